@@ -0,0 +1,148 @@
+"""
+application/admission.py
+
+Admission control for text searches.
+
+At most ``max_concurrent`` searches (encode plus vector search) run at once;
+further requests wait in a bounded FIFO queue. A request is shed instead of
+queued when the queue is full or when the expected wait (queue position times
+the recent search time) already exceeds the wait budget, and a queued request
+is shed when it has waited ``max_wait`` seconds. Shedding early keeps latency
+of admitted requests stable under a spike instead of letting every request
+time out behind the encoder.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Optional
+
+from infrastructure.metrics import (
+    admission_in_flight, admission_queue_depth, admission_queue_wait, admission_shed_total,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed; retry_after is a hint in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Request shed: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, deadline-aware wait queue."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_queue: int = 64,
+        max_wait_seconds: float = 1.0,
+        retry_after_seconds: int = 1,
+    ):
+        """
+        Args:
+            max_concurrent (int): Searches running at once.
+            max_queue (int): Requests allowed to wait for a slot; 0 sheds as
+                soon as every slot is busy.
+            max_wait_seconds (float): Longest a request may wait for a slot.
+            retry_after_seconds (int): Retry-After hint given to shed requests.
+        """
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max(max_queue, 0)
+        self.max_wait = max_wait_seconds
+        self.retry_after = retry_after_seconds
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Exponentially weighted moving average of admitted search time.
+        self._service_time: Optional[float] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Hold a search slot for the enclosed block.
+
+        Raises:
+            OverloadedError: If the request was shed.
+        """
+        await self._acquire()
+        admission_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._service_time = (
+                elapsed if self._service_time is None
+                else 0.9 * self._service_time + 0.1 * elapsed
+            )
+            admission_in_flight.dec()
+            self._release()
+
+    def expected_wait(self) -> float:
+        """Seconds a request joining the queue now is expected to wait."""
+        if self._service_time is None:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrent * self._service_time
+
+    async def _acquire(self) -> None:
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            admission_queue_wait.observe(0.0)
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+        if self.expected_wait() > self.max_wait:
+            self._shed("expected_wait")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        admission_queue_depth.inc()
+        queued = time.perf_counter()
+        try:
+            # The slot is handed over by _release resolving the future.
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            if not (future.done() and not future.cancelled()):
+                self._discard(future)
+                self._shed("wait_timeout")
+            # Before Python 3.12, wait_for can time out after _release has
+            # already handed this request a slot; keep it rather than leak it.
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Cancelled just after being handed a slot; pass it on.
+                self._release()
+            else:
+                self._discard(future)
+            raise
+        admission_queue_wait.observe(time.perf_counter() - queued)
+
+    def _release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            admission_queue_depth.dec()
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _discard(self, future: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            return
+        admission_queue_depth.dec()
+
+    def _shed(self, reason: str) -> None:
+        admission_shed_total.labels(reason=reason).inc()
+        logger.debug("Shed a search request: %s.", reason)
+        raise OverloadedError(reason, self.retry_after)
@@ -0,0 +1,73 @@
+"""
+application/batch_search.py
+
+Runs many text searches together: queries are encoded in batched forward
+passes and their vector searches are sent in one multi-search round trip per
+chunk, with results yielded as each chunk completes.
+"""
+
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSearchService:
+    """Streams top results for a list of text queries."""
+
+    def __init__(
+        self,
+        encode_queries: Callable[[List[str]], Awaitable[List[object]]],
+        search_client,
+        mode: str,
+        chunk_size: int = 64,
+    ):
+        """
+        Args:
+            encode_queries: Coroutine function returning one embedding per query
+                (empty for queries that failed to encode).
+            search_client: Backend exposing msearch_embeddings.
+            mode (str): Search mode passed to the backend.
+            chunk_size (int): Queries encoded and searched together.
+        """
+        self.encode_queries = encode_queries
+        self.search_client = search_client
+        self.mode = mode
+        self.chunk_size = chunk_size
+
+    async def search(
+        self, queries: List[str], size: int, num_candidates: Optional[int] = None
+    ) -> AsyncIterator[dict]:
+        """
+        Yield one result entry per query, in input order.
+
+        Args:
+            queries (List[str]): Query strings.
+            size (int): Results per query.
+            num_candidates (Optional[int]): Approximate candidates per shard.
+
+        Yields:
+            dict: {"query", "results"} and, when the query could not be
+            encoded, an "error" message.
+        """
+        for start in range(0, len(queries), self.chunk_size):
+            chunk = queries[start:start + self.chunk_size]
+            embeddings = await self.encode_queries(chunk)
+            searchable = [i for i, embedding in enumerate(embeddings) if len(embedding) > 0]
+            found = await self.search_client.msearch_embeddings(
+                [embeddings[i] for i in searchable],
+                top_k=size,
+                num_candidates=num_candidates,
+                mode=self.mode,
+            ) if searchable else []
+            results_by_position = dict(zip(searchable, found))
+            for position, query in enumerate(chunk):
+                if position not in results_by_position:
+                    yield {
+                        "query": query,
+                        "results": [],
+                        "error": "Failed to generate embedding for the query.",
+                    }
+                    continue
+                yield {"query": query, "results": results_by_position[position]}
+            logger.debug("Batch search served %d queries.", len(chunk))
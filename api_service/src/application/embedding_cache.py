@@ -0,0 +1,147 @@
+"""
+application/embedding_cache.py
+
+Bounded LRU/TTL cache for query text embeddings with an optional Redis tier
+shared across API replicas.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from infrastructure.metrics import (
+    embedding_cache_evictions_total,
+    embedding_cache_hits_total,
+    embedding_cache_misses_total,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query string for cache lookups.
+
+    CLIP's tokenizer lowercases text and collapses whitespace, so queries that
+    differ only in case or spacing produce identical embeddings.
+    """
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache mapping (model, normalized query) to a float32 vector.
+
+    The local tier is an LRU bounded by ``max_entries`` with an optional TTL.
+    The Redis tier stores raw float32 bytes so every replica benefits from the
+    others' warm entries; Redis errors degrade to cache misses.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        redis_client=None,
+    ):
+        """
+        Args:
+            model_name (str): Embedding model, part of every key.
+            max_entries (int): Local LRU capacity; 0 disables the local tier.
+            ttl_seconds (Optional[float]): Entry lifetime in both tiers; None or 0
+                keeps entries until evicted.
+            redis_client: Optional client exposing ``get(key)``/``set(key, value, ttl)``,
+                ttl in seconds.
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds or None
+        self.redis_client = redis_client
+        self._entries: "OrderedDict[str, Tuple[Optional[float], np.ndarray]]" = OrderedDict()
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"emb:{self.model_name}:{digest}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding for a query.
+
+        Args:
+            text (str): The raw query string.
+
+        Returns:
+            Optional[np.ndarray]: The cached float32 vector, or None on a miss.
+        """
+        key = self._key(text)
+        vector = self._get_local(key)
+        if vector is not None:
+            embedding_cache_hits_total.labels(tier="local").inc()
+            return vector
+        embedding_cache_misses_total.labels(tier="local").inc()
+
+        if self.redis_client is None:
+            return None
+        try:
+            raw = await self.redis_client.get(key)
+        except Exception as e:
+            logger.warning("Redis embedding cache lookup failed: %s", e)
+            raw = None
+        if raw is None:
+            embedding_cache_misses_total.labels(tier="redis").inc()
+            return None
+        embedding_cache_hits_total.labels(tier="redis").inc()
+        vector = np.frombuffer(raw, dtype=np.float32)
+        self._put_local(key, vector)
+        return vector
+
+    async def put(self, text: str, embedding) -> np.ndarray:
+        """
+        Store the embedding for a query in every tier.
+
+        Args:
+            text (str): The raw query string.
+            embedding: The embedding vector (list or array).
+
+        Returns:
+            np.ndarray: The stored read-only float32 vector.
+        """
+        key = self._key(text)
+        vector = np.array(embedding, dtype=np.float32)
+        vector.flags.writeable = False
+        self._put_local(key, vector)
+        if self.redis_client is not None:
+            try:
+                await self.redis_client.set(key, vector.tobytes(), ttl=self.ttl_seconds)
+            except Exception as e:
+                logger.warning("Redis embedding cache write failed: %s", e)
+        return vector
+
+    def _get_local(self, key: str) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            embedding_cache_evictions_total.labels(reason="expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _put_local(self, key: str, vector: np.ndarray) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (expires_at, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            embedding_cache_evictions_total.labels(reason="size").inc()
@@ -0,0 +1,60 @@
+"""
+application/encoder_factory.py
+
+Builds the text EmbeddingService for the configured inference backend, so the
+API process and process-pool workers load the same kind of encoder.
+"""
+
+from domain.embedding_service import EmbeddingService
+from infrastructure.config import settings
+from infrastructure.quantization import TORCH_QUANTIZATION_MODES
+
+
+def create_text_encoder(model_name: str, artifact_dir: str = "") -> EmbeddingService:
+    """
+    Build a text-only EmbeddingService.
+
+    Args:
+        model_name (str): CLIP model name.
+        artifact_dir (str): Model artifact cache for the torch backend; empty
+            disables it.
+
+    Returns:
+        EmbeddingService: Backed by ONNX Runtime when EMBEDDING_BACKEND is
+        "onnx", otherwise by the PyTorch text tower (int8 when
+        EMBEDDING_QUANTIZATION is "dynamic"). Texts are tokenized with the
+        cached ClipTokenizer when TOKENIZER_CACHE_ENABLED is set.
+
+    Raises:
+        ValueError: If EMBEDDING_QUANTIZATION is not "none" or "dynamic".
+    """
+    if settings.EMBEDDING_QUANTIZATION not in TORCH_QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported EMBEDDING_QUANTIZATION: {settings.EMBEDDING_QUANTIZATION}")
+    tokenizer = None
+    if settings.TOKENIZER_CACHE_ENABLED:
+        from infrastructure.text_tokenizer import ClipTokenizer
+
+        tokenizer = ClipTokenizer(
+            cache_size=settings.TOKENIZER_CACHE_SIZE,
+            word_cache_size=settings.TOKENIZER_WORD_CACHE_SIZE,
+        )
+    if settings.EMBEDDING_BACKEND == "onnx":
+        from infrastructure.onnx_encoder import OnnxEncoder
+
+        encoder = OnnxEncoder(
+            settings.ONNX_TEXT_MODEL_PATH,
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+            inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+            optimization_level=settings.ONNX_GRAPH_OPTIMIZATION,
+        )
+        return EmbeddingService(model_name, onnx_encoder=encoder, tokenizer=tokenizer)
+    from infrastructure.model_artifacts import ModelArtifactCache
+
+    artifacts = ModelArtifactCache(artifact_dir) if artifact_dir else None
+    return EmbeddingService(
+        model_name,
+        text_only=True,
+        artifacts=artifacts,
+        quantize=settings.EMBEDDING_QUANTIZATION == "dynamic",
+        tokenizer=tokenizer,
+    )
@@ -0,0 +1,169 @@
+"""
+application/inference_executor.py
+
+Runs CLIP text encoding on a thread or process pool so torch forward passes
+never block the event loop.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from infrastructure.metrics import encode_inference_latency, encode_queue_wait, record_stage
+from infrastructure.request_timing import collect_stages
+
+logger = logging.getLogger(__name__)
+
+# Model instance owned by a process-pool worker, set by _init_worker.
+_worker_service = None
+
+
+def _init_worker(model_name: str, artifact_dir: str = "") -> None:
+    """Load a private EmbeddingService in a process-pool worker."""
+    global _worker_service
+    from application.encoder_factory import create_text_encoder
+
+    _worker_service = create_text_encoder(model_name, artifact_dir)
+
+
+def _worker_encode_text(text: str) -> list:
+    return _worker_service.generate_embedding_from_text(text)
+
+
+def _worker_encode_texts(texts: List[str]) -> List[list]:
+    return _worker_service.generate_embeddings_from_texts(texts)
+
+
+def _timed_call(fn: Callable, *args) -> Tuple[object, float, float, Dict[str, float]]:
+    """
+    Run fn(*args) and report when it started and finished, plus the stage
+    timings it recorded (the tokenize time of an encode).
+
+    time.monotonic is system-wide on Linux, so timestamps taken in a pool
+    worker process are comparable with ones taken in the event loop.
+    """
+    with collect_stages() as stages:
+        started = time.monotonic()
+        result = fn(*args)
+        finished = time.monotonic()
+    return result, started, finished, stages
+
+
+class InferenceExecutor:
+    """
+    Async facade over a bounded pool of CLIP text encoders.
+
+    At most ``max_concurrency`` encodes are submitted to the pool at once; the
+    remaining callers wait on a semaphore without occupying a worker. Queue
+    wait and inference time are exported as separate histograms.
+    """
+
+    def __init__(
+        self,
+        embedding_service=None,
+        model_name: str = "ViT-B/32",
+        kind: str = "thread",
+        max_workers: int = 1,
+        max_concurrency: int = 4,
+        artifact_dir: str = "",
+    ):
+        """
+        Args:
+            embedding_service: Shared EmbeddingService used by thread workers.
+            model_name (str): CLIP model each process worker loads.
+            kind (str): "thread" or "process".
+            max_workers (int): Pool size.
+            max_concurrency (int): Maximum encodes submitted to the pool at once.
+            artifact_dir (str): Model artifact cache process workers load from.
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported inference executor: {kind}")
+        if kind == "thread" and embedding_service is None:
+            raise ValueError("Thread executor requires an embedding service")
+        self.embedding_service = embedding_service
+        self.model_name = model_name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max(max_concurrency, 1)
+        self.artifact_dir = artifact_dir
+        # The pool and semaphore are created lazily so the executor can be
+        # built at import time and still be safe to use after a fork.
+        self._pool: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.artifact_dir),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="clip-inference"
+                )
+            logger.info(
+                "Started %s inference pool with %d workers.", self.kind, self.max_workers
+            )
+        return self._pool
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        async with self._get_semaphore():
+            result, started, finished, stages = await loop.run_in_executor(
+                self._get_pool(), _timed_call, fn, *args
+            )
+        queue_wait = max(started - submitted, 0.0)
+        encode_queue_wait.observe(queue_wait)
+        encode_inference_latency.observe(finished - started)
+        tokenize = stages.get("tokenize", 0.0)
+        record_stage("encode_queue", queue_wait)
+        record_stage("tokenize", tokenize)
+        record_stage("encode", max(finished - started - tokenize, 0.0))
+        return result
+
+    async def encode_text(self, text: str) -> list:
+        """
+        Generate the embedding for a text query without blocking the event loop.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            list: The embedding vector, or an empty list if encoding failed.
+        """
+        if self.kind == "process":
+            return await self._run(_worker_encode_text, text)
+        return await self._run(self.embedding_service.generate_embedding_from_text, text)
+
+    async def encode_texts(self, texts: List[str]) -> List[list]:
+        """
+        Generate embeddings for a batch of texts in a single forward pass.
+
+        Args:
+            texts (List[str]): The input texts.
+
+        Returns:
+            List[list]: One embedding per text; empty lists if encoding failed.
+        """
+        if self.kind == "process":
+            return await self._run(_worker_encode_texts, texts)
+        return await self._run(self.embedding_service.generate_embeddings_from_texts, texts)
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running encodes to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,100 @@
+"""
+application/micro_batcher.py
+
+Collects concurrent text queries into small batches so CLIP encodes them in
+one forward pass instead of many batches of one.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from infrastructure.metrics import encode_batch_size, encode_batch_wait
+from infrastructure.request_timing import collect_stages, current_stages, merge_stages
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batcher in front of an InferenceExecutor.
+
+    A batch is dispatched when it reaches ``max_batch_size`` queries or when
+    its oldest query has waited ``max_wait_ms``, whichever comes first.
+    Identical texts within a batch are encoded once.
+    """
+
+    def __init__(self, executor, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Args:
+            executor: Object exposing ``async encode_texts(texts)``.
+            max_batch_size (int): Maximum queries per forward pass.
+            max_wait_ms (float): Longest time a query waits for batch-mates.
+        """
+        self.executor = executor
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: List[Tuple[str, asyncio.Future, float, Optional[Dict[str, float]]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def encode_text(self, text: str) -> list:
+        """
+        Queue a text for the next batch and wait for its embedding.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            list: The embedding vector, or an empty list if encoding failed.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.monotonic(), current_stages()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(
+        self, batch: List[Tuple[str, asyncio.Future, float, Optional[Dict[str, float]]]]
+    ) -> None:
+        dispatched = time.monotonic()
+        for _, _, enqueued, stages in batch:
+            encode_batch_wait.observe(dispatched - enqueued)
+            merge_stages(stages, {"encode_queue": dispatched - enqueued})
+        texts = list(dict.fromkeys(text for text, _, _, _ in batch))
+        encode_batch_size.observe(len(texts))
+
+        # The batch runs outside the queries' requests; its stage timings are
+        # copied to every query's request once it finishes.
+        with collect_stages() as batch_stages:
+            try:
+                embeddings = await self.executor.encode_texts(texts)
+            except Exception as e:
+                logger.exception("Batch of %d texts failed to encode: %s", len(texts), e)
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                for _, _, _, stages in batch:
+                    merge_stages(stages, batch_stages)
+
+        by_text = dict(zip(texts, embeddings))
+        for text, future, _, _ in batch:
+            if not future.done():
+                future.set_result(by_text.get(text, []))
@@ -0,0 +1,88 @@
+"""
+application/model_loader.py
+
+Loads and warms up the text encoder off the request path, so the server can
+accept connections (and answer /health) while the model is still loading,
+and reports when it is ready to serve queries.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+from infrastructure.metrics import startup_phase_duration
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReadyError(Exception):
+    """Raised when an encode is requested before the model has loaded."""
+
+
+class BackgroundModelLoader:
+    """
+    Owns the EmbeddingService once it is loaded and warmed up.
+
+    Exposes the EmbeddingService encode methods so it can be handed to the
+    inference executor before the model exists.
+    """
+
+    def __init__(self, load: Callable[[], object]):
+        """
+        Args:
+            load: Builds the EmbeddingService; it is warmed up afterwards.
+        """
+        self._load = load
+        self.service = None
+        self.error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the model is loaded and has run a forward pass."""
+        return self._ready.is_set()
+
+    def load(self) -> None:
+        """Load and warm up the model in the calling thread."""
+        if self.ready:
+            return
+        started = time.perf_counter()
+        service = self._load()
+        loaded = time.perf_counter()
+        service.warm_up()
+        warmed = time.perf_counter()
+        startup_phase_duration.labels(phase="model_load").set(loaded - started)
+        startup_phase_duration.labels(phase="warmup").set(warmed - loaded)
+        self.service = service
+        self._ready.set()
+        logger.info(
+            "Model ready: loaded in %.2fs, warmed up in %.2fs.",
+            loaded - started, warmed - loaded,
+        )
+
+    def start(self) -> None:
+        """Load the model on a background thread unless it is loaded or loading."""
+        if self.ready or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            self.error = e
+            logger.exception("Failed to load the embedding model: %s", e)
+
+    def _require(self):
+        if self.service is None:
+            raise ModelNotReadyError("The embedding model is still loading.")
+        return self.service
+
+    def generate_embedding_from_text(self, text: str) -> list:
+        return self._require().generate_embedding_from_text(text)
+
+    def generate_embeddings_from_texts(self, texts: List[str]) -> List[list]:
+        return self._require().generate_embeddings_from_texts(texts)
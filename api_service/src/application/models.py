@@ -4,8 +4,12 @@ application/models.py
 Data models for the API responses.
 """
 
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Optional
+
+# Longest accepted query string. CLIP reads only the first 77 tokens (longer
+# queries are truncated), so this just bounds tokenizer work and cache keys.
+MAX_QUERY_LENGTH = 1000
 
 class SearchResult(BaseModel):
     image_id: int
@@ -15,3 +19,16 @@ class SearchResult(BaseModel):
 class FullSearchResponse(BaseModel):
     query: str
     results: List[SearchResult]
+    # Opaque token for the next page; None when the results are exhausted.
+    next_cursor: Optional[str] = None
+
+class SimilarImagesResponse(BaseModel):
+    image_id: int
+    results: List[SearchResult]
+
+class BatchSearchRequest(BaseModel):
+    queries: List[Annotated[str, Field(min_length=1, max_length=MAX_QUERY_LENGTH)]] = Field(
+        ..., min_length=1
+    )
+    size: int = Field(20, ge=1, le=100)
+    num_candidates: Optional[int] = Field(None, ge=1, le=10000)
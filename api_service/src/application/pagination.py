@@ -1,10 +1,14 @@
 """
 application/pagination.py
 
-Pagination utility functions for slicing query results.
+Pagination helpers: slicing query results and encoding opaque cursors.
 """
 
-from typing import List
+import base64
+import binascii
+import hashlib
+import json
+from typing import List, Optional
 
 def paginate_results(results: List[dict], page: int, size: int) -> List[dict]:
     """
@@ -21,3 +25,55 @@ def paginate_results(results: List[dict], page: int, size: int) -> List[dict]:
     start_index = (page - 1) * size
     end_index = start_index + size
     return results[start_index:end_index]
+
+
+def encode_cursor(state: Optional[dict]) -> Optional[str]:
+    """
+    Encode continuation state into an opaque, URL-safe cursor token.
+
+    Args:
+        state (Optional[dict]): JSON-serializable state, or None.
+
+    Returns:
+        Optional[str]: The cursor token, or None when there is no next page.
+    """
+    if state is None:
+        return None
+    raw = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor token produced by encode_cursor.
+
+    Args:
+        cursor (str): The cursor token.
+
+    Returns:
+        dict: The continuation state.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(state, dict):
+        raise ValueError("Malformed cursor")
+    return state
+
+
+def query_fingerprint(query_string: str) -> str:
+    """
+    Short digest of a query, stored in its cursors.
+
+    Args:
+        query_string (str): The text query.
+
+    Returns:
+        str: A hex digest of the query string.
+    """
+    return hashlib.sha1(query_string.encode("utf-8")).hexdigest()[:16]
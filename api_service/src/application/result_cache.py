@@ -0,0 +1,130 @@
+"""
+application/result_cache.py
+
+Memory-bounded cache of ranked search results, so paging through a query
+slices cached ids instead of running the vector search again.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+import numpy as np
+
+from application.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-entry bookkeeping cost on top of the id/score arrays.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+class RankedResultCache:
+    """
+    LRU cache of ranked ``(image_id, score)`` lists keyed by normalized query.
+
+    Ids and scores are stored as int64/float32 arrays, so a 1000-result entry
+    costs about 12 KB. Entries expire after ``ttl_seconds`` and are ignored
+    once the index generation they were computed at is no longer current.
+    """
+
+    def __init__(self, max_bytes: int, max_results: int, ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            max_bytes (int): Memory budget for all cached entries.
+            max_results (int): Number of ranked hits kept per query.
+            ttl_seconds (Optional[float]): Entry lifetime; None or 0 disables expiry.
+        """
+        self.max_bytes = max_bytes
+        self.max_results = max_results
+        self.ttl_seconds = ttl_seconds or None
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, query: str, mode: str, generation: int
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the cached ranking for a query computed at ``generation``.
+
+        Args:
+            query (str): The raw query string.
+            mode (str): Search mode the ranking was produced with.
+            generation (int): Current index generation.
+
+        Returns:
+            Optional[Tuple[np.ndarray, np.ndarray]]: Ids and scores, or None.
+        """
+        key = (normalize_query(query), mode)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry_generation, expires_at, ids, scores = entry
+        if entry_generation != generation or (
+            expires_at is not None and expires_at <= time.monotonic()
+        ):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return ids, scores
+
+    def put(
+        self, query: str, mode: str, generation: int, ids, scores
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Store a ranking, truncated to ``max_results`` hits.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The stored ids and scores.
+        """
+        key = (normalize_query(query), mode)
+        ids = np.asarray(ids[: self.max_results], dtype=np.int64)
+        scores = np.asarray(scores[: self.max_results], dtype=np.float32)
+        if key in self._entries:
+            self._remove(key)
+        size = ids.nbytes + scores.nbytes + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return ids, scores
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (generation, expires_at, ids, scores)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        return ids, scores
+
+    def _remove(self, key) -> None:
+        _, _, ids, scores = self._entries.pop(key)
+        self.current_bytes -= ids.nbytes + scores.nbytes + _ENTRY_OVERHEAD_BYTES
+
+
+class IndexGenerationTracker:
+    """
+    Caches the index generation, refreshing it at most every ``refresh_seconds``.
+
+    Newly indexed images therefore show up in cached rankings within one
+    refresh interval, without a count request per search.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[int]], refresh_seconds: float = 30.0):
+        self.fetch = fetch
+        self.refresh_seconds = refresh_seconds
+        self._generation: Optional[int] = None
+        self._fetched_at = 0.0
+
+    async def current(self) -> Optional[int]:
+        """
+        Return the latest known generation, or None if it cannot be determined.
+        """
+        now = time.monotonic()
+        if self._generation is None or now - self._fetched_at >= self.refresh_seconds:
+            try:
+                self._generation = await self.fetch()
+                self._fetched_at = now
+            except Exception as e:
+                logger.warning("Failed to refresh index generation: %s", e)
+                return None
+        return self._generation
@@ -0,0 +1,166 @@
+"""
+application/search_effort.py
+
+Adaptive search effort.
+
+Vector search cost is set by a few knobs: kNN num_candidates, IVF probes, PQ
+and two-stage re-rank depth. SearchEffortController watches the p95 latency of
+recent vector searches and how many are running, and steps down through a
+list of effort levels (fractions of the configured knobs) while either is over
+its threshold. It steps back up once latency is well inside the budget again.
+Changes are rate-limited, and the latency window is reset after each change,
+so every decision is based on searches run at the current level.
+"""
+
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Sequence
+
+import numpy as np
+
+from infrastructure.metrics import search_effort_level
+
+logger = logging.getLogger(__name__)
+
+
+def parse_effort(value: object) -> Optional[float]:
+    """
+    Validate an effort read back from a cursor.
+
+    Args:
+        value (object): The decoded "effort" value.
+
+    Returns:
+        Optional[float]: The effort clamped to at most 1.0; None at full effort.
+
+    Raises:
+        ValueError: If the value is not a positive number.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise ValueError("Invalid search effort")
+    return None if value >= 1.0 else float(value)
+
+
+def in_flight_threshold(max_in_flight: int, admission_limit: Optional[int]) -> int:
+    """
+    Concurrent searches above which effort is lowered.
+
+    With admission control on, searches are counted inside it, so at most
+    ``admission_limit`` can ever run at once.
+
+    Args:
+        max_in_flight (int): Configured threshold; 0 derives one.
+        admission_limit (Optional[int]): Admission concurrency, or None when
+            admission control is off.
+
+    Returns:
+        int: Three quarters of the admission limit when 0 is configured and
+        admission is on, 32 when it is off, otherwise the configured value.
+
+    Raises:
+        ValueError: If the configured threshold is not below the admission limit.
+    """
+    if max_in_flight <= 0:
+        return 32 if admission_limit is None else max(1, admission_limit * 3 // 4)
+    if admission_limit is not None and max_in_flight >= admission_limit:
+        raise ValueError(
+            f"SEARCH_EFFORT_MAX_IN_FLIGHT={max_in_flight} can never be exceeded with "
+            f"ADMISSION_MAX_CONCURRENT={admission_limit}; set it lower or to 0"
+        )
+    return max_in_flight
+
+
+class SearchEffortController:
+    """Chooses the effort of the next vector search from recent load."""
+
+    def __init__(
+        self,
+        latency_budget_seconds: float = 0.25,
+        max_in_flight: int = 32,
+        levels: Sequence[float] = (1.0, 0.5, 0.25),
+        window: int = 200,
+        min_samples: int = 10,
+        adjust_interval_seconds: float = 1.0,
+        recover_ratio: float = 0.5,
+    ):
+        """
+        Args:
+            latency_budget_seconds (float): p95 vector search latency target.
+            max_in_flight (int): Concurrent vector searches above which effort
+                is lowered regardless of latency.
+            levels (Sequence[float]): Effort fractions, full effort first.
+            window (int): Recent searches the p95 is computed over.
+            min_samples (int): Searches needed before latency is judged.
+            adjust_interval_seconds (float): Minimum time between two changes.
+            recover_ratio (float): Effort is raised again once the p95 is below
+                this fraction of the budget.
+        """
+        if not levels:
+            raise ValueError("At least one effort level is required")
+        self.latency_budget = latency_budget_seconds
+        self.max_in_flight = max(max_in_flight, 1)
+        self.levels = list(levels)
+        self.min_samples = min_samples
+        self.adjust_interval = adjust_interval_seconds
+        self.recover_ratio = recover_ratio
+        self.level = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._last_adjusted = float("-inf")
+        search_effort_level.set(0)
+
+    @property
+    def effort(self) -> Optional[float]:
+        """Effort fraction for the next search; None at full effort."""
+        effort = self.levels[self.level]
+        return None if effort >= 1.0 else effort
+
+    def p95(self) -> Optional[float]:
+        """p95 of the recent search latencies, or None with too few samples."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        return float(np.percentile(self._latencies, 95))
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Count the enclosed vector search as in flight and record its latency."""
+        self.in_flight += 1
+        self._adjust()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._latencies.append(time.perf_counter() - started)
+            self._adjust()
+
+    def _adjust(self) -> None:
+        now = time.monotonic()
+        if now - self._last_adjusted < self.adjust_interval:
+            return
+        p95 = self.p95()
+        if self.in_flight > self.max_in_flight or (p95 is not None and p95 > self.latency_budget):
+            if self.level < len(self.levels) - 1:
+                self._set_level(self.level + 1, now, p95)
+        elif (
+            self.level > 0
+            and p95 is not None
+            and p95 < self.latency_budget * self.recover_ratio
+            and self.in_flight <= self.max_in_flight // 2
+        ):
+            self._set_level(self.level - 1, now, p95)
+
+    def _set_level(self, level: int, now: float, p95: Optional[float]) -> None:
+        logger.info(
+            "Search effort %s to %.2f (p95 %s, %d in flight).",
+            "lowered" if level > self.level else "raised", self.levels[level],
+            "n/a" if p95 is None else f"{p95 * 1000:.1f}ms", self.in_flight,
+        )
+        self.level = level
+        self._latencies.clear()
+        self._last_adjusted = now
+        search_effort_level.set(level)
@@ -0,0 +1,112 @@
+"""
+application/search_filters.py
+
+Metadata filters for text searches.
+
+The embedding service indexes each image's source domain, download time and
+dimensions next to its embedding. A search restricted on them is filtered
+inside the vector search, so only matching documents are scored. Filters are
+a plain JSON-serializable dict, which lets them travel in a pagination cursor
+and key the ranked result cache. Filters read back from a cursor come from the
+client, so parse_filters rebuilds them instead of passing them to the search.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional
+
+FILTER_KEYS = {"domains", "downloaded_after", "downloaded_before", "min_width", "min_height"}
+
+
+def normalize_domain(domain: str) -> str:
+    """Lower-case a domain and drop a leading "www.", as the indexer does."""
+    domain = domain.strip().lower()
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _as_utc(value: datetime) -> datetime:
+    """The same instant as an aware UTC time; naive times are UTC, as in Elasticsearch."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def build_filters(
+    domains: Optional[List[str]] = None,
+    downloaded_after: Optional[datetime] = None,
+    downloaded_before: Optional[datetime] = None,
+    min_width: Optional[int] = None,
+    min_height: Optional[int] = None,
+) -> Optional[dict]:
+    """
+    Collect the given metadata restrictions into a filters dict.
+
+    Args:
+        domains (Optional[List[str]]): Source domains to search in.
+        downloaded_after (Optional[datetime]): Earliest download time (inclusive).
+        downloaded_before (Optional[datetime]): Latest download time (exclusive).
+        min_width (Optional[int]): Minimum image width in pixels.
+        min_height (Optional[int]): Minimum image height in pixels.
+
+    Returns:
+        Optional[dict]: The filters, or None when nothing is restricted.
+
+    Raises:
+        ValueError: If the download time range is empty.
+    """
+    if (
+        downloaded_after and downloaded_before
+        and _as_utc(downloaded_after) >= _as_utc(downloaded_before)
+    ):
+        raise ValueError("downloaded_after must be earlier than downloaded_before")
+    filters = {}
+    if domains:
+        filters["domains"] = sorted({normalize_domain(domain) for domain in domains})
+    if downloaded_after:
+        filters["downloaded_after"] = downloaded_after.isoformat()
+    if downloaded_before:
+        filters["downloaded_before"] = downloaded_before.isoformat()
+    if min_width:
+        filters["min_width"] = min_width
+    if min_height:
+        filters["min_height"] = min_height
+    return filters or None
+
+
+def parse_filters(raw: object) -> Optional[dict]:
+    """
+    Rebuild filters taken from a cursor through build_filters.
+
+    Only what build_filters produces is accepted: a list of domain strings,
+    ISO 8601 times and positive integer sizes.
+
+    Args:
+        raw (object): The decoded "filters" value of a cursor.
+
+    Returns:
+        Optional[dict]: The filters, or None when nothing is restricted.
+
+    Raises:
+        ValueError: If the value is not a valid filters dict.
+    """
+    if raw is None:
+        return None
+    if not isinstance(raw, dict) or not set(raw) <= FILTER_KEYS:
+        raise ValueError("Invalid filters")
+    domains = raw.get("domains")
+    if domains is not None and (
+        not isinstance(domains, list) or not all(isinstance(domain, str) for domain in domains)
+    ):
+        raise ValueError("Invalid domain filter")
+    times = {}
+    for key in ("downloaded_after", "downloaded_before"):
+        value = raw.get(key)
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"Invalid {key} filter")
+        times[key] = datetime.fromisoformat(value) if value is not None else None
+    sizes = {}
+    for key in ("min_width", "min_height"):
+        value = raw.get(key)
+        if value is not None and (type(value) is not int or value < 1):
+            raise ValueError(f"Invalid {key} filter")
+        sizes[key] = value
+    return build_filters(domains, **times, **sizes)
@@ -0,0 +1,333 @@
+"""
+application/search_service.py
+
+Orchestrates a text search: query encoding, ranked-result caching and
+Elasticsearch paging.
+"""
+
+import contextlib
+import json
+import logging
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from application.pagination import query_fingerprint
+from application.search_effort import parse_effort
+from application.search_filters import parse_filters
+from infrastructure.metrics import result_cache_requests_total, timed_stage
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingFailedError(RuntimeError):
+    """Raised when the query text could not be encoded."""
+
+
+class InvalidSearchError(ValueError):
+    """Raised when a page cannot be served with the requested options."""
+
+
+class SearchService:
+    """
+    Serves one page of text search results.
+
+    When a ranked result cache is configured, the first request for a query
+    ranks the top ``max_results`` ids once; later offset-based pages within that
+    range slice the cached ranking and only load the page's documents.
+    """
+
+    def __init__(
+        self,
+        encode_query: Callable[[str], Awaitable[object]],
+        search_client,
+        mode: str,
+        result_cache=None,
+        generation_tracker=None,
+        single_flight=None,
+        admission=None,
+        effort_controller=None,
+        max_ranked_results: Optional[int] = None,
+    ):
+        """
+        Args:
+            encode_query: Coroutine function returning the query embedding.
+            search_client: Backend exposing search_page, search_ranked_ids and
+                fetch_by_image_ids.
+            mode (str): Default search mode ("knn" or "exact").
+            result_cache: Optional RankedResultCache.
+            generation_tracker: IndexGenerationTracker required with result_cache.
+            single_flight: Optional SingleFlight; concurrent identical requests
+                then share one encode and one search.
+            admission: Optional AdmissionController bounding concurrent
+                searches; a coalesced search takes a single slot.
+            effort_controller: Optional SearchEffortController; vector searches
+                then run at its current effort with its latency budget as
+                timeout. A continuation keeps the effort of its first page.
+            max_ranked_results (Optional[int]): Deepest rank kNN and two-stage
+                pages may reach (the backend's candidate limit); None is
+                unbounded.
+        """
+        self.encode_query = encode_query
+        self.search_client = search_client
+        self.mode = mode
+        self.result_cache = result_cache
+        self.generation_tracker = generation_tracker
+        self.single_flight = single_flight
+        self.admission = admission
+        self.effort_controller = effort_controller
+        self.max_ranked_results = max_ranked_results
+
+    def modes(self) -> Tuple[str, ...]:
+        """Search modes requests can use: the default, and two-stage where supported."""
+        if self.mode != "two_stage" and self.search_client.supports_two_stage:
+            return (self.mode, "two_stage")
+        return (self.mode,)
+
+    def parse_cursor_state(self, state: dict, query_string: str) -> dict:
+        """
+        Validate the continuation state decoded from a client's cursor.
+
+        Cursors are not signed, so every field is checked like a request
+        parameter: the cursor must continue the same query, in a mode a request
+        could have chosen, with search options inside the request limits.
+
+        Args:
+            state (dict): State from decode_cursor.
+            query_string (str): The query the cursor is presented with.
+
+        Returns:
+            dict: The state, with filters rebuilt and effort clamped.
+
+        Raises:
+            ValueError: If the cursor belongs to another query or was altered.
+        """
+        if state.get("query") != query_fingerprint(query_string):
+            raise ValueError("Cursor of another query")
+        offset = state.get("offset", 0)
+        if type(offset) is not int or offset < 0:
+            raise ValueError("Invalid cursor offset")
+        if state.get("mode") not in self.modes():
+            raise ValueError("Invalid cursor mode")
+        limit = self.max_ranked_results
+        for key in ("num_candidates", "rerank_depth"):
+            value = state.get(key)
+            if value is None:
+                continue
+            if type(value) is not int or value < 1 or (limit is not None and value > limit):
+                raise ValueError(f"Invalid cursor {key}")
+        if not isinstance(state.get("pit_id", ""), str):
+            raise ValueError("Invalid cursor point-in-time")
+        if not isinstance(state.get("search_after", []), list):
+            raise ValueError("Invalid cursor sort values")
+        if "filters" in state:
+            state["filters"] = parse_filters(state["filters"])
+        if "effort" in state:
+            state["effort"] = parse_effort(state["effort"])
+        return state
+
+    async def _embed(self, query_string: str):
+        embedding = await self.encode_query(query_string)
+        if len(embedding) == 0:
+            raise EmbeddingFailedError(query_string)
+        return embedding
+
+    def _track(self):
+        if self.effort_controller is None:
+            return contextlib.nullcontext()
+        return self.effort_controller.track()
+
+    def _timeout(self) -> Optional[float]:
+        if self.effort_controller is None:
+            return None
+        return self.effort_controller.latency_budget
+
+    async def search(
+        self,
+        query_string: str,
+        size: int,
+        state: dict,
+        num_candidates: Optional[int] = None,
+        rerank_depth: Optional[int] = None,
+        filters: Optional[dict] = None,
+    ) -> Tuple[List[dict], Optional[dict]]:
+        """
+        Return one page of results and the state for the next page.
+
+        Args:
+            query_string (str): The text query.
+            size (int): Page size.
+            state (dict): Continuation state (offset and, for cursors taken from
+                a point-in-time search, pit_id/search_after/mode).
+            num_candidates (Optional[int]): Approximate candidates per shard for
+                this request.
+            rerank_depth (Optional[int]): Re-rank this many candidates exactly;
+                switches the request to two-stage mode.
+            filters (Optional[dict]): Metadata filters from build_filters,
+                applied inside the vector search. Like the search options, a
+                cursor keeps the filters of its first page.
+
+        Returns:
+            Tuple[List[dict], Optional[dict]]: Page results and next-page state.
+
+        Raises:
+            EmbeddingFailedError: If the query could not be encoded.
+            InvalidSearchError: If the mode is not available or a kNN page
+                lies beyond max_ranked_results.
+            OverloadedError: If admission control shed the request.
+        """
+        if self.single_flight is None:
+            return await self._admitted_search(
+                query_string, size, state, num_candidates, rerank_depth, filters
+            )
+        key = (
+            query_string, size, json.dumps(state, sort_keys=True, default=str),
+            num_candidates, rerank_depth, json.dumps(filters, sort_keys=True),
+        )
+        return await self.single_flight.do(
+            key,
+            lambda: self._admitted_search(
+                query_string, size, state, num_candidates, rerank_depth, filters
+            ),
+        )
+
+    async def _admitted_search(self, *args) -> Tuple[List[dict], Optional[dict]]:
+        if self.admission is None:
+            return await self._search(*args)
+        async with self.admission.admit():
+            return await self._search(*args)
+
+    async def _search(
+        self,
+        query_string: str,
+        size: int,
+        state: dict,
+        num_candidates: Optional[int],
+        rerank_depth: Optional[int],
+        filters: Optional[dict],
+    ) -> Tuple[List[dict], Optional[dict]]:
+        mode = state.get("mode") or ("two_stage" if rerank_depth else self.mode)
+        if mode not in self.modes():
+            raise InvalidSearchError(f"The {mode} search mode is not available for this index")
+        offset = state.get("offset", 0)
+        if (
+            mode != "exact" and self.max_ranked_results is not None
+            and offset + size > self.max_ranked_results
+        ):
+            raise InvalidSearchError(
+                f"Only the first {self.max_ranked_results} results can be paged"
+            )
+        num_candidates = state.get("num_candidates", num_candidates)
+        rerank_depth = state.get("rerank_depth", rerank_depth)
+        effort = state.get("effort")
+        if effort is None and self.effort_controller is not None:
+            effort = self.effort_controller.effort
+        search_options = {
+            "num_candidates": num_candidates,
+            "rerank_depth": rerank_depth,
+            "effort": effort,
+            "filters": state.get("filters", filters),
+        }
+        cacheable = (
+            self.result_cache is not None
+            and state.get("pit_id") is None
+            and offset + size <= self.result_cache.max_results
+        )
+        if cacheable:
+            generation = await self.generation_tracker.current()
+            if generation is not None:
+                results, next_state = await self._search_cached(
+                    query_string, size, offset, mode, generation, search_options
+                )
+                return results, self._bind(next_state, query_string)
+
+        embedding = await self._embed(query_string)
+        # The page query returns the documents too, so hydration is included.
+        async with self._track():
+            with timed_stage("vector_search"):
+                results, next_state = await self.search_client.search_page(
+                    embedding,
+                    size=size,
+                    offset=offset,
+                    search_after=state.get("search_after"),
+                    pit_id=state.get("pit_id"),
+                    mode=mode,
+                    with_cursor=True,
+                    timeout=self._timeout(),
+                    **search_options,
+                )
+        if next_state is not None:
+            next_state = dict(next_state, **{
+                key: search_options[key] for key in ("effort", "filters")
+                if search_options[key] is not None
+            })
+        return results, self._bind(next_state, query_string)
+
+    @staticmethod
+    def _bind(next_state: Optional[dict], query_string: str) -> Optional[dict]:
+        """Tie continuation state to its query, so it cannot resume another one."""
+        if next_state is None:
+            return None
+        return dict(next_state, query=query_fingerprint(query_string))
+
+    async def _search_cached(
+        self,
+        query_string: str,
+        size: int,
+        offset: int,
+        mode: str,
+        generation: int,
+        search_options: dict,
+    ) -> Tuple[List[dict], Optional[dict]]:
+        # Rankings produced with per-request search options are cached separately.
+        cache_mode = mode
+        if any(value is not None for value in search_options.values()):
+            cache_mode = "{}:{num_candidates}:{rerank_depth}:{effort}:{}".format(
+                mode, json.dumps(search_options["filters"], sort_keys=True), **search_options
+            )
+        ranked = self.result_cache.get(query_string, cache_mode, generation)
+        if ranked is None:
+            result_cache_requests_total.labels(result="miss").inc()
+            embedding = await self._embed(query_string)
+            async with self._track():
+                with timed_stage("vector_search"):
+                    ids, scores, timed_out = await self.search_client.search_ranked_ids(
+                        embedding, top_k=self.result_cache.max_results, mode=mode,
+                        timeout=self._timeout(), **search_options
+                    )
+            if not ids:
+                # Never cache an empty ranking; it may come from a failed search.
+                return [], None
+            if timed_out:
+                # A partial ranking taken under load is served once, not cached.
+                ranked = (np.asarray(ids, dtype=np.int64), np.asarray(scores, dtype=np.float32))
+            else:
+                ranked = self.result_cache.put(query_string, cache_mode, generation, ids, scores)
+        else:
+            result_cache_requests_total.labels(result="hit").inc()
+
+        ids, scores = ranked
+        page_ids = ids[offset:offset + size].tolist()
+        page_scores = scores[offset:offset + size].tolist()
+        with timed_stage("hydrate"):
+            documents = await self.search_client.fetch_by_image_ids(page_ids)
+        results = []
+        for image_id, score in zip(page_ids, page_scores):
+            document = documents.get(image_id)
+            if document is None:
+                # Deleted since the ranking was cached.
+                continue
+            results.append({
+                "image_id": image_id,
+                "image_url": document.get("image_url"),
+                "score": score,
+            })
+
+        next_offset = offset + size
+        next_state = None
+        if next_offset < len(ids):
+            next_state = {"mode": mode, "offset": next_offset}
+            next_state.update(
+                (key, value) for key, value in search_options.items() if value is not None
+            )
+        return results, next_state
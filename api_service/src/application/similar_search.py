@@ -0,0 +1,92 @@
+"""
+application/similar_search.py
+
+"More like this" search: finds images similar to an indexed image by reusing
+its stored embedding, so no CLIP inference is needed.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from infrastructure.metrics import image_vector_cache_requests_total
+
+logger = logging.getLogger(__name__)
+
+
+class ImageVectorCache:
+    """LRU of stored image embeddings, keyed by image_id."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, np.ndarray]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, image_id: int) -> Optional[np.ndarray]:
+        vector = self._entries.get(image_id)
+        if vector is not None:
+            self._entries.move_to_end(image_id)
+        return vector
+
+    def put(self, image_id: int, embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector.setflags(write=False)
+        if self.max_entries <= 0:
+            return vector
+        self._entries[image_id] = vector
+        self._entries.move_to_end(image_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return vector
+
+
+class SimilarImageService:
+    """Searches with the stored vector of an image, excluding the image itself."""
+
+    def __init__(self, search_client, mode: str, vector_cache: Optional[ImageVectorCache] = None):
+        """
+        Args:
+            search_client: Backend exposing fetch_embedding and search_embeddings.
+            mode (str): Search mode passed to the backend.
+            vector_cache (Optional[ImageVectorCache]): Cache of recently used vectors.
+        """
+        self.search_client = search_client
+        self.mode = mode
+        self.vector_cache = vector_cache
+
+    async def _vector(self, image_id: int) -> Optional[np.ndarray]:
+        if self.vector_cache is not None:
+            vector = self.vector_cache.get(image_id)
+            if vector is not None:
+                image_vector_cache_requests_total.labels(result="hit").inc()
+                return vector
+            image_vector_cache_requests_total.labels(result="miss").inc()
+        embedding = await self.search_client.fetch_embedding(image_id)
+        if embedding is None or len(embedding) == 0:
+            return None
+        if self.vector_cache is not None:
+            return self.vector_cache.put(image_id, embedding)
+        return np.asarray(embedding, dtype=np.float32)
+
+    async def search(self, image_id: int, size: int) -> Optional[List[dict]]:
+        """
+        Return the ``size`` images most similar to ``image_id``.
+
+        Args:
+            image_id (int): The source image.
+            size (int): Number of results.
+
+        Returns:
+            Optional[List[dict]]: Result dictionaries, or None when the image
+            has no stored embedding.
+        """
+        vector = await self._vector(image_id)
+        if vector is None:
+            return None
+        return await self.search_client.search_embeddings(
+            vector, top_k=size, mode=self.mode, exclude_image_ids=[image_id]
+        )
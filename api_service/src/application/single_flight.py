@@ -0,0 +1,82 @@
+"""
+application/single_flight.py
+
+Request coalescing: concurrent calls with the same key share one execution.
+
+The first caller for a key starts the work as a task; callers arriving while
+it runs await the same task and get the same result (or exception). The key
+is forgotten as soon as the task finishes, so nothing is cached beyond the
+in-flight window. Stage timings recorded by the shared work are added to
+every caller's request timings.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from infrastructure.metrics import coalesced_requests_total
+from infrastructure.request_timing import collect_stages, current_stages, merge_stages
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces identical in-flight coroutine calls within one event loop."""
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Operation label for the coalesced-requests metric.
+        """
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` once for all concurrent callers passing the same key.
+
+        The shared task is shielded, so one caller being cancelled (e.g. its
+        client disconnected) does not cancel the work other callers wait on.
+
+        Args:
+            key (Hashable): Identity of the request.
+            fn: Coroutine function performing the work.
+
+        Returns:
+            The result of the shared call.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            coalesced_requests_total.labels(operation=self.name).inc()
+            logger.debug("Coalesced %s request %r.", self.name, key)
+        stages = current_stages()
+        result, error, shared_stages = await asyncio.shield(task)
+        merge_stages(stages, shared_stages)
+        if error is not None:
+            raise error
+        return result
+
+    @staticmethod
+    async def _run(
+        fn: Callable[[], Awaitable[T]]
+    ) -> Tuple[Optional[T], Optional[Exception], Dict[str, float]]:
+        # The outcome is returned rather than raised so the stage timings
+        # reach every caller either way.
+        with collect_stages() as stages:
+            try:
+                return await fn(), None, stages
+            except Exception as e:
+                return None, e, stages
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
@@ -5,24 +5,128 @@ Defines the EmbeddingService class for generating text embeddings using CLIP.
 """
 
 import logging
+import time
+from typing import List
+import numpy as np
 import torch
 import clip
 
+from infrastructure.request_timing import add_stage
+
 logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     """Service to generate embeddings for textual queries."""
 
-    def __init__(self, model_name: str = "ViT-B/32"):
+    def __init__(
+        self,
+        model_name: str = "ViT-B/32",
+        text_only: bool = False,
+        artifacts=None,
+        onnx_encoder=None,
+        quantize: bool = False,
+        tokenizer=None,
+    ):
+        """
+        Args:
+            model_name (str): CLIP model to load.
+            text_only (bool): Drop the image encoder after loading; text encoding
+                is all the API needs, and a smaller model is cheaper to share.
+            artifacts (Optional[ModelArtifactCache]): Cache of serialized models.
+                A cached model is memory-mapped instead of rebuilt by clip.load;
+                a model that is not cached yet is saved after loading.
+            onnx_encoder (Optional[OnnxEncoder]): Exported text tower to run with
+                ONNX Runtime instead of the PyTorch model, which is then not
+                loaded at all.
+            quantize (bool): Dynamically quantize the PyTorch model's linear
+                layers to int8 (CPU only). Quantized ONNX graphs are produced
+                offline instead, see infrastructure.quantization.
+            tokenizer (Optional[ClipTokenizer]): Cached batch tokenizer used
+                instead of clip.tokenize; it yields the same token ids.
+        """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model, self.preprocess = clip.load(model_name, device=self.device)
-        # Determine embedding dimension by encoding a dummy text
-        self.dimension = self.model.encode_text(clip.tokenize(["test"]).to(self.device)).shape[1]
+        self.model_name = model_name
+        self.onnx_encoder = onnx_encoder
+        self.tokenizer = tokenizer
+        if onnx_encoder is not None:
+            self.device = "cpu"
+            self.model, self.preprocess = None, None
+            self.dimension = onnx_encoder.dimension
+            text_only = False
+        elif artifacts is not None and artifacts.exists(model_name, self.device):
+            self._load_artifact(artifacts)
+        else:
+            self.model, self.preprocess = clip.load(model_name, device=self.device)
+            # Determine embedding dimension by encoding a dummy text
+            self.dimension = self.model.encode_text(
+                clip.tokenize(["test"]).to(self.device)
+            ).shape[1]
+            if artifacts is not None:
+                self._save_artifact(artifacts)
+        if text_only:
+            self._strip_visual_tower()
+        if quantize and self.model is not None:
+            self._quantize()
         logger.info(
-            "Loaded CLIP model '%s' on %s with dimension %d.",
-            model_name, self.device, self.dimension
+            "Loaded CLIP model '%s' on %s (%s) with dimension %d.",
+            model_name, self.device, "onnx" if onnx_encoder is not None else "torch",
+            self.dimension,
         )
 
+    def _load_artifact(self, artifacts) -> None:
+        from infrastructure.model_artifacts import build_clip_model
+
+        state_dict, metadata = artifacts.load(self.model_name, self.device)
+        self.model = build_clip_model(state_dict).to(self.device)
+        self.preprocess = None
+        self.dimension = metadata["dimension"]
+
+    def _save_artifact(self, artifacts) -> None:
+        from infrastructure.model_artifacts import clip_metadata
+
+        try:
+            artifacts.save(
+                self.model_name, self.device, self.model.state_dict(),
+                clip_metadata(self.model, self.preprocess, self.dimension),
+            )
+        except Exception as e:
+            # The cache only speeds up the next start; serve without it.
+            logger.warning("Could not save model artifact for '%s': %s", self.model_name, e)
+
+    def _strip_visual_tower(self) -> None:
+        """
+        Replace the vision transformer with a stub holding only conv1.
+
+        CLIP's ``model.dtype`` reads ``visual.conv1.weight.dtype`` and
+        encode_text casts with it, so that single layer has to stay.
+        """
+        conv1 = self.model.visual.conv1
+        self.model.visual = torch.nn.Module()
+        self.model.visual.conv1 = conv1
+        self.preprocess = None
+
+    def _quantize(self) -> None:
+        if self.device != "cpu":
+            logger.warning(
+                "Int8 dynamic quantization runs on the CPU only; keeping float weights."
+            )
+            return
+        from infrastructure.quantization import quantize_torch_model
+
+        self.model = quantize_torch_model(self.model)
+        logger.info("Quantized the linear layers of '%s' to int8.", self.model_name)
+
+    def _tokenize(self, texts: List[str]):
+        # Texts are tokenized as one batch, so a query over the 77-token
+        # context must be truncated rather than fail every text batched with it.
+        if self.tokenizer is None:
+            return clip.tokenize(texts, truncate=True)
+        return torch.from_numpy(self.tokenizer.tokenize(texts, truncate=True))
+
+    def warm_up(self) -> None:
+        """Run one forward pass so the first query does not pay for lazy init."""
+        self.generate_embeddings_from_texts(["warm up"])
+
     def generate_embedding_from_text(self, text: str) -> list:
         """
         Generate an embedding vector for the given text.
@@ -33,14 +137,35 @@ class EmbeddingService:
         Returns:
             list: The embedding vector as a list of floats.
         """
+        return self.generate_embeddings_from_texts([text])[0]
+
+    def generate_embeddings_from_texts(self, texts: List[str]) -> List[list]:
+        """
+        Generate embedding vectors for several texts in one forward pass.
+
+        Args:
+            texts (List[str]): The input texts.
+
+        Returns:
+            List[list]: One embedding per input text, in order. Every entry is an
+            empty list if the batch failed.
+        """
         try:
-            text_tokens = clip.tokenize([text]).to(self.device)
+            started = time.perf_counter()
+            text_tokens = self._tokenize(texts)
+            add_stage("tokenize", time.perf_counter() - started)
+            if self.onnx_encoder is not None:
+                embeddings = self.onnx_encoder.run(text_tokens.numpy())
+                embeddings = embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)
+                logger.debug("Generated %d text embeddings.", len(texts))
+                return embeddings.tolist()
+            text_tokens = text_tokens.to(self.device)
             with torch.no_grad():
-                embedding = self.model.encode_text(text_tokens)
-                embedding = embedding / embedding.norm(dim=-1, keepdim=True)
-            embedding_np = embedding.cpu().numpy().tolist()[0]
-            logger.debug("Generated embedding for text: '%s'", text)
-            return embedding_np
+                embeddings = self.model.encode_text(text_tokens)
+                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+            embeddings_np = embeddings.cpu().numpy().tolist()
+            logger.debug("Generated %d text embeddings.", len(texts))
+            return embeddings_np
         except Exception as e:
-            logger.exception("Failed to generate embedding for text '%s': %s", text, e)
-            return []
+            logger.exception("Failed to generate embeddings for texts %s: %s", texts, e)
+            return [[] for _ in texts]
@@ -9,6 +9,8 @@ For example, LOG_LEVEL field will read from LOG_LEVEL env var.
 The default values are used if the environment variable is not set.
 """
 
+from typing import List
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -27,11 +29,168 @@ class Settings(BaseSettings):
     ELASTICSEARCH_PORT: int = Field(default=9200)
     ELASTICSEARCH_INDEX: str = Field(default="image_embeddings")
     TOP_K_VALUE: int = Field(default=50)
+    # Must match the embedding service's index: with VECTOR_ELEMENT_TYPE=byte
+    # query vectors are quantized to int8 like the stored ones, and with
+    # EMBEDDING_IN_SOURCE=false stored vectors (two-stage re-ranking, similar
+    # images, export) are read from doc values by a script field. kNN on a
+    # float "hnsw" index already scores hits by exact cosine; only with
+    # VECTOR_INDEX_TYPE "int8_hnsw"/"int4_hnsw" does two-stage re-ranking of
+    # the quantized scores change results, so it is rejected otherwise.
+    VECTOR_INDEX_TYPE: str = Field(default="hnsw")
+    VECTOR_ELEMENT_TYPE: str = Field(default="float")
+    EMBEDDING_IN_SOURCE: bool = Field(default=True)
+
+    # Vector Search Settings
+    # SEARCH_MODE selects "knn" (HNSW approximate search), "exact"
+    # (script_score brute-force scan, kept for recall comparisons) or
+    # "two_stage" (approximate candidates re-ranked by exact cosine in the API;
+    # TWO_STAGE_RERANK_DEPTH candidates are re-ranked unless a request overrides it).
+    SEARCH_MODE: str = Field(default="knn")
+    KNN_NUM_CANDIDATES: int = Field(default=100)
+    KNN_MAX_CANDIDATES: int = Field(default=10000)
+    TWO_STAGE_RERANK_DEPTH: int = Field(default=200)
+    # POST /search/batch: queries accepted per request, and queries encoded
+    # and searched (one _msearch) together before their results are streamed.
+    BATCH_SEARCH_MAX_QUERIES: int = Field(default=1000)
+    BATCH_SEARCH_CHUNK_SIZE: int = Field(default=64)
+    # Stored image vectors kept in memory for /similar/{image_id}.
+    SIMILAR_VECTOR_CACHE_SIZE: int = Field(default=10000)
+    # SEARCH_BACKEND selects "elasticsearch" or "memmap", an in-process
+    # brute-force engine over the store at VECTOR_STORE_PATH (built with
+    # `python -m interface.cli build-vector-store`).
+    SEARCH_BACKEND: str = Field(default="elasticsearch")
+    VECTOR_STORE_PATH: str = Field(default="/app/vector_store")
+    VECTOR_STORE_DTYPE: str = Field(default="float16")
+    # VECTOR_INDEX selects how the memmap backend scans the store: "flat"
+    # (exact), "ivf" (inverted lists built with `interface.cli train-ivf`,
+    # scanning the IVF_NPROBE closest lists per query) or "pq" (uint8
+    # product-quantized codes built with `interface.cli train-pq`, with the
+    # best PQ_RERANK candidates re-scored against the full vectors).
+    VECTOR_INDEX: str = Field(default="flat")
+    IVF_NPROBE: int = Field(default=8)
+    PQ_RERANK: int = Field(default=100)
+    # Adaptive search effort: while the p95 vector search latency exceeds
+    # SEARCH_LATENCY_BUDGET_MS, or more than SEARCH_EFFORT_MAX_IN_FLIGHT
+    # searches run at once, /get_image steps down SEARCH_EFFORT_LEVELS
+    # (fractions of num_candidates, IVF probes and re-rank depths) and steps
+    # back up once the p95 is under half the budget. Elasticsearch searches
+    # also get the budget as their timeout and return partial results, so it
+    # is off by default. Searches are counted inside admission control, so
+    # SEARCH_EFFORT_MAX_IN_FLIGHT must be below ADMISSION_MAX_CONCURRENT;
+    # 0 uses three quarters of it (32 without admission control).
+    SEARCH_EFFORT_CONTROL_ENABLED: bool = Field(default=False)
+    SEARCH_LATENCY_BUDGET_MS: float = Field(default=250.0)
+    SEARCH_EFFORT_MAX_IN_FLIGHT: int = Field(default=0)
+    SEARCH_EFFORT_LEVELS: List[float] = Field(default=[1.0, 0.5, 0.25])
+    # Lifetime of the point-in-time kept open between cursor pages (exact mode).
+    SEARCH_PIT_KEEP_ALIVE: str = Field(default="1m")
 
     # Embedding Model Settings
     EMBEDDING_MODEL: str = Field(default="ViT-B/32")
+    # Serialized models are cached here and memory-mapped on later starts
+    # instead of being rebuilt by clip.load. Empty disables the cache.
+    MODEL_ARTIFACT_DIR: str = Field(default="/app/model_artifacts")
+    # EMBEDDING_BACKEND selects how text is encoded: "torch" (the PyTorch CLIP
+    # text tower) or "onnx" (ONNX_TEXT_MODEL_PATH, exported with
+    # `python -m interface.cli export-onnx`, run on ONNX Runtime's CPU
+    # provider). Thread counts of 0 use the runtime defaults; the graph
+    # optimization level is one of disable, basic, extended, all.
+    EMBEDDING_BACKEND: str = Field(default="torch")
+    ONNX_TEXT_MODEL_PATH: str = Field(default="/app/model_artifacts/clip-text.onnx")
+    ONNX_INTRA_OP_THREADS: int = Field(default=0)
+    ONNX_INTER_OP_THREADS: int = Field(default=0)
+    ONNX_GRAPH_OPTIMIZATION: str = Field(default="all")
+    # EMBEDDING_QUANTIZATION="dynamic" quantizes the torch backend's linear
+    # layers to int8 at load time. For the onnx backend, point
+    # ONNX_TEXT_MODEL_PATH at a graph written by `interface.cli quantize-onnx`.
+    EMBEDDING_QUANTIZATION: str = Field(default="none")
+
+    # Query tokenization: the cached batch tokenizer (same ids as
+    # clip.tokenize) keeps the token ids of TOKENIZER_CACHE_SIZE recent texts
+    # and the BPE ids of TOKENIZER_WORD_CACHE_SIZE words per encoder process.
+    TOKENIZER_CACHE_ENABLED: bool = Field(default=True)
+    TOKENIZER_CACHE_SIZE: int = Field(default=10000)
+    TOKENIZER_WORD_CACHE_SIZE: int = Field(default=50000)
+
+    # Inference Executor Settings
+    # INFERENCE_EXECUTOR selects a "thread" pool sharing one model or a
+    # "process" pool where every worker loads its own model copy.
+    INFERENCE_EXECUTOR: str = Field(default="thread")
+    INFERENCE_WORKERS: int = Field(default=1)
+    INFERENCE_MAX_CONCURRENCY: int = Field(default=4)
+
+    # Micro-batching: concurrent queries arriving within MICRO_BATCH_WAIT_MS
+    # are encoded together, up to MICRO_BATCH_MAX_SIZE texts per forward pass.
+    MICRO_BATCH_ENABLED: bool = Field(default=True)
+    MICRO_BATCH_MAX_SIZE: int = Field(default=16)
+    MICRO_BATCH_WAIT_MS: float = Field(default=5.0)
+
+    # Query Embedding Cache
+    # EMBEDDING_CACHE_SIZE=0 disables the in-process LRU tier and
+    # EMBEDDING_CACHE_TTL_SECONDS=0 keeps entries until they are evicted.
+    EMBEDDING_CACHE_SIZE: int = Field(default=10000)
+    EMBEDDING_CACHE_TTL_SECONDS: float = Field(default=3600.0)
+    EMBEDDING_CACHE_REDIS_ENABLED: bool = Field(default=False)
+
+    # Ranked Result Cache
+    # Keeps the top RESULT_CACHE_MAX_RESULTS (image_id, score) pairs per query
+    # so later pages skip the vector search. Off by default: each first-page
+    # miss ranks RESULT_CACHE_MAX_RESULTS hits instead of one page, which only
+    # pays off when users page deep. Entries are dropped when the index
+    # document count (polled every RESULT_CACHE_GENERATION_REFRESH_SECONDS)
+    # has moved by RESULT_CACHE_GENERATION_DOCS, so a running ingest does not
+    # invalidate them on every refresh; the TTL bounds staleness in between.
+    RESULT_CACHE_ENABLED: bool = Field(default=False)
+    RESULT_CACHE_MAX_RESULTS: int = Field(default=200)
+    RESULT_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024)
+    RESULT_CACHE_TTL_SECONDS: float = Field(default=300.0)
+    RESULT_CACHE_GENERATION_REFRESH_SECONDS: float = Field(default=30.0)
+    RESULT_CACHE_GENERATION_DOCS: int = Field(default=1000)
+
+    # Request Coalescing
+    # Concurrent /get_image requests with the same query, page/cursor, size
+    # and search options share one in-flight encode and search.
+    SINGLE_FLIGHT_ENABLED: bool = Field(default=True)
+
+    # Admission Control
+    # At most ADMISSION_MAX_CONCURRENT searches run per API process; up to
+    # ADMISSION_MAX_QUEUE more wait for at most ADMISSION_MAX_WAIT_MS. Other
+    # requests get 503 with Retry-After: ADMISSION_RETRY_AFTER_SECONDS.
+    ADMISSION_CONTROL_ENABLED: bool = Field(default=True)
+    ADMISSION_MAX_CONCURRENT: int = Field(default=16)
+    ADMISSION_MAX_QUEUE: int = Field(default=64)
+    ADMISSION_MAX_WAIT_MS: float = Field(default=1000.0)
+    ADMISSION_RETRY_AFTER_SECONDS: int = Field(default=1)
+
+    # Request Timing
+    # Adds a Server-Timing header with the per-stage breakdown (encode_queue,
+    # tokenize, encode, vector_search, hydrate, serialize) to /get_image
+    # responses. Stage histograms are exported either way.
+    SERVER_TIMING_ENABLED: bool = Field(default=True)
+
+    # Redis Settings
+    REDIS_HOST: str = Field(default="redis")
+    REDIS_PORT: int = Field(default=6379)
+    REDIS_DB: int = Field(default=0)
 
     # Metrics
     METRICS_PORT: int = Field(default=8002)
 
+    # Server (main.py launcher)
+    # API_WORKERS > 1 loads the model once in the parent and forks that many
+    # uvicorn workers sharing its weights copy-on-write over one listening
+    # socket. TORCH_THREADS_PER_WORKER = 0 splits the CPUs evenly between workers.
+    # A dead worker is re-forked after WORKER_RESTART_BACKOFF seconds, doubling
+    # per further crash up to WORKER_RESTART_BACKOFF_MAX; more than
+    # WORKER_MAX_RESTARTS crashes within WORKER_RESTART_WINDOW seconds stops
+    # the service so the container's restart policy takes over.
+    API_HOST: str = Field(default="0.0.0.0")
+    API_PORT: int = Field(default=8080)
+    API_WORKERS: int = Field(default=1)
+    TORCH_THREADS_PER_WORKER: int = Field(default=0)
+    WORKER_RESTART_BACKOFF: float = Field(default=1.0)
+    WORKER_RESTART_BACKOFF_MAX: float = Field(default=30.0)
+    WORKER_MAX_RESTARTS: int = Field(default=5)
+    WORKER_RESTART_WINDOW: float = Field(default=60.0)
+
 settings = Settings()
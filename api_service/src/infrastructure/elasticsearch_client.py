@@ -4,15 +4,42 @@ infrastructure/elasticsearch_client.py
 Elasticsearch client for searching embeddings.
 """
 
+import asyncio
 import logging
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import numpy as np
 from elasticsearch import AsyncElasticsearch, exceptions
 from infrastructure.config import settings
+from infrastructure.metrics import search_timeouts_total, timed_stage
+from infrastructure.rerank import rerank_exact
+from infrastructure.vector_store import cosine_to_score
 
 logger = logging.getLogger(__name__)
 
+# Only the fields search responses are built from; the stored embedding is
+# never shipped back unless a caller asks for it.
+RESULT_SOURCE_FIELDS = ["image_id", "image_url"]
+
+# Reads a stored vector from doc values, for indices that keep it out of _source.
+VECTOR_SCRIPT_FIELD = {"embedding": {"script": {"source": "doc['embedding'].vectorValue"}}}
+
+# Index types whose kNN scores come from quantized vectors, which two-stage
+# search re-ranks by exact cosine.
+QUANTIZED_INDEX_TYPES = ("int8_hnsw", "int4_hnsw")
+
 class ElasticsearchClient:
     """Elasticsearch client for searching embeddings."""
 
+    supports_filters = True
+
+    @property
+    def supports_two_stage(self) -> bool:
+        """True when kNN scores are approximate, so re-ranking them can help."""
+        return (
+            settings.VECTOR_INDEX_TYPE in QUANTIZED_INDEX_TYPES
+            and settings.VECTOR_ELEMENT_TYPE == "float"
+        )
+
     def __init__(self):
         self.es = AsyncElasticsearch(
             hosts=[f"http://{settings.ELASTICSEARCH_HOST}:{settings.ELASTICSEARCH_PORT}"],
@@ -21,54 +48,605 @@ class ElasticsearchClient:
             retry_on_timeout=True
         )
 
-    async def search_embeddings(self, embedding: list, top_k: int = 5) -> list:
+    async def search_embeddings(
+        self,
+        embedding: list,
+        top_k: int = 5,
+        num_candidates: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank_depth: Optional[int] = None,
+        exclude_image_ids: Optional[List[int]] = None,
+        effort: Optional[float] = None,
+        timeout: Optional[float] = None,
+        filters: Optional[dict] = None,
+    ) -> list:
         """
         Search for similar embeddings in Elasticsearch.
 
         Args:
-            embedding (list): The query embedding vector.
+            embedding (list): The query embedding vector (list or numpy array).
             top_k (int): Number of top results to retrieve.
+            num_candidates (Optional[int]): HNSW candidates per shard for kNN and
+                two-stage modes. Defaults to settings.KNN_NUM_CANDIDATES.
+            mode (Optional[str]): "knn", "exact" or "two_stage". Defaults to
+                settings.SEARCH_MODE.
+            rerank_depth (Optional[int]): Candidates re-ranked exactly in two-stage
+                mode. Defaults to settings.TWO_STAGE_RERANK_DEPTH.
+            exclude_image_ids (Optional[List[int]]): Images never returned.
+            effort (Optional[float]): Fraction of num_candidates and
+                rerank_depth to use; None is full effort.
+            timeout (Optional[float]): Latency budget in seconds. Shards that
+                exceed it return what they found so far.
+            filters (Optional[dict]): Metadata filters (see
+                application.search_filters), applied inside the search.
 
         Returns:
             list: A list of result dictionaries.
         """
+        results, _ = await self.search_page(
+            embedding, size=top_k, num_candidates=num_candidates, mode=mode,
+            rerank_depth=rerank_depth, exclude_image_ids=exclude_image_ids,
+            effort=effort, timeout=timeout, filters=filters,
+        )
+        return results
+
+    async def msearch_embeddings(
+        self,
+        embeddings: List[list],
+        top_k: int = 5,
+        num_candidates: Optional[int] = None,
+        mode: Optional[str] = None,
+    ) -> List[list]:
+        """
+        Run one vector search per embedding in a single _msearch round trip.
+
+        Two-stage searches need a re-rank per query and are run concurrently
+        instead.
+
+        Args:
+            embeddings (List[list]): Query embedding vectors.
+            top_k (int): Number of results per query.
+            num_candidates (Optional[int]): HNSW candidates per shard for kNN mode.
+            mode (Optional[str]): "knn", "exact" or "two_stage". Defaults to
+                settings.SEARCH_MODE.
+
+        Returns:
+            List[list]: Result dictionaries per embedding; an empty list for
+            searches that failed.
+        """
+        if not embeddings:
+            return []
+        mode = mode or settings.SEARCH_MODE
+        if mode == "two_stage":
+            return list(await asyncio.gather(*(
+                self.search_embeddings(embedding, top_k, num_candidates, mode)
+                for embedding in embeddings
+            )))
         try:
-            query = {
-                "size": top_k,
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
-                            "params": {"query_vector": embedding}
-                        }
-                    }
-                }
-            }
-            response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
-            hits = response['hits']['hits']
+            searches = []
+            for embedding in embeddings:
+                if hasattr(embedding, "tolist"):
+                    embedding = embedding.tolist()
+                if mode == "knn":
+                    query = self._build_knn_query(embedding, top_k, num_candidates)
+                elif mode == "exact":
+                    query = self._build_exact_query(embedding, top_k)
+                else:
+                    raise ValueError(f"Unsupported search mode: {mode}")
+                searches.append({})
+                searches.append(query)
+            response = await self.es.msearch(index=settings.ELASTICSEARCH_INDEX, body=searches)
             results = []
-            for hit in hits:
-                score = hit['_score']
-                source = hit['_source']
-
-                results.append({
-                    "image_id": source.get("image_id"),
-                    "image_url": source.get("image_url"),
-                    "image_path": source.get("image_path"),
-                    "score": score
-                })
-            logger.debug("Elasticsearch search returned %d results.", len(results))
+            for item in response['responses']:
+                if 'error' in item:
+                    logger.warning("Multi-search item failed: %s", item['error'])
+                    results.append([])
+                else:
+                    results.append(self._parse_hits(item['hits']['hits']))
             return results
+        except Exception as e:
+            logger.exception("Multi-search failed: %s", e)
+            return [[] for _ in embeddings]
+
+    async def search_page(
+        self,
+        embedding: list,
+        size: int,
+        offset: int = 0,
+        search_after: Optional[list] = None,
+        pit_id: Optional[str] = None,
+        num_candidates: Optional[int] = None,
+        mode: Optional[str] = None,
+        with_cursor: bool = False,
+        rerank_depth: Optional[int] = None,
+        exclude_image_ids: Optional[List[int]] = None,
+        effort: Optional[float] = None,
+        timeout: Optional[float] = None,
+        filters: Optional[dict] = None,
+    ) -> Tuple[list, Optional[dict]]:
+        """
+        Fetch one page of similar embeddings, returning only ``size`` hits.
+
+        kNN mode pages with ``from`` inside the top ``offset + size`` neighbours.
+        Exact mode continues from ``search_after`` sort values, so deep pages
+        never re-score and ship earlier hits; a plain ``offset`` is still
+        honoured for legacy page numbers. The first page opens no
+        point-in-time, since most clients never follow the cursor; the second
+        opens one and later pages stay in it. Two-stage mode pages inside the
+        ``rerank_depth`` re-ranked candidates.
+
+        Args:
+            embedding (list): The query embedding vector (list or numpy array).
+            size (int): Number of hits to return.
+            offset (int): Number of ranked hits before this page.
+            search_after (Optional[list]): Sort values of the previous page's last hit.
+            pit_id (Optional[str]): Point-in-time to continue in (exact mode).
+            num_candidates (Optional[int]): HNSW candidates per shard for kNN mode.
+            mode (Optional[str]): "knn", "exact" or "two_stage". Defaults to
+                settings.SEARCH_MODE.
+            with_cursor (bool): Compute continuation state for the next page; exact
+                mode then opens a point-in-time when continuing without one.
+            rerank_depth (Optional[int]): Candidates re-ranked in two-stage mode.
+            exclude_image_ids (Optional[List[int]]): Images filtered out of the
+                search (applied inside kNN, not after it).
+            effort (Optional[float]): Fraction of num_candidates and
+                rerank_depth to use; None is full effort.
+            timeout (Optional[float]): Latency budget in seconds; partial
+                results are returned when it is exceeded.
+            filters (Optional[dict]): Metadata filters, applied inside the
+                search like exclude_image_ids.
+
+        Returns:
+            Tuple[list, Optional[dict]]: The page's result dictionaries and the
+            state for the next page (mode, offset, pit_id, search_after), or None when
+            no further page exists or was requested.
+        """
+        try:
+            if hasattr(embedding, "tolist"):
+                embedding = embedding.tolist()
+            mode = mode or settings.SEARCH_MODE
+            filter_clause = self._build_filter(exclude_image_ids, filters)
+            if mode == "two_stage":
+                # One hit past the page tells whether another page exists.
+                ranked, _ = await self._search_two_stage(
+                    embedding, num_candidates, rerank_depth, filter_clause, effort, timeout,
+                    min_depth=offset + size + 1,
+                )
+                results = ranked[offset:offset + size]
+                next_state = None
+                if with_cursor and offset + size < len(ranked):
+                    next_state = {
+                        "mode": mode,
+                        "offset": offset + size,
+                        "num_candidates": num_candidates,
+                        "rerank_depth": rerank_depth,
+                    }
+                return results, next_state
+            if mode == "knn":
+                query = self._build_knn_query(
+                    embedding, offset + size, num_candidates, filter_clause, effort
+                )
+                query["from"] = offset
+                query["size"] = size
+                self._set_timeout(query, timeout)
+                response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
+            elif mode == "exact":
+                query = self._build_exact_query(embedding, size, filter_clause)
+                self._set_timeout(query, timeout)
+                if with_cursor or pit_id or search_after is not None:
+                    if pit_id is None and with_cursor and search_after is not None:
+                        pit = await self.es.open_point_in_time(
+                            index=settings.ELASTICSEARCH_INDEX,
+                            keep_alive=settings.SEARCH_PIT_KEEP_ALIVE,
+                        )
+                        pit_id = pit["id"]
+                    # image_id breaks score ties, so search_after values carry
+                    # over from the first page, which runs outside a PIT.
+                    query["sort"] = [{"_score": "desc"}, {"image_id": "asc"}]
+                    query["track_scores"] = True
+                    query["track_total_hits"] = False
+                    if search_after is not None:
+                        query["search_after"] = search_after
+                    elif offset:
+                        query["from"] = offset
+                    if pit_id is not None:
+                        query["pit"] = {
+                            "id": pit_id, "keep_alive": settings.SEARCH_PIT_KEEP_ALIVE,
+                        }
+                        response = await self.es.search(body=query)
+                    else:
+                        response = await self.es.search(
+                            index=settings.ELASTICSEARCH_INDEX, body=query
+                        )
+                else:
+                    if offset:
+                        query["from"] = offset
+                    response = await self.es.search(
+                        index=settings.ELASTICSEARCH_INDEX, body=query
+                    )
+            else:
+                raise ValueError(f"Unsupported search mode: {mode}")
+
+            self._check_timed_out(response)
+            hits = response['hits']['hits']
+            results = self._parse_hits(hits)
+            logger.debug("Elasticsearch %s search returned %d results.", mode, len(results))
+
+            next_state = None
+            next_offset = offset + len(hits)
+            has_more = len(hits) == size
+            if mode == "knn":
+                has_more = has_more and next_offset < settings.KNN_MAX_CANDIDATES
+            if with_cursor and has_more:
+                next_state = {"mode": mode, "offset": next_offset}
+                if mode == "exact":
+                    # Elasticsearch may hand back a new id for the same PIT.
+                    pit_id = response.get("pit_id") or pit_id
+                    if pit_id is not None:
+                        next_state["pit_id"] = pit_id
+                    next_state["search_after"] = hits[-1].get("sort")
+            elif mode == "exact" and pit_id is not None:
+                await self.close_point_in_time(response.get("pit_id") or pit_id)
+            return results, next_state
         except exceptions.NotFoundError as e:
             logger.exception("Elasticsearch search failed: Index not found. %s", e)
-            return []
+            return [], None
         except exceptions.RequestError as e:
             logger.exception("Elasticsearch request failed: %s", e)
-            return []
+            return [], None
         except Exception as e:
             logger.exception("An unexpected error occurred during search: %s", e)
-            return []
+            return [], None
+
+    async def search_ranked_ids(
+        self,
+        embedding: list,
+        top_k: int,
+        num_candidates: Optional[int] = None,
+        mode: Optional[str] = None,
+        rerank_depth: Optional[int] = None,
+        effort: Optional[float] = None,
+        timeout: Optional[float] = None,
+        filters: Optional[dict] = None,
+    ) -> Tuple[List[int], List[float], bool]:
+        """
+        Rank the top_k most similar images, returning only ids and scores.
+
+        Documents are not loaded: image_id is read from doc values, keeping the
+        response small enough to cache hundreds of ranks per query. Two-stage
+        mode returns at most ``rerank_depth`` re-ranked hits.
+
+        Args:
+            embedding (list): The query embedding vector (list or numpy array).
+            top_k (int): Number of ranked hits to retrieve.
+            num_candidates (Optional[int]): HNSW candidates per shard for kNN mode.
+            mode (Optional[str]): "knn", "exact" or "two_stage". Defaults to
+                settings.SEARCH_MODE.
+            rerank_depth (Optional[int]): Candidates re-ranked in two-stage mode.
+            effort (Optional[float]): Fraction of num_candidates and
+                rerank_depth to use; None is full effort.
+            timeout (Optional[float]): Latency budget in seconds; partial
+                results are returned when it is exceeded.
+            filters (Optional[dict]): Metadata filters, applied inside the search.
+
+        Returns:
+            Tuple[List[int], List[float], bool]: Image ids and scores in rank
+            order, and whether the search hit its timeout (the ranking may then
+            be incomplete).
+        """
+        try:
+            if hasattr(embedding, "tolist"):
+                embedding = embedding.tolist()
+            mode = mode or settings.SEARCH_MODE
+            filter_clause = self._build_filter(filters=filters)
+            if mode == "two_stage":
+                ranked, timed_out = await self._search_two_stage(
+                    embedding, num_candidates, rerank_depth, filter_clause, effort, timeout,
+                    min_depth=top_k,
+                )
+                ranked = ranked[:top_k]
+                return (
+                    [hit["image_id"] for hit in ranked], [hit["score"] for hit in ranked],
+                    timed_out,
+                )
+            if mode == "knn":
+                query = self._build_knn_query(
+                    embedding, top_k, num_candidates, filter_clause, effort
+                )
+            elif mode == "exact":
+                query = self._build_exact_query(embedding, top_k, filter_clause)
+            else:
+                raise ValueError(f"Unsupported search mode: {mode}")
+            query["_source"] = False
+            query["docvalue_fields"] = ["image_id"]
+            self._set_timeout(query, timeout)
+            response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
+            timed_out = self._check_timed_out(response)
+            ids, scores = [], []
+            for hit in response['hits']['hits']:
+                ids.append(hit['fields']['image_id'][0])
+                scores.append(hit['_score'])
+            return ids, scores, timed_out
+        except Exception as e:
+            logger.exception("Ranked id search failed: %s", e)
+            return [], [], False
+
+    async def _search_two_stage(
+        self,
+        embedding: list,
+        num_candidates: Optional[int],
+        rerank_depth: Optional[int],
+        filter_clause: Optional[dict] = None,
+        effort: Optional[float] = None,
+        timeout: Optional[float] = None,
+        min_depth: int = 1,
+    ) -> Tuple[list, bool]:
+        """
+        Fetch ``rerank_depth`` kNN candidates with their stored vectors and
+        re-rank them by exact cosine similarity. Reduced effort shrinks the
+        depth (and num_candidates) proportionally, but never below
+        ``min_depth``, so a page full effort would fill is not truncated.
+
+        Scores use the kNN cosine scale, (1 + cos) / 2. Also returns whether
+        the candidate search hit its timeout.
+        """
+        full_depth = min(
+            rerank_depth or settings.TWO_STAGE_RERANK_DEPTH, settings.KNN_MAX_CANDIDATES
+        )
+        depth = full_depth
+        if effort is not None:
+            depth = max(int(depth * min(effort, 1.0)), min(min_depth, full_depth), 1)
+        with timed_stage("candidates"):
+            query = self._build_knn_query(embedding, depth, num_candidates, filter_clause, effort)
+            self._request_vectors(query, RESULT_SOURCE_FIELDS)
+            self._set_timeout(query, timeout)
+            response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
+            timed_out = self._check_timed_out(response)
+        hits = response['hits']['hits']
+        with timed_stage("rerank"):
+            order, cosines = rerank_exact(
+                embedding, [self._hit_vector(hit) for hit in hits], depth
+            )
+        results = []
+        for position, cosine in zip(order, cosine_to_score(cosines)):
+            source = hits[position]['_source']
+            results.append({
+                "image_id": source.get("image_id"),
+                "image_url": source.get("image_url"),
+                "score": float(cosine),
+            })
+        return results, timed_out
+
+    async def fetch_embedding(self, image_id: int) -> Optional[list]:
+        """
+        Load the stored embedding of one image.
+
+        Args:
+            image_id (int): The image to look up.
+
+        Returns:
+            Optional[list]: The embedding, or None if the image is not indexed.
+
+        Raises:
+            Exception: Search errors are not caught, so an unavailable cluster
+                is not reported as a missing image.
+        """
+        query = {"size": 1, "query": {"term": {"image_id": image_id}}}
+        self._request_vectors(query)
+        response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
+        hits = response['hits']['hits']
+        return self._hit_vector(hits[0]) if hits else None
+
+    async def fetch_by_image_ids(self, image_ids: List[int]) -> Dict[int, dict]:
+        """
+        Load the stored documents for the given image ids.
+
+        Args:
+            image_ids (List[int]): Ids to fetch.
+
+        Returns:
+            Dict[int, dict]: Source documents keyed by image_id.
+        """
+        if not image_ids:
+            return {}
+        try:
+            query = {
+                "size": len(image_ids),
+                "query": {"terms": {"image_id": list(image_ids)}},
+                "_source": RESULT_SOURCE_FIELDS,
+            }
+            response = await self.es.search(index=settings.ELASTICSEARCH_INDEX, body=query)
+            return {
+                hit['_source']['image_id']: hit['_source'] for hit in response['hits']['hits']
+            }
+        except Exception as e:
+            logger.exception("Failed to fetch documents by image id: %s", e)
+            return {}
+
+    async def index_generation(self) -> int:
+        """
+        Return a value that changes as documents are added or removed.
+
+        The searchable document count is rounded down to a multiple of
+        RESULT_CACHE_GENERATION_DOCS. The raw count moves on every refresh
+        while images are ingested, which would drop every cached ranking each
+        time; hits deleted in between are skipped when a page is loaded.
+        """
+        response = await self.es.count(index=settings.ELASTICSEARCH_INDEX)
+        return response["count"] // max(settings.RESULT_CACHE_GENERATION_DOCS, 1)
+
+    async def close_point_in_time(self, pit_id: str) -> None:
+        """Release a point-in-time once its last page has been served."""
+        try:
+            await self.es.close_point_in_time(id=pit_id)
+        except Exception as e:
+            logger.warning("Failed to close point-in-time: %s", e)
+
+    @staticmethod
+    def _parse_hits(hits: list) -> list:
+        results = []
+        for hit in hits:
+            score = hit['_score']
+            source = hit['_source']
+
+            results.append({
+                "image_id": source.get("image_id"),
+                "image_url": source.get("image_url"),
+                "score": score
+            })
+        return results
+
+    @staticmethod
+    def _query_vector(embedding) -> list:
+        """The query embedding in the index's element type (int8 for byte vectors)."""
+        if settings.VECTOR_ELEMENT_TYPE != "byte":
+            return embedding
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        return np.clip(np.rint(vector * 127), -127, 127).astype(np.int8).tolist()
+
+    @staticmethod
+    def _request_vectors(query: dict, source_fields: Optional[List[str]] = None) -> None:
+        """Ask for each hit's stored vector besides ``source_fields``."""
+        source_fields = list(source_fields or [])
+        if settings.EMBEDDING_IN_SOURCE:
+            query["_source"] = source_fields + ["embedding"]
+        else:
+            query["_source"] = source_fields or False
+            query["script_fields"] = VECTOR_SCRIPT_FIELD
+
+    @staticmethod
+    def _hit_vector(hit: dict) -> list:
+        source = hit.get('_source') or {}
+        if "embedding" in source:
+            return source["embedding"]
+        return hit['fields']['embedding']
+
+    @staticmethod
+    def _set_timeout(query: dict, timeout: Optional[float]) -> None:
+        """Bound a search's run time; shards that exceed it return partial hits."""
+        if timeout:
+            query["timeout"] = f"{max(int(timeout * 1000), 1)}ms"
+
+    @staticmethod
+    def _check_timed_out(response) -> bool:
+        if not response.get("timed_out"):
+            return False
+        search_timeouts_total.inc()
+        logger.warning("Vector search hit its timeout; returning partial results.")
+        return True
+
+    @staticmethod
+    def _build_filter(
+        exclude_image_ids: Optional[List[int]] = None, filters: Optional[dict] = None
+    ) -> Optional[dict]:
+        """
+        Build the filter clause restricting which documents a search may return.
+
+        Metadata filters become non-scoring ``filter`` clauses on the indexed
+        domain, downloaded_at, width and height fields; documents indexed
+        without a field never match a filter on it.
+        """
+        clauses = []
+        filters = filters or {}
+        if filters.get("domains"):
+            clauses.append({"terms": {"domain": filters["domains"]}})
+        downloaded_at = {}
+        if filters.get("downloaded_after"):
+            downloaded_at["gte"] = filters["downloaded_after"]
+        if filters.get("downloaded_before"):
+            downloaded_at["lt"] = filters["downloaded_before"]
+        if downloaded_at:
+            clauses.append({"range": {"downloaded_at": downloaded_at}})
+        for field in ("width", "height"):
+            if filters.get(f"min_{field}"):
+                clauses.append({"range": {field: {"gte": filters[f"min_{field}"]}}})
+        query = {}
+        if clauses:
+            query["filter"] = clauses
+        if exclude_image_ids:
+            query["must_not"] = [{"terms": {"image_id": list(exclude_image_ids)}}]
+        return {"bool": query} if query else None
+
+    @staticmethod
+    def _build_knn_query(
+        embedding: list,
+        top_k: int,
+        num_candidates: Optional[int],
+        filter_clause: Optional[dict] = None,
+        effort: Optional[float] = None,
+    ) -> dict:
+        """
+        Build an approximate kNN query served by the HNSW graph of the embedding field.
+
+        num_candidates (scaled by effort, if given) is clamped to
+        [top_k, KNN_MAX_CANDIDATES]; Elasticsearch rejects requests where it is
+        lower than k. A filter clause is applied during the graph search, so k
+        filtered hits are still returned.
+        """
+        candidates = num_candidates or settings.KNN_NUM_CANDIDATES
+        if effort is not None:
+            candidates = int(candidates * effort)
+        candidates = min(max(candidates, top_k), settings.KNN_MAX_CANDIDATES)
+        query = {
+            "size": top_k,
+            "_source": RESULT_SOURCE_FIELDS,
+            "knn": {
+                "field": "embedding",
+                "query_vector": ElasticsearchClient._query_vector(embedding),
+                "k": top_k,
+                "num_candidates": candidates,
+            },
+        }
+        if filter_clause is not None:
+            query["knn"]["filter"] = filter_clause
+        return query
+
+    @staticmethod
+    def _build_exact_query(
+        embedding: list, top_k: int, filter_clause: Optional[dict] = None
+    ) -> dict:
+        """Build a brute-force script_score query scoring every (filtered) document."""
+        return {
+            "size": top_k,
+            "_source": RESULT_SOURCE_FIELDS,
+            "query": {
+                "script_score": {
+                    "query": filter_clause or {"match_all": {}},
+                    "script": {
+                        "source": "cosineSimilarity(params.query_vector, 'embedding') + 1.0",
+                        "params": {"query_vector": ElasticsearchClient._query_vector(embedding)}
+                    }
+                }
+            }
+        }
+
+    async def scan_embeddings(
+        self, batch_size: int = 1000
+    ) -> AsyncIterator[Tuple[int, str, list]]:
+        """
+        Stream every indexed embedding, e.g. to build an in-process vector store.
+
+        Args:
+            batch_size (int): Documents fetched per scroll page.
+
+        Yields:
+            Tuple[int, str, list]: (image_id, image_url, embedding).
+        """
+        from elasticsearch.helpers import async_scan
+
+        query = {}
+        self._request_vectors(query, ["image_id", "image_url"])
+        async for hit in async_scan(
+            self.es,
+            index=settings.ELASTICSEARCH_INDEX,
+            query=query,
+            size=batch_size,
+        ):
+            source = hit["_source"]
+            yield source["image_id"], source.get("image_url"), self._hit_vector(hit)
 
     async def close(self):
         """Close the Elasticsearch connection."""
@@ -0,0 +1,236 @@
+"""
+infrastructure/ivf_index.py
+
+Inverted-file (IVF) index for the in-process vector engine.
+
+Vectors are clustered around k-means centroids; each inverted list stores its
+members contiguously so a query scans only the ``nprobe`` lists whose
+centroids are closest, instead of the whole matrix.
+
+Files, written next to the vector store:
+- ivf_centroids.npy: L x D float32 unit-norm centroids
+- ivf_offsets.npy: L + 1 int64 list boundaries
+- ivf_rows.npy: N int64 store rows in list order
+- ivf_vectors.npy: N x D vectors in list order (store dtype)
+"""
+
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from infrastructure.vector_store import (
+    CHUNK_ROWS,
+    MemmapVectorStore,
+    normalize_rows,
+    top_k_indices,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def assign_to_centroids(
+    vectors: np.ndarray, centroids: np.ndarray, spherical: bool = True
+) -> np.ndarray:
+    """
+    Return the index of the closest centroid for every vector.
+
+    Spherical assignment maximizes the dot product; otherwise the nearest
+    centroid in L2 is found as argmax(x . c - |c|^2 / 2). Processed in chunks
+    so the N x L similarity matrix is never materialized.
+    """
+    bias = 0.0 if spherical else 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(vectors.shape[0], dtype=np.int64)
+    for start in range(0, vectors.shape[0], CHUNK_ROWS):
+        chunk = np.asarray(vectors[start:start + CHUNK_ROWS], dtype=np.float32)
+        assignments[start:start + CHUNK_ROWS] = np.argmax(chunk @ centroids.T - bias, axis=1)
+    return assignments
+
+
+def train_kmeans(
+    vectors: np.ndarray,
+    n_lists: int,
+    n_iter: int = 20,
+    seed: int = 0,
+    spherical: bool = True,
+) -> np.ndarray:
+    """
+    Train k-means centroids with Lloyd iterations.
+
+    Spherical k-means (cosine assignment, unit-norm centroids) partitions
+    normalized embeddings; plain L2 k-means is used for PQ sub-vectors.
+    Empty clusters are re-seeded from random training vectors.
+
+    Args:
+        vectors (np.ndarray): Training vectors (L2-normalized when spherical).
+        n_lists (int): Number of centroids.
+        n_iter (int): Lloyd iterations.
+        seed (int): Random seed.
+        spherical (bool): Normalize centroids and assign by dot product.
+
+    Returns:
+        np.ndarray: n_lists x D float32 centroids.
+    """
+    rng = np.random.default_rng(seed)
+    data = np.asarray(vectors, dtype=np.float32)
+    if data.shape[0] < n_lists:
+        raise ValueError(f"Need at least {n_lists} training vectors, got {data.shape[0]}")
+    centroids = data[rng.choice(data.shape[0], n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = assign_to_centroids(data, centroids, spherical=spherical)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = data[rng.choice(data.shape[0], int(empty.sum()), replace=False)]
+            counts[empty] = 1
+        if spherical:
+            centroids = normalize_rows(sums).astype(np.float32)
+        else:
+            centroids = (sums / counts[:, None]).astype(np.float32)
+    return centroids
+
+
+class IVFIndex:
+    """Coarse-quantizer index over the rows of a MemmapVectorStore."""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        vectors: np.ndarray,
+        nprobe: int = 8,
+    ):
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.vectors = vectors
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        store: MemmapVectorStore,
+        path: str,
+        n_lists: int,
+        sample_size: int = 100_000,
+        n_iter: int = 20,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """
+        Train centroids on a sample of the store and write the inverted lists.
+
+        The reordered vectors are streamed into a memory-mapped file, so
+        building never holds a second copy of the matrix in RAM.
+
+        Args:
+            store (MemmapVectorStore): Vectors to index.
+            path (str): Directory to write the index files into (the store directory).
+            n_lists (int): Number of inverted lists (sqrt(N) to 4 * sqrt(N) is typical).
+            sample_size (int): Vectors used for k-means training.
+            n_iter (int): k-means iterations.
+            seed (int): Random seed.
+
+        Returns:
+            IVFIndex: The written index, memory-mapped.
+        """
+        started = time.monotonic()
+        rng = np.random.default_rng(seed)
+        count = len(store)
+        sample_rows = np.sort(rng.choice(count, min(sample_size, count), replace=False))
+        centroids = train_kmeans(store.vectors[sample_rows], n_lists, n_iter=n_iter, seed=seed)
+
+        assignments = assign_to_centroids(store.vectors, centroids)
+        rows = np.argsort(assignments, kind="stable")
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+
+        vectors_tmp = os.path.join(path, "ivf_vectors.tmp.npy")
+        vectors = np.lib.format.open_memmap(
+            vectors_tmp, mode="w+", dtype=store.vectors.dtype, shape=store.vectors.shape
+        )
+        for start in range(0, count, CHUNK_ROWS):
+            vectors[start:start + CHUNK_ROWS] = store.vectors[rows[start:start + CHUNK_ROWS]]
+        vectors.flush()
+        del vectors
+        for name, array in (("ivf_offsets", offsets), ("ivf_rows", rows)):
+            tmp = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+        os.replace(vectors_tmp, os.path.join(path, "ivf_vectors.npy"))
+        # Centroids go last: their presence marks a complete index.
+        tmp = os.path.join(path, "ivf_centroids.tmp.npy")
+        np.save(tmp, centroids)
+        os.replace(tmp, os.path.join(path, "ivf_centroids.npy"))
+        logger.info(
+            "Built IVF index with %d lists over %d vectors in %.1fs.",
+            n_lists, count, time.monotonic() - started,
+        )
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> "IVFIndex":
+        """Memory-map an index saved in the store directory ``path``."""
+        def _load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        return cls(
+            centroids=np.asarray(_load("ivf_centroids"), dtype=np.float32),
+            offsets=np.asarray(_load("ivf_offsets")),
+            rows=_load("ivf_rows"),
+            vectors=_load("ivf_vectors"),
+            nprobe=nprobe,
+        )
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "ivf_centroids.npy"))
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None,
+        effort: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate top-k search over the ``nprobe`` closest inverted lists.
+
+        Args:
+            query (np.ndarray): L2-normalized query vector.
+            top_k (int): Number of results.
+            nprobe (Optional[int]): Lists to scan; defaults to self.nprobe.
+            effort (Optional[float]): Fraction of the lists to scan (at least one).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Store rows and cosine similarities,
+            best first.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = nprobe or self.nprobe
+        if effort is not None:
+            nprobe = max(int(nprobe * effort), 1)
+        nprobe = min(nprobe, self.n_lists)
+        probes = top_k_indices(self.centroids @ query, nprobe)
+        row_parts, score_parts = [], []
+        for probe in probes:
+            start, end = self.offsets[probe], self.offsets[probe + 1]
+            if start == end:
+                continue
+            block = np.asarray(self.vectors[start:end], dtype=np.float32)
+            score_parts.append(block @ query)
+            row_parts.append(self.rows[start:end])
+        if not score_parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        scores = np.concatenate(score_parts)
+        rows = np.concatenate(row_parts)
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best]
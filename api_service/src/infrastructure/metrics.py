@@ -4,8 +4,13 @@ infrastructure/metrics.py
 Defines Prometheus metrics and starts a metrics server for the API service.
 """
 
-from prometheus_client import Counter, Histogram, start_http_server
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 import logging
+import os
+import time
+
+from infrastructure.request_timing import add_stage
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +26,151 @@ query_latency = Histogram(
     "ui_service_query_latency_seconds",
     "Time taken to process search queries",
 )
+encode_queue_wait = Histogram(
+    "ui_service_encode_queue_wait_seconds",
+    "Time text encodes wait before an inference worker picks them up",
+)
+encode_inference_latency = Histogram(
+    "ui_service_encode_inference_seconds",
+    "Time spent running CLIP text inference",
+)
+encode_batch_size = Histogram(
+    "ui_service_encode_batch_size",
+    "Number of queries encoded together by the micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+encode_batch_wait = Histogram(
+    "ui_service_encode_batch_wait_seconds",
+    "Time queries wait in the micro-batcher before their batch is dispatched",
+    buckets=(0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25),
+)
+embedding_cache_hits_total = Counter(
+    "ui_service_embedding_cache_hits_total",
+    "Query embedding cache hits",
+    ["tier"],
+)
+embedding_cache_misses_total = Counter(
+    "ui_service_embedding_cache_misses_total",
+    "Query embedding cache misses",
+    ["tier"],
+)
+embedding_cache_evictions_total = Counter(
+    "ui_service_embedding_cache_evictions_total",
+    "Query embeddings evicted from the in-process cache",
+    ["reason"],
+)
+result_cache_requests_total = Counter(
+    "ui_service_result_cache_requests_total",
+    "Ranked result cache lookups by outcome",
+    ["result"],
+)
+image_vector_cache_requests_total = Counter(
+    "ui_service_image_vector_cache_requests_total",
+    "Stored image vector cache lookups for similar-image searches by outcome",
+    ["result"],
+)
+coalesced_requests_total = Counter(
+    "ui_service_coalesced_requests_total",
+    "Requests served by joining an identical in-flight request",
+    ["operation"],
+)
+admission_shed_total = Counter(
+    "ui_service_admission_shed_total",
+    "Search requests rejected with 503 by admission control",
+    ["reason"],
+)
+admission_queue_depth = Gauge(
+    "ui_service_admission_queue_depth",
+    "Search requests waiting for an admission slot",
+    multiprocess_mode="livesum",
+)
+admission_in_flight = Gauge(
+    "ui_service_admission_in_flight",
+    "Search requests holding an admission slot",
+    multiprocess_mode="livesum",
+)
+admission_queue_wait = Histogram(
+    "ui_service_admission_queue_wait_seconds",
+    "Time admitted search requests waited for a slot",
+    buckets=(0.0, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+search_effort_level = Gauge(
+    "ui_service_search_effort_level",
+    "Current search effort level (0 is full effort; higher levels search less)",
+    multiprocess_mode="max",
+)
+search_timeouts_total = Counter(
+    "ui_service_search_timeouts_total",
+    "Vector searches that hit the latency budget and returned partial results",
+)
+search_stage_latency = Histogram(
+    "ui_service_search_stage_seconds",
+    "Time spent in each stage of a search request",
+    ["stage"],
+    # Stages range from sub-millisecond (tokenize, serialize) to CLIP inference.
+    buckets=(
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+        0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+    ),
+)
+search_stage_errors_total = Counter(
+    "ui_service_search_stage_errors_total",
+    "Search request stages that raised",
+    ["stage"],
+)
+
+response_bytes = Histogram(
+    "ui_service_response_bytes",
+    "Size of serialized search response bodies",
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144),
+)
+response_serialization_latency = Histogram(
+    "ui_service_response_serialization_seconds",
+    "Time spent serializing search responses to JSON",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+startup_phase_duration = Gauge(
+    "ui_service_startup_phase_seconds",
+    "Time the last start-up spent in each phase (model_load, warmup)",
+    ["phase"],
+    multiprocess_mode="max",
+)
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record a stage duration in search_stage_latency and the open request timings."""
+    search_stage_latency.labels(stage=stage).observe(seconds)
+    add_stage(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """Record the wall time of the enclosed block with record_stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        search_stage_errors_total.labels(stage=stage).inc()
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def metrics_registry():
+    """
+    Return the registry to expose.
+
+    With PROMETHEUS_MULTIPROC_DIR set (pre-forked workers), every process
+    writes its samples to files in that directory and this registry
+    aggregates them; otherwise it is the default in-process registry.
+    """
+    from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
 
 def start_metrics_server(port: int = 8002) -> None:
     """
@@ -30,7 +180,10 @@ def start_metrics_server(port: int = 8002) -> None:
         port (int): Port number for metrics server.
     """
     try:
-        start_http_server(port)
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            start_http_server(port, registry=metrics_registry())
+        else:
+            start_http_server(port)
         logger.info("Prometheus metrics server started on port %d", port)
     except Exception as e:
         logger.exception("Failed to start Prometheus metrics server: %s", e)
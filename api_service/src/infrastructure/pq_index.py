@@ -0,0 +1,202 @@
+"""
+infrastructure/pq_index.py
+
+Product-quantized (PQ) index for the in-process vector engine.
+
+Each D-dim vector is split into M sub-vectors and every sub-vector is replaced
+by the id of its nearest centroid in a 256-entry codebook, so an image costs M
+bytes of codes instead of 2 * D (float16) or 4 * D (float32) bytes. A query
+builds an M x 256 table of sub-vector dot products once and scores every code
+by table lookups (asymmetric distance computation). The best ``rerank``
+candidates are then re-scored exactly against the full vectors, which are
+read lazily from the store's memory map.
+
+Files, written next to the vector store:
+- pq_codebooks.npy: M x 256 x (D / M) float32 codebooks
+- pq_codes.npy: N x M uint8 codes, row-aligned with the store
+"""
+
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from infrastructure.ivf_index import assign_to_centroids, train_kmeans
+from infrastructure.vector_store import CHUNK_ROWS, MemmapVectorStore, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+CODEBOOK_SIZE = 256
+
+
+class PQCodec:
+    """Trainable product quantizer with uint8 codes."""
+
+    def __init__(self, codebooks: np.ndarray):
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)
+        self.m, self.ksub, self.dsub = self.codebooks.shape
+        # Offsets turning per-subspace codes into indices of the flattened table.
+        self._table_offsets = (np.arange(self.m) * self.ksub).astype(np.intp)
+
+    @property
+    def dims(self) -> int:
+        return self.m * self.dsub
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, m: int, n_iter: int = 20, seed: int = 0) -> "PQCodec":
+        """
+        Train one 256-centroid L2 codebook per sub-space.
+
+        Args:
+            vectors (np.ndarray): N x D training vectors; D must be divisible by m.
+            m (int): Number of sub-quantizers (bytes per code).
+            n_iter (int): k-means iterations per sub-space.
+            seed (int): Random seed.
+
+        Returns:
+            PQCodec: The trained codec.
+        """
+        data = np.asarray(vectors, dtype=np.float32)
+        dims = data.shape[1]
+        if dims % m:
+            raise ValueError(f"Dimension {dims} is not divisible by {m} sub-quantizers")
+        dsub = dims // m
+        codebooks = np.stack([
+            train_kmeans(
+                data[:, j * dsub:(j + 1) * dsub], CODEBOOK_SIZE,
+                n_iter=n_iter, seed=seed + j, spherical=False,
+            )
+            for j in range(m)
+        ])
+        return cls(codebooks)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Return N x M uint8 codes for N x D vectors."""
+        data = np.asarray(vectors, dtype=np.float32)
+        codes = np.empty((data.shape[0], self.m), dtype=np.uint8)
+        for j in range(self.m):
+            sub = data[:, j * self.dsub:(j + 1) * self.dsub]
+            codes[:, j] = assign_to_centroids(sub, self.codebooks[j], spherical=False)
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate vectors from codes."""
+        parts = [self.codebooks[j][codes[:, j]] for j in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def distance_table(self, query: np.ndarray) -> np.ndarray:
+        """Return the flattened M * 256 table of sub-vector dot products."""
+        sub_queries = np.asarray(query, dtype=np.float32).reshape(self.m, self.dsub)
+        return np.einsum("mkd,md->mk", self.codebooks, sub_queries).ravel()
+
+    def score(self, table: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate dot products of the query behind ``table`` with ``codes``."""
+        scores = np.empty(codes.shape[0], dtype=np.float32)
+        for start in range(0, codes.shape[0], CHUNK_ROWS):
+            chunk = np.asarray(codes[start:start + CHUNK_ROWS], dtype=np.intp)
+            scores[start:start + CHUNK_ROWS] = table[chunk + self._table_offsets].sum(axis=1)
+        return scores
+
+
+class PQIndex:
+    """PQ codes for every store row, with exact re-rank from the store."""
+
+    def __init__(
+        self, store: MemmapVectorStore, codec: PQCodec, codes: np.ndarray, rerank: int = 100
+    ):
+        self.store = store
+        self.codec = codec
+        self.codes = codes
+        self.rerank = rerank
+
+    @classmethod
+    def build(
+        cls,
+        store: MemmapVectorStore,
+        path: str,
+        m: int,
+        sample_size: int = 100_000,
+        n_iter: int = 20,
+        seed: int = 0,
+    ) -> "PQIndex":
+        """
+        Train codebooks on a sample of the store, encode every row and write
+        the index files into ``path``.
+
+        Returns:
+            PQIndex: The written index.
+        """
+        started = time.monotonic()
+        rng = np.random.default_rng(seed)
+        count = len(store)
+        sample_rows = np.sort(rng.choice(count, min(sample_size, count), replace=False))
+        codec = PQCodec.train(store.vectors[sample_rows], m, n_iter=n_iter, seed=seed)
+        codes = np.empty((count, m), dtype=np.uint8)
+        for start in range(0, count, CHUNK_ROWS):
+            codes[start:start + CHUNK_ROWS] = codec.encode(store.vectors[start:start + CHUNK_ROWS])
+        for name, array in (("pq_codes", codes), ("pq_codebooks", codec.codebooks)):
+            tmp = os.path.join(path, f"{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+        logger.info(
+            "Built PQ index with %d sub-quantizers over %d vectors in %.1fs "
+            "(%d bytes per vector).",
+            m, count, time.monotonic() - started, m,
+        )
+        return cls(store, codec, codes)
+
+    @classmethod
+    def load(cls, store: MemmapVectorStore, path: str, rerank: int = 100) -> "PQIndex":
+        """
+        Load the codes into memory; full vectors stay memory-mapped in the store.
+        """
+        codebooks = np.load(os.path.join(path, "pq_codebooks.npy"))
+        codes = np.load(os.path.join(path, "pq_codes.npy"))
+        if codes.shape[0] != len(store):
+            raise ValueError(
+                f"PQ codes cover {codes.shape[0]} rows but the store has {len(store)}; retrain."
+            )
+        return cls(store, PQCodec(codebooks), codes, rerank=rerank)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, "pq_codebooks.npy"))
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        rerank: Optional[int] = None,
+        effort: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ADC scan over all codes, then exact re-rank of the best candidates.
+
+        Args:
+            query (np.ndarray): L2-normalized query vector.
+            top_k (int): Number of results.
+            rerank (Optional[int]): Candidates re-scored exactly; defaults to
+                self.rerank. 0 returns the approximate ranking.
+            effort (Optional[float]): Fraction of the re-rank candidates to
+                re-score.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Store rows and cosine similarities
+            (approximate when rerank is 0), best first.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        rerank = self.rerank if rerank is None else rerank
+        if effort is not None and rerank:
+            rerank = max(int(rerank * effort), 1)
+        approximate = self.codec.score(self.codec.distance_table(query), self.codes)
+        candidates = top_k_indices(approximate, max(rerank, top_k))
+        if rerank == 0:
+            best = candidates[:top_k]
+            return best, approximate[best]
+        # Read candidates in row order so the memory map is accessed sequentially.
+        candidates = np.sort(candidates)
+        exact = np.asarray(self.store.vectors[candidates], dtype=np.float32) @ query
+        best = top_k_indices(exact, top_k)
+        return candidates[best], exact[best]
@@ -0,0 +1,53 @@
+"""
+infrastructure/process_memory.py
+
+Resident-memory accounting for the API processes, read from /proc (Linux).
+
+RSS counts every resident page a process maps, so summing it over pre-forked
+workers counts the shared model weights once per worker. PSS divides each
+shared page between the processes mapping it; its sum is the real footprint.
+"""
+
+import os
+from typing import Dict, List
+
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+}
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """
+    Return rss, pss, shared_* and private_* sizes in bytes for a process.
+
+    Args:
+        pid (int): Process id.
+
+    Returns:
+        Dict[str, int]: Sizes from /proc/<pid>/smaps_rollup.
+    """
+    usage = {name: 0 for name in _FIELDS.values()}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            field = _FIELDS.get(parts[0].rstrip(":"))
+            if field is not None:
+                usage[field] = int(parts[1]) * 1024
+    return usage
+
+
+def child_pids(pid: int) -> List[int]:
+    """Return the direct children of a process."""
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            continue
+    return sorted(set(children))
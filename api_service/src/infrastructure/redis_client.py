@@ -0,0 +1,42 @@
+"""
+infrastructure/redis_client.py
+
+Redis client for the cache tiers shared by all API replicas.
+"""
+
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from infrastructure.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisClient:
+    """Redis client storing raw bytes values."""
+
+    def __init__(self):
+        self.redis = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        # Milliseconds, at least one: Redis rejects a zero expiry, which ex=int(ttl)
+        # would send for any lifetime under a second.
+        px = max(int(ttl * 1000), 1) if ttl else None
+        await self.redis.set(key, value, px=px)
+
+    async def close(self) -> None:
+        """Close the Redis connection."""
+        await self.redis.close()
+        logger.info("Redis connection closed.")
+
+
+redis_client = RedisClient()
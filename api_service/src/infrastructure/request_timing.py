@@ -0,0 +1,77 @@
+"""
+infrastructure/request_timing.py
+
+Per-request stage timings.
+
+collect_stages() opens a collection for the enclosed block. Durations added
+with add_stage while it is open are summed per stage, including those added
+by tasks the block starts (they inherit the context). The collection is
+rendered as a Server-Timing header so a single slow request can be broken
+down without correlating histograms.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, float]]:
+    """Collect stage durations (in seconds) recorded by the enclosed block."""
+    stages: Dict[str, float] = {}
+    token = _stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _stages.reset(token)
+
+
+def current_stages() -> Optional[Dict[str, float]]:
+    """The open collection, or None outside collect_stages."""
+    return _stages.get()
+
+
+def add_stage(stage: str, seconds: float) -> None:
+    """Add a duration to a stage of the open collection, if any."""
+    stages = _stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+def merge_stages(target: Optional[Dict[str, float]], source: Dict[str, float]) -> None:
+    """
+    Add every stage of ``source`` to ``target``.
+
+    Used when work shared by several requests (a micro-batch, a coalesced
+    search) ran in its own collection.
+
+    Args:
+        target (Optional[Dict[str, float]]): A request's collection; nothing
+            is done when it is None.
+        source (Dict[str, float]): Durations to add.
+    """
+    if target is None:
+        return
+    for stage, seconds in source.items():
+        target[stage] = target.get(stage, 0.0) + seconds
+
+
+def server_timing_header(stages: Dict[str, float], total: Optional[float] = None) -> str:
+    """
+    Render stage durations as a Server-Timing header value.
+
+    Args:
+        stages (Dict[str, float]): Durations in seconds, in recording order.
+        total (Optional[float]): Whole request time in seconds, appended as
+            the "total" metric.
+
+    Returns:
+        str: e.g. ``tokenize;dur=0.42, encode;dur=11.90, total;dur=15.03``
+        (milliseconds).
+    """
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in stages.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
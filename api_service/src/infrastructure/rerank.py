@@ -0,0 +1,37 @@
+"""
+infrastructure/rerank.py
+
+Exact re-ranking for two-stage retrieval.
+
+A cheap first pass (HNSW, IVF or PQ) returns a few hundred candidates with
+their stored vectors; they are re-scored here with exact cosine similarity in
+one matrix-vector product.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+from infrastructure.vector_store import normalize_rows, top_k_indices
+
+
+def rerank_exact(query, vectors, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Order candidates by exact cosine similarity to the query.
+
+    Args:
+        query: Query embedding (list or array of length D).
+        vectors: Candidate vectors, K x D (list of lists or array).
+        top_k (int): Number of candidates to keep.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Candidate positions and cosine
+        similarities, best first.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    query = normalize_rows(np.asarray(query, dtype=np.float32))
+    cosines = normalize_rows(matrix) @ query
+    order = top_k_indices(cosines, top_k)
+    return order, cosines[order]
@@ -0,0 +1,155 @@
+"""
+infrastructure/text_tokenizer.py
+
+Batched CLIP tokenizer with caches.
+
+clip.tokenize cleans every text with ftfy, splits it with CLIP's regex, runs
+the BPE merge loop in pure Python and copies each row into a fresh tensor.
+ClipTokenizer produces the same token ids with less work per query:
+
+- whole texts are cached (bounded LRU), so a repeated query skips cleaning,
+  splitting and BPE entirely;
+- BPE merges are memoized per word in a bounded cache that maps straight to
+  vocabulary ids;
+- a batch is padded into one preallocated int32 array with a single masked
+  assignment.
+
+The vocabulary, merge ranks and split pattern are taken from CLIP's own
+SimpleTokenizer, so there is no second copy of the BPE tables to keep in sync.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+START_TOKEN = "<|startoftext|>"
+END_TOKEN = "<|endoftext|>"
+
+
+class ClipTokenizer:
+    """Drop-in replacement for clip.tokenize returning a numpy array."""
+
+    def __init__(
+        self,
+        context_length: int = 77,
+        cache_size: int = 10000,
+        word_cache_size: int = 50000,
+    ):
+        """
+        Args:
+            context_length (int): Tokens per row, including the start and end
+                tokens.
+            cache_size (int): Texts whose token ids are kept; 0 disables the
+                text cache.
+            word_cache_size (int): Words whose BPE ids are kept.
+        """
+        from clip.simple_tokenizer import SimpleTokenizer, basic_clean, whitespace_clean
+
+        base = SimpleTokenizer()
+        self.context_length = context_length
+        self.cache_size = cache_size
+        self._encoder = base.encoder
+        self._bpe_ranks = base.bpe_ranks
+        self._byte_encoder = base.byte_encoder
+        self._pattern = base.pat
+        self._clean = lambda text: whitespace_clean(basic_clean(text)).lower()
+        self.start_id = self._encoder[START_TOKEN]
+        self.end_id = self._encoder[END_TOKEN]
+        self._word_ids = lru_cache(maxsize=word_cache_size)(self._bpe_ids)
+        self._texts: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        # Inference threads share one tokenizer.
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def tokenize(self, texts: List[str], truncate: bool = False) -> np.ndarray:
+        """
+        Tokenize a batch exactly like clip.tokenize.
+
+        Args:
+            texts (List[str]): Input texts.
+            truncate (bool): Cut texts longer than the context (keeping the
+                end token) instead of raising.
+
+        Returns:
+            np.ndarray: int32 array of shape (len(texts), context_length),
+            zero-padded.
+
+        Raises:
+            RuntimeError: If a text is too long and truncate is False.
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+        rows = [self.encode(text) for text in texts]
+        lengths = np.fromiter((len(row) for row in rows), dtype=np.int64, count=len(rows))
+        too_long = lengths > self.context_length
+        if too_long.any():
+            if not truncate:
+                index = int(np.argmax(too_long))
+                raise RuntimeError(
+                    f"Input {texts[index]} is too long for context length {self.context_length}"
+                )
+            rows = [
+                row if len(row) <= self.context_length
+                else row[:self.context_length - 1] + (self.end_id,)
+                for row in rows
+            ]
+            lengths = np.minimum(lengths, self.context_length)
+        result = np.zeros((len(rows), self.context_length), dtype=np.int32)
+        if rows:
+            mask = np.arange(self.context_length) < lengths[:, None]
+            result[mask] = np.fromiter(
+                (token for row in rows for token in row), dtype=np.int32, count=int(lengths.sum())
+            )
+        return result
+
+    def encode(self, text: str) -> Tuple[int, ...]:
+        """Token ids of one text, with the start and end tokens."""
+        if self.cache_size <= 0:
+            return self._encode(text)
+        with self._lock:
+            ids = self._texts.get(text)
+            if ids is not None:
+                self._texts.move_to_end(text)
+                return ids
+        ids = self._encode(text)
+        with self._lock:
+            self._texts[text] = ids
+            if len(self._texts) > self.cache_size:
+                self._texts.popitem(last=False)
+        return ids
+
+    def _encode(self, text: str) -> Tuple[int, ...]:
+        ids = [self.start_id]
+        for word in self._pattern.findall(self._clean(text)):
+            word = "".join(self._byte_encoder[b] for b in word.encode("utf-8"))
+            ids.extend(self._word_ids(word))
+        ids.append(self.end_id)
+        return tuple(ids)
+
+    def _bpe_ids(self, word: str) -> Tuple[int, ...]:
+        """Vocabulary ids of one byte-encoded word (CLIP's merge loop)."""
+        if word in (START_TOKEN, END_TOKEN):
+            return (self._encoder[word],)
+        symbols = tuple(word[:-1]) + (word[-1] + "</w>",)
+        while len(symbols) > 1:
+            pairs = set(zip(symbols, symbols[1:]))
+            bigram = min(pairs, key=lambda pair: self._bpe_ranks.get(pair, float("inf")))
+            if bigram not in self._bpe_ranks:
+                break
+            first, second = bigram
+            merged = []
+            i = 0
+            while i < len(symbols):
+                if i < len(symbols) - 1 and symbols[i] == first and symbols[i + 1] == second:
+                    merged.append(first + second)
+                    i += 2
+                else:
+                    merged.append(symbols[i])
+                    i += 1
+            symbols = tuple(merged)
+        return tuple(self._encoder[symbol] for symbol in symbols)
@@ -0,0 +1,468 @@
+"""
+infrastructure/vector_store.py
+
+In-process vector search over a memory-mapped embedding matrix.
+
+A store is a directory holding:
+- vectors.npy: N x D L2-normalized embeddings (float16 or float32)
+- image_ids.npy: N int64 image ids, row-aligned with the vectors
+- id_order.npy: argsort of image_ids, for id -> row lookups
+- urls.bin / url_offsets.npy: UTF-8 image URLs concatenated, with N + 1 offsets
+- meta.json: dimension, dtype, count, model and build generation
+
+Every array is opened with np.load(mmap_mode="r"), so loading takes
+milliseconds and all worker processes share the same page-cache pages.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from infrastructure.metrics import timed_stage
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matmul when the matrix is float16, bounding the float32
+# working copy to CHUNK_ROWS x D.
+CHUNK_ROWS = 65536
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k highest scores, best first.
+
+    argpartition selects the top k in O(N); only those k are sorted.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row, leaving all-zero rows unchanged."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def cosine_to_score(cosine: np.ndarray) -> np.ndarray:
+    """Map cosine similarity to Elasticsearch's kNN cosine score, (1 + cos) / 2."""
+    return (1.0 + cosine) / 2.0
+
+
+def _open_bytes(path: str) -> np.ndarray:
+    """Memory-map a byte file; np.memmap cannot map an empty file."""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class MemmapVectorStore:
+    """Read-only, memory-mapped embedding matrix with ids and URLs."""
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        image_ids: np.ndarray,
+        url_bytes: np.ndarray,
+        url_offsets: np.ndarray,
+        id_order: np.ndarray,
+        meta: dict,
+    ):
+        self.vectors = vectors
+        self.image_ids = image_ids
+        self.url_bytes = url_bytes
+        self.url_offsets = url_offsets
+        self.id_order = id_order
+        self.meta = meta
+
+    @classmethod
+    def load(cls, path: str) -> "MemmapVectorStore":
+        """
+        Open a store directory without reading the vectors into memory.
+
+        Args:
+            path (str): Store directory written by write_vector_store.
+
+        Returns:
+            MemmapVectorStore: The opened store.
+        """
+        started = time.monotonic()
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        store = cls(
+            vectors=np.load(os.path.join(path, "vectors.npy"), mmap_mode="r"),
+            image_ids=np.load(os.path.join(path, "image_ids.npy"), mmap_mode="r"),
+            url_bytes=_open_bytes(os.path.join(path, "urls.bin")),
+            url_offsets=np.load(os.path.join(path, "url_offsets.npy"), mmap_mode="r"),
+            id_order=np.load(os.path.join(path, "id_order.npy"), mmap_mode="r"),
+            meta=meta,
+        )
+        logger.info(
+            "Loaded vector store %s (%d x %d %s) in %.1f ms.",
+            path, meta["count"], meta["dims"], meta["dtype"],
+            (time.monotonic() - started) * 1000,
+        )
+        return store
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    @property
+    def generation(self) -> int:
+        return self.meta.get("generation", 0)
+
+    def url(self, row: int) -> str:
+        start, end = self.url_offsets[row], self.url_offsets[row + 1]
+        return self.url_bytes[start:end].tobytes().decode("utf-8")
+
+    def rows_for_ids(self, image_ids: List[int]) -> np.ndarray:
+        """
+        Map image ids to row numbers; unknown ids map to -1.
+        """
+        wanted = np.asarray(image_ids, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(wanted.shape, -1, dtype=np.int64)
+        positions = np.searchsorted(self.image_ids, wanted, sorter=self.id_order)
+        rows = self.id_order[np.minimum(positions, len(self) - 1)]
+        return np.where(self.image_ids[rows] == wanted, rows, -1)
+
+    def score_all(self, query: np.ndarray) -> np.ndarray:
+        """
+        Compute cosine similarity between the query and every stored vector.
+
+        Args:
+            query (np.ndarray): L2-normalized query vector of length D.
+
+        Returns:
+            np.ndarray: N float32 cosine similarities.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start:start + CHUNK_ROWS], dtype=np.float32)
+            scores[start:start + CHUNK_ROWS] = chunk @ query
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact top-k search.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row numbers and cosine similarities,
+            best first.
+        """
+        scores = self.score_all(query)
+        rows = top_k_indices(scores, top_k)
+        return rows, scores[rows]
+
+    def search_batch(
+        self, queries: np.ndarray, top_k: int
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Exact top-k search for several queries in one pass over the matrix.
+
+        Each chunk of rows is scored against all queries with one matrix
+        product, and only the running top k per query is kept.
+
+        Args:
+            queries (np.ndarray): B x D L2-normalized query vectors.
+            top_k (int): Results per query.
+
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: Rows and cosine similarities
+            per query, best first.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        best_rows = np.empty((queries.shape[0], 0), dtype=np.int64)
+        best_scores = np.empty((queries.shape[0], 0), dtype=np.float32)
+        for start in range(0, len(self), CHUNK_ROWS):
+            chunk = np.asarray(self.vectors[start:start + CHUNK_ROWS], dtype=np.float32)
+            scores = queries @ chunk.T
+            k = min(top_k, scores.shape[1])
+            if k <= 0:
+                break
+            picked = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_rows = np.concatenate([best_rows, picked + start], axis=1)
+            best_scores = np.concatenate(
+                [best_scores, np.take_along_axis(scores, picked, axis=1)], axis=1
+            )
+            if best_rows.shape[1] > top_k:
+                keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return list(zip(best_rows, best_scores))
+
+
+async def write_vector_store(
+    path: str,
+    records: AsyncIterator[Tuple[int, str, list]],
+    dims: int,
+    dtype: str = "float16",
+    model: Optional[str] = None,
+) -> int:
+    """
+    Write a store from (image_id, image_url, embedding) records.
+
+    Records are streamed to temporary files first, then the final arrays are
+    written into ``path + ".tmp"`` and swapped into place with a rename, so
+    processes never open a half-written store.
+
+    Args:
+        path (str): Destination directory.
+        records: Async iterator of (image_id, image_url, embedding).
+        dims (int): Embedding dimension.
+        dtype (str): "float16" or "float32" storage for the vectors.
+        model (Optional[str]): Embedding model name recorded in meta.json.
+
+    Returns:
+        int: Number of vectors written.
+    """
+    np_dtype = np.dtype(dtype)
+    staging = f"{path}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    raw_path = os.path.join(staging, "vectors.raw")
+    image_ids: List[int] = []
+    url_offsets: List[int] = [0]
+    with open(raw_path, "wb") as raw, open(os.path.join(staging, "urls.bin"), "wb") as urls:
+        async for image_id, image_url, embedding in records:
+            vector = np.asarray(embedding, dtype=np.float32)
+            if vector.shape != (dims,):
+                logger.warning("Skipping image_id %s with dimension %s", image_id, vector.shape)
+                continue
+            raw.write(normalize_rows(vector[None, :]).astype(np_dtype).tobytes())
+            encoded = (image_url or "").encode("utf-8")
+            urls.write(encoded)
+            image_ids.append(int(image_id))
+            url_offsets.append(url_offsets[-1] + len(encoded))
+
+    count = len(image_ids)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(staging, "vectors.npy"), mode="w+", dtype=np_dtype, shape=(count, dims)
+    )
+    if count:
+        vectors[:] = np.memmap(raw_path, dtype=np_dtype, mode="r", shape=(count, dims))
+    vectors.flush()
+    del vectors
+    os.remove(raw_path)
+    ids = np.asarray(image_ids, dtype=np.int64)
+    np.save(os.path.join(staging, "image_ids.npy"), ids)
+    np.save(os.path.join(staging, "id_order.npy"), np.argsort(ids, kind="stable"))
+    np.save(os.path.join(staging, "url_offsets.npy"), np.asarray(url_offsets, dtype=np.int64))
+    with open(os.path.join(staging, "meta.json"), "w") as f:
+        json.dump(
+            {
+                "count": count,
+                "dims": dims,
+                "dtype": np_dtype.name,
+                "model": model,
+                "generation": time.time_ns(),
+            },
+            f,
+        )
+
+    if os.path.exists(path):
+        previous = f"{path}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        os.rename(path, previous)
+        os.rename(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.rename(staging, path)
+    logger.info("Wrote vector store %s with %d vectors.", path, count)
+    return count
+
+
+class VectorStoreSearchClient:
+    """
+    Search backend answering queries from a MemmapVectorStore.
+
+    Exposes the same coroutine interface as ElasticsearchClient. Scoring runs in
+    a worker thread (NumPy releases the GIL during the matmul) so the event loop
+    stays responsive.
+
+    When an index (e.g. IVFIndex) is given, ranking goes through its
+    ``search(query, top_k)`` instead of the exact scan, except in exact mode;
+    ids and URLs still come from the store. Two-stage mode takes
+    ``rerank_depth`` candidates from the index and re-ranks them exactly
+    against the store's vectors. A reduced search ``effort`` scales the index's
+    probes or re-rank candidates and the two-stage depth; the exact scan has no
+    such knob. The store holds no image
+    metadata, so metadata filters are not supported.
+    """
+
+    supports_filters = False
+
+    def __init__(self, store: MemmapVectorStore, index=None, rerank_depth: int = 200):
+        self.store = store
+        self.index = index if index is not None else store
+        self.rerank_depth = rerank_depth
+
+    @property
+    def supports_two_stage(self) -> bool:
+        """True with an approximate index; re-ranking the flat scan changes nothing."""
+        return self.index is not self.store
+
+    def _ranker(self, mode: Optional[str]):
+        """The exact scan for exact mode, the configured index otherwise."""
+        return self.store if mode == "exact" else self.index
+
+    def _search_two_stage(self, query: np.ndarray, depth: int) -> Tuple[np.ndarray, np.ndarray]:
+        with timed_stage("candidates"):
+            rows, _ = self.index.search(query, depth)
+        with timed_stage("rerank"):
+            # Row order keeps reads from the memory map sequential.
+            rows = np.sort(rows)
+            cosines = np.asarray(self.store.vectors[rows], dtype=np.float32) @ query
+            best = top_k_indices(cosines, depth)
+        return rows[best], cosines[best]
+
+    def _index_search(
+        self, query: np.ndarray, top_k: int, effort: Optional[float] = None,
+        mode: Optional[str] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        ranker = self._ranker(mode)
+        if effort is None or ranker is self.store:
+            return ranker.search(query, top_k)
+        return ranker.search(query, top_k, effort=effort)
+
+    async def _rank(
+        self, embedding, top_k: int, mode: Optional[str] = None,
+        rerank_depth: Optional[int] = None, exclude_image_ids: Optional[List[int]] = None,
+        effort: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        query = np.asarray(embedding, dtype=np.float32)
+        # Excluded images can only displace that many results.
+        wanted = top_k + len(exclude_image_ids or ())
+        if mode == "two_stage":
+            full_depth = rerank_depth or self.rerank_depth
+            depth = full_depth
+            if effort is not None:
+                # Never fewer candidates than the requested ranks full effort serves.
+                depth = max(int(depth * min(effort, 1.0)), min(top_k, full_depth), 1)
+            rows, cosines = await asyncio.to_thread(
+                self._search_two_stage, query, depth + wanted - top_k
+            )
+        else:
+            rows, cosines = await asyncio.to_thread(
+                self._index_search, query, wanted, effort, mode
+            )
+        if exclude_image_ids:
+            keep = ~np.isin(self.store.image_ids[rows], exclude_image_ids)
+            rows, cosines = rows[keep], cosines[keep]
+        return rows[:top_k], cosines[:top_k]
+
+    def _results(self, rows: np.ndarray, cosines: np.ndarray) -> List[dict]:
+        scores = cosine_to_score(cosines)
+        return [
+            {
+                "image_id": int(self.store.image_ids[row]),
+                "image_url": self.store.url(row),
+                "score": float(score),
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    async def search_embeddings(
+        self, embedding, top_k: int = 5, mode: Optional[str] = None,
+        rerank_depth: Optional[int] = None, exclude_image_ids: Optional[List[int]] = None,
+        effort: Optional[float] = None, **kwargs,
+    ) -> list:
+        rows, cosines = await self._rank(
+            embedding, top_k, mode, rerank_depth, exclude_image_ids, effort
+        )
+        return self._results(rows, cosines)
+
+    def _search_batch(
+        self, queries: np.ndarray, top_k: int, mode: Optional[str]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        if mode == "two_stage":
+            ranked = [self._search_two_stage(query, self.rerank_depth) for query in queries]
+            return [(rows[:top_k], cosines[:top_k]) for rows, cosines in ranked]
+        ranker = self._ranker(mode)
+        if ranker is self.store:
+            return self.store.search_batch(queries, top_k)
+        return [ranker.search(query, top_k) for query in queries]
+
+    async def msearch_embeddings(
+        self, embeddings: List, top_k: int = 5, mode: Optional[str] = None, **kwargs
+    ) -> List[list]:
+        if not embeddings:
+            return []
+        queries = np.asarray([np.asarray(e, dtype=np.float32) for e in embeddings])
+        ranked = await asyncio.to_thread(self._search_batch, queries, top_k, mode)
+        return [self._results(rows, cosines) for rows, cosines in ranked]
+
+    async def search_page(
+        self,
+        embedding,
+        size: int,
+        offset: int = 0,
+        mode: Optional[str] = None,
+        with_cursor: bool = False,
+        rerank_depth: Optional[int] = None,
+        exclude_image_ids: Optional[List[int]] = None,
+        effort: Optional[float] = None,
+        **kwargs,
+    ) -> Tuple[list, Optional[dict]]:
+        rows, cosines = await self._rank(
+            embedding, offset + size, mode, rerank_depth, exclude_image_ids, effort
+        )
+        results = self._results(rows[offset:], cosines[offset:])
+        next_offset = offset + len(results)
+        next_state = None
+        if with_cursor and len(results) == size and next_offset < len(self.store):
+            if mode == "two_stage":
+                if next_offset < (rerank_depth or self.rerank_depth):
+                    next_state = {
+                        "mode": mode, "offset": next_offset, "rerank_depth": rerank_depth,
+                    }
+            else:
+                next_state = {"mode": mode, "offset": next_offset}
+        return results, next_state
+
+    async def search_ranked_ids(
+        self, embedding, top_k: int, mode: Optional[str] = None,
+        rerank_depth: Optional[int] = None, effort: Optional[float] = None, **kwargs,
+    ) -> Tuple[list, list, bool]:
+        rows, cosines = await self._rank(embedding, top_k, mode, rerank_depth, effort=effort)
+        # In-process searches have no timeout; the ranking is always complete.
+        return self.store.image_ids[rows].tolist(), cosine_to_score(cosines).tolist(), False
+
+    async def fetch_embedding(self, image_id: int) -> Optional[np.ndarray]:
+        row = self.store.rows_for_ids([image_id])[0]
+        if row < 0:
+            return None
+        return np.asarray(self.store.vectors[row], dtype=np.float32)
+
+    async def fetch_by_image_ids(self, image_ids: List[int]) -> Dict[int, dict]:
+        rows = self.store.rows_for_ids(image_ids)
+        return {
+            int(image_id): {"image_id": int(image_id), "image_url": self.store.url(row)}
+            for image_id, row in zip(image_ids, rows)
+            if row >= 0
+        }
+
+    async def index_generation(self) -> int:
+        return self.store.generation
+
+    async def close(self) -> None:
+        pass
@@ -5,22 +5,57 @@ FastAPI application defining the API endpoints, including a health check.
 """
 
 from fastapi import FastAPI, Query, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import Annotated, List, Optional
+from datetime import datetime
+from contextlib import asynccontextmanager
 import asyncio
 import logging
 
 from infrastructure.metrics import queries_total, query_errors_total, query_latency
-from application.pagination import paginate_results
-from application.models import SearchResult, FullSearchResponse  # Import FullSearchResponse
-from domain.embedding_service import EmbeddingService
+from application.admission import AdmissionController, OverloadedError
+from application.pagination import decode_cursor, encode_cursor
+from application.batch_search import BatchSearchService
+from application.models import (
+    MAX_QUERY_LENGTH,
+    BatchSearchRequest,
+    FullSearchResponse,
+    SimilarImagesResponse,
+)
+from application.inference_executor import InferenceExecutor
+from application.micro_batcher import MicroBatcher
+from application.model_loader import BackgroundModelLoader
+from application.embedding_cache import EmbeddingCache
+from application.encoder_factory import create_text_encoder
+from application.result_cache import IndexGenerationTracker, RankedResultCache
+from application.search_effort import SearchEffortController, in_flight_threshold
+from application.search_filters import build_filters
+from application.search_service import EmbeddingFailedError, InvalidSearchError, SearchService
+from application.single_flight import SingleFlight
+from application.similar_search import ImageVectorCache, SimilarImageService
+from infrastructure.config import settings
 from infrastructure.elasticsearch_client import elasticsearch_client
+from infrastructure.redis_client import redis_client
+from infrastructure.request_timing import collect_stages, server_timing_header
+from interface.responses import (
+    SearchJSONResponse, ndjson_lines, public_results, search_response_content,
+)
 
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the text encoder without delaying the server start."""
+    if model_loader is not None:
+        model_loader.start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,7 +64,157 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-embedding_service = EmbeddingService()
+# Process workers load their own model copies, so the API process only needs
+# one when encodes run on threads. It is loaded in the background once the
+# server starts (or before forking, see main.serve); /ready reports when.
+model_loader = (
+    BackgroundModelLoader(
+        lambda: create_text_encoder(settings.EMBEDDING_MODEL, settings.MODEL_ARTIFACT_DIR)
+    )
+    if settings.INFERENCE_EXECUTOR == "thread" else None
+)
+inference_executor = InferenceExecutor(
+    model_loader,
+    model_name=settings.EMBEDDING_MODEL,
+    kind=settings.INFERENCE_EXECUTOR,
+    max_workers=settings.INFERENCE_WORKERS,
+    max_concurrency=settings.INFERENCE_MAX_CONCURRENCY,
+    artifact_dir=settings.MODEL_ARTIFACT_DIR,
+)
+text_encoder = (
+    MicroBatcher(
+        inference_executor,
+        max_batch_size=settings.MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=settings.MICRO_BATCH_WAIT_MS,
+    )
+    if settings.MICRO_BATCH_ENABLED else inference_executor
+)
+embedding_cache = EmbeddingCache(
+    settings.EMBEDDING_MODEL,
+    max_entries=settings.EMBEDDING_CACHE_SIZE,
+    ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    redis_client=redis_client if settings.EMBEDDING_CACHE_REDIS_ENABLED else None,
+)
+
+
+async def encode_query(query_string: str):
+    """
+    Return the embedding for a query, encoding it only on a cache miss.
+    Failed encodes are returned as-is and never cached.
+    """
+    embedding = await embedding_cache.get(query_string)
+    if embedding is not None:
+        return embedding
+    embedding = await text_encoder.encode_text(query_string)
+    if len(embedding) == 0:
+        return embedding
+    return await embedding_cache.put(query_string, embedding)
+
+
+async def encode_queries(query_strings: List[str]) -> List[object]:
+    """
+    Return embeddings for several queries, encoding all cache misses in one
+    batched forward pass. Failed encodes come back empty and are not cached.
+    """
+    embeddings = [await embedding_cache.get(query) for query in query_strings]
+    misses = list(dict.fromkeys(
+        query for query, embedding in zip(query_strings, embeddings) if embedding is None
+    ))
+    if misses:
+        encoded = {}
+        for query, embedding in zip(misses, await inference_executor.encode_texts(misses)):
+            if len(embedding) > 0:
+                embedding = await embedding_cache.put(query, embedding)
+            encoded[query] = embedding
+        embeddings = [
+            encoded[query] if embedding is None else embedding
+            for query, embedding in zip(query_strings, embeddings)
+        ]
+    return embeddings
+
+
+if settings.SEARCH_BACKEND == "memmap":
+    from infrastructure.vector_store import MemmapVectorStore, VectorStoreSearchClient
+
+    vector_store = MemmapVectorStore.load(settings.VECTOR_STORE_PATH)
+    vector_index = None
+    if settings.VECTOR_INDEX == "ivf":
+        from infrastructure.ivf_index import IVFIndex
+
+        vector_index = IVFIndex.load(settings.VECTOR_STORE_PATH, nprobe=settings.IVF_NPROBE)
+    elif settings.VECTOR_INDEX == "pq":
+        from infrastructure.pq_index import PQIndex
+
+        vector_index = PQIndex.load(
+            vector_store, settings.VECTOR_STORE_PATH, rerank=settings.PQ_RERANK
+        )
+    search_client = VectorStoreSearchClient(
+        vector_store, index=vector_index, rerank_depth=settings.TWO_STAGE_RERANK_DEPTH
+    )
+else:
+    search_client = elasticsearch_client
+if settings.SEARCH_MODE == "two_stage" and not search_client.supports_two_stage:
+    if settings.SEARCH_BACKEND == "memmap":
+        raise ValueError(
+            "SEARCH_MODE=two_stage on the memmap backend needs VECTOR_INDEX ivf or pq"
+        )
+    raise ValueError("SEARCH_MODE=two_stage needs VECTOR_INDEX_TYPE int8_hnsw or int4_hnsw")
+
+search_service = SearchService(
+    encode_query,
+    search_client,
+    mode=settings.SEARCH_MODE,
+    result_cache=RankedResultCache(
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        max_results=settings.RESULT_CACHE_MAX_RESULTS,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+    ) if settings.RESULT_CACHE_ENABLED else None,
+    generation_tracker=IndexGenerationTracker(
+        search_client.index_generation,
+        refresh_seconds=settings.RESULT_CACHE_GENERATION_REFRESH_SECONDS,
+    ),
+    single_flight=SingleFlight("search") if settings.SINGLE_FLIGHT_ENABLED else None,
+    admission=AdmissionController(
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        max_wait_seconds=settings.ADMISSION_MAX_WAIT_MS / 1000.0,
+        retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    ) if settings.ADMISSION_CONTROL_ENABLED else None,
+    effort_controller=SearchEffortController(
+        latency_budget_seconds=settings.SEARCH_LATENCY_BUDGET_MS / 1000.0,
+        max_in_flight=in_flight_threshold(
+            settings.SEARCH_EFFORT_MAX_IN_FLIGHT,
+            settings.ADMISSION_MAX_CONCURRENT if settings.ADMISSION_CONTROL_ENABLED else None,
+        ),
+        levels=settings.SEARCH_EFFORT_LEVELS,
+    ) if settings.SEARCH_EFFORT_CONTROL_ENABLED else None,
+    max_ranked_results=settings.KNN_MAX_CANDIDATES,
+)
+
+batch_search_service = BatchSearchService(
+    encode_queries,
+    search_client,
+    mode=settings.SEARCH_MODE,
+    chunk_size=settings.BATCH_SEARCH_CHUNK_SIZE,
+)
+
+similar_image_service = SimilarImageService(
+    search_client,
+    mode=settings.SEARCH_MODE,
+    vector_cache=ImageVectorCache(max_entries=settings.SIMILAR_VECTOR_CACHE_SIZE),
+)
+
+
+def model_ready() -> bool:
+    """True when text queries can be encoded."""
+    return model_loader is None or model_loader.ready
+
+
+def require_model() -> None:
+    """Reject text searches with 503 until the model is warmed up."""
+    if not model_ready():
+        raise HTTPException(status_code=503, detail="The embedding model is still loading.")
+
 
 @app.get("/health", summary="Health Check", description="Return service health status.")
 async def health():
@@ -39,54 +224,191 @@ async def health():
     return {"status": "ok", "service": "api_server"}
 
 
-@app.get("/get_image", response_model=FullSearchResponse)
+@app.get("/ready", summary="Readiness Check",
+         description="Return 200 once the embedding model is loaded and warmed up.")
+async def ready():
+    """
+    Readiness endpoint: 503 while the model is loading (or failed to load).
+    """
+    if model_ready():
+        return {"status": "ready", "service": "api_server"}
+    status = "failed" if model_loader.error is not None else "loading"
+    return JSONResponse(status_code=503, content={"status": status, "service": "api_server"})
+
+
+@app.get("/get_image", response_model=FullSearchResponse, response_class=SearchJSONResponse)
 async def get_image(
-    query_string: str = Query(..., min_length=1),
+    query_string: str = Query(..., min_length=1, max_length=MAX_QUERY_LENGTH),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: Annotated[
+        Optional[str], Query(description="next_cursor of the previous page")
+    ] = None,
+    num_candidates: Annotated[
+        Optional[int], Query(ge=1, le=10000, description="Approximate candidates per shard")
+    ] = None,
+    rerank_depth: Annotated[
+        Optional[int],
+        Query(ge=1, le=10000, description="Re-rank this many candidates exactly (two-stage)"),
+    ] = None,
+    domain: Annotated[
+        Optional[List[str]], Query(description="Only images from these source domains")
+    ] = None,
+    downloaded_after: Annotated[
+        Optional[datetime], Query(description="Only images downloaded at or after this time")
+    ] = None,
+    downloaded_before: Annotated[
+        Optional[datetime], Query(description="Only images downloaded before this time")
+    ] = None,
+    min_width: Annotated[Optional[int], Query(ge=1, description="Minimum width in pixels")] = None,
+    min_height: Annotated[
+        Optional[int], Query(ge=1, description="Minimum height in pixels")
+    ] = None,
 ):
     """
     Search for images based on the query string with pagination.
-    Returns a response containing the query and a list of SearchResult objects.
+    Returns a FullSearchResponse body (query, results and an opaque
+    next_cursor), serialized directly without per-hit model validation.
+    When a cursor is given it takes precedence over page.
+    num_candidates and rerank_depth trade latency for recall per request; a
+    rerank_depth switches the request to two-stage retrieval. The metadata
+    filters (domain, download time, minimum size) are applied inside the vector
+    search; a cursor keeps the filters of its first page.
     """
     queries_total.inc()
     start_time = asyncio.get_event_loop().time()
 
-    try:
-        embedding = embedding_service.generate_embedding_from_text(query_string)
-        if not embedding:
-            raise HTTPException(
-                status_code=500, detail="Failed to generate embedding for the query."
-            )
+    with collect_stages() as stages:
+        try:
+            require_model()
+            state = {"offset": (page - 1) * size}
+            if cursor:
+                try:
+                    state = search_service.parse_cursor_state(
+                        decode_cursor(cursor), query_string
+                    )
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Invalid cursor.")
+            try:
+                filters = build_filters(
+                    domain, downloaded_after, downloaded_before, min_width, min_height
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            if filters and not search_client.supports_filters:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Metadata filters need the Elasticsearch search backend.",
+                )
 
-        top_k = page * size
-        results = await elasticsearch_client.search_embeddings(embedding, top_k=top_k)
-        paged_results = paginate_results(results, page=page, size=size)
+            try:
+                paged_results, next_state = await search_service.search(
+                    query_string, size, state,
+                    num_candidates=num_candidates, rerank_depth=rerank_depth,
+                    filters=filters,
+                )
+            except EmbeddingFailedError:
+                raise HTTPException(
+                    status_code=500, detail="Failed to generate embedding for the query."
+                )
+            except InvalidSearchError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            next_cursor = encode_cursor(next_state)
 
-        search_time = asyncio.get_event_loop().time() - start_time
-        query_latency.observe(search_time)
+            search_time = asyncio.get_event_loop().time() - start_time
+            query_latency.observe(search_time)
 
-        if not paged_results:
-            # Return empty results but still include the query
-            return FullSearchResponse(query=query_string, results=[])
+            if paged_results:
+                logger.info(
+                    "Search query '%s' returned %d results (offset %d, size %d).",
+                    query_string, len(paged_results), state.get("offset", 0), size
+                )
+            else:
+                # Return empty results but still include the query
+                next_cursor = None
+            response = SearchJSONResponse(
+                search_response_content(query_string, paged_results, next_cursor)
+            )
 
-        logger.info(
-            "Search query '%s' returned %d results (page %d, size %d).",
-            query_string, len(paged_results), page, size
-        )
-        return FullSearchResponse(
-            query=query_string,
-            results=[SearchResult(**res) for res in paged_results]
+        except HTTPException as he:
+            query_errors_total.inc()
+            logger.error("HTTPException: %s", he.detail)
+            raise he
+        except OverloadedError as e:
+            # Counted in ui_service_admission_shed_total, not as a query error.
+            raise HTTPException(
+                status_code=503,
+                detail="The service is overloaded; retry later.",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            query_errors_total.inc()
+            logger.exception("Unexpected error during search: %s", e)
+            raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(
+            stages, asyncio.get_event_loop().time() - start_time
         )
+    return response
 
-    except HTTPException as he:
-        query_errors_total.inc()
-        logger.error("HTTPException: %s", he.detail)
-        raise he
+
+@app.get("/similar/{image_id}", response_model=SimilarImagesResponse,
+         response_class=SearchJSONResponse)
+async def similar_images(
+    image_id: int,
+    size: Annotated[int, Query(ge=1, le=100)] = 20,
+):
+    """
+    Find images similar to an indexed image.
+
+    The image's stored embedding is searched directly (no text encoding); the
+    image itself is excluded from the results.
+    """
+    queries_total.inc()
+    start_time = asyncio.get_event_loop().time()
+    try:
+        results = await similar_image_service.search(image_id, size)
     except Exception as e:
         query_errors_total.inc()
-        logger.exception("Unexpected error during search: %s", e)
+        logger.exception("Unexpected error during similar-image search: %s", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
+    if results is None:
+        query_errors_total.inc()
+        raise HTTPException(status_code=404, detail="Image not found.")
+    query_latency.observe(asyncio.get_event_loop().time() - start_time)
+    return SearchJSONResponse({"image_id": image_id, "results": public_results(results)})
+
+
+@app.post("/search/batch")
+async def search_batch(request: BatchSearchRequest):
+    """
+    Search for many query strings at once.
+
+    Queries are encoded in batched forward passes and searched with one
+    multi-search per chunk. Results stream back as newline-delimited JSON, one
+    {"query", "results"} object per query in request order.
+    """
+    if len(request.queries) > settings.BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_SEARCH_MAX_QUERIES} queries per batch.",
+        )
+    require_model()
+    queries_total.inc(len(request.queries))
+    entries = batch_search_service.search(
+        request.queries, request.size, num_candidates=request.num_candidates
+    )
+
+    async def project(entries):
+        async for entry in entries:
+            content = {"query": entry["query"], "results": public_results(entry["results"])}
+            if "error" in entry:
+                query_errors_total.inc()
+                content["error"] = entry["error"]
+            yield content
+
+    return StreamingResponse(ndjson_lines(project(entries)), media_type="application/x-ndjson")
 
 
 @app.get("/metrics")
@@ -95,4 +417,5 @@ async def metrics():
     Endpoint to expose Prometheus metrics.
     """
     from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    from infrastructure.metrics import metrics_registry
+    return Response(content=generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
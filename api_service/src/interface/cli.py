@@ -0,0 +1,446 @@
+"""
+interface/cli.py
+
+Command-line entry points for offline search tooling.
+
+Run from the service container (PYTHONPATH=/app/src):
+    python -m interface.cli build-vector-store --output /app/vector_store
+    python -m interface.cli train-ivf --store /app/vector_store --lists 4096
+    python -m interface.cli benchmark-ivf --store /app/vector_store --nprobe 1 4 16 64
+    python -m interface.cli train-pq --store /app/vector_store --subquantizers 64
+    python -m interface.cli benchmark-pq --store /app/vector_store --rerank 0 100 500
+    python -m interface.cli memory-report --pid 1
+    python -m interface.cli export-onnx --output /app/model_artifacts/clip-text.onnx
+    python -m interface.cli benchmark-encoders --batch-size 32
+    python -m interface.cli quantize-onnx --mode static --calibration-queries queries.txt
+    python -m interface.cli quantization-report --queries heldout.txt --candidate torch-int8
+    python -m interface.cli benchmark-tokenizer --queries queries.txt
+"""
+
+import argparse
+import asyncio
+
+import numpy as np
+
+from infrastructure.config import settings
+from infrastructure.logging_config import logger
+
+
+async def build_vector_store(args: argparse.Namespace) -> None:
+    """Export every embedding from Elasticsearch into a memory-mapped store."""
+    from infrastructure.elasticsearch_client import elasticsearch_client
+    from infrastructure.vector_store import write_vector_store
+
+    try:
+        count = await write_vector_store(
+            args.output,
+            elasticsearch_client.scan_embeddings(batch_size=args.batch_size),
+            dims=args.dims,
+            dtype=args.dtype,
+            model=settings.EMBEDDING_MODEL,
+        )
+        logger.info("Vector store %s built with %d vectors.", args.output, count)
+    finally:
+        await elasticsearch_client.close()
+
+
+async def train_ivf(args: argparse.Namespace) -> None:
+    """Train an IVF index over an existing vector store."""
+    from infrastructure.ivf_index import IVFIndex
+    from infrastructure.vector_store import MemmapVectorStore
+
+    store = MemmapVectorStore.load(args.store)
+    n_lists = args.lists or max(1, 4 * int(len(store) ** 0.5))
+    index = await asyncio.to_thread(
+        IVFIndex.build, store, args.store, n_lists,
+        sample_size=args.sample_size, n_iter=args.iterations,
+    )
+    sizes = index.offsets[1:] - index.offsets[:-1]
+    logger.info(
+        "IVF index written to %s: %d lists, sizes min/median/max %d/%d/%d.",
+        args.store, index.n_lists, sizes.min(), int(np.median(sizes)), sizes.max(),
+    )
+
+
+def _benchmark(store, variants, queries: int, top_k: int) -> None:
+    """Print recall@k and latency for each (label, search) against the exact scan."""
+    from infrastructure.vector_benchmark import (
+        latency_summary, recall_at_k, run_queries, sample_queries,
+    )
+
+    sample = sample_queries(store, queries)
+    exact, exact_latencies = run_queries(store.search, sample, top_k)
+    print(f"{'index':<12}{'recall@' + str(top_k):>12}{'p50 ms':>10}{'p95 ms':>10}")
+    for label, search in [("flat", None)] + list(variants):
+        if search is None:
+            recall, latencies = 1.0, exact_latencies
+        else:
+            rows, latencies = run_queries(search, sample, top_k)
+            recall = recall_at_k(rows, exact)
+        summary = latency_summary(latencies)
+        print(f"{label:<12}{recall:>12.3f}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}")
+
+
+async def benchmark_ivf(args: argparse.Namespace) -> None:
+    """Report recall@k and latency of the IVF index against the exact scan."""
+    from infrastructure.ivf_index import IVFIndex
+    from infrastructure.vector_store import MemmapVectorStore
+
+    store = MemmapVectorStore.load(args.store)
+    index = IVFIndex.load(args.store)
+    variants = [
+        (f"ivf/{nprobe}", lambda q, k, nprobe=nprobe: index.search(q, k, nprobe=nprobe))
+        for nprobe in args.nprobe
+    ]
+    _benchmark(store, variants, args.queries, args.top_k)
+
+
+async def train_pq(args: argparse.Namespace) -> None:
+    """Train PQ codebooks over an existing vector store and encode every vector."""
+    from infrastructure.pq_index import PQIndex
+    from infrastructure.vector_store import MemmapVectorStore
+
+    store = MemmapVectorStore.load(args.store)
+    index = await asyncio.to_thread(
+        PQIndex.build, store, args.store, args.subquantizers,
+        sample_size=args.sample_size, n_iter=args.iterations,
+    )
+    logger.info(
+        "PQ index written to %s: %d bytes per vector (vectors use %d).",
+        args.store, index.codes.shape[1], store.vectors.dtype.itemsize * store.vectors.shape[1],
+    )
+
+
+async def benchmark_pq(args: argparse.Namespace) -> None:
+    """Report recall@k and latency of the PQ index per re-rank depth."""
+    from infrastructure.pq_index import PQIndex
+    from infrastructure.vector_store import MemmapVectorStore
+
+    store = MemmapVectorStore.load(args.store)
+    index = PQIndex.load(store, args.store)
+    variants = [
+        (f"pq/{rerank}", lambda q, k, rerank=rerank: index.search(q, k, rerank=rerank))
+        for rerank in args.rerank
+    ]
+    _benchmark(store, variants, args.queries, args.top_k)
+
+
+async def memory_report(args: argparse.Namespace) -> None:
+    """Print RSS and PSS of the given processes and their children."""
+    from infrastructure.process_memory import child_pids, memory_usage
+
+    pids = []
+    for pid in args.pid:
+        pids.append(pid)
+        pids.extend(child_pids(pid))
+    mib = 1024 * 1024
+    totals = {"rss": 0, "pss": 0}
+    print(f"{'pid':>8}{'rss MiB':>12}{'pss MiB':>12}{'shared MiB':>12}{'private MiB':>13}")
+    for pid in pids:
+        usage = memory_usage(pid)
+        shared = usage["shared_clean"] + usage["shared_dirty"]
+        private = usage["private_clean"] + usage["private_dirty"]
+        totals["rss"] += usage["rss"]
+        totals["pss"] += usage["pss"]
+        print(
+            f"{pid:>8}{usage['rss'] / mib:>12.1f}{usage['pss'] / mib:>12.1f}"
+            f"{shared / mib:>12.1f}{private / mib:>13.1f}"
+        )
+    print(f"{'total':>8}{totals['rss'] / mib:>12.1f}{totals['pss'] / mib:>12.1f}")
+
+
+# Query-like texts for the encoder benchmark.
+BENCHMARK_TEXTS = [
+    "a dog playing in the snow", "red sports car on a highway", "beach at sunset",
+    "a bowl of fresh fruit", "city skyline at night", "portrait of an old man",
+    "mountain lake with reflections", "two cats sleeping on a sofa",
+]
+
+
+async def export_onnx(args: argparse.Namespace) -> None:
+    """Export the CLIP text tower to ONNX for EMBEDDING_BACKEND=onnx."""
+    import clip
+    from infrastructure.model_artifacts import clip_metadata
+    from infrastructure.onnx_encoder import export_text_tower
+
+    model, preprocess = clip.load(args.model, device="cpu")
+    metadata = clip_metadata(model, preprocess, model.text_projection.shape[1])
+    await asyncio.to_thread(export_text_tower, model, args.output, metadata, args.opset)
+
+
+async def benchmark_encoders(args: argparse.Namespace) -> None:
+    """Compare the torch and ONNX text encoders: parity, latency and throughput."""
+    import torch
+    from domain.embedding_service import EmbeddingService
+    from infrastructure.encoder_benchmark import cosine_parity, measure_encoder
+    from infrastructure.onnx_encoder import OnnxEncoder
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    backends = {
+        "torch": EmbeddingService(args.model, text_only=True),
+        "onnx": EmbeddingService(args.model, onnx_encoder=OnnxEncoder(
+            args.onnx_model,
+            intra_op_threads=args.threads,
+            inter_op_threads=args.inter_op_threads,
+            optimization_level=args.optimization,
+        )),
+    }
+    texts = [
+        f"{text} {i}" for i in range(-(-args.items // len(BENCHMARK_TEXTS)))
+        for text in BENCHMARK_TEXTS
+    ][:args.items]
+    print(f"{'backend':<10}{'p50 ms':>10}{'p95 ms':>10}{'items/s':>12}")
+    for name, service in backends.items():
+        service.warm_up()
+        stats = measure_encoder(service.generate_embeddings_from_texts, texts, args.batch_size)
+        print(f"{name:<10}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['items_per_second']:>12.1f}")
+    parity = cosine_parity(
+        backends["torch"].generate_embeddings_from_texts(texts),
+        backends["onnx"].generate_embeddings_from_texts(texts),
+    )
+    print(f"onnx vs torch cosine: min {parity['min_cosine']:.6f}, "
+          f"mean {parity['mean_cosine']:.6f}")
+
+
+def _read_queries(path: str) -> list:
+    """Non-empty lines of a query file."""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _load_text_encoder(spec: str, model_name: str):
+    """
+    Build the encoder named by ``spec``: "torch", "torch-int8", or the path
+    of an exported (optionally quantized) .onnx graph.
+    """
+    from domain.embedding_service import EmbeddingService
+    from infrastructure.onnx_encoder import OnnxEncoder
+
+    if spec in ("torch", "torch-int8"):
+        return EmbeddingService(model_name, text_only=True, quantize=spec == "torch-int8")
+    return EmbeddingService(model_name, onnx_encoder=OnnxEncoder(spec))
+
+
+async def quantize_onnx(args: argparse.Namespace) -> None:
+    """
+    Quantize the exported text tower to int8, calibrating on our own queries.
+
+    The API only runs the text tower, so queries are its whole calibration
+    set; the embedding service calibrates the image tower on images.
+    """
+    import clip
+    from infrastructure.quantization import quantize_onnx_model
+
+    batches = None
+    if args.mode == "static":
+        if not args.calibration_queries:
+            raise SystemExit("--calibration-queries is required for static quantization")
+        queries = _read_queries(args.calibration_queries)
+        rng = np.random.default_rng(0)
+        sample = [queries[i] for i in rng.permutation(len(queries))[:args.samples]]
+        batches = [
+            clip.tokenize(sample[start:start + args.batch_size], truncate=True).numpy()
+            for start in range(0, len(sample), args.batch_size)
+        ]
+    output = args.output or args.model_path.replace(".onnx", f".{args.mode}-int8.onnx")
+    await asyncio.to_thread(quantize_onnx_model, args.model_path, output, args.mode, batches)
+
+
+async def quantization_report(args: argparse.Namespace) -> None:
+    """
+    Compare a quantized text encoder with the float one on held-out queries:
+    top-k overlap of the search results, embedding cosine, latency.
+    """
+    from infrastructure.encoder_benchmark import cosine_parity, measure_encoder, topk_overlap
+    from infrastructure.vector_store import MemmapVectorStore
+
+    queries = _read_queries(args.queries)
+    store = MemmapVectorStore.load(args.store)
+    encoders = {
+        "baseline": _load_text_encoder(args.baseline, args.model),
+        "candidate": _load_text_encoder(args.candidate, args.model),
+    }
+    print(f"{'encoder':<11}{'spec':<40}{'p50 ms':>10}{'items/s':>12}")
+    embeddings, rows = {}, {}
+    for name, service in encoders.items():
+        service.warm_up()
+        stats = measure_encoder(service.generate_embeddings_from_texts, queries, args.batch_size)
+        spec = args.baseline if name == "baseline" else args.candidate
+        print(f"{name:<11}{spec:<40}{stats['p50_ms']:>10.2f}{stats['items_per_second']:>12.1f}")
+        embeddings[name] = service.generate_embeddings_from_texts(queries)
+        rows[name] = [
+            store.search(np.asarray(embedding, dtype=np.float32), args.top_k)[0]
+            for embedding in embeddings[name]
+        ]
+    overlap = topk_overlap(rows["candidate"], rows["baseline"])
+    parity = cosine_parity(embeddings["baseline"], embeddings["candidate"])
+    print(f"top-{args.top_k} overlap over {len(queries)} queries: "
+          f"mean {overlap['mean_overlap']:.3f}, min {overlap['min_overlap']:.3f}, "
+          f"identical {overlap['identical_fraction']:.1%}")
+    print(f"query embedding cosine: min {parity['min_cosine']:.4f}, "
+          f"mean {parity['mean_cosine']:.4f}")
+
+
+async def benchmark_tokenizer(args: argparse.Namespace) -> None:
+    """
+    Check that ClipTokenizer yields clip.tokenize's ids and compare their speed,
+    with cold caches and with every query cached.
+    """
+    import time
+    import clip
+    from infrastructure.text_tokenizer import ClipTokenizer
+
+    queries = _read_queries(args.queries) if args.queries else BENCHMARK_TEXTS
+    batches = [
+        queries[start:start + args.batch_size]
+        for start in range(0, len(queries), args.batch_size)
+    ]
+    tokenizer = ClipTokenizer(cache_size=max(len(queries), 1))
+
+    def run(tokenize) -> float:
+        started = time.perf_counter()
+        for batch in batches:
+            tokenize(batch, truncate=True)
+        return (time.perf_counter() - started) / len(queries) * 1e6
+
+    timings = {"clip.tokenize": run(clip.tokenize)}
+    timings["cached, cold"] = run(tokenizer.tokenize)
+    timings["cached, warm"] = run(tokenizer.tokenize)
+    mismatches = sum(
+        not np.array_equal(
+            tokenizer.tokenize(batch, truncate=True), clip.tokenize(batch, truncate=True).numpy()
+        )
+        for batch in batches
+    )
+    print(f"{'tokenizer':<16}{'us/query':>10}")
+    for name, micros in timings.items():
+        print(f"{name:<16}{micros:>10.1f}")
+    print(f"{len(queries)} queries, {mismatches} batches with different token ids")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="API service search tooling.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser(
+        "build-vector-store", help="Export Elasticsearch embeddings to a memmap store."
+    )
+    build.add_argument("--output", default=settings.VECTOR_STORE_PATH)
+    build.add_argument("--dtype", choices=["float16", "float32"],
+                       default=settings.VECTOR_STORE_DTYPE)
+    build.add_argument("--dims", type=int, default=512)
+    build.add_argument("--batch-size", type=int, default=1000)
+    build.set_defaults(handler=build_vector_store)
+
+    train = subparsers.add_parser("train-ivf", help="Train an IVF index over a vector store.")
+    train.add_argument("--store", default=settings.VECTOR_STORE_PATH)
+    train.add_argument("--lists", type=int, default=None,
+                       help="Number of inverted lists (default 4 * sqrt(N)).")
+    train.add_argument("--sample-size", type=int, default=100_000)
+    train.add_argument("--iterations", type=int, default=20)
+    train.set_defaults(handler=train_ivf)
+
+    bench = subparsers.add_parser(
+        "benchmark-ivf", help="Measure IVF recall@k and latency against the exact scan."
+    )
+    bench.add_argument("--store", default=settings.VECTOR_STORE_PATH)
+    bench.add_argument("--queries", type=int, default=200)
+    bench.add_argument("--top-k", type=int, default=10)
+    bench.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    bench.set_defaults(handler=benchmark_ivf)
+
+    train = subparsers.add_parser("train-pq", help="Train a PQ index over a vector store.")
+    train.add_argument("--store", default=settings.VECTOR_STORE_PATH)
+    train.add_argument("--subquantizers", type=int, default=64,
+                       help="Bytes per encoded vector; must divide the dimension.")
+    train.add_argument("--sample-size", type=int, default=50_000)
+    train.add_argument("--iterations", type=int, default=15)
+    train.set_defaults(handler=train_pq)
+
+    bench = subparsers.add_parser(
+        "benchmark-pq", help="Measure PQ recall@k and latency against the exact scan."
+    )
+    bench.add_argument("--store", default=settings.VECTOR_STORE_PATH)
+    bench.add_argument("--queries", type=int, default=200)
+    bench.add_argument("--top-k", type=int, default=10)
+    bench.add_argument("--rerank", type=int, nargs="+", default=[0, 50, 100, 200, 500])
+    bench.set_defaults(handler=benchmark_pq)
+
+    memory = subparsers.add_parser(
+        "memory-report", help="Show RSS/PSS of API processes and their workers."
+    )
+    memory.add_argument("--pid", type=int, nargs="+", required=True,
+                        help="Launcher (or independent server) process ids.")
+    memory.set_defaults(handler=memory_report)
+
+    export = subparsers.add_parser("export-onnx", help="Export the CLIP text tower to ONNX.")
+    export.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    export.add_argument("--output", default=settings.ONNX_TEXT_MODEL_PATH)
+    export.add_argument("--opset", type=int, default=17)
+    export.set_defaults(handler=export_onnx)
+
+    bench = subparsers.add_parser(
+        "benchmark-encoders", help="Compare torch and ONNX text encoding latency and parity."
+    )
+    bench.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    bench.add_argument("--onnx-model", default=settings.ONNX_TEXT_MODEL_PATH)
+    bench.add_argument("--items", type=int, default=256)
+    bench.add_argument("--batch-size", type=int, default=32)
+    bench.add_argument("--threads", type=int, default=settings.ONNX_INTRA_OP_THREADS,
+                       help="torch threads and ONNX intra-op threads (0: defaults).")
+    bench.add_argument("--inter-op-threads", type=int, default=settings.ONNX_INTER_OP_THREADS)
+    bench.add_argument("--optimization", default=settings.ONNX_GRAPH_OPTIMIZATION,
+                       choices=["disable", "basic", "extended", "all"])
+    bench.set_defaults(handler=benchmark_encoders)
+
+    quantize = subparsers.add_parser(
+        "quantize-onnx", help="Quantize the exported text tower to int8."
+    )
+    quantize.add_argument("--model-path", default=settings.ONNX_TEXT_MODEL_PATH)
+    quantize.add_argument("--output", default=None,
+                          help="Default: <model-path> with .<mode>-int8.onnx.")
+    quantize.add_argument("--mode", choices=["dynamic", "static"], default="dynamic")
+    quantize.add_argument("--calibration-queries", default=None,
+                          help="Query file (one per line) for static calibration.")
+    quantize.add_argument("--samples", type=int, default=512)
+    quantize.add_argument("--batch-size", type=int, default=32)
+    quantize.set_defaults(handler=quantize_onnx)
+
+    report = subparsers.add_parser(
+        "quantization-report",
+        help="Top-k overlap and latency of a quantized encoder against the float one.",
+    )
+    report.add_argument("--queries", required=True,
+                        help="Held-out query file, disjoint from the calibration queries.")
+    report.add_argument("--store", default=settings.VECTOR_STORE_PATH)
+    report.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    report.add_argument("--baseline", default="torch",
+                        help="torch, torch-int8 or an .onnx path.")
+    report.add_argument("--candidate", default="torch-int8",
+                        help="torch, torch-int8 or an .onnx path.")
+    report.add_argument("--top-k", type=int, default=10)
+    report.add_argument("--batch-size", type=int, default=32)
+    report.set_defaults(handler=quantization_report)
+
+    tokens = subparsers.add_parser(
+        "benchmark-tokenizer",
+        help="Compare the cached tokenizer with clip.tokenize (ids and speed).",
+    )
+    tokens.add_argument("--queries", default=None,
+                        help="Query file (one per line); default: built-in sample texts.")
+    tokens.add_argument("--batch-size", type=int, default=1)
+    tokens.set_defaults(handler=benchmark_tokenizer)
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+interface/responses.py
+
+Search response serialization.
+
+Search results are already plain dicts; they are projected onto the public
+fields and serialized with orjson in one pass, instead of being validated
+into a pydantic model per hit and encoded again.
+"""
+
+import time
+from typing import AsyncIterator, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from infrastructure.metrics import record_stage, response_bytes, response_serialization_latency
+
+
+class SearchJSONResponse(JSONResponse):
+    """JSON response rendered with orjson; records body size and render time."""
+
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        elapsed = time.perf_counter() - started
+        response_serialization_latency.observe(elapsed)
+        record_stage("serialize", elapsed)
+        response_bytes.observe(len(body))
+        return body
+
+
+def search_response_content(
+    query: str, results: List[dict], next_cursor: Optional[str] = None
+) -> dict:
+    """
+    Build the FullSearchResponse body from search result dicts.
+
+    Args:
+        query (str): The query string echoed back.
+        results (List[dict]): Results with image_id, image_url and score.
+        next_cursor (Optional[str]): Cursor for the next page.
+
+    Returns:
+        dict: The response body.
+    """
+    return {"query": query, "results": public_results(results), "next_cursor": next_cursor}
+
+
+def public_results(results: List[dict]) -> List[dict]:
+    """Project result dicts onto the SearchResult fields."""
+    return [
+        {"image_id": r["image_id"], "image_url": r["image_url"], "score": r["score"]}
+        for r in results
+    ]
+
+
+async def ndjson_lines(items: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """Serialize each item as one newline-terminated JSON line."""
+    async for item in items:
+        yield orjson.dumps(item, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
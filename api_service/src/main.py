@@ -7,16 +7,25 @@ Orchestrates:
 - Elasticsearch connectivity check
 - Starting metrics server
 - Shutting down resources
-- Running FastAPI application (handled by uvicorn)
+- Running FastAPI application (handled by uvicorn), optionally in pre-forked
+  workers that share one copy of the CLIP model
+
+Run with ``python main.py``; API_WORKERS selects the number of workers.
 """
 
-import asyncio
+import gc
+import glob
+import os
 import signal
+import socket
+import time
+from collections import deque
+from typing import Callable, Optional
+
 from infrastructure.logging_config import logger
 from infrastructure.metrics import start_metrics_server
 from infrastructure.config import settings
 from infrastructure.elasticsearch_client import elasticsearch_client
-from application.shutdown import shutdown
 
 
 # The FastAPI app and routes are defined in interface/api.py
@@ -39,7 +48,201 @@ async def shutdown_event():
     logger.info("API Service shut down.")
 
 
+def torch_threads_per_worker(workers: int) -> int:
+    """Intra-op threads per worker: configured, or the CPUs split evenly."""
+    if settings.TORCH_THREADS_PER_WORKER > 0:
+        return settings.TORCH_THREADS_PER_WORKER
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Open the listening socket every worker accepts connections from."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def reset_multiprocess_metrics() -> None:
+    """
+    Remove sample files left in PROMETHEUS_MULTIPROC_DIR by earlier runs,
+    keeping this process's own (its metrics were created at import).
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        if not path.endswith(f"_{os.getpid()}.db"):
+            os.remove(path)
+
+
+class WorkerRestarts:
+    """
+    Backoff and crash budget for restarting dead workers.
+
+    Each crash within ``window`` seconds of the previous ones doubles the delay
+    before the replacement is forked, from ``base_delay`` up to ``max_delay``.
+    More than ``max_crashes`` crashes within the window means the workers
+    cannot start (bad configuration, Elasticsearch gone, out of memory), and
+    the launcher gives up instead of forking in a tight loop.
+    """
+
+    def __init__(
+        self,
+        max_crashes: int,
+        window: float,
+        base_delay: float,
+        max_delay: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_crashes = max_crashes
+        self.window = window
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.crashes = deque()
+
+    def record_crash(self) -> Optional[float]:
+        """
+        Count a crash and return the delay before restarting the worker.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None once the budget is spent.
+        """
+        now = self.clock()
+        while self.crashes and now - self.crashes[0] > self.window:
+            self.crashes.popleft()
+        self.crashes.append(now)
+        if len(self.crashes) > self.max_crashes:
+            return None
+        return min(self.base_delay * 2 ** (len(self.crashes) - 1), self.max_delay)
+
+
+def run_worker(app, sock: socket.socket, threads: int) -> None:
+    """Serve the app from a forked worker on the inherited socket."""
+    import torch
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    torch.set_num_threads(threads)
+    config = uvicorn.Config(app, log_config=None)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(workers: int) -> None:
+    """
+    Load the API once, then serve it from ``workers`` processes.
+
+    The parent imports interface.api and loads the CLIP text tower, then
+    forks. Workers share the model's pages copy-on-write; gc.freeze() moves
+    every object created so far out of the collector's reach so collections
+    in the workers do not write to (and un-share) those pages. Pools and
+    connections (inference executor, Elasticsearch, Redis) are created lazily,
+    so each worker opens its own after the fork.
+
+    Args:
+        workers (int): Number of worker processes; 1 serves in-process.
+    """
+    import torch
+    import uvicorn
+
+    # GNU OpenMP thread pools do not survive fork(); keep the parent on one
+    # thread and give each worker its own pool after forking.
+    torch.set_num_threads(1)
+    reset_multiprocess_metrics()
+    started = time.monotonic()
+    from interface.api import app, model_loader
+    logger.info("API loaded in %.1fs.", time.monotonic() - started)
+    start_metrics_server(port=settings.METRICS_PORT)
+
+    threads = torch_threads_per_worker(workers)
+    if workers <= 1:
+        # The model loads in the background once the server is listening.
+        torch.set_num_threads(threads)
+        uvicorn.run(app, host=settings.API_HOST, port=settings.API_PORT, log_config=None)
+        return
+
+    # Workers must inherit a loaded model to share it, so load it up front.
+    if model_loader is not None:
+        model_loader.load()
+
+    sock = bind_socket(settings.API_HOST, settings.API_PORT)
+    gc.collect()
+    gc.freeze()
+    children = set()
+    stopping = False
+    restarts = WorkerRestarts(
+        settings.WORKER_MAX_RESTARTS,
+        settings.WORKER_RESTART_WINDOW,
+        settings.WORKER_RESTART_BACKOFF,
+        settings.WORKER_RESTART_BACKOFF_MAX,
+    )
+    exit_code = 0
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock, threads)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(
+        "Serving on %s:%d with %d workers, %d torch threads each.",
+        settings.API_HOST, settings.API_PORT, workers, threads,
+    )
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            from prometheus_client import multiprocess
+            multiprocess.mark_process_dead(pid)
+        if stopping:
+            continue
+        delay = restarts.record_crash()
+        if delay is None:
+            logger.error(
+                "Worker %d exited with status %d, %d crashes within %.0fs; shutting down.",
+                pid, status, len(restarts.crashes), restarts.window,
+            )
+            exit_code = 1
+            stop(signal.SIGTERM, None)
+            continue
+        logger.warning(
+            "Worker %d exited with status %d; restarting it in %.1fs.", pid, status, delay
+        )
+        # Sleep in short steps so SIGTERM during the backoff is not delayed.
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(min(0.5, deadline - time.monotonic()))
+        if not stopping:
+            spawn()
+    sock.close()
+    if exit_code:
+        raise SystemExit(exit_code)
+
+
 if __name__ == "__main__":
-    loop = asyncio.get_event_loop()
-    for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, shutdown)
+    serve(settings.API_WORKERS)
@@ -3,28 +3,282 @@ import sys
 import unittest
 import types
 import asyncio
+from unittest.mock import AsyncMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 import importlib
 
 class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
     async def test_search_embeddings(self):
+        client = self._client()
+        results = await client.search_embeddings([0.1, 0.2], top_k=1)
+        await client.close()
+        self.assertEqual(results[0]['image_id'], 1)
+
+    async def test_knn_mode_uses_hnsw_clause(self):
+        client = self._client()
+        await client.search_embeddings([0.1, 0.2], top_k=20, num_candidates=5, mode='knn')
+        body = client.es.bodies[-1]
+        self.assertNotIn('query', body)
+        self.assertEqual(body['knn']['k'], 20)
+        # num_candidates can never be lower than k
+        self.assertEqual(body['knn']['num_candidates'], 20)
+        self.assertEqual(body['knn']['query_vector'], [0.1, 0.2])
+        # the stored embedding is never shipped back with the hits
+        self.assertEqual(body['_source'], ['image_id', 'image_url'])
+
+    async def test_excluded_images_are_filtered_inside_the_search(self):
+        client = self._client()
+        await client.search_embeddings([0.1], top_k=5, mode='knn', exclude_image_ids=[7])
+        must_not = {'bool': {'must_not': [{'terms': {'image_id': [7]}}]}}
+        self.assertEqual(client.es.bodies[-1]['knn']['filter'], must_not)
+        await client.search_embeddings([0.1], top_k=5, mode='exact', exclude_image_ids=[7])
+        self.assertEqual(client.es.bodies[-1]['query']['script_score']['query'], must_not)
+
+    async def test_metadata_filters_run_inside_the_search(self):
+        client = self._client()
+        filters = {'domains': ['example.com'], 'downloaded_after': '2024-01-01T00:00:00',
+                   'min_height': 300}
+        await client.search_embeddings([0.1], top_k=5, mode='knn', filters=filters,
+                                       exclude_image_ids=[7])
+        self.assertEqual(client.es.bodies[-1]['knn']['filter'], {'bool': {
+            'filter': [
+                {'terms': {'domain': ['example.com']}},
+                {'range': {'downloaded_at': {'gte': '2024-01-01T00:00:00'}}},
+                {'range': {'height': {'gte': 300}}},
+            ],
+            'must_not': [{'terms': {'image_id': [7]}}],
+        }})
+        await client.search_ranked_ids([0.1], top_k=5, mode='exact', filters=filters)
+        query = client.es.bodies[-1]['query']['script_score']['query']
+        self.assertEqual(query['bool']['filter'][0], {'terms': {'domain': ['example.com']}})
+
+    async def test_fetch_embedding_reads_stored_vector(self):
+        client = self._client()
+        client.es.hits = [{'_score': 1.0, '_source': {'embedding': [0.3, 0.4]}}]
+        self.assertEqual(await client.fetch_embedding(7), [0.3, 0.4])
+        self.assertEqual(client.es.bodies[-1]['query'], {'term': {'image_id': 7}})
+        self.assertEqual(client.es.bodies[-1]['_source'], ['embedding'])
+
+    async def test_fetch_embedding_does_not_hide_search_errors(self):
+        client = self._client()
+        client.es.search = AsyncMock(side_effect=ConnectionError('cluster down'))
+        with self.assertRaises(ConnectionError):
+            await client.fetch_embedding(7)
+
+    async def test_exact_mode_keeps_script_score_scan(self):
+        client = self._client()
+        await client.search_embeddings([0.1, 0.2], top_k=3, mode='exact')
+        body = client.es.bodies[-1]
+        self.assertNotIn('knn', body)
+        self.assertIn('script_score', body['query'])
+        self.assertEqual(body['size'], 3)
+
+    async def test_knn_page_requests_only_page_hits(self):
+        client = self._client()
+        results, state = await client.search_page([0.1], size=1, offset=40, mode='knn',
+                                                  with_cursor=True)
+        body = client.es.bodies[-1]
+        self.assertEqual(body['from'], 40)
+        self.assertEqual(body['size'], 1)
+        self.assertEqual(body['knn']['k'], 41)
+        self.assertEqual(state, {'mode': 'knn', 'offset': 41})
+
+    async def test_exact_first_page_opens_no_point_in_time(self):
+        client = self._client()
+        client.es.open_point_in_time = AsyncMock()
+        results, state = await client.search_page([0.1], size=1, mode='exact', with_cursor=True)
+        body = client.es.bodies[-1]
+        client.es.open_point_in_time.assert_not_awaited()
+        self.assertNotIn('pit', body)
+        self.assertEqual(body['sort'], [{'_score': 'desc'}, {'image_id': 'asc'}])
+        self.assertEqual(state, {'mode': 'exact', 'offset': 1, 'search_after': [1.0, 3]})
+
+    async def test_exact_page_continues_in_point_in_time(self):
+        client = self._client()
+        _, state = await client.search_page([0.1], size=1, mode='exact', with_cursor=True)
+        _, state = await client.search_page(
+            [0.1], size=1, offset=state['offset'], mode='exact',
+            search_after=state['search_after'], with_cursor=True,
+        )
+        body = client.es.bodies[-1]
+        self.assertEqual(body['pit']['id'], 'pit-1')
+        self.assertEqual(body['search_after'], [1.0, 3])
+        self.assertEqual(state['pit_id'], 'pit-1')
+
+        await client.search_page([0.1], size=2, offset=state['offset'], mode='exact',
+                                 search_after=state['search_after'], pit_id=state['pit_id'],
+                                 with_cursor=True)
+        body = client.es.bodies[-1]
+        self.assertEqual(body['pit']['id'], 'pit-1')
+        self.assertNotIn('from', body)
+        # a short page ends the cursor and releases the point-in-time
+        self.assertEqual(client.es.closed_pits, ['pit-1'])
+
+    async def test_two_stage_reranks_knn_candidates_exactly(self):
+        client = self._client()
+        # Approximate order 1, 2, 3; exact cosine to [1, 0] orders them 3, 2, 1.
+        client.es.hits = [
+            {'_score': 0.9, '_source': {'image_id': i, 'image_url': f'u{i}', 'embedding': vector}}
+            for i, vector in ((1, [0.0, 1.0]), (2, [0.6, 0.8]), (3, [1.0, 0.0]))
+        ]
+        results, state = await client.search_page([1.0, 0.0], size=2, mode='two_stage',
+                                                  num_candidates=50, rerank_depth=3,
+                                                  with_cursor=True)
+        body = client.es.bodies[-1]
+        self.assertEqual(body['knn']['k'], 3)
+        self.assertEqual(body['knn']['num_candidates'], 50)
+        self.assertIn('embedding', body['_source'])
+        self.assertEqual([r['image_id'] for r in results], [3, 2])
+        self.assertAlmostEqual(results[0]['score'], 1.0)
+        self.assertEqual(state, {'mode': 'two_stage', 'offset': 2,
+                                 'num_candidates': 50, 'rerank_depth': 3})
+
+        ids, scores, timed_out = await client.search_ranked_ids(
+            [1.0, 0.0], top_k=10, mode='two_stage', rerank_depth=3
+        )
+        self.assertFalse(timed_out)
+        self.assertEqual(ids, [3, 2, 1])
+
+    async def test_reduced_effort_shrinks_candidates_within_timeout(self):
+        client = self._client()
+        await client.search_embeddings([0.1], top_k=10, num_candidates=400, mode='knn',
+                                       effort=0.25, timeout=0.2)
+        body = client.es.bodies[-1]
+        self.assertEqual(body['knn']['num_candidates'], 100)
+        self.assertEqual(body['timeout'], '200ms')
+        await client.search_page([1.0, 0.0], size=2, mode='two_stage', rerank_depth=40,
+                                 effort=0.5)
+        body = client.es.bodies[-1]
+        self.assertEqual(body['knn']['k'], 20)
+        self.assertNotIn('timeout', body)
+
+    async def test_reduced_effort_keeps_deep_two_stage_pages_full(self):
+        client = self._client()
+        # 200 candidates at full effort, 50 at a quarter: still enough for
+        # offset 40 + size 20, plus one hit telling whether a next page exists.
+        await client.search_page([1.0, 0.0], size=20, offset=40, mode='two_stage',
+                                 with_cursor=True, effort=0.25)
+        self.assertEqual(client.es.bodies[-1]['knn']['k'], 61)
+        await client.search_ranked_ids([1.0, 0.0], top_k=100, mode='two_stage', effort=0.25)
+        self.assertEqual(client.es.bodies[-1]['knn']['k'], 100)
+        await client.search_page([1.0, 0.0], size=20, mode='two_stage', effort=4.0)
+        self.assertEqual(client.es.bodies[-1]['knn']['k'], 200)
+
+    async def test_ranked_ids_report_a_timed_out_search(self):
+        client = self._client()
+        client.es.hits = [{'_score': 0.9, 'fields': {'image_id': [4]},
+                           '_source': {'image_id': 4, 'embedding': [1.0, 0.0]}}]
+        client.es.timed_out = True
+        for mode in ('knn', 'two_stage'):
+            ids, _, timed_out = await client.search_ranked_ids(
+                [1.0, 0.0], top_k=5, mode=mode, timeout=0.1
+            )
+            self.assertEqual((ids, timed_out), ([4], True))
+
+    async def test_compact_index_gets_int8_queries_and_vectors_from_doc_values(self):
+        client = self._client()
+        settings = sys.modules['infrastructure.elasticsearch_client'].settings
+        settings.VECTOR_ELEMENT_TYPE, settings.EMBEDDING_IN_SOURCE = 'byte', False
+        try:
+            client.es.hits = [
+                {'_score': 0.9, '_source': {'image_id': i, 'image_url': f'u{i}'},
+                 'fields': {'embedding': vector}}
+                for i, vector in ((1, [0, 127]), (2, [127, 0]))
+            ]
+            results, _ = await client.search_page([3.0, 4.0], size=2, mode='two_stage',
+                                                  rerank_depth=2)
+            body = client.es.bodies[-1]
+            self.assertEqual(body['knn']['query_vector'], [76, 102])
+            self.assertEqual(body['_source'], ['image_id', 'image_url'])
+            self.assertIn('embedding', body['script_fields'])
+            self.assertEqual([r['image_id'] for r in results], [1, 2])
+            self.assertEqual(await client.fetch_embedding(1), [0, 127])
+        finally:
+            settings.VECTOR_ELEMENT_TYPE, settings.EMBEDDING_IN_SOURCE = 'float', True
+
+    async def test_two_stage_needs_a_quantized_index(self):
+        client = self._client()
+        settings = sys.modules['infrastructure.elasticsearch_client'].settings
+        self.assertFalse(client.supports_two_stage)
+        for index_type, element_type, supported in (
+            ('int8_hnsw', 'float', True), ('int4_hnsw', 'float', True), ('hnsw', 'byte', False),
+        ):
+            settings.VECTOR_INDEX_TYPE, settings.VECTOR_ELEMENT_TYPE = index_type, element_type
+            try:
+                self.assertEqual(client.supports_two_stage, supported)
+            finally:
+                settings.VECTOR_INDEX_TYPE, settings.VECTOR_ELEMENT_TYPE = 'hnsw', 'float'
+
+    async def test_msearch_sends_every_query_in_one_request(self):
+        client = self._client()
+        results = await client.msearch_embeddings([[0.1], [0.2], [0.3]], top_k=4, mode='knn')
+        body = client.es.bodies[-1]
+        self.assertEqual(len(client.es.bodies), 1)
+        self.assertEqual(len(body), 6)
+        self.assertEqual(body[0], {})
+        self.assertEqual(body[3]['knn']['query_vector'], [0.2])
+        self.assertEqual(body[5]['knn']['k'], 4)
+        # a failed item only empties its own results
+        self.assertEqual([[r['image_id'] for r in hits] for hits in results], [[0], [], [2]])
+
+    async def test_fetch_by_image_ids_hydrates_only_requested_documents(self):
+        client = self._client()
+        documents = await client.fetch_by_image_ids([1])
+        body = client.es.bodies[-1]
+        self.assertEqual(body['query'], {'terms': {'image_id': [1]}})
+        self.assertEqual(body['size'], 1)
+        self.assertEqual(documents[1]['image_url'], 'u')
+        self.assertEqual(await client.fetch_by_image_ids([]), {})
+
+    async def test_index_generation_ignores_small_count_changes(self):
+        client = self._client()
+        generations = []
+        for count in (5000, 5400, 5999, 6000):
+            client.es.count = AsyncMock(return_value={'count': count})
+            generations.append(await client.index_generation())
+        self.assertEqual(generations[0], generations[2])
+        self.assertNotEqual(generations[2], generations[3])
+
+    def _client(self):
         sys.modules.pop('elasticsearch', None)
         es_module = types.ModuleType('elasticsearch')
 
         class AsyncElasticsearch:
             def __init__(self, *args, **kwargs):
-                pass
+                self.bodies = []
+                self.closed_pits = []
 
-            async def search(self, index, body):
+            async def search(self, body, index=None):
+                self.bodies.append(body)
                 return {
+                    'pit_id': body.get('pit', {}).get('id'),
+                    'timed_out': getattr(self, 'timed_out', False),
                     'hits': {
-                        'hits': [
-                            {'_score': 1.0, '_source': {'image_id': 1, 'image_url': 'u', 'image_path': 'p'}}
+                        'hits': getattr(self, 'hits', None) or [
+                            {'_score': 1.0,
+                             '_source': {'image_id': 1, 'image_url': 'u', 'image_path': 'p'},
+                             'sort': [1.0, 3]}
                         ]
                     }
                 }
 
+            async def msearch(self, body, index=None):
+                self.bodies.append(body)
+                return {'responses': [
+                    {'error': {'type': 'boom'}} if i == 1 else
+                    {'hits': {'hits': [
+                        {'_score': 0.5, '_source': {'image_id': i, 'image_url': 'u'}}
+                    ]}}
+                    for i in range(len(body) // 2)
+                ]}
+
+            async def open_point_in_time(self, index, keep_alive):
+                return {'id': 'pit-1'}
+
+            async def close_point_in_time(self, id):
+                self.closed_pits.append(id)
+
             async def close(self):
                 pass
 
@@ -42,10 +296,7 @@ class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
 
         import infrastructure.elasticsearch_client as es_client_module
         importlib.reload(es_client_module)
-        client = es_client_module.ElasticsearchClient()
-        results = await client.search_embeddings([0.1, 0.2], top_k=1)
-        await client.close()
-        self.assertEqual(results[0]['image_id'], 1)
+        return es_client_module.ElasticsearchClient()
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,209 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+import unittest.mock
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def inc(self):
+        self.calls += 1
+
+
+class LabeledCounter:
+    def __init__(self):
+        self.children = {}
+
+    def labels(self, **labels):
+        return self.children.setdefault(tuple(sorted(labels.items())), Counter())
+
+    def count(self, **labels):
+        return self.labels(**labels).calls
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0
+
+    def inc(self):
+        self.value += 1
+
+    def dec(self):
+        self.value -= 1
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+class TestAdmissionController(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.admission_shed_total = LabeledCounter()
+        self.metrics_module.admission_queue_depth = Gauge()
+        self.metrics_module.admission_in_flight = Gauge()
+        self.metrics_module.admission_queue_wait = Histogram()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.admission as admission_module
+        importlib.reload(admission_module)
+        self.module = admission_module
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def _hold(self, controller, release, order=None, name=None):
+        async def hold():
+            async with controller.admit():
+                if order is not None:
+                    order.append(name)
+                await release.wait()
+        return hold()
+
+    def test_concurrency_is_bounded_and_queue_is_fifo(self):
+        controller = self.module.AdmissionController(max_concurrent=2, max_queue=4)
+        order = []
+
+        async def run():
+            release = asyncio.Event()
+            tasks = [
+                asyncio.ensure_future(self._hold(controller, release, order, i)) for i in range(4)
+            ]
+            await asyncio.sleep(0.01)
+            self.assertEqual(order, [0, 1])
+            self.assertEqual(controller.queue_depth, 2)
+            self.assertEqual(self.metrics_module.admission_in_flight.value, 2)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+        self.assertEqual(order, [0, 1, 2, 3])
+        self.assertEqual(controller.queue_depth, 0)
+        self.assertEqual(self.metrics_module.admission_queue_depth.value, 0)
+        self.assertEqual(self.metrics_module.admission_in_flight.value, 0)
+
+    def test_full_queue_fails_fast(self):
+        controller = self.module.AdmissionController(
+            max_concurrent=1, max_queue=1, retry_after_seconds=3
+        )
+
+        async def run():
+            release = asyncio.Event()
+            held = [asyncio.ensure_future(self._hold(controller, release)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with self.assertRaises(self.module.OverloadedError) as ctx:
+                async with controller.admit():
+                    pass
+            release.set()
+            await asyncio.gather(*held)
+            return ctx.exception
+
+        error = asyncio.run(run())
+        self.assertEqual(error.reason, 'queue_full')
+        self.assertEqual(error.retry_after, 3)
+        self.assertEqual(self.metrics_module.admission_shed_total.count(reason='queue_full'), 1)
+
+    def test_waiting_past_the_deadline_is_shed(self):
+        controller = self.module.AdmissionController(
+            max_concurrent=1, max_queue=4, max_wait_seconds=0.01
+        )
+
+        async def run():
+            release = asyncio.Event()
+            held = asyncio.ensure_future(self._hold(controller, release))
+            await asyncio.sleep(0)
+            with self.assertRaises(self.module.OverloadedError):
+                async with controller.admit():
+                    pass
+            self.assertEqual(controller.queue_depth, 0)
+            release.set()
+            await held
+            # The slot is free again.
+            async with controller.admit():
+                pass
+
+        asyncio.run(run())
+        self.assertEqual(self.metrics_module.admission_shed_total.count(reason='wait_timeout'), 1)
+
+    def test_expected_wait_beyond_budget_is_shed_without_queueing(self):
+        controller = self.module.AdmissionController(
+            max_concurrent=1, max_queue=4, max_wait_seconds=0.5
+        )
+        controller._service_time = 2.0
+
+        async def run():
+            release = asyncio.Event()
+            held = asyncio.ensure_future(self._hold(controller, release))
+            await asyncio.sleep(0)
+            with self.assertRaises(self.module.OverloadedError) as ctx:
+                async with controller.admit():
+                    pass
+            release.set()
+            await held
+            return ctx.exception
+
+        self.assertEqual(asyncio.run(run()).reason, 'expected_wait')
+        self.assertEqual(controller.queue_depth, 0)
+
+    def test_slot_handed_over_as_the_wait_times_out_is_kept(self):
+        controller = self.module.AdmissionController(max_concurrent=1, max_queue=4)
+
+        release = None
+
+        async def wait_for(future, timeout):
+            # The holder leaves and hands over its slot, then the timeout fires anyway.
+            release.set()
+            await asyncio.shield(future)
+            raise asyncio.TimeoutError
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            held = asyncio.ensure_future(self._hold(controller, release))
+            await asyncio.sleep(0)
+            with unittest.mock.patch.object(self.module.asyncio, 'wait_for', wait_for):
+                async with controller.admit():
+                    self.assertEqual(controller._active, 1)
+            await held
+            self.assertEqual(controller._active, 0)
+            self.assertEqual(controller.queue_depth, 0)
+
+        asyncio.run(run())
+        self.assertEqual(self.metrics_module.admission_shed_total.count(reason='wait_timeout'), 0)
+
+    def test_cancelled_waiter_leaves_the_queue(self):
+        controller = self.module.AdmissionController(max_concurrent=1, max_queue=4)
+
+        async def run():
+            release = asyncio.Event()
+            held = asyncio.ensure_future(self._hold(controller, release))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(self._hold(controller, release))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            self.assertEqual(controller.queue_depth, 0)
+            release.set()
+            await held
+            self.assertEqual(controller._active, 0)
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,13 @@
 import os
 import sys
+import json
 import types
+import contextlib
 import importlib
 import asyncio
 import unittest
-from unittest.mock import AsyncMock, MagicMock
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Stub httpx before importing TestClient to avoid missing dependency
 sys.modules.setdefault('httpx', types.ModuleType('httpx'))
@@ -16,8 +19,15 @@ sys.path.insert(0, os.path.abspath(root_path))
 class Counter:
     def __init__(self):
         self.calls = 0
-    def inc(self):
-        self.calls += 1
+    def inc(self, amount=1):
+        self.calls += amount
+
+class LabeledCounter:
+    def __init__(self):
+        self.calls = {}
+    def labels(self, **labels):
+        counter = self.calls.setdefault(tuple(sorted(labels.items())), Counter())
+        return counter
 
 class Histogram:
     def __init__(self):
@@ -25,19 +35,66 @@ class Histogram:
     def observe(self, value):
         self.values.append(value)
 
+class LabeledHistogram:
+    def __init__(self):
+        self.calls = {}
+    def labels(self, **labels):
+        return self.calls.setdefault(tuple(sorted(labels.items())), Histogram())
+
+class Gauge:
+    def __init__(self):
+        self.value = None
+    def set(self, value):
+        self.value = value
+
+class LiveGauge:
+    def __init__(self):
+        self.value = 0
+    def inc(self, amount=1):
+        self.value += amount
+    def dec(self, amount=1):
+        self.value -= amount
+
+class LabeledGauge:
+    def __init__(self):
+        self.calls = {}
+    def labels(self, **labels):
+        return self.calls.setdefault(tuple(sorted(labels.items())), Gauge())
+
 
 class TestAPI(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         embed_service = MagicMock()
         embed_service.generate_embedding_from_text = MagicMock(return_value=[0.1, 0.2])
+        embed_service.generate_embeddings_from_texts = MagicMock(
+            side_effect=lambda texts: [
+                embed_service.generate_embedding_from_text(text) for text in texts
+            ]
+        )
         embed_module = types.ModuleType('domain.embedding_service')
-        embed_module.EmbeddingService = lambda: embed_service
+        embed_module.EmbeddingService = lambda *args, **kwargs: embed_service
         sys.modules['domain.embedding_service'] = embed_module
 
         es_client = types.SimpleNamespace(
-            search_embeddings=AsyncMock(return_value=[{'image_id': 1, 'image_url': 'u', 'image_path': 'p', 'score': 0.9}]),
-            close=AsyncMock()
+            search_page=AsyncMock(return_value=(
+                [{'image_id': 1, 'image_url': 'u', 'image_path': 'p', 'score': 0.9}],
+                {'mode': 'knn', 'offset': 1},
+            )),
+            msearch_embeddings=AsyncMock(side_effect=lambda embeddings, **kwargs: [
+                [{'image_id': i, 'image_url': f'u{i}', 'score': 0.5}]
+                for i, _ in enumerate(embeddings)
+            ]),
+            fetch_embedding=AsyncMock(
+                side_effect=lambda image_id: [0.5, 0.5] if image_id == 1 else None
+            ),
+            search_embeddings=AsyncMock(
+                return_value=[{'image_id': 2, 'image_url': 'u2', 'score': 0.8}]
+            ),
+            index_generation=AsyncMock(return_value=1),
+            close=AsyncMock(),
+            supports_filters=True,
+            supports_two_stage=False,
         )
         es_module = types.ModuleType('infrastructure.elasticsearch_client')
         es_module.elasticsearch_client = es_client
@@ -47,10 +104,46 @@ class TestAPI(unittest.TestCase):
         metrics_module.queries_total = Counter()
         metrics_module.query_errors_total = Counter()
         metrics_module.query_latency = Histogram()
+        metrics_module.encode_queue_wait = Histogram()
+        metrics_module.encode_inference_latency = Histogram()
+        metrics_module.encode_batch_size = Histogram()
+        metrics_module.encode_batch_wait = Histogram()
+        metrics_module.embedding_cache_hits_total = LabeledCounter()
+        metrics_module.embedding_cache_misses_total = LabeledCounter()
+        metrics_module.embedding_cache_evictions_total = LabeledCounter()
+        metrics_module.result_cache_requests_total = LabeledCounter()
+        metrics_module.coalesced_requests_total = LabeledCounter()
+        metrics_module.admission_shed_total = LabeledCounter()
+        metrics_module.admission_queue_depth = LiveGauge()
+        metrics_module.admission_in_flight = LiveGauge()
+        metrics_module.admission_queue_wait = Histogram()
+        metrics_module.search_effort_level = Gauge()
+        metrics_module.search_timeouts_total = Counter()
+        metrics_module.search_stage_latency = LabeledHistogram()
+        metrics_module.timed_stage = lambda stage: contextlib.nullcontext()
+        from infrastructure.request_timing import add_stage
+        metrics_module.record_stage = add_stage
+        metrics_module.image_vector_cache_requests_total = LabeledCounter()
+        metrics_module.metrics_registry = lambda: None
+        metrics_module.response_bytes = Histogram()
+        metrics_module.response_serialization_latency = Histogram()
+        metrics_module.startup_phase_duration = LabeledGauge()
         sys.modules['infrastructure.metrics'] = metrics_module
 
+        artifacts_module = types.ModuleType('infrastructure.model_artifacts')
+        artifacts_module.ModelArtifactCache = MagicMock()
+        sys.modules['infrastructure.model_artifacts'] = artifacts_module
+
+        tokenizer_module = types.ModuleType('infrastructure.text_tokenizer')
+        tokenizer_module.ClipTokenizer = MagicMock()
+        sys.modules['infrastructure.text_tokenizer'] = tokenizer_module
+
+        redis_module = types.ModuleType('infrastructure.redis_client')
+        redis_module.redis_client = None
+        sys.modules['infrastructure.redis_client'] = redis_module
+
         prom_module = types.ModuleType('prometheus_client')
-        prom_module.generate_latest = lambda: b'metrics'
+        prom_module.generate_latest = lambda registry=None: b'metrics'
         prom_module.CONTENT_TYPE_LATEST = 'text/plain'
         sys.modules['prometheus_client'] = prom_module
 
@@ -58,27 +151,281 @@ class TestAPI(unittest.TestCase):
         httpx_module = types.ModuleType('httpx')
         sys.modules.setdefault('httpx', httpx_module)
 
+        import application.inference_executor as executor_module
+        importlib.reload(executor_module)
+        import application.micro_batcher as batcher_module
+        importlib.reload(batcher_module)
+        import application.model_loader as loader_module
+        importlib.reload(loader_module)
+        import application.encoder_factory as factory_module
+        importlib.reload(factory_module)
+        import application.embedding_cache as cache_module
+        importlib.reload(cache_module)
+        import application.result_cache as result_cache_module
+        importlib.reload(result_cache_module)
+        import application.single_flight as single_flight_module
+        importlib.reload(single_flight_module)
+        import application.admission as admission_module
+        importlib.reload(admission_module)
+        import application.search_effort as search_effort_module
+        importlib.reload(search_effort_module)
+        import application.search_service as search_service_module
+        importlib.reload(search_service_module)
+        import application.similar_search as similar_module
+        importlib.reload(similar_module)
+        import interface.responses as responses_module
+        importlib.reload(responses_module)
         import interface.api as api_module
         importlib.reload(api_module)
+        # Ranked result caching is covered in test_search_service; these tests
+        # exercise the direct Elasticsearch paging path.
+        api_module.search_service.result_cache = None
+        cls.not_ready = asyncio.run(api_module.ready())
+        api_module.model_loader.load()
         cls.api = api_module
         cls.metrics = metrics_module
-        cls.embed_service = api_module.embedding_service
+        cls.embed_service = api_module.model_loader.service
+        cls.es_client = es_client
+
+    def _get_image(self, **params):
+        response = asyncio.run(self.api.get_image(**params))
+        return json.loads(response.body)
 
     def test_health_endpoint(self):
         response = asyncio.run(self.api.health())
         self.assertEqual(response, {'status': 'ok', 'service': 'api_server'})
 
+    def test_ready_endpoint_flips_after_model_warm_up(self):
+        self.assertEqual(self.not_ready.status_code, 503)
+        self.assertEqual(json.loads(self.not_ready.body)['status'], 'loading')
+        response = asyncio.run(self.api.ready())
+        self.assertEqual(response, {'status': 'ready', 'service': 'api_server'})
+        self.embed_service.warm_up.assert_called_once()
+        phases = {key[0][1] for key in self.metrics.startup_phase_duration.calls}
+        self.assertEqual(phases, {'model_load', 'warmup'})
+
     def test_get_image_success(self):
         self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
         before = self.metrics.queries_total.calls
         err_before = self.metrics.query_errors_total.calls
-        data = asyncio.run(self.api.get_image(query_string='hi', page=1, size=1))
-        self.assertEqual(data.query, 'hi')
-        self.assertEqual(len(data.results), 1)
-        self.assertEqual(data.results[0].image_id, 1)
+        data = self._get_image(query_string='hi', page=1, size=1)
+        self.assertEqual(data['query'], 'hi')
+        self.assertEqual(data['results'], [{'image_id': 1, 'image_url': 'u', 'score': 0.9}])
         self.assertEqual(self.metrics.queries_total.calls, before + 1)
         self.assertEqual(self.metrics.query_errors_total.calls, err_before)
 
+    def test_get_image_records_response_size(self):
+        before = len(self.metrics.response_bytes.values)
+        response = asyncio.run(self.api.get_image(query_string='hi', page=1, size=1))
+        self.assertEqual(response.media_type, 'application/json')
+        self.assertEqual(self.metrics.response_bytes.values[before:], [len(response.body)])
+        self.assertEqual(len(self.metrics.response_serialization_latency.values), before + 1)
+
+    def test_get_image_reports_stage_timings(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        response = asyncio.run(self.api.get_image(query_string='timed query', page=1, size=1))
+        stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+        self.assertEqual(stages, ['encode_queue', 'tokenize', 'encode', 'serialize', 'total'])
+
+    def test_get_image_reuses_cached_query_embedding(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.3, 0.4]
+        self.embed_service.generate_embedding_from_text.reset_mock()
+        asyncio.run(self.api.get_image(query_string='Red  Car', page=1, size=1))
+        asyncio.run(self.api.get_image(query_string='red car', page=1, size=1))
+        self.assertEqual(self.embed_service.generate_embedding_from_text.call_count, 1)
+
+    def test_get_image_returns_cursor_and_resumes_from_it(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        first = self._get_image(query_string='hi', page=1, size=1)
+        self.assertIsNotNone(first['next_cursor'])
+        self._get_image(query_string='hi', page=1, size=1, cursor=first['next_cursor'])
+        kwargs = self.es_client.search_page.await_args.kwargs
+        self.assertEqual(kwargs['offset'], 1)
+        self.assertEqual(kwargs['size'], 1)
+        self.assertEqual(kwargs['mode'], 'knn')
+
+    def test_get_image_legacy_page_fetches_only_one_page(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        asyncio.run(self.api.get_image(query_string='hi', page=50, size=100))
+        kwargs = self.es_client.search_page.await_args.kwargs
+        self.assertEqual(kwargs['offset'], 4900)
+        self.assertEqual(kwargs['size'], 100)
+
+    def test_get_image_rejects_malformed_cursor(self):
+        with self.assertRaises(self.api.HTTPException) as ctx:
+            asyncio.run(self.api.get_image(
+                query_string='hi', page=1, size=1, cursor='not-a-cursor'
+            ))
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_get_image_filters_inside_the_search_and_keeps_them_in_the_cursor(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        first = self._get_image(
+            query_string='hi', page=1, size=1, domain=['WWW.Example.com'], min_width=200,
+            downloaded_after=datetime(2024, 1, 1),
+        )
+        filters = {
+            'domains': ['example.com'],
+            'downloaded_after': '2024-01-01T00:00:00',
+            'min_width': 200,
+        }
+        self.assertEqual(self.es_client.search_page.await_args.kwargs['filters'], filters)
+        # the next page is filtered the same way without repeating the parameters
+        self._get_image(query_string='hi', page=1, size=1, cursor=first['next_cursor'])
+        self.assertEqual(self.es_client.search_page.await_args.kwargs['filters'], filters)
+
+    def _cursor(self, query_string='hi', **state):
+        from application.pagination import encode_cursor, query_fingerprint
+
+        return encode_cursor(dict(state, query=query_fingerprint(query_string)))
+
+    def _assert_bad_request(self, **params):
+        params = dict({'query_string': 'hi', 'page': 1, 'size': 1}, **params)
+        with self.assertRaises(self.api.HTTPException) as ctx:
+            asyncio.run(self.api.get_image(**params))
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_get_image_rejects_forged_cursor_filters(self):
+        for filters in (
+            {'domains': {'index': 'users', 'id': '1', 'path': 'domains'}},
+            {'domains': ['a.com'], 'script': 'x'},
+            {'min_width': '200'},
+            {'downloaded_after': 'yesterday'},
+        ):
+            self._assert_bad_request(cursor=self._cursor(mode='knn', offset=1, filters=filters))
+
+    def test_get_image_clamps_cursor_effort(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        cursor = self._cursor(mode='knn', offset=1, effort=50)
+        self._get_image(query_string='hi', page=1, size=1, cursor=cursor)
+        self.assertIsNone(self.es_client.search_page.await_args.kwargs['effort'])
+        for effort in (0, -1, 'max', True):
+            self._assert_bad_request(cursor=self._cursor(mode='knn', offset=1, effort=effort))
+
+    def test_get_image_rejects_cursors_of_other_queries(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        first = self._get_image(query_string='cats', page=1, size=1)
+        self._assert_bad_request(query_string='dogs', cursor=first['next_cursor'])
+        from application.pagination import encode_cursor
+        self._assert_bad_request(cursor=encode_cursor({'mode': 'knn', 'offset': 1}))
+
+    def test_get_image_rejects_cursor_modes_a_request_cannot_choose(self):
+        for mode in ('exact', 'two_stage', 'brute', None):
+            self._assert_bad_request(cursor=self._cursor(mode=mode, offset=1, pit_id='p'))
+
+    def test_get_image_rejects_forged_cursor_search_options(self):
+        for options in (
+            {'num_candidates': 0}, {'num_candidates': 20000}, {'rerank_depth': '50'},
+            {'num_candidates': True}, {'offset': -1}, {'offset': 1.5},
+        ):
+            state = dict({'mode': 'knn', 'offset': 1}, **options)
+            self._assert_bad_request(cursor=self._cursor(**state))
+
+    def test_get_image_rejects_knn_pages_beyond_the_candidate_limit(self):
+        search_page = self.es_client.search_page
+        search_page.reset_mock()
+        self._assert_bad_request(page=101, size=100)
+        self._assert_bad_request(cursor=self._cursor(mode='knn', offset=9999), size=2)
+        search_page.assert_not_awaited()
+
+    def test_get_image_rejects_rerank_depth_without_a_quantized_index(self):
+        with self.assertRaises(self.api.HTTPException) as ctx:
+            asyncio.run(self.api.get_image(query_string='hi', page=1, size=1, rerank_depth=50))
+        self.assertEqual(ctx.exception.status_code, 400)
+        self.es_client.supports_two_stage = True
+        try:
+            self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+            self._get_image(query_string='hi', page=1, size=1, rerank_depth=50)
+            self.assertEqual(self.es_client.search_page.await_args.kwargs['mode'], 'two_stage')
+        finally:
+            self.es_client.supports_two_stage = False
+
+    def test_get_image_rejects_empty_download_range(self):
+        with self.assertRaises(self.api.HTTPException) as ctx:
+            asyncio.run(self.api.get_image(
+                query_string='hi', page=1, size=1,
+                downloaded_after=datetime(2024, 2, 1), downloaded_before=datetime(2024, 1, 1),
+            ))
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_get_image_compares_aware_and_naive_download_times_in_utc(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        after = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self._get_image(
+            query_string='hi', page=1, size=1,
+            downloaded_after=after, downloaded_before=datetime(2024, 2, 1),
+        )
+        self.assertEqual(self.es_client.search_page.await_args.kwargs['filters'], {
+            'downloaded_after': '2024-01-01T00:00:00+00:00',
+            'downloaded_before': '2024-02-01T00:00:00',
+        })
+        # 2024-01-01T00:30+01:00 is 23:30 UTC, before the naive (UTC) bound
+        self._assert_bad_request(
+            downloaded_after=datetime(2024, 1, 1), downloaded_before=datetime(
+                2024, 1, 1, 0, 30, tzinfo=timezone(timedelta(hours=1))
+            ),
+        )
+
+    def test_similar_images_searches_stored_vector(self):
+        self.embed_service.generate_embedding_from_text.reset_mock()
+        response = asyncio.run(self.api.similar_images(image_id=1, size=3))
+        data = json.loads(response.body)
+        self.assertEqual(data, {
+            'image_id': 1, 'results': [{'image_id': 2, 'image_url': 'u2', 'score': 0.8}],
+        })
+        kwargs = self.es_client.search_embeddings.await_args.kwargs
+        self.assertEqual(kwargs['exclude_image_ids'], [1])
+        self.embed_service.generate_embedding_from_text.assert_not_called()
+
+    def test_similar_images_unknown_image_is_404(self):
+        with self.assertRaises(self.api.HTTPException) as ctx:
+            asyncio.run(self.api.similar_images(image_id=404, size=3))
+        self.assertEqual(ctx.exception.status_code, 404)
+
+    def test_similar_images_storage_outage_is_500_not_404(self):
+        fetch_embedding = self.es_client.fetch_embedding
+        self.es_client.fetch_embedding = AsyncMock(side_effect=ConnectionError('cluster down'))
+        try:
+            with self.assertRaises(self.api.HTTPException) as ctx:
+                asyncio.run(self.api.similar_images(image_id=503, size=3))
+        finally:
+            self.es_client.fetch_embedding = fetch_embedding
+        self.assertEqual(ctx.exception.status_code, 500)
+
+    def test_search_batch_streams_one_line_per_query(self):
+        self.embed_service.generate_embedding_from_text.return_value = [0.1, 0.2]
+        self.embed_service.generate_embeddings_from_texts.reset_mock()
+        before = self.metrics.queries_total.calls
+        request = self.api.BatchSearchRequest(queries=['dog', 'cat', 'dog'], size=1)
+
+        async def run():
+            response = await self.api.search_batch(request)
+            return [chunk async for chunk in response.body_iterator], response.media_type
+
+        chunks, media_type = asyncio.run(run())
+        lines = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual(media_type, 'application/x-ndjson')
+        self.assertEqual([line['query'] for line in lines], ['dog', 'cat', 'dog'])
+        self.assertEqual(lines[1]['results'], [{'image_id': 1, 'image_url': 'u1', 'score': 0.5}])
+        self.assertEqual(self.metrics.queries_total.calls, before + 3)
+        # the distinct uncached queries are encoded in one batch
+        self.embed_service.generate_embeddings_from_texts.assert_called_once_with(['dog', 'cat'])
+
+    def test_search_batch_rejects_overlong_queries(self):
+        with self.assertRaises(ValueError):
+            self.api.BatchSearchRequest(queries=['q', 'q' * (self.api.MAX_QUERY_LENGTH + 1)])
+
+    def test_search_batch_rejects_oversized_batches(self):
+        request = self.api.BatchSearchRequest(queries=['q'] * 2, size=1)
+        limit = self.api.settings.BATCH_SEARCH_MAX_QUERIES
+        self.api.settings.BATCH_SEARCH_MAX_QUERIES = 1
+        try:
+            with self.assertRaises(self.api.HTTPException) as ctx:
+                asyncio.run(self.api.search_batch(request))
+        finally:
+            self.api.settings.BATCH_SEARCH_MAX_QUERIES = limit
+        self.assertEqual(ctx.exception.status_code, 400)
+
     def test_get_image_embedding_failure(self):
         self.embed_service.generate_embedding_from_text.return_value = []
         before = self.metrics.query_errors_total.calls
@@ -86,6 +433,19 @@ class TestAPI(unittest.TestCase):
             asyncio.run(self.api.get_image(query_string='bad', page=1, size=1))
         self.assertEqual(self.metrics.query_errors_total.calls, before + 1)
 
+    def test_get_image_sheds_load_with_retry_after(self):
+        admission = self.api.search_service.admission
+        before = self.metrics.query_errors_total.calls
+        busy = admission.max_concurrent
+        with patch.object(admission, 'max_queue', 0), patch.object(admission, '_active', busy):
+            with self.assertRaises(self.api.HTTPException) as ctx:
+                asyncio.run(self.api.get_image(query_string='busy', page=1, size=1))
+        self.assertEqual(ctx.exception.status_code, 503)
+        self.assertEqual(ctx.exception.headers, {'Retry-After': '1'})
+        self.assertEqual(self.metrics.query_errors_total.calls, before)
+        shed = self.metrics.admission_shed_total.calls[(('reason', 'queue_full'),)]
+        self.assertEqual(shed.calls, 1)
+
 
 if __name__ == '__main__':
     unittest.main()
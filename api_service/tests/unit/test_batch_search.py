@@ -0,0 +1,53 @@
+import os
+import sys
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from application.batch_search import BatchSearchService  # noqa: E402
+
+
+def fake_search_client():
+    async def msearch(embeddings, top_k, num_candidates=None, mode=None):
+        return [[{'image_id': int(e[0]), 'image_url': 'u', 'score': 1.0}] for e in embeddings]
+
+    return AsyncMock(msearch_embeddings=AsyncMock(side_effect=msearch))
+
+
+async def collect(entries):
+    return [entry async for entry in entries]
+
+
+class TestBatchSearchService(unittest.TestCase):
+    def test_chunks_encode_and_search_together_in_order(self):
+        encode = AsyncMock(side_effect=lambda queries: [[float(len(q))] for q in queries])
+        client = fake_search_client()
+        service = BatchSearchService(encode, client, mode='knn', chunk_size=2)
+
+        entries = asyncio.run(collect(service.search(['a', 'bb', 'ccc'], size=3)))
+
+        self.assertEqual([e['query'] for e in entries], ['a', 'bb', 'ccc'])
+        self.assertEqual([e['results'][0]['image_id'] for e in entries], [1, 2, 3])
+        self.assertEqual([c.args[0] for c in encode.await_args_list], [['a', 'bb'], ['ccc']])
+        self.assertEqual(client.msearch_embeddings.await_count, 2)
+        self.assertEqual(client.msearch_embeddings.await_args.kwargs['top_k'], 3)
+        self.assertEqual(client.msearch_embeddings.await_args.kwargs['mode'], 'knn')
+
+    def test_failed_encodes_are_reported_without_searching_them(self):
+        encode = AsyncMock(return_value=[[], [5.0]])
+        client = fake_search_client()
+        service = BatchSearchService(encode, client, mode='knn')
+
+        entries = asyncio.run(collect(service.search(['bad', 'good'], size=1)))
+
+        self.assertEqual(entries[0]['results'], [])
+        self.assertIn('error', entries[0])
+        self.assertEqual(entries[1]['results'][0]['image_id'], 5)
+        self.assertEqual(client.msearch_embeddings.await_args.args[0], [[5.0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
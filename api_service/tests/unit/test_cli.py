@@ -0,0 +1,334 @@
+import io
+import os
+import sys
+import types
+import asyncio
+import tempfile
+import contextlib
+import unittest
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from interface import cli  # noqa: E402
+from infrastructure.vector_store import MemmapVectorStore, write_vector_store  # noqa: E402
+
+
+async def records(items):
+    for item in items:
+        yield item
+
+
+def clustered_records(count, dims, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dims))
+    vectors = centers[rng.integers(0, 8, count)] + 0.1 * rng.standard_normal((count, dims))
+    return [(i, f'http://img/{i}.jpg', vector.tolist()) for i, vector in enumerate(vectors)]
+
+
+def fake_clip():
+    """clip stub whose tokenize rejects long texts unless truncate is set."""
+    clip_module = types.ModuleType('clip')
+
+    def tokenize(texts, truncate=False):
+        if not truncate and any(len(text.split()) > 75 for text in texts):
+            raise RuntimeError('Input is too long for context length 77')
+        return types.SimpleNamespace(numpy=lambda: np.zeros((len(texts), 77), dtype=np.int32))
+
+    clip_module.tokenize = tokenize
+    return clip_module
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write_lines(self, name, lines):
+        with open(self.path(name), 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return self.path(name)
+
+    def build_store(self, count=400, dims=8):
+        path = self.path('store')
+        asyncio.run(write_vector_store(
+            path, records(clustered_records(count, dims)), dims=dims, dtype='float32'
+        ))
+        return path
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.main(list(argv))
+        return output.getvalue()
+
+
+class TestBuildVectorStore(CliTestCase):
+    def _es_module(self, items):
+        module = types.ModuleType('infrastructure.elasticsearch_client')
+        module.elasticsearch_client = types.SimpleNamespace(
+            scan_embeddings=mock.MagicMock(side_effect=lambda batch_size: records(items)),
+            close=AsyncMock(),
+        )
+        return module
+
+    def test_exports_every_embedding_and_closes_the_client(self):
+        es_module = self._es_module(clustered_records(20, 4))
+        with mock.patch.dict(sys.modules, {'infrastructure.elasticsearch_client': es_module}):
+            self.run_cli(
+                'build-vector-store', '--output', self.path('store'), '--dims', '4',
+                '--dtype', 'float32', '--batch-size', '50',
+            )
+        client = es_module.elasticsearch_client
+        client.scan_embeddings.assert_called_once_with(batch_size=50)
+        client.close.assert_awaited_once()
+        store = MemmapVectorStore.load(self.path('store'))
+        self.assertEqual(len(store), 20)
+        self.assertEqual(store.url(3), 'http://img/3.jpg')
+
+    def test_failed_export_still_closes_the_client(self):
+        es_module = self._es_module([])
+        es_module.elasticsearch_client.scan_embeddings.side_effect = RuntimeError('scroll expired')
+        with mock.patch.dict(sys.modules, {'infrastructure.elasticsearch_client': es_module}):
+            with self.assertRaises(RuntimeError):
+                self.run_cli('build-vector-store', '--output', self.path('store'))
+        es_module.elasticsearch_client.close.assert_awaited_once()
+
+
+class TestQuantizeOnnx(CliTestCase):
+    def _quantize(self, *argv):
+        quantize = mock.MagicMock()
+        with mock.patch.dict(sys.modules, {'clip': fake_clip()}), \
+                mock.patch('infrastructure.quantization.quantize_onnx_model', quantize):
+            self.run_cli('quantize-onnx', '--model-path', self.path('text.onnx'), *argv)
+        return quantize
+
+    def test_static_calibration_truncates_long_queries(self):
+        queries = self.write_lines('queries.txt', ['a dog', 'word ' * 200, 'red car'])
+        quantize = self._quantize(
+            '--mode', 'static', '--calibration-queries', queries, '--batch-size', '2'
+        )
+        model_path, output, mode, batches = quantize.call_args.args
+        self.assertEqual(output, self.path('text.static-int8.onnx'))
+        self.assertEqual(mode, 'static')
+        self.assertEqual([batch.shape for batch in batches], [(2, 77), (1, 77)])
+
+    def test_dynamic_mode_needs_no_calibration(self):
+        quantize = self._quantize('--output', self.path('out.onnx'))
+        self.assertEqual(
+            quantize.call_args.args,
+            (self.path('text.onnx'), self.path('out.onnx'), 'dynamic', None),
+        )
+
+    def test_static_mode_requires_calibration_queries(self):
+        with self.assertRaises(SystemExit):
+            self._quantize('--mode', 'static')
+
+
+
+class TestIVFCommands(CliTestCase):
+    def test_train_then_benchmark_ivf(self):
+        store = self.build_store()
+        self.run_cli(
+            'train-ivf', '--store', store, '--lists', '8', '--sample-size', '200',
+            '--iterations', '3',
+        )
+        from infrastructure.ivf_index import IVFIndex
+        self.assertTrue(IVFIndex.exists(store))
+
+        output = self.run_cli(
+            'benchmark-ivf', '--store', store, '--queries', '20', '--top-k', '5',
+            '--nprobe', '1', '8',
+        )
+        lines = output.splitlines()
+        self.assertIn('recall@5', lines[0])
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['flat', 'ivf/1', 'ivf/8'])
+        # the exact scan is its own ground truth, and probing every list matches it
+        self.assertEqual(float(lines[1].split()[1]), 1.0)
+        self.assertEqual(float(lines[3].split()[1]), 1.0)
+
+
+
+class TestPQCommands(CliTestCase):
+    def test_train_then_benchmark_pq(self):
+        store = self.build_store()
+        self.run_cli(
+            'train-pq', '--store', store, '--subquantizers', '4', '--sample-size', '300',
+            '--iterations', '3',
+        )
+        from infrastructure.pq_index import PQIndex
+        self.assertTrue(PQIndex.exists(store))
+
+        output = self.run_cli(
+            'benchmark-pq', '--store', store, '--queries', '20', '--top-k', '5',
+            '--rerank', '0', '400',
+        )
+        lines = output.splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:]], ['flat', 'pq/0', 'pq/400'])
+        # re-ranking every vector exactly recovers the exact ranking
+        self.assertEqual(float(lines[3].split()[1]), 1.0)
+        self.assertLessEqual(float(lines[2].split()[1]), 1.0)
+
+
+
+class TestMemoryReport(CliTestCase):
+    def test_sums_rss_and_pss_over_workers(self):
+        mib = 1024 * 1024
+        usage = {
+            1: dict(rss=400 * mib, pss=150 * mib, shared_clean=300 * mib, shared_dirty=0,
+                    private_clean=0, private_dirty=100 * mib),
+            2: dict(rss=350 * mib, pss=100 * mib, shared_clean=300 * mib, shared_dirty=0,
+                    private_clean=0, private_dirty=50 * mib),
+        }
+        children = mock.MagicMock(return_value=[2])
+        with mock.patch('infrastructure.process_memory.child_pids', children), \
+                mock.patch('infrastructure.process_memory.memory_usage', usage.get):
+            output = self.run_cli('memory-report', '--pid', '1')
+        children.assert_called_once_with(1)
+        rows = [line.split() for line in output.splitlines()[1:]]
+        self.assertEqual([row[0] for row in rows], ['1', '2', 'total'])
+        self.assertEqual(rows[1][1:], ['350.0', '100.0', '300.0', '50.0'])
+        self.assertEqual(rows[2][1:], ['750.0', '250.0'])
+
+
+
+class FakeEmbeddingService:
+    """Stands in for domain.embedding_service.EmbeddingService."""
+
+    def __init__(self, model_name, text_only=False, quantize=False, onnx_encoder=None):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.onnx_encoder = onnx_encoder
+        self.warmed_up = False
+
+    def warm_up(self):
+        self.warmed_up = True
+
+    def generate_embeddings_from_texts(self, texts):
+        # The int8 and ONNX encoders tilt every embedding slightly.
+        tilt = 0.0 if self.onnx_encoder is None and not self.quantize else 0.05
+        return [[1.0, tilt] for _ in texts]
+
+
+def embedding_service_module():
+    module = types.ModuleType('domain.embedding_service')
+    module.EmbeddingService = FakeEmbeddingService
+    return module
+
+
+class TestOnnxCommands(CliTestCase):
+    def test_export_onnx_writes_the_text_tower_with_metadata(self):
+        model = types.SimpleNamespace(text_projection=np.zeros((512, 256)))
+        clip_module = types.ModuleType('clip')
+        clip_module.load = mock.MagicMock(return_value=(model, 'preprocess'))
+        artifacts_module = types.ModuleType('infrastructure.model_artifacts')
+        artifacts_module.clip_metadata = mock.MagicMock(return_value={'dimension': 256})
+        export = mock.MagicMock()
+        modules = {'clip': clip_module, 'infrastructure.model_artifacts': artifacts_module}
+        with mock.patch.dict(sys.modules, modules), \
+                mock.patch('infrastructure.onnx_encoder.export_text_tower', export):
+            self.run_cli('export-onnx', '--model', 'ViT-B/32', '--output',
+                         self.path('text.onnx'), '--opset', '14')
+        clip_module.load.assert_called_once_with('ViT-B/32', device='cpu')
+        artifacts_module.clip_metadata.assert_called_once_with(model, 'preprocess', 256)
+        export.assert_called_once_with(model, self.path('text.onnx'), {'dimension': 256}, 14)
+
+    def test_benchmark_encoders_reports_latency_and_parity(self):
+        torch_module = types.ModuleType('torch')
+        torch_module.set_num_threads = mock.MagicMock()
+        onnx_encoder = mock.MagicMock()
+        modules = {'torch': torch_module, 'domain.embedding_service': embedding_service_module()}
+        with mock.patch.dict(sys.modules, modules), \
+                mock.patch('infrastructure.onnx_encoder.OnnxEncoder', onnx_encoder):
+            output = self.run_cli(
+                'benchmark-encoders', '--onnx-model', self.path('text.onnx'), '--items', '10',
+                '--batch-size', '4', '--threads', '2', '--optimization', 'basic',
+            )
+        torch_module.set_num_threads.assert_called_once_with(2)
+        onnx_encoder.assert_called_once_with(
+            self.path('text.onnx'), intra_op_threads=2,
+            inter_op_threads=cli.settings.ONNX_INTER_OP_THREADS, optimization_level='basic',
+        )
+        lines = output.splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:3]], ['torch', 'onnx'])
+        self.assertIn('onnx vs torch cosine: min 0.998752', lines[3])
+
+
+class TestQuantizationReport(CliTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.dict(
+            sys.modules, {'domain.embedding_service': embedding_service_module()}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_quantization_report_compares_candidate_with_baseline(self):
+        store = self.build_store(dims=2)
+        queries = self.write_lines('heldout.txt', ['a dog', '', 'red car', 'beach'])
+        onnx_encoder = mock.MagicMock()
+        with mock.patch('infrastructure.onnx_encoder.OnnxEncoder', onnx_encoder):
+            output = self.run_cli(
+                'quantization-report', '--queries', queries, '--store', store,
+                '--baseline', 'torch', '--candidate', self.path('text.int8.onnx'), '--top-k', '5',
+            )
+        onnx_encoder.assert_called_once_with(self.path('text.int8.onnx'))
+        lines = output.splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:3]], ['baseline', 'candidate'])
+        self.assertIn('top-5 overlap over 3 queries', lines[3])
+        self.assertIn('query embedding cosine: min 0.9988', lines[4])
+
+    def test_identical_encoders_overlap_fully(self):
+        store = self.build_store(dims=2)
+        queries = self.write_lines('heldout.txt', ['a dog', 'red car'])
+        output = self.run_cli(
+            'quantization-report', '--queries', queries, '--store', store, '--candidate', 'torch',
+        )
+        self.assertIn('mean 1.000, min 1.000, identical 100.0%', output)
+
+
+
+class FakeClipTokenizer:
+    """ClipTokenizer stand-in; ``offset`` shifts its ids away from clip's."""
+
+    offset = 0
+
+    def __init__(self, cache_size):
+        self.cache_size = cache_size
+
+    def tokenize(self, texts, truncate=False):
+        return np.zeros((len(texts), 77), dtype=np.int32) + self.offset
+
+
+class TestBenchmarkTokenizer(CliTestCase):
+    def _run(self, offset, *argv):
+        tokenizer = type('Tokenizer', (FakeClipTokenizer,), {'offset': offset})
+        with mock.patch.dict(sys.modules, {'clip': fake_clip()}), \
+                mock.patch('infrastructure.text_tokenizer.ClipTokenizer', tokenizer):
+            return self.run_cli('benchmark-tokenizer', *argv)
+
+    def test_matching_ids_report_timings(self):
+        queries = self.write_lines('queries.txt', ['a dog', 'word ' * 200, 'red car'])
+        output = self._run(0, '--queries', queries, '--batch-size', '2')
+        lines = output.splitlines()
+        self.assertEqual(
+            [line.rsplit(None, 1)[0] for line in lines[1:4]],
+            ['clip.tokenize', 'cached, cold', 'cached, warm'],
+        )
+        self.assertEqual(lines[4], '3 queries, 0 batches with different token ids')
+
+    def test_different_ids_fail_the_command(self):
+        with self.assertRaises(SystemExit) as ctx:
+            self._run(1)
+        self.assertEqual(ctx.exception.code, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+from unittest.mock import AsyncMock, patch
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def inc(self):
+        self.calls += 1
+
+
+class LabeledCounter:
+    def __init__(self):
+        self.children = {}
+
+    def labels(self, **labels):
+        return self.children.setdefault(tuple(sorted(labels.items())), Counter())
+
+    def count(self, **labels):
+        return self.labels(**labels).calls
+
+
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.store = {}
+        self.fail = fail
+        self.ttls = {}
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError('down')
+        return self.store.get(key)
+
+    async def set(self, key, value, ttl=None):
+        if self.fail:
+            raise ConnectionError('down')
+        self.store[key] = value
+        self.ttls[key] = ttl
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.embedding_cache_hits_total = LabeledCounter()
+        self.metrics_module.embedding_cache_misses_total = LabeledCounter()
+        self.metrics_module.embedding_cache_evictions_total = LabeledCounter()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.embedding_cache as cache_module
+        importlib.reload(cache_module)
+        self.module = cache_module
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def test_normalized_queries_share_an_entry(self):
+        cache = self.module.EmbeddingCache('ViT-B/32')
+
+        async def run():
+            await cache.put('  A Red   Car ', [0.5, 0.25])
+            return await cache.get('a red car')
+
+        vector = asyncio.run(run())
+        self.assertEqual(vector.dtype.name, 'float32')
+        self.assertEqual(vector.tolist(), [0.5, 0.25])
+        self.assertEqual(self.metrics_module.embedding_cache_hits_total.count(tier='local'), 1)
+
+    def test_keys_include_model_name(self):
+        first = self.module.EmbeddingCache('ViT-B/32')
+        second = self.module.EmbeddingCache('ViT-L/14')
+        self.assertNotEqual(first._key('cat'), second._key('cat'))
+
+    def test_lru_bound_evicts_least_recently_used(self):
+        cache = self.module.EmbeddingCache('m', max_entries=2)
+
+        async def run():
+            await cache.put('a', [1.0])
+            await cache.put('b', [2.0])
+            await cache.get('a')
+            await cache.put('c', [3.0])
+            return await cache.get('a'), await cache.get('b'), await cache.get('c')
+
+        a, b, c = asyncio.run(run())
+        self.assertIsNotNone(a)
+        self.assertIsNone(b)
+        self.assertIsNotNone(c)
+        self.assertEqual(len(cache), 2)
+        evictions = self.metrics_module.embedding_cache_evictions_total
+        self.assertEqual(evictions.count(reason='size'), 1)
+
+    def test_ttl_expires_entries(self):
+        cache = self.module.EmbeddingCache('m', ttl_seconds=10)
+        with patch.object(self.module.time, 'monotonic', return_value=100.0):
+            asyncio.run(cache.put('a', [1.0]))
+        with patch.object(self.module.time, 'monotonic', return_value=111.0):
+            self.assertIsNone(asyncio.run(cache.get('a')))
+        evictions = self.metrics_module.embedding_cache_evictions_total
+        self.assertEqual(evictions.count(reason='expired'), 1)
+
+    def test_redis_tier_warms_other_replicas(self):
+        redis = FakeRedis()
+        writer = self.module.EmbeddingCache('m', ttl_seconds=60, redis_client=redis)
+        reader = self.module.EmbeddingCache('m', redis_client=redis)
+
+        async def run():
+            await writer.put('cat', [0.1, 0.2])
+            return await reader.get('cat')
+
+        vector = asyncio.run(run())
+        self.assertAlmostEqual(vector.tolist()[1], 0.2, places=6)
+        self.assertEqual(list(redis.ttls.values()), [60])
+        self.assertEqual(self.metrics_module.embedding_cache_hits_total.count(tier='redis'), 1)
+
+    def test_redis_errors_degrade_to_misses(self):
+        cache = self.module.EmbeddingCache('m', max_entries=0, redis_client=FakeRedis(fail=True))
+
+        async def run():
+            await cache.put('cat', [0.1])
+            return await cache.get('cat')
+
+        self.assertIsNone(asyncio.run(run()))
+
+
+
+class TestRedisClient(unittest.TestCase):
+    def _set(self, ttl):
+        with patch.dict(sys.modules):
+            sys.modules.pop('infrastructure.redis_client', None)
+            import infrastructure.redis_client as redis_module
+            client = redis_module.RedisClient()
+        client.redis = types.SimpleNamespace(set=AsyncMock())
+        asyncio.run(client.set('k', b'v', ttl=ttl))
+        return client.redis.set.await_args.kwargs
+
+    def test_sub_second_ttl_is_sent_in_milliseconds(self):
+        self.assertEqual(self._set(0.25), {'px': 250})
+        self.assertEqual(self._set(0.0001), {'px': 1})
+        self.assertEqual(self._set(60), {'px': 60000})
+
+    def test_no_ttl_never_expires(self):
+        self.assertEqual(self._set(None), {'px': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,9 @@ import types
 import contextlib
 import importlib
 import unittest
+from unittest import mock
+
+import numpy as np
 from unittest.mock import MagicMock
 
 root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
@@ -39,12 +42,13 @@ class FakeTensor:
 def setup_modules(mock_model):
     clip_module = types.ModuleType('clip')
     clip_module.load = lambda model_name, device=None: (mock_model, None)
-    clip_module.tokenize = lambda text: FakeTensor([0])
+    clip_module.tokenize = lambda text, truncate=False: FakeTensor([0])
     sys.modules['clip'] = clip_module
 
     torch_module = types.ModuleType('torch')
     torch_module.cuda = types.SimpleNamespace(is_available=lambda: False)
     torch_module.no_grad = contextlib.nullcontext
+    torch_module.nn = types.SimpleNamespace(Module=types.SimpleNamespace)
     sys.modules['torch'] = torch_module
 
 
@@ -75,6 +79,116 @@ class TestEmbeddingService(unittest.TestCase):
         embedding = service.generate_embedding_from_text('hi')
         self.assertEqual(embedding, [])
 
+    def test_generate_embeddings_batch_failure_returns_empty_per_text(self):
+        mock_model = MagicMock()
+        mock_model.encode_text.return_value = FakeTensor([1.0])
+        setup_modules(mock_model)
+        import domain.embedding_service as emb_mod
+        importlib.reload(emb_mod)
+        service = emb_mod.EmbeddingService()
+        service.model.encode_text.side_effect = Exception('fail')
+        embeddings = service.generate_embeddings_from_texts(['a', 'b'])
+        self.assertEqual(embeddings, [[], []])
+
+    def test_text_only_keeps_just_conv1_of_visual_tower(self):
+        mock_model = MagicMock()
+        mock_model.encode_text.return_value = FakeTensor([1.0, 0.0])
+        conv1 = mock_model.visual.conv1
+        setup_modules(mock_model)
+        import domain.embedding_service as emb_mod
+        importlib.reload(emb_mod)
+        service = emb_mod.EmbeddingService(text_only=True)
+        self.assertEqual(vars(service.model.visual), {'conv1': conv1})
+        self.assertIsNone(service.preprocess)
+        self.assertEqual(service.generate_embedding_from_text('hi'), [1.0, 0.0])
+
+    def test_first_load_saves_model_artifact(self):
+        mock_model = MagicMock()
+        mock_model.encode_text.return_value = FakeTensor([1.0, 0.0])
+        mock_model.state_dict.return_value = {'w': 1}
+        setup_modules(mock_model)
+        artifacts_module = types.ModuleType('infrastructure.model_artifacts')
+        artifacts_module.clip_metadata = lambda model, preprocess, dimension: {
+            'dimension': dimension
+        }
+        artifacts = MagicMock()
+        artifacts.exists.return_value = False
+        with mock.patch.dict(sys.modules, {'infrastructure.model_artifacts': artifacts_module}):
+            import domain.embedding_service as emb_mod
+            importlib.reload(emb_mod)
+            emb_mod.EmbeddingService('ViT-B/32', artifacts=artifacts)
+        artifacts.save.assert_called_once_with('ViT-B/32', 'cpu', {'w': 1}, {'dimension': 2})
+
+    def test_cached_artifact_skips_clip_load_and_dummy_encode(self):
+        cached_model = MagicMock()
+        cached_model.to.return_value = cached_model
+        setup_modules(MagicMock())
+        sys.modules['clip'].load = MagicMock()
+        artifacts_module = types.ModuleType('infrastructure.model_artifacts')
+        artifacts_module.build_clip_model = MagicMock(return_value=cached_model)
+        artifacts = MagicMock()
+        artifacts.exists.return_value = True
+        artifacts.load.return_value = ({'w': 1}, {'dimension': 512})
+        with mock.patch.dict(sys.modules, {'infrastructure.model_artifacts': artifacts_module}):
+            import domain.embedding_service as emb_mod
+            importlib.reload(emb_mod)
+            service = emb_mod.EmbeddingService('ViT-B/32', artifacts=artifacts)
+        self.assertIs(service.model, cached_model)
+        self.assertEqual(service.dimension, 512)
+        artifacts_module.build_clip_model.assert_called_once_with({'w': 1})
+        sys.modules['clip'].load.assert_not_called()
+        cached_model.encode_text.assert_not_called()
+
+    def test_onnx_backend_skips_torch_model(self):
+        setup_modules(MagicMock())
+        sys.modules['clip'].load = MagicMock()
+        sys.modules['clip'].tokenize = lambda texts, truncate=False: types.SimpleNamespace(
+            numpy=lambda: np.zeros((len(texts), 77), dtype=np.int32)
+        )
+        encoder = types.SimpleNamespace(
+            dimension=2, run=lambda tokens: np.tile([3.0, 4.0], (len(tokens), 1))
+        )
+        import domain.embedding_service as emb_mod
+        importlib.reload(emb_mod)
+        service = emb_mod.EmbeddingService('ViT-B/32', onnx_encoder=encoder)
+        self.assertIsNone(service.model)
+        self.assertEqual(service.dimension, 2)
+        sys.modules['clip'].load.assert_not_called()
+        embeddings = service.generate_embeddings_from_texts(['a', 'b'])
+        np.testing.assert_allclose(embeddings, [[0.6, 0.8], [0.6, 0.8]])
+
+    def test_long_query_does_not_fail_its_batch(self):
+        setup_modules(MagicMock())
+
+        def tokenize(texts, truncate=False):
+            if not truncate and any(len(text.split()) > 75 for text in texts):
+                raise RuntimeError('Input is too long for context length 77')
+            return types.SimpleNamespace(numpy=lambda: np.zeros((len(texts), 77), dtype=np.int32))
+
+        sys.modules['clip'].tokenize = tokenize
+        encoder = types.SimpleNamespace(
+            dimension=2, run=lambda tokens: np.tile([3.0, 4.0], (len(tokens), 1))
+        )
+        import domain.embedding_service as emb_mod
+        importlib.reload(emb_mod)
+        service = emb_mod.EmbeddingService('ViT-B/32', onnx_encoder=encoder)
+        embeddings = service.generate_embeddings_from_texts(['dog ' * 200, 'cat'])
+        np.testing.assert_allclose(embeddings, [[0.6, 0.8], [0.6, 0.8]])
+
+    def test_quantize_replaces_model_with_int8_version(self):
+        mock_model = MagicMock()
+        mock_model.encode_text.return_value = FakeTensor([1.0, 0.0])
+        quantized = MagicMock()
+        setup_modules(mock_model)
+        quantization_module = types.ModuleType('infrastructure.quantization')
+        quantization_module.quantize_torch_model = MagicMock(return_value=quantized)
+        with mock.patch.dict(sys.modules, {'infrastructure.quantization': quantization_module}):
+            import domain.embedding_service as emb_mod
+            importlib.reload(emb_mod)
+            service = emb_mod.EmbeddingService(text_only=True, quantize=True)
+        self.assertIs(service.model, quantized)
+        quantization_module.quantize_torch_model.assert_called_once_with(mock_model)
+
 
 if __name__ == '__main__':
     unittest.main()
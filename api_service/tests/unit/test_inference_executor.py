@@ -0,0 +1,96 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+class TestInferenceExecutor(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.encode_queue_wait = Histogram()
+        self.metrics_module.encode_inference_latency = Histogram()
+        self.metrics_module.record_stage = lambda stage, seconds: None
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.inference_executor as executor_module
+        importlib.reload(executor_module)
+        self.module = executor_module
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def test_encode_text_runs_off_the_event_loop(self):
+        threads = []
+        service = MagicMock()
+
+        def encode(text):
+            threads.append(threading.current_thread().name)
+            return [0.5, 0.5]
+
+        service.generate_embedding_from_text.side_effect = encode
+        executor = self.module.InferenceExecutor(service, max_workers=2)
+        result = asyncio.run(executor.encode_text('cat'))
+        executor.shutdown()
+
+        self.assertEqual(result, [0.5, 0.5])
+        self.assertTrue(threads[0].startswith('clip-inference'))
+        self.assertEqual(len(self.metrics_module.encode_queue_wait.values), 1)
+        self.assertEqual(len(self.metrics_module.encode_inference_latency.values), 1)
+
+    def test_concurrency_is_bounded(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+        release = threading.Event()
+        service = MagicMock()
+
+        def encode(text):
+            with lock:
+                active.append(text)
+                peak.append(len(active))
+            release.wait(1)
+            with lock:
+                active.remove(text)
+            return [1.0]
+
+        service.generate_embedding_from_text.side_effect = encode
+        executor = self.module.InferenceExecutor(service, max_workers=4, max_concurrency=2)
+
+        async def run():
+            tasks = [asyncio.create_task(executor.encode_text(str(i))) for i in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        results = asyncio.run(run())
+        executor.shutdown()
+        self.assertEqual(results, [[1.0]] * 5)
+        self.assertLessEqual(max(peak), 2)
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ValueError):
+            self.module.InferenceExecutor(MagicMock(), kind='gpu')
+        with self.assertRaises(ValueError):
+            self.module.InferenceExecutor(None, kind='thread')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.ivf_index import IVFIndex, train_kmeans  # noqa: E402
+from infrastructure.vector_benchmark import recall_at_k, run_queries, sample_queries  # noqa: E402
+from infrastructure.vector_store import (  # noqa: E402
+    MemmapVectorStore,
+    VectorStoreSearchClient,
+    normalize_rows,
+    write_vector_store,
+)
+
+
+async def records(items):
+    for item in items:
+        yield item
+
+
+def clustered_vectors(count, dims, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dims))
+    labels = rng.integers(0, clusters, count)
+    return (centers[labels] + 0.1 * rng.standard_normal((count, dims))).astype(np.float32)
+
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'store')
+        self.vectors = clustered_vectors(2000, 16, clusters=20)
+        items = [(i, f'http://img/{i}.jpg', v.tolist()) for i, v in enumerate(self.vectors)]
+        asyncio.run(write_vector_store(self.path, records(items), dims=16, dtype='float32'))
+        self.store = MemmapVectorStore.load(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_train_kmeans_returns_unit_centroids(self):
+        centroids = train_kmeans(normalize_rows(self.vectors), 8, n_iter=5)
+        self.assertEqual(centroids.shape, (8, 16))
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_train_kmeans_rejects_too_few_vectors(self):
+        with self.assertRaises(ValueError):
+            train_kmeans(self.vectors[:4], 8)
+
+    def test_build_partitions_every_row_once(self):
+        index = IVFIndex.build(self.store, self.path, n_lists=16, n_iter=5)
+        self.assertTrue(IVFIndex.exists(self.path))
+        self.assertEqual(index.offsets[-1], len(self.store))
+        self.assertEqual(sorted(index.rows.tolist()), list(range(len(self.store))))
+        np.testing.assert_array_equal(index.vectors, self.store.vectors[index.rows])
+
+    def test_probing_every_list_matches_exact_search(self):
+        index = IVFIndex.build(self.store, self.path, n_lists=16, n_iter=5)
+        query = np.asarray(self.store.vectors[7], dtype=np.float32)
+        rows, scores = index.search(query, 10, nprobe=16)
+        exact_rows, exact_scores = self.store.search(query, 10)
+        np.testing.assert_array_equal(rows, exact_rows)
+        np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+
+    def test_recall_improves_with_nprobe(self):
+        index = IVFIndex.build(self.store, self.path, n_lists=32, n_iter=5)
+        queries = sample_queries(self.store, 50)
+        exact, _ = run_queries(self.store.search, queries, 10)
+        low, _ = run_queries(lambda q, k: index.search(q, k, nprobe=1), queries, 10)
+        high, _ = run_queries(lambda q, k: index.search(q, k, nprobe=32), queries, 10)
+        self.assertLessEqual(recall_at_k(low, exact), recall_at_k(high, exact))
+        self.assertEqual(recall_at_k(high, exact), 1.0)
+
+    def test_sample_queries_are_held_out_unit_vectors(self):
+        queries = sample_queries(self.store, 50)
+        self.assertEqual(queries.shape, (50, 16))
+        np.testing.assert_allclose(np.linalg.norm(queries, axis=1), 1.0, rtol=1e-5)
+        # no query is a stored vector, but each stays close to the one it came from
+        cosines = queries @ np.asarray(self.store.vectors, dtype=np.float32).T
+        self.assertLess(cosines.max(), 0.9999)
+        self.assertGreater(cosines.max(axis=1).min(), 0.7)
+
+    def test_effort_scales_probed_lists(self):
+        index = IVFIndex.build(self.store, self.path, n_lists=16, n_iter=5)
+        query = np.asarray(self.store.vectors[5], dtype=np.float32)
+        reduced, _ = index.search(query, 10, nprobe=16, effort=0.25)
+        expected, _ = index.search(query, 10, nprobe=4)
+        np.testing.assert_array_equal(reduced, expected)
+        # at least one list is always probed
+        lowest, _ = index.search(query, 10, nprobe=2, effort=0.1)
+        np.testing.assert_array_equal(lowest, index.search(query, 10, nprobe=1)[0])
+
+    def test_search_client_ranks_through_index(self):
+        IVFIndex.build(self.store, self.path, n_lists=16, n_iter=5)
+        index = IVFIndex.load(self.path, nprobe=16)
+        client = VectorStoreSearchClient(self.store, index=index)
+        ids, _, _ = asyncio.run(client.search_ranked_ids(self.store.vectors[3].tolist(), 1))
+        self.assertEqual(ids, [3])
+
+    def test_exact_mode_scans_the_store_instead_of_the_index(self):
+        IVFIndex.build(self.store, self.path, n_lists=32, n_iter=5)
+        index = IVFIndex.load(self.path, nprobe=1)
+        client = VectorStoreSearchClient(self.store, index=index)
+        self.assertTrue(client.supports_two_stage)
+        queries = sample_queries(self.store, 20)
+        exact = [self.store.search(query, 10)[0] for query in queries]
+        with mock.patch.object(index, 'search', side_effect=AssertionError('index used')):
+            ranked = [
+                asyncio.run(client.search_ranked_ids(query.tolist(), 10, mode='exact'))[0]
+                for query in queries
+            ]
+            batched = asyncio.run(client.msearch_embeddings(queries.tolist(), 10, mode='exact'))
+        expected = [self.store.image_ids[rows].tolist() for rows in exact]
+        self.assertEqual(ranked, expected)
+        self.assertEqual([[r['image_id'] for r in results] for results in batched], expected)
+
+    def test_two_stage_reranks_index_candidates_exactly(self):
+        IVFIndex.build(self.store, self.path, n_lists=16, n_iter=5)
+        index = IVFIndex.load(self.path, nprobe=2)
+        client = VectorStoreSearchClient(self.store, index=index, rerank_depth=50)
+        query = np.asarray(self.store.vectors[11], dtype=np.float32)
+        results, state = asyncio.run(
+            client.search_page(query.tolist(), size=5, mode='two_stage', with_cursor=True)
+        )
+        candidates, _ = index.search(query, 50)
+        cosines = np.asarray(self.store.vectors[candidates], dtype=np.float32) @ query
+        expected = candidates[np.argsort(-cosines, kind='stable')[:5]]
+        self.assertEqual([r['image_id'] for r in results], expected.tolist())
+        self.assertEqual(state, {'mode': 'two_stage', 'offset': 5, 'rerank_depth': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
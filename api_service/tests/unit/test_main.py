@@ -2,7 +2,9 @@ import os
 import sys
 import types
 import importlib
+import tempfile
 import unittest
+from unittest import mock
 from unittest.mock import AsyncMock, MagicMock
 
 root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
@@ -23,7 +25,9 @@ class TestMain(unittest.IsolatedAsyncioTestCase):
         sys.modules['infrastructure.metrics'] = metrics_module
 
         config_module = types.ModuleType('infrastructure.config')
-        config_module.settings = types.SimpleNamespace(METRICS_PORT=9876)
+        config_module.settings = types.SimpleNamespace(
+            METRICS_PORT=9876, TORCH_THREADS_PER_WORKER=0
+        )
         sys.modules['infrastructure.config'] = config_module
 
         logger_module = types.ModuleType('infrastructure.logging_config')
@@ -44,6 +48,55 @@ class TestMain(unittest.IsolatedAsyncioTestCase):
         await self.main.shutdown_event()
         self.es.close.assert_awaited_once()
 
+    def test_torch_threads_split_cpus_between_workers(self):
+        with mock.patch.object(self.main.os, 'cpu_count', return_value=8):
+            self.assertEqual(self.main.torch_threads_per_worker(4), 2)
+            self.assertEqual(self.main.torch_threads_per_worker(16), 1)
+            self.main.settings.TORCH_THREADS_PER_WORKER = 3
+            self.assertEqual(self.main.torch_threads_per_worker(4), 3)
+
+    def test_bind_socket_is_inheritable_by_workers(self):
+        sock = self.main.bind_socket('127.0.0.1', 0)
+        try:
+            self.assertTrue(sock.get_inheritable())
+            self.assertNotEqual(sock.getsockname()[1], 0)
+        finally:
+            sock.close()
+
+    def test_reset_multiprocess_metrics_keeps_own_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            own = os.path.join(directory, f'counter_{os.getpid()}.db')
+            stale = os.path.join(directory, 'counter_1.db')
+            for path in (own, stale):
+                open(path, 'w').close()
+            with mock.patch.dict(os.environ, {'PROMETHEUS_MULTIPROC_DIR': directory}):
+                self.main.reset_multiprocess_metrics()
+            self.assertEqual(os.listdir(directory), [os.path.basename(own)])
+
+
+class TestWorkerRestarts(unittest.TestCase):
+    def setUp(self):
+        import main as main_module
+        self.now = 0.0
+        self.restarts = main_module.WorkerRestarts(
+            max_crashes=3, window=60, base_delay=1, max_delay=3, clock=lambda: self.now
+        )
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        self.assertEqual([self.restarts.record_crash() for _ in range(3)], [1, 2, 3])
+
+    def test_budget_is_spent_after_max_crashes_in_window(self):
+        for _ in range(3):
+            self.restarts.record_crash()
+        self.now = 59
+        self.assertIsNone(self.restarts.record_crash())
+
+    def test_crashes_outside_window_are_forgotten(self):
+        for _ in range(3):
+            self.restarts.record_crash()
+        self.now = 61
+        self.assertEqual(self.restarts.record_crash(), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
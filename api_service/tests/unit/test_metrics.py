@@ -19,10 +19,11 @@ class TestMetrics(unittest.TestCase):
         prom_module.start_http_server = MagicMock()
         prom_module.Counter = MagicMock
         prom_module.Histogram = MagicMock
+        prom_module.Gauge = MagicMock
         sys.modules['prometheus_client'] = prom_module
 
-        import infrastructure.metrics as metrics
-        importlib.reload(metrics)
+        # import_module resolves through sys.modules, which other tests stub.
+        metrics = importlib.reload(importlib.import_module('infrastructure.metrics'))
         metrics.start_metrics_server(port=1234)
         prom_module.start_http_server.assert_called_once_with(1234)
 
@@ -31,10 +32,11 @@ class TestMetrics(unittest.TestCase):
         prom_module.start_http_server = MagicMock(side_effect=Exception('boom'))
         prom_module.Counter = MagicMock
         prom_module.Histogram = MagicMock
+        prom_module.Gauge = MagicMock
         sys.modules['prometheus_client'] = prom_module
 
-        import infrastructure.metrics as metrics
-        importlib.reload(metrics)
+        # import_module resolves through sys.modules, which other tests stub.
+        metrics = importlib.reload(importlib.import_module('infrastructure.metrics'))
         with self.assertRaises(Exception):
             metrics.start_metrics_server(port=1234)
 
@@ -0,0 +1,115 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Histogram:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value):
+        self.values.append(value)
+
+
+class FakeExecutor:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def encode_texts(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError('boom')
+        return [[float(len(text))] for text in texts]
+
+
+class TimedExecutor(FakeExecutor):
+    async def encode_texts(self, texts):
+        from infrastructure.request_timing import add_stage
+
+        add_stage('encode', 0.01)
+        return await super().encode_texts(texts)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.encode_batch_size = Histogram()
+        self.metrics_module.encode_batch_wait = Histogram()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.micro_batcher as batcher_module
+        importlib.reload(batcher_module)
+        self.module = batcher_module
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def test_concurrent_queries_share_one_batch(self):
+        executor = FakeExecutor()
+        batcher = self.module.MicroBatcher(executor, max_batch_size=8, max_wait_ms=20)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.encode_text('a'), batcher.encode_text('bb'), batcher.encode_text('a')
+            )
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [[1.0], [2.0], [1.0]])
+        # duplicates inside a batch are encoded once
+        self.assertEqual(executor.batches, [['a', 'bb']])
+        self.assertEqual(self.metrics_module.encode_batch_size.values, [2])
+        self.assertEqual(len(self.metrics_module.encode_batch_wait.values), 3)
+
+    def test_full_batch_dispatches_without_waiting(self):
+        executor = FakeExecutor()
+        batcher = self.module.MicroBatcher(executor, max_batch_size=2, max_wait_ms=10000)
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.encode_text(t) for t in ['a', 'b', 'c', 'd'])), 1
+            )
+
+        asyncio.run(run())
+        self.assertEqual(executor.batches, [['a', 'b'], ['c', 'd']])
+
+    def test_failure_propagates_to_every_caller(self):
+        batcher = self.module.MicroBatcher(FakeExecutor(fail=True), max_wait_ms=1)
+
+        async def run():
+            return await asyncio.gather(
+                batcher.encode_text('a'), batcher.encode_text('b'), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+    def test_batch_stage_timings_reach_every_query(self):
+        from infrastructure.request_timing import collect_stages
+
+        batcher = self.module.MicroBatcher(TimedExecutor(), max_batch_size=8, max_wait_ms=5)
+
+        async def encode(text):
+            with collect_stages() as stages:
+                await batcher.encode_text(text)
+            return stages
+
+        async def run():
+            return await asyncio.gather(encode('a'), encode('b'))
+
+        for stages in asyncio.run(run()):
+            self.assertEqual(stages['encode'], 0.01)
+            self.assertGreaterEqual(stages['encode_queue'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import types
+import pickle
+import importlib
+import tempfile
+import unittest
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+def setup_torch():
+    torch_module = types.ModuleType('torch')
+    torch_module.load_calls = []
+
+    def save(obj, path):
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
+
+    def load(path, **kwargs):
+        torch_module.load_calls.append(kwargs)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    torch_module.save = save
+    torch_module.load = load
+    sys.modules['torch'] = torch_module
+    return torch_module
+
+
+class TestModelArtifactCache(unittest.TestCase):
+    def setUp(self):
+        self.torch = setup_torch()
+        import infrastructure.model_artifacts as artifacts_module
+        self.module = importlib.reload(artifacts_module)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = self.module.ModelArtifactCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        sys.modules.pop('torch', None)
+        sys.modules.pop('infrastructure.model_artifacts', None)
+
+    def test_artifact_path_is_per_model_and_device(self):
+        path = self.cache.artifact_path('ViT-B/32', 'cpu')
+        self.assertEqual(os.path.basename(path), 'ViT-B-32-cpu')
+        self.assertNotEqual(path, self.cache.artifact_path('ViT-B/32', 'cuda'))
+
+    def test_save_then_load_memory_maps_weights(self):
+        self.assertFalse(self.cache.exists('ViT-B/32', 'cpu'))
+        self.cache.save('ViT-B/32', 'cpu', {'w': [1.0]}, {'dimension': 512})
+        self.assertTrue(self.cache.exists('ViT-B/32', 'cpu'))
+        state_dict, metadata = self.cache.load('ViT-B/32', 'cpu')
+        self.assertEqual(state_dict, {'w': [1.0]})
+        self.assertEqual(metadata, {'dimension': 512})
+        self.assertEqual(
+            self.torch.load_calls,
+            [{'map_location': 'cpu', 'mmap': True, 'weights_only': True}],
+        )
+        leftovers = [n for n in os.listdir(self.cache.artifact_path('ViT-B/32', 'cpu'))
+                     if n.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+    def test_clip_metadata_reads_preprocess_normalization(self):
+        model = types.SimpleNamespace(
+            visual=types.SimpleNamespace(input_resolution=224), context_length=77
+        )
+        normalize = types.SimpleNamespace(mean=(0.5, 0.4, 0.3), std=(0.2, 0.2, 0.2))
+        preprocess = types.SimpleNamespace(transforms=[object(), normalize])
+        metadata = self.module.clip_metadata(model, preprocess, 512)
+        self.assertEqual(json.loads(json.dumps(metadata)), {
+            'dimension': 512, 'input_resolution': 224, 'context_length': 77,
+            'mean': [0.5, 0.4, 0.3], 'std': [0.2, 0.2, 0.2],
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
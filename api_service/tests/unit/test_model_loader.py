@@ -0,0 +1,78 @@
+import os
+import sys
+import types
+import importlib
+import unittest
+from unittest.mock import MagicMock
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Gauge:
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+
+class LabeledGauge:
+    def __init__(self):
+        self.calls = {}
+
+    def labels(self, phase):
+        return self.calls.setdefault(phase, Gauge())
+
+
+class TestBackgroundModelLoader(unittest.TestCase):
+    def setUp(self):
+        self.gauge = LabeledGauge()
+        metrics_module = types.ModuleType('infrastructure.metrics')
+        metrics_module.startup_phase_duration = self.gauge
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = metrics_module
+        import application.model_loader as loader_module
+        self.module = importlib.reload(loader_module)
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def test_encodes_are_rejected_until_loaded(self):
+        loader = self.module.BackgroundModelLoader(MagicMock())
+        self.assertFalse(loader.ready)
+        with self.assertRaises(self.module.ModelNotReadyError):
+            loader.generate_embedding_from_text('hi')
+
+    def test_load_warms_up_and_records_phases(self):
+        service = MagicMock()
+        service.generate_embeddings_from_texts.return_value = [[1.0]]
+        loader = self.module.BackgroundModelLoader(lambda: service)
+        loader.load()
+        self.assertTrue(loader.ready)
+        service.warm_up.assert_called_once()
+        self.assertEqual(set(self.gauge.calls), {'model_load', 'warmup'})
+        self.assertEqual(loader.generate_embeddings_from_texts(['hi']), [[1.0]])
+
+    def test_start_loads_in_background_once(self):
+        load = MagicMock()
+        loader = self.module.BackgroundModelLoader(load)
+        loader.start()
+        loader.start()
+        loader._thread.join(5)
+        self.assertTrue(loader.ready)
+        load.assert_called_once()
+
+    def test_failed_load_is_recorded(self):
+        loader = self.module.BackgroundModelLoader(MagicMock(side_effect=RuntimeError('oom')))
+        loader.start()
+        loader._thread.join(5)
+        self.assertFalse(loader.ready)
+        self.assertIsInstance(loader.error, RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import types
+import importlib
+import importlib.util
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.encoder_benchmark import cosine_parity, measure_encoder  # noqa: E402
+
+
+def installed(name):
+    # Other tests replace torch and clip with stub modules, which have no spec.
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ValueError:
+        return False
+
+
+HAS_EXPORT_DEPS = all(installed(name) for name in ('torch', 'clip', 'onnxruntime'))
+
+
+class FakeSession:
+    def __init__(self, path, sess_options=None, providers=None):
+        self.path = path
+        self.options = sess_options
+        self.providers = providers
+        self.feeds = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name='tokens')]
+
+    def run(self, outputs, feeds):
+        self.feeds.append(feeds)
+        return [np.ones((len(feeds['tokens']), 4), dtype=np.float32)]
+
+
+def fake_onnxruntime():
+    ort = types.ModuleType('onnxruntime')
+    ort.SessionOptions = types.SimpleNamespace
+    ort.GraphOptimizationLevel = types.SimpleNamespace(
+        ORT_DISABLE_ALL=0, ORT_ENABLE_BASIC=1, ORT_ENABLE_EXTENDED=2, ORT_ENABLE_ALL=99
+    )
+    ort.InferenceSession = FakeSession
+    return ort
+
+
+class TestOnnxEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'text.onnx')
+        with open(self.path + '.json', 'w') as f:
+            json.dump({'dimension': 4}, f)
+        patcher = mock.patch.dict(sys.modules, {'onnxruntime': fake_onnxruntime()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        import infrastructure.onnx_encoder as onnx_module
+        self.module = importlib.reload(onnx_module)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_session_options_follow_configuration(self):
+        encoder = self.module.OnnxEncoder(
+            self.path, intra_op_threads=3, inter_op_threads=1, optimization_level='all'
+        )
+        options = encoder.session.options
+        self.assertEqual(options.intra_op_num_threads, 3)
+        self.assertEqual(options.inter_op_num_threads, 1)
+        self.assertEqual(options.graph_optimization_level, 99)
+        self.assertEqual(encoder.session.providers, ['CPUExecutionProvider'])
+        self.assertEqual(encoder.dimension, 4)
+
+    def test_run_feeds_the_graph_input(self):
+        encoder = self.module.OnnxEncoder(self.path)
+        tokens = np.zeros((2, 77), dtype=np.int32)
+        self.assertEqual(encoder.run(tokens).shape, (2, 4))
+        self.assertIs(encoder.session.feeds[0]['tokens'], tokens)
+
+    def test_rejects_unknown_optimization_level(self):
+        with self.assertRaises(ValueError):
+            self.module.OnnxEncoder(self.path, optimization_level='max')
+
+
+class TestEncoderBenchmark(unittest.TestCase):
+    def test_measure_encoder_times_items_and_batches(self):
+        batches = []
+        stats = measure_encoder(lambda items: batches.append(len(items)), list(range(10)), 4)
+        self.assertEqual(batches, [1] * 10 + [4, 4, 2])
+        self.assertGreater(stats['items_per_second'], 0)
+        self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+
+    def test_cosine_parity(self):
+        parity = cosine_parity([[1.0, 0.0], [0.0, 2.0]], [[2.0, 0.0], [1.0, 1.0]])
+        self.assertAlmostEqual(parity['min_cosine'], np.sqrt(0.5))
+        self.assertAlmostEqual(parity['mean_cosine'], (1 + np.sqrt(0.5)) / 2)
+
+
+@unittest.skipUnless(HAS_EXPORT_DEPS, 'requires torch, clip and onnxruntime')
+class TestTextTowerParity(unittest.TestCase):
+    def test_onnx_text_embeddings_match_torch(self):
+        import clip
+        import torch
+        from clip.model import CLIP
+        import infrastructure.onnx_encoder as onnx_module
+        onnx_module = importlib.reload(onnx_module)
+
+        torch.manual_seed(0)
+        model = CLIP(
+            embed_dim=32, image_resolution=32, vision_layers=1, vision_width=64,
+            vision_patch_size=16, context_length=77, vocab_size=49408,
+            transformer_width=64, transformer_heads=2, transformer_layers=2,
+        ).float().eval()
+        texts = ['a dog in the snow', 'red car', 'beach at sunset']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'text.onnx')
+            onnx_module.export_text_tower(model, path, {'dimension': 32})
+            encoder = onnx_module.OnnxEncoder(path)
+            onnx_out = encoder.run(clip.tokenize(texts).numpy())
+        with torch.no_grad():
+            torch_out = model.encode_text(clip.tokenize(texts)).numpy()
+        parity = cosine_parity(torch_out.tolist(), onnx_out.tolist())
+        self.assertGreater(parity['min_cosine'], 0.999)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,7 @@ import sys
 import unittest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
-from application.pagination import paginate_results
+from application.pagination import decode_cursor, encode_cursor, paginate_results
 
 class TestPagination(unittest.TestCase):
     def test_paginate_results(self):
@@ -11,5 +11,17 @@ class TestPagination(unittest.TestCase):
         self.assertEqual(paginate_results(data, page=1, size=3), data[0:3])
         self.assertEqual(paginate_results(data, page=2, size=5), data[5:10])
 
+    def test_cursor_round_trip(self):
+        state = {'mode': 'exact', 'offset': 40, 'pit_id': 'abc==', 'search_after': [1.5, 7]}
+        cursor = encode_cursor(state)
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), state)
+        self.assertIsNone(encode_cursor(None))
+
+    def test_decode_cursor_rejects_garbage(self):
+        for cursor in ['%%%', 'bm90IGpzb24', encode_cursor({'a': 1})[:-3], 'WzFd']:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
 if __name__ == '__main__':
     unittest.main()
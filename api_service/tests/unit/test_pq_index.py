@@ -0,0 +1,82 @@
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.pq_index import PQCodec, PQIndex  # noqa: E402
+from infrastructure.vector_store import MemmapVectorStore, write_vector_store  # noqa: E402
+
+
+async def records(items):
+    for item in items:
+        yield item
+
+
+class TestPQCodec(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.vectors = rng.standard_normal((600, 16)).astype(np.float32)
+
+    def test_codes_are_uint8_with_one_byte_per_subquantizer(self):
+        codec = PQCodec.train(self.vectors, m=4, n_iter=3)
+        codes = codec.encode(self.vectors)
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertEqual(codes.shape, (600, 4))
+
+    def test_rejects_indivisible_dimension(self):
+        with self.assertRaises(ValueError):
+            PQCodec.train(self.vectors, m=5)
+
+    def test_table_scores_equal_dot_product_with_reconstruction(self):
+        codec = PQCodec.train(self.vectors, m=4, n_iter=3)
+        codes = codec.encode(self.vectors[:20])
+        query = self.vectors[0]
+        expected = codec.decode(codes) @ query
+        scores = codec.score(codec.distance_table(query), codes)
+        np.testing.assert_allclose(scores, expected, rtol=1e-4, atol=1e-4)
+
+
+class TestPQIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'store')
+        rng = np.random.default_rng(1)
+        vectors = rng.standard_normal((1000, 16)).astype(np.float32)
+        items = [(i, f'http://img/{i}.jpg', v.tolist()) for i, v in enumerate(vectors)]
+        asyncio.run(write_vector_store(self.path, records(items), dims=16, dtype='float16'))
+        self.store = MemmapVectorStore.load(self.path)
+        PQIndex.build(self.store, self.path, m=4, n_iter=3)
+        self.index = PQIndex.load(self.store, self.path, rerank=50)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_full_rerank_matches_exact_search(self):
+        query = np.asarray(self.store.vectors[5], dtype=np.float32)
+        rows, scores = self.index.search(query, 10, rerank=len(self.store))
+        exact_rows, exact_scores = self.store.search(query, 10)
+        np.testing.assert_array_equal(rows, exact_rows)
+        np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+
+    def test_rerank_scores_are_exact_cosines(self):
+        query = np.asarray(self.store.vectors[9], dtype=np.float32)
+        rows, scores = self.index.search(query, 5)
+        expected = np.asarray(self.store.vectors[rows], dtype=np.float32) @ query
+        np.testing.assert_allclose(scores, expected, rtol=1e-5)
+        self.assertEqual(rows[0], 9)
+
+    def test_load_rejects_codes_for_another_store(self):
+        codes = np.load(os.path.join(self.path, 'pq_codes.npy'))
+        np.save(os.path.join(self.path, 'pq_codes.npy'), codes[:10])
+        with self.assertRaises(ValueError):
+            PQIndex.load(self.store, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import subprocess
+import unittest
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.process_memory import child_pids, memory_usage  # noqa: E402
+
+
+@unittest.skipUnless(os.path.exists('/proc/self/smaps_rollup'), 'requires Linux /proc')
+class TestProcessMemory(unittest.TestCase):
+    def test_memory_usage_reports_rss_and_pss(self):
+        usage = memory_usage(os.getpid())
+        self.assertGreater(usage['rss'], 0)
+        self.assertLessEqual(usage['pss'], usage['rss'])
+        self.assertEqual(
+            usage['rss'],
+            usage['shared_clean'] + usage['shared_dirty']
+            + usage['private_clean'] + usage['private_dirty'],
+        )
+
+    def test_child_pids_lists_direct_children(self):
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)'])
+        try:
+            self.assertIn(child.pid, child_pids(os.getpid()))
+        finally:
+            child.kill()
+            child.wait()
+
+
+if __name__ == '__main__':
+    unittest.main()
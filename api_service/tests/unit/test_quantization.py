@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import types
+import importlib
+import importlib.util
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.encoder_benchmark import topk_overlap  # noqa: E402
+import infrastructure.quantization as quantization  # noqa: E402
+
+
+def installed(name):
+    # Other tests replace torch and clip with stub modules, which have no spec.
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ValueError:
+        return False
+
+
+def fake_ort_quantization(calls):
+    module = types.ModuleType('onnxruntime.quantization')
+    module.QuantFormat = types.SimpleNamespace(QDQ='QDQ')
+    module.QuantType = types.SimpleNamespace(QInt8='QInt8', QUInt8='QUInt8')
+
+    def quantize_dynamic(model_input, model_output, **kwargs):
+        calls.append(('dynamic', kwargs))
+        with open(model_output, 'wb') as f:
+            f.write(b'int8')
+
+    def quantize_static(model_input, model_output, reader, **kwargs):
+        calls.append(('static', [reader.get_next() for _ in range(3)], kwargs))
+        with open(model_output, 'wb') as f:
+            f.write(b'int8')
+
+    module.quantize_dynamic = quantize_dynamic
+    module.quantize_static = quantize_static
+    onnx_module = types.ModuleType('onnx')
+    onnx_module.load = lambda path, load_external_data=False: types.SimpleNamespace(
+        graph=types.SimpleNamespace(input=[types.SimpleNamespace(name='tokens')])
+    )
+    return {
+        'onnxruntime': types.ModuleType('onnxruntime'),
+        'onnxruntime.quantization': module,
+        'onnx': onnx_module,
+    }
+
+
+class TestOnnxQuantization(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmp.name, 'text.onnx')
+        with open(self.model_path, 'wb') as f:
+            f.write(b'float32 graph')
+        with open(self.model_path + '.json', 'w') as f:
+            json.dump({'dimension': 4}, f)
+        self.output = os.path.join(self.tmp.name, 'text.int8.onnx')
+        self.calls = []
+        patcher = mock.patch.dict(sys.modules, fake_ort_quantization(self.calls))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_dynamic_quantizes_matmuls_and_tags_metadata(self):
+        quantization.quantize_onnx_model(self.model_path, self.output, 'dynamic')
+        self.assertEqual(self.calls[0][0], 'dynamic')
+        self.assertEqual(self.calls[0][1]['op_types_to_quantize'], ['MatMul', 'Gemm'])
+        with open(self.output + '.json') as f:
+            self.assertEqual(json.load(f), {'dimension': 4, 'quantization': 'dynamic'})
+
+    def test_static_feeds_calibration_batches(self):
+        batches = [np.zeros((2, 77), dtype=np.int32), np.ones((1, 77), dtype=np.int32)]
+        quantization.quantize_onnx_model(self.model_path, self.output, 'static', batches)
+        mode, fed, kwargs = self.calls[0]
+        self.assertEqual(mode, 'static')
+        self.assertEqual([feed and feed['tokens'].shape for feed in fed], [(2, 77), (1, 77), None])
+        self.assertTrue(kwargs['per_channel'])
+
+    def test_static_requires_calibration_batches(self):
+        with self.assertRaises(ValueError):
+            quantization.quantize_onnx_model(self.model_path, self.output, 'static')
+
+    def test_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            quantization.quantize_onnx_model(self.model_path, self.output, 'int4')
+
+
+class TestTopKOverlap(unittest.TestCase):
+    def test_overlap_statistics(self):
+        baseline = [np.array([1, 2, 3, 4]), np.array([5, 6, 7, 8])]
+        candidate = [np.array([4, 3, 2, 1]), np.array([5, 6, 9, 10])]
+        overlap = topk_overlap(candidate, baseline)
+        self.assertEqual(overlap, {
+            'mean_overlap': 0.75, 'min_overlap': 0.5, 'identical_fraction': 0.5,
+        })
+
+
+class TestQuantizationSetting(unittest.TestCase):
+    def test_text_encoder_rejects_static_quantization(self):
+        stubs = {
+            name: sys.modules.get(name) or types.ModuleType(name) for name in ('torch', 'clip')
+        }
+        with mock.patch.dict(sys.modules, stubs):
+            import application.encoder_factory as factory
+            with mock.patch.object(factory.settings, 'EMBEDDING_QUANTIZATION', 'static'):
+                with self.assertRaises(ValueError):
+                    factory.create_text_encoder('ViT-B/32')
+
+
+@unittest.skipUnless(installed('torch') and installed('clip'), 'requires torch and clip')
+class TestTorchDynamicQuantization(unittest.TestCase):
+    def test_quantized_text_embeddings_stay_close(self):
+        import clip
+        import torch
+        from clip.model import CLIP
+
+        torch.manual_seed(0)
+        model = CLIP(
+            embed_dim=32, image_resolution=32, vision_layers=1, vision_width=64,
+            vision_patch_size=16, context_length=77, vocab_size=49408,
+            transformer_width=64, transformer_heads=2, transformer_layers=2,
+        ).float().eval()
+        tokens = clip.tokenize(['a dog in the snow', 'red car', 'beach at sunset'])
+        with torch.no_grad():
+            reference = model.encode_text(tokens)
+            quantized = quantization.quantize_torch_model(model).encode_text(tokens)
+        cosine = torch.nn.functional.cosine_similarity(reference, quantized)
+        self.assertGreater(float(cosine.min()), 0.99)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import sys
+import asyncio
+import unittest
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.request_timing import (  # noqa: E402
+    add_stage, collect_stages, current_stages, merge_stages, server_timing_header,
+)
+
+
+class TestRequestTiming(unittest.TestCase):
+    def test_stages_are_summed_inside_a_collection_only(self):
+        add_stage('encode', 1.0)
+        with collect_stages() as stages:
+            add_stage('encode', 0.5)
+            add_stage('hydrate', 0.25)
+            add_stage('encode', 0.5)
+        add_stage('encode', 1.0)
+        self.assertEqual(stages, {'encode': 1.0, 'hydrate': 0.25})
+        self.assertIsNone(current_stages())
+
+    def test_tasks_started_in_a_collection_record_into_it(self):
+        async def stage():
+            add_stage('vector_search', 0.01)
+
+        async def run():
+            with collect_stages() as stages:
+                await asyncio.gather(stage(), stage())
+            return stages
+
+        self.assertEqual(asyncio.run(run()), {'vector_search': 0.02})
+
+    def test_merge_into_missing_collection_is_a_no_op(self):
+        target = {'encode': 0.1}
+        merge_stages(target, {'encode': 0.2, 'tokenize': 0.05})
+        merge_stages(None, {'encode': 0.2})
+        self.assertAlmostEqual(target['encode'], 0.3)
+        self.assertEqual(target['tokenize'], 0.05)
+
+    def test_server_timing_header_is_in_milliseconds(self):
+        header = server_timing_header({'tokenize': 0.0004, 'encode': 0.0125}, total=0.02)
+        self.assertEqual(header, 'tokenize;dur=0.40, encode;dur=12.50, total;dur=20.00')
+
+
+if __name__ == '__main__':
+    unittest.main()
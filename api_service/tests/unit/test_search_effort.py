@@ -0,0 +1,127 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+from unittest.mock import patch
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Gauge:
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+
+class TestSearchEffortController(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.search_effort_level = Gauge()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.search_effort as search_effort_module
+        importlib.reload(search_effort_module)
+        self.module = search_effort_module
+        self.now = 0.0
+        self.clock = 0.0
+        patcher = patch.object(self.module.time, 'perf_counter', side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(self.module.time, 'monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def _controller(self, **kwargs):
+        options = dict(latency_budget_seconds=0.1, max_in_flight=4, min_samples=5,
+                       adjust_interval_seconds=1.0)
+        options.update(kwargs)
+        return self.module.SearchEffortController(**options)
+
+    def _run_searches(self, controller, count, latency):
+        async def search():
+            async with controller.track():
+                self.clock += latency
+
+        async def run():
+            for _ in range(count):
+                await search()
+
+        asyncio.run(run())
+
+    def test_full_effort_is_reported_as_none(self):
+        controller = self._controller()
+        self.assertIsNone(controller.effort)
+        self.assertEqual(self.metrics_module.search_effort_level.value, 0)
+
+    def test_slow_searches_lower_effort_one_level_per_interval(self):
+        controller = self._controller()
+        self._run_searches(controller, 5, 0.2)
+        self.assertEqual(controller.effort, 0.5)
+        # the window restarts at the new level and changes are rate-limited
+        self._run_searches(controller, 5, 0.2)
+        self.assertEqual(controller.effort, 0.5)
+        self.now += 1.0
+        self._run_searches(controller, 1, 0.2)
+        self.assertEqual(controller.effort, 0.25)
+        self.now += 1.0
+        self._run_searches(controller, 5, 0.2)
+        self.assertEqual(controller.effort, 0.25)
+        self.assertEqual(self.metrics_module.search_effort_level.value, 2)
+
+    def test_effort_recovers_once_latency_is_well_inside_budget(self):
+        controller = self._controller()
+        self._run_searches(controller, 5, 0.2)
+        self.assertEqual(controller.effort, 0.5)
+        self.now += 1.0
+        # inside the budget but above the recovery threshold
+        self._run_searches(controller, 5, 0.08)
+        self.assertEqual(controller.effort, 0.5)
+        self._run_searches(controller, 200, 0.01)
+        self.assertIsNone(controller.effort)
+        self.assertEqual(self.metrics_module.search_effort_level.value, 0)
+
+    def test_concurrency_alone_lowers_effort(self):
+        controller = self._controller(max_in_flight=2)
+        release = asyncio.Event()
+
+        async def search():
+            async with controller.track():
+                await release.wait()
+
+        async def run():
+            tasks = [asyncio.create_task(search()) for _ in range(3)]
+            await asyncio.sleep(0)
+            effort = controller.effort
+            release.set()
+            await asyncio.gather(*tasks)
+            return effort
+
+        self.assertEqual(asyncio.run(run()), 0.5)
+        self.assertEqual(controller.in_flight, 0)
+
+    def test_in_flight_threshold_stays_below_admission_limit(self):
+        self.assertEqual(self.module.in_flight_threshold(0, 16), 12)
+        self.assertEqual(self.module.in_flight_threshold(0, None), 32)
+        self.assertEqual(self.module.in_flight_threshold(8, 16), 8)
+        self.assertEqual(self.module.in_flight_threshold(64, None), 64)
+        with self.assertRaises(ValueError):
+            self.module.in_flight_threshold(16, 16)
+
+    def test_levels_are_required(self):
+        with self.assertRaises(ValueError):
+            self._controller(levels=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
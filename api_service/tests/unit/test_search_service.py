@@ -0,0 +1,260 @@
+import os
+import sys
+import contextlib
+import types
+import asyncio
+import importlib
+import unittest
+from unittest.mock import AsyncMock, patch
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from application.pagination import query_fingerprint as fingerprint  # noqa: E402
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def inc(self):
+        self.calls += 1
+
+
+class LabeledCounter:
+    def __init__(self):
+        self.children = {}
+
+    def labels(self, **labels):
+        return self.children.setdefault(tuple(sorted(labels.items())), Counter())
+
+    def count(self, **labels):
+        return self.labels(**labels).calls
+
+
+def make_client(ids, timed_out=False):
+    scores = [1.0 - i / 100 for i in range(len(ids))]
+    return types.SimpleNamespace(
+        search_page=AsyncMock(return_value=([{'image_id': 1}], None)),
+        search_ranked_ids=AsyncMock(return_value=(ids, scores, timed_out)),
+        fetch_by_image_ids=AsyncMock(side_effect=lambda page_ids: {
+            i: {'image_id': i, 'image_url': f'u{i}', 'image_path': f'p{i}'} for i in page_ids
+        }),
+        supports_two_stage=True,
+    )
+
+
+class TestSearchService(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.result_cache_requests_total = LabeledCounter()
+        self.metrics_module.coalesced_requests_total = LabeledCounter()
+        self.metrics_module.search_effort_level = types.SimpleNamespace(set=lambda value: None)
+        self.stages = []
+
+        @contextlib.contextmanager
+        def timed_stage(stage):
+            self.stages.append(stage)
+            yield
+
+        self.metrics_module.timed_stage = timed_stage
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.search_service as search_service_module
+        importlib.reload(search_service_module)
+        import application.result_cache as result_cache_module
+        importlib.reload(result_cache_module)
+        import application.single_flight as single_flight_module
+        importlib.reload(single_flight_module)
+        self.single_flight_module = single_flight_module
+        self.module = search_service_module
+        self.cache_module = result_cache_module
+        self.generation = 1
+        self.encode = AsyncMock(return_value=[0.1, 0.2])
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def _service(self, client, max_results=10, mode='knn'):
+        async def fetch_generation():
+            return self.generation
+
+        return self.module.SearchService(
+            self.encode,
+            client,
+            mode=mode,
+            result_cache=self.cache_module.RankedResultCache(
+                max_bytes=1 << 20, max_results=max_results, ttl_seconds=60
+            ),
+            generation_tracker=self.cache_module.IndexGenerationTracker(
+                fetch_generation, refresh_seconds=0
+            ),
+        )
+
+    def test_later_pages_are_served_from_cached_ranking(self):
+        client = make_client(list(range(100, 110)))
+        service = self._service(client)
+
+        page1, state1 = asyncio.run(service.search('cat', 3, {'offset': 0}))
+        page2, state2 = asyncio.run(service.search('Cat', 3, state1))
+
+        self.assertEqual([r['image_id'] for r in page1], [100, 101, 102])
+        self.assertEqual([r['image_id'] for r in page2], [103, 104, 105])
+        self.assertEqual(page2[0]['image_url'], 'u103')
+        self.assertEqual(state2, {'mode': 'knn', 'offset': 6, 'query': fingerprint('Cat')})
+        self.assertEqual(client.search_ranked_ids.await_count, 1)
+        self.assertEqual(self.encode.await_count, 1)
+        client.fetch_by_image_ids.assert_awaited_with([103, 104, 105])
+        counter = self.metrics_module.result_cache_requests_total
+        self.assertEqual(counter.count(result='hit'), 1)
+        self.assertEqual(counter.count(result='miss'), 1)
+        self.assertEqual(self.stages, ['vector_search', 'hydrate', 'hydrate'])
+
+    def test_last_cached_page_has_no_cursor(self):
+        service = self._service(make_client([1, 2, 3, 4]))
+        _, state = asyncio.run(service.search('cat', 2, {'offset': 2}))
+        self.assertIsNone(state)
+
+    def test_generation_change_invalidates_ranking(self):
+        client = make_client([1, 2, 3])
+        service = self._service(client)
+        asyncio.run(service.search('cat', 2, {'offset': 0}))
+        self.generation = 2
+        asyncio.run(service.search('cat', 2, {'offset': 0}))
+        self.assertEqual(client.search_ranked_ids.await_count, 2)
+
+    def test_pages_beyond_cap_and_pit_cursors_use_elasticsearch(self):
+        client = make_client([1, 2, 3])
+        service = self._service(client, max_results=10, mode='exact')
+        asyncio.run(service.search('cat', 5, {'offset': 8}))
+        asyncio.run(service.search('cat', 2, {'offset': 2, 'pit_id': 'p', 'mode': 'exact'}))
+        self.assertEqual(client.search_page.await_count, 2)
+        self.assertEqual(client.search_page.await_args.kwargs['pit_id'], 'p')
+        client.search_ranked_ids.assert_not_awaited()
+
+    def test_rerank_depth_switches_to_two_stage_and_keys_the_cache(self):
+        client = make_client(list(range(10)))
+        service = self._service(client)
+        _, state = asyncio.run(service.search('cat', 2, {'offset': 0}, rerank_depth=5))
+        self.assertEqual(client.search_ranked_ids.await_args.kwargs['mode'], 'two_stage')
+        self.assertEqual(client.search_ranked_ids.await_args.kwargs['rerank_depth'], 5)
+        self.assertEqual(state, {
+            'mode': 'two_stage', 'offset': 2, 'rerank_depth': 5, 'query': fingerprint('cat'),
+        })
+
+        # The cursor carries the options; a plain search gets its own ranking.
+        asyncio.run(service.search('cat', 2, state))
+        asyncio.run(service.search('cat', 2, {'offset': 0}))
+        self.assertEqual(client.search_ranked_ids.await_count, 2)
+        self.assertEqual(client.search_ranked_ids.await_args.kwargs['mode'], 'knn')
+
+    def test_empty_ranking_is_not_cached(self):
+        client = make_client([])
+        service = self._service(client)
+        asyncio.run(service.search('cat', 2, {'offset': 0}))
+        asyncio.run(service.search('cat', 2, {'offset': 0}))
+        self.assertEqual(client.search_ranked_ids.await_count, 2)
+
+    def test_concurrent_identical_searches_are_coalesced(self):
+        client = make_client([])
+        gate = asyncio.Event()
+
+        async def search_page(*args, **kwargs):
+            await gate.wait()
+            return [{'image_id': 1}], None
+
+        client.search_page = AsyncMock(side_effect=search_page)
+        service = self.module.SearchService(
+            self.encode, client, mode='knn',
+            single_flight=self.single_flight_module.SingleFlight('search'),
+        )
+
+        async def run():
+            searches = [
+                asyncio.ensure_future(service.search('cat', 2, {'offset': 0})),
+                asyncio.ensure_future(service.search('cat', 2, {'offset': 0})),
+                asyncio.ensure_future(service.search('cat', 2, {'offset': 2})),
+            ]
+            await asyncio.sleep(0)
+            gate.set()
+            return await asyncio.gather(*searches)
+
+        first, second, other_page = asyncio.run(run())
+        self.assertEqual(first, second)
+        self.assertEqual(client.search_page.await_count, 2)
+        self.assertEqual(self.encode.await_count, 2)
+        self.assertEqual(
+            self.metrics_module.coalesced_requests_total.count(operation='search'), 1
+        )
+
+    def test_reduced_effort_is_kept_across_pages(self):
+        client = make_client(list(range(100, 110)))
+        service = self._service(client)
+        tracked = []
+
+        @contextlib.asynccontextmanager
+        async def track():
+            tracked.append(True)
+            yield
+
+        controller = types.SimpleNamespace(effort=0.5, latency_budget=0.2, track=track)
+        service.effort_controller = controller
+
+        _, state = asyncio.run(service.search('cat', 3, {'offset': 0}))
+        kwargs = client.search_ranked_ids.await_args.kwargs
+        self.assertEqual((kwargs['effort'], kwargs['timeout']), (0.5, 0.2))
+        self.assertEqual(state['effort'], 0.5)
+        self.assertEqual(tracked, [True])
+
+        # The next page keeps the first page's ranking even after effort recovers.
+        controller.effort = None
+        asyncio.run(service.search('cat', 3, state))
+        self.assertEqual(client.search_ranked_ids.await_count, 1)
+        # A new query at full effort is ranked (and cached) separately.
+        asyncio.run(service.search('cat', 3, {'offset': 0}))
+        self.assertEqual(client.search_ranked_ids.await_count, 2)
+        self.assertIsNone(client.search_ranked_ids.await_args.kwargs['effort'])
+
+    def test_ranking_that_hit_the_timeout_is_served_but_not_cached(self):
+        client = make_client(list(range(100, 110)), timed_out=True)
+        service = self._service(client)
+        results, state = asyncio.run(service.search('cat', 3, {'offset': 0}))
+        self.assertEqual([r['image_id'] for r in results], [100, 101, 102])
+        asyncio.run(service.search('cat', 3, state))
+        self.assertEqual(client.search_ranked_ids.await_count, 2)
+
+    def test_embedding_failure_raises(self):
+        self.encode.return_value = []
+        service = self._service(make_client([1]))
+        with self.assertRaises(self.module.EmbeddingFailedError):
+            asyncio.run(service.search('cat', 2, {'offset': 0}))
+
+
+class TestRankedResultCache(unittest.TestCase):
+    def setUp(self):
+        import application.result_cache as result_cache_module
+        self.module = result_cache_module
+
+    def test_memory_budget_evicts_oldest_entries(self):
+        entry_bytes = 10 * 12 + self.module._ENTRY_OVERHEAD_BYTES
+        cache = self.module.RankedResultCache(max_bytes=2 * entry_bytes, max_results=10)
+        for query in ['a', 'b', 'c']:
+            cache.put(query, 'knn', 1, list(range(10)), [0.5] * 10)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('a', 'knn', 1))
+        self.assertLessEqual(cache.current_bytes, 2 * entry_bytes)
+
+    def test_ttl_expiry(self):
+        cache = self.module.RankedResultCache(max_bytes=1 << 20, max_results=10, ttl_seconds=5)
+        with patch.object(self.module.time, 'monotonic', return_value=10.0):
+            cache.put('a', 'knn', 1, [1], [0.5])
+        with patch.object(self.module.time, 'monotonic', return_value=16.0):
+            self.assertIsNone(cache.get('a', 'knn', 1))
+        self.assertEqual(cache.current_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
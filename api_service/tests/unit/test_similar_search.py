@@ -0,0 +1,88 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+from unittest.mock import AsyncMock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def inc(self):
+        self.calls += 1
+
+
+class LabeledCounter:
+    def __init__(self):
+        self.children = {}
+
+    def labels(self, **labels):
+        return self.children.setdefault(tuple(sorted(labels.items())), Counter())
+
+    def count(self, **labels):
+        return self.labels(**labels).calls
+
+
+class TestSimilarImageService(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.image_vector_cache_requests_total = LabeledCounter()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.similar_search as similar_module
+        importlib.reload(similar_module)
+        self.module = similar_module
+        self.client = types.SimpleNamespace(
+            fetch_embedding=AsyncMock(return_value=[0.6, 0.8]),
+            search_embeddings=AsyncMock(
+                return_value=[{'image_id': 2, 'image_url': 'u', 'score': 0.9}]
+            ),
+        )
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def test_searches_stored_vector_excluding_source_image(self):
+        service = self.module.SimilarImageService(self.client, mode='knn')
+        results = asyncio.run(service.search(7, 5))
+        self.assertEqual(results[0]['image_id'], 2)
+        args = self.client.search_embeddings.await_args
+        np.testing.assert_allclose(args.args[0], [0.6, 0.8])
+        self.assertEqual(args.kwargs['exclude_image_ids'], [7])
+        self.assertEqual(args.kwargs['top_k'], 5)
+
+    def test_recent_vectors_are_served_from_cache(self):
+        cache = self.module.ImageVectorCache(max_entries=1)
+        service = self.module.SimilarImageService(self.client, mode='knn', vector_cache=cache)
+        asyncio.run(service.search(7, 5))
+        asyncio.run(service.search(7, 5))
+        self.assertEqual(self.client.fetch_embedding.await_count, 1)
+        counter = self.metrics_module.image_vector_cache_requests_total
+        self.assertEqual(counter.count(result='hit'), 1)
+        self.assertEqual(counter.count(result='miss'), 1)
+
+        # capacity 1: a new image evicts the previous one
+        asyncio.run(service.search(8, 5))
+        asyncio.run(service.search(7, 5))
+        self.assertEqual(self.client.fetch_embedding.await_count, 3)
+
+    def test_unknown_image_returns_none(self):
+        self.client.fetch_embedding.return_value = None
+        service = self.module.SimilarImageService(self.client, mode='knn')
+        self.assertIsNone(asyncio.run(service.search(9, 5)))
+        self.client.search_embeddings.assert_not_awaited()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import os
+import sys
+import types
+import asyncio
+import importlib
+import unittest
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def inc(self):
+        self.calls += 1
+
+
+class LabeledCounter:
+    def __init__(self):
+        self.children = {}
+
+    def labels(self, **labels):
+        return self.children.setdefault(tuple(sorted(labels.items())), Counter())
+
+    def count(self, **labels):
+        return self.labels(**labels).calls
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.metrics_module = types.ModuleType('infrastructure.metrics')
+        self.metrics_module.coalesced_requests_total = LabeledCounter()
+        self._saved_metrics = sys.modules.get('infrastructure.metrics')
+        sys.modules['infrastructure.metrics'] = self.metrics_module
+        import application.single_flight as single_flight_module
+        importlib.reload(single_flight_module)
+        self.flight = single_flight_module.SingleFlight('search')
+        self.calls = 0
+
+    def tearDown(self):
+        if self._saved_metrics is not None:
+            sys.modules['infrastructure.metrics'] = self._saved_metrics
+        else:
+            sys.modules.pop('infrastructure.metrics', None)
+
+    def _work(self, gate, result='result'):
+        async def work():
+            self.calls += 1
+            await gate.wait()
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return work
+
+    def test_identical_calls_share_one_execution(self):
+        async def run():
+            gate = asyncio.Event()
+            callers = [
+                asyncio.ensure_future(self.flight.do('cat', self._work(gate)))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(len(self.flight), 1)
+            gate.set()
+            return await asyncio.gather(*callers)
+
+        self.assertEqual(asyncio.run(run()), ['result'] * 3)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(self.flight), 0)
+        self.assertEqual(self.metrics_module.coalesced_requests_total.count(operation='search'), 2)
+
+    def test_different_keys_run_separately(self):
+        async def run():
+            gate = asyncio.Event()
+            gate.set()
+            return await asyncio.gather(
+                self.flight.do('cat', self._work(gate, 'a')),
+                self.flight.do('dog', self._work(gate, 'b')),
+            )
+
+        self.assertEqual(asyncio.run(run()), ['a', 'b'])
+        self.assertEqual(self.calls, 2)
+
+    def test_exception_is_shared_and_key_released(self):
+        async def run():
+            gate = asyncio.Event()
+            callers = [
+                asyncio.ensure_future(self.flight.do('cat', self._work(gate, ValueError('boom'))))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            gate.set()
+            results = await asyncio.gather(*callers, return_exceptions=True)
+            gate_again = asyncio.Event()
+            gate_again.set()
+            retry = await self.flight.do('cat', self._work(gate_again))
+            return results, retry
+
+        results, retry = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(retry, 'result')
+        self.assertEqual(self.calls, 2)
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        async def run():
+            gate = asyncio.Event()
+            first = asyncio.ensure_future(self.flight.do('cat', self._work(gate)))
+            second = asyncio.ensure_future(self.flight.do('cat', self._work(gate)))
+            await asyncio.sleep(0)
+            first.cancel()
+            await asyncio.sleep(0)
+            gate.set()
+            return first, await second
+
+        first, result = asyncio.run(run())
+        self.assertTrue(first.cancelled())
+        self.assertEqual(result, 'result')
+        self.assertEqual(self.calls, 1)
+
+    def test_stage_timings_reach_every_caller(self):
+        from infrastructure.request_timing import add_stage, collect_stages
+
+        async def work():
+            add_stage('vector_search', 0.01)
+            await asyncio.sleep(0)
+            return 'result'
+
+        async def caller():
+            with collect_stages() as stages:
+                await self.flight.do('cat', work)
+            return stages
+
+        async def run():
+            return await asyncio.gather(caller(), caller())
+
+        self.assertEqual(asyncio.run(run()), [{'vector_search': 0.01}] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
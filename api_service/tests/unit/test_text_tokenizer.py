@@ -0,0 +1,124 @@
+import os
+import re
+import sys
+import types
+import importlib
+import importlib.util
+import unittest
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+
+def installed(name):
+    # Other tests replace torch and clip with stub modules, which have no spec.
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ValueError:
+        return False
+
+
+HAS_CLIP = installed('clip') and installed('torch')
+
+MERGES = [('l', 'o'), ('lo', 'w</w>'), ('c', 'a'), ('ca', 't</w>')]
+
+
+class FakeSimpleTokenizer:
+    """CLIP's SimpleTokenizer interface over a tiny vocabulary."""
+
+    def __init__(self):
+        letters = 'abcdefghijklmnopqrstuvwxyz!'
+        vocab = list(letters) + [c + '</w>' for c in letters]
+        vocab += [''.join(merge) for merge in MERGES]
+        vocab += ['<|startoftext|>', '<|endoftext|>']
+        self.encoder = {token: i for i, token in enumerate(vocab)}
+        self.bpe_ranks = {merge: i for i, merge in enumerate(MERGES)}
+        self.byte_encoder = {b: chr(b) for b in range(256)}
+        self.pat = re.compile(r"<\|startoftext\|>|<\|endoftext\|>|[a-z]+|[^\sa-z]+")
+
+
+def setup_clip():
+    clip_module = types.ModuleType('clip')
+    tokenizer_module = types.ModuleType('clip.simple_tokenizer')
+    tokenizer_module.SimpleTokenizer = FakeSimpleTokenizer
+    tokenizer_module.basic_clean = lambda text: text.strip()
+    tokenizer_module.whitespace_clean = lambda text: ' '.join(text.split())
+    clip_module.simple_tokenizer = tokenizer_module
+    sys.modules['clip'] = clip_module
+    sys.modules['clip.simple_tokenizer'] = tokenizer_module
+
+
+class TestClipTokenizer(unittest.TestCase):
+    def setUp(self):
+        self._saved = {name: sys.modules.get(name) for name in ('clip', 'clip.simple_tokenizer')}
+        setup_clip()
+        sys.modules.pop('infrastructure.text_tokenizer', None)
+        import infrastructure.text_tokenizer as tokenizer_module
+        self.module = tokenizer_module
+        self.ids = FakeSimpleTokenizer().encoder
+
+    def tearDown(self):
+        for name, module in self._saved.items():
+            if module is not None:
+                sys.modules[name] = module
+            else:
+                sys.modules.pop(name, None)
+        sys.modules.pop('infrastructure.text_tokenizer', None)
+
+    def _row(self, *tokens):
+        start, end = self.ids['<|startoftext|>'], self.ids['<|endoftext|>']
+        return [start] + [self.ids[t] for t in tokens] + [end]
+
+    def test_bpe_merges_and_padding(self):
+        tokenizer = self.module.ClipTokenizer(context_length=8)
+        tokens = tokenizer.tokenize(['Low  cat!', 'lot'])
+        self.assertEqual(tokens.dtype, np.int32)
+        self.assertEqual(tokens.shape, (2, 8))
+        expected = [self._row('low</w>', 'cat</w>', '!</w>'), self._row('lo', 't</w>')]
+        for row, ids in zip(tokens.tolist(), expected):
+            self.assertEqual(row, ids + [0] * (8 - len(ids)))
+
+    def test_repeated_text_is_served_from_cache(self):
+        tokenizer = self.module.ClipTokenizer(context_length=8, cache_size=1)
+        first = tokenizer.encode('low')
+        self.assertIs(tokenizer.encode('low'), first)
+        tokenizer.encode('cat')
+        self.assertEqual(len(tokenizer), 1)
+        self.assertIsNot(tokenizer.encode('low'), first)
+        self.assertEqual(tokenizer.encode('low'), first)
+
+    def test_too_long_text_raises_or_truncates(self):
+        tokenizer = self.module.ClipTokenizer(context_length=4)
+        with self.assertRaises(RuntimeError):
+            tokenizer.tokenize(['low cat low'])
+        tokens = tokenizer.tokenize(['low cat low', 'cat'], truncate=True)
+        end = self.ids['<|endoftext|>']
+        self.assertEqual(tokens[0].tolist(), self._row('low</w>', 'cat</w>')[:3] + [end])
+        self.assertEqual(tokens[1].tolist(), self._row('cat</w>') + [0])
+
+    def test_empty_batch(self):
+        tokenizer = self.module.ClipTokenizer(context_length=8)
+        self.assertEqual(tokenizer.tokenize([]).shape, (0, 8))
+
+
+@unittest.skipUnless(HAS_CLIP, 'clip and torch are not installed')
+class TestClipTokenizerParity(unittest.TestCase):
+    def test_ids_match_clip_tokenize(self):
+        import clip
+        from infrastructure.text_tokenizer import ClipTokenizer
+
+        texts = [
+            'a photo of a dog', 'Red  Car at NIGHT', "it's a café's menu", 'x' * 300,
+            '3 cats & 2 dogs!!', 'naïve résumé 東京', '', '<|endoftext|> tags',
+        ]
+        tokenizer = ClipTokenizer()
+        expected = clip.tokenize(texts, truncate=True).numpy()
+        # Cold, then from the caches.
+        np.testing.assert_array_equal(tokenizer.tokenize(texts, truncate=True), expected)
+        np.testing.assert_array_equal(tokenizer.tokenize(texts, truncate=True), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), '..', '..', 'src')
+sys.path.insert(0, os.path.abspath(root_path))
+
+from infrastructure.vector_store import (  # noqa: E402
+    MemmapVectorStore,
+    VectorStoreSearchClient,
+    top_k_indices,
+    write_vector_store,
+)
+
+
+async def records(items):
+    for item in items:
+        yield item
+
+
+def random_records(count, dims, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dims)).astype(np.float32)
+    return [(1000 + i, f'http://img/{i}.jpg', vectors[i].tolist()) for i in range(count)], vectors
+
+
+class TestVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'store')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _build(self, items, dims, dtype='float32'):
+        return asyncio.run(write_vector_store(self.path, records(items), dims=dims, dtype=dtype))
+
+    def test_top_k_indices_orders_best_first(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+        self.assertEqual(top_k_indices(scores, 2).tolist(), [1, 3])
+        self.assertEqual(top_k_indices(scores, 10).tolist(), [1, 3, 2, 0])
+        self.assertEqual(top_k_indices(scores, 0).tolist(), [])
+
+    def test_search_matches_brute_force(self):
+        items, vectors = random_records(500, 16)
+        self.assertEqual(self._build(items, 16), 500)
+        store = MemmapVectorStore.load(self.path)
+        self.assertIsInstance(store.vectors, np.memmap)
+
+        query = vectors[7] / np.linalg.norm(vectors[7])
+        rows, cosines = store.search(query, 5)
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ query))[:5]
+        self.assertEqual(rows.tolist(), expected.tolist())
+        self.assertEqual(rows[0], 7)
+        self.assertAlmostEqual(float(cosines[0]), 1.0, places=5)
+
+    def test_search_batch_matches_single_searches(self):
+        items, vectors = random_records(700, 16, seed=3)
+        self._build(items, 16)
+        store = MemmapVectorStore.load(self.path)
+        queries = vectors[[1, 50, 600]]
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        with mock.patch('infrastructure.vector_store.CHUNK_ROWS', 128):
+            batched = store.search_batch(queries, 5)
+        for query, (rows, cosines) in zip(queries, batched):
+            expected_rows, expected_cosines = store.search(query, 5)
+            self.assertEqual(rows.tolist(), expected_rows.tolist())
+            np.testing.assert_allclose(cosines, expected_cosines, rtol=1e-5)
+
+    def test_search_client_excludes_images_and_returns_stored_vectors(self):
+        items, vectors = random_records(40, 8, seed=4)
+        self._build(items, 8)
+        client = VectorStoreSearchClient(MemmapVectorStore.load(self.path))
+        vector = asyncio.run(client.fetch_embedding(1005))
+        self.assertIsNone(asyncio.run(client.fetch_embedding(1)))
+        results = asyncio.run(client.search_embeddings(vector, top_k=3, exclude_image_ids=[1005]))
+        self.assertEqual(len(results), 3)
+        self.assertNotIn(1005, [r['image_id'] for r in results])
+
+    def test_float16_store_keeps_ranking(self):
+        items, vectors = random_records(300, 32, seed=1)
+        self._build(items, 32, dtype='float16')
+        store = MemmapVectorStore.load(self.path)
+        self.assertEqual(store.vectors.dtype, np.float16)
+        query = vectors[42] / np.linalg.norm(vectors[42])
+        rows, _ = store.search(query, 1)
+        self.assertEqual(rows.tolist(), [42])
+
+    def test_search_client_pages_and_hydrates(self):
+        items, vectors = random_records(50, 8, seed=2)
+        self._build(items, 8)
+        client = VectorStoreSearchClient(MemmapVectorStore.load(self.path))
+        query = vectors[3] / np.linalg.norm(vectors[3])
+
+        async def run():
+            first, state = await client.search_page(query, size=5, with_cursor=True)
+            second, _ = await client.search_page(query, size=5, offset=state['offset'])
+            ranked, _, timed_out = await client.search_ranked_ids(query, top_k=10)
+            self.assertFalse(timed_out)
+            docs = await client.fetch_by_image_ids([1003, 999999])
+            return first, second, ranked, docs
+
+        first, second, ranked, docs = asyncio.run(run())
+        self.assertEqual(first[0]['image_id'], 1003)
+        self.assertEqual(first[0]['image_url'], 'http://img/3.jpg')
+        self.assertAlmostEqual(first[0]['score'], 1.0, places=5)
+        self.assertEqual([r['image_id'] for r in first + second], ranked)
+        self.assertEqual(list(docs), [1003])
+
+    def test_flat_store_offers_no_two_stage_search(self):
+        items, _ = random_records(10, 4)
+        self._build(items, 4)
+        client = VectorStoreSearchClient(MemmapVectorStore.load(self.path))
+        self.assertFalse(client.supports_two_stage)
+
+    def test_reduced_effort_never_truncates_a_two_stage_page(self):
+        items, vectors = random_records(200, 8, seed=5)
+        self._build(items, 8)
+        client = VectorStoreSearchClient(MemmapVectorStore.load(self.path), rerank_depth=100)
+        query = vectors[0] / np.linalg.norm(vectors[0])
+
+        def page(effort):
+            return asyncio.run(client.search_page(
+                query, size=20, offset=40, mode='two_stage', with_cursor=True, effort=effort
+            ))
+
+        full, full_state = page(None)
+        reduced, reduced_state = page(0.25)
+        self.assertEqual(len(reduced), 20)
+        self.assertEqual(reduced_state['offset'], full_state['offset'])
+        # an effort above 1 is full effort, not a deeper search
+        with mock.patch.object(client, '_search_two_stage',
+                               wraps=client._search_two_stage) as two_stage:
+            page(4.0)
+        self.assertEqual(two_stage.call_args.args[1], 100)
+
+    def test_rebuild_replaces_store_and_skips_bad_vectors(self):
+        items, _ = random_records(10, 4)
+        self._build(items, 4)
+        first_generation = MemmapVectorStore.load(self.path).generation
+        self._build(items[:3] + [(5, 'bad', [1.0, 2.0])], 4)
+        store = MemmapVectorStore.load(self.path)
+        self.assertEqual(len(store), 3)
+        self.assertNotEqual(store.generation, first_generation)
+        self.assertFalse(os.path.exists(self.path + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
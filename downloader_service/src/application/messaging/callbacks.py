@@ -29,4 +29,10 @@ async def process_url(url: str, downloader_service: "DownloaderService"):
     result = await downloader_service.download_image(url)
     if result:
         image_id, image_path = result
-        await publish_embeddings(image_id, url, image_path)
+        try:
+            downloaded_at = await downloader_service.database.get_downloaded_at(image_id)
+        except Exception as e:
+            # The embedding is still worth indexing without the date.
+            logger.warning("Could not read downloaded_at for image_id %d: %s", image_id, e)
+            downloaded_at = None
+        await publish_embeddings(image_id, url, image_path, downloaded_at=downloaded_at)
@@ -1,5 +1,7 @@
 import json
 import logging
+from datetime import datetime
+from typing import Optional
 
 from infrastructure.config import settings
 from infrastructure.rabbitmq_client import rabbitmq_client
@@ -7,12 +9,17 @@ from infrastructure.rabbitmq_client import rabbitmq_client
 logger = logging.getLogger(__name__)
 
 
-async def publish_embeddings(image_id: int, image_url: str, image_path: str):
+async def publish_embeddings(
+    image_id: int, image_url: str, image_path: str, downloaded_at: Optional[datetime] = None
+):
     message = {
         "image_id": image_id,
         "image_url": image_url,
         "image_path": image_path,
     }
+    if downloaded_at is not None:
+        # Indexed with the embedding so searches can filter on it.
+        message["downloaded_at"] = downloaded_at.isoformat()
     try:
         await rabbitmq_client.publish(settings.EMBEDDING_QUEUE, json.dumps(message))
         logger.info("Published embedding for image_id: %d", image_id)
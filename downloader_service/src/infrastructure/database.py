@@ -8,6 +8,7 @@ Handles:
 """
 
 import logging
+from datetime import datetime
 from typing import Optional
 
 import asyncpg
@@ -91,6 +92,21 @@ class Database:
             logger.error("Failed to store or retrieve image record for URL: %s", url)
             return None
 
+    async def get_downloaded_at(self, image_id: int) -> Optional[datetime]:
+        """
+        Look up when an image was first downloaded.
+
+        Args:
+            image_id (int): Image ID.
+
+        Returns:
+            Optional[datetime]: The record's downloaded_at, or None if there is no record.
+        """
+        query = "SELECT downloaded_at FROM images WHERE id = $1;"
+        async with self.pool.acquire() as connection:
+            row = await connection.fetchrow(query, image_id)
+        return row["downloaded_at"] if row else None
+
     async def close(self) -> None:
         """Close the connection pool."""
         if self.pool is not None:
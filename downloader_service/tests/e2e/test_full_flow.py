@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime
 import os
 import sys
 import types
@@ -14,14 +15,19 @@ sys.modules.setdefault("redis.asyncio", types.ModuleType("redis.asyncio"))
 
 from application.messaging.callbacks import message_callback
 
+DOWNLOADED_AT = datetime(2024, 5, 1, 12, 30)
+
 class TestDownloaderE2E(unittest.IsolatedAsyncioTestCase):
     async def test_full_flow(self):
         mock_downloader = AsyncMock()
         mock_downloader.download_image = AsyncMock(return_value=(123, "/tmp/a.jpg"))
+        mock_downloader.database.get_downloaded_at = AsyncMock(return_value=DOWNLOADED_AT)
 
         with patch(
             "application.messaging.callbacks.publish_embeddings", new_callable=AsyncMock
         ) as mock_publish:
             await message_callback("http://example.com/a.jpg", mock_downloader)
             mock_downloader.download_image.assert_awaited_once_with("http://example.com/a.jpg")
-            mock_publish.assert_awaited_once_with(123, "http://example.com/a.jpg", "/tmp/a.jpg")
+            mock_publish.assert_awaited_once_with(
+                123, "http://example.com/a.jpg", "/tmp/a.jpg", downloaded_at=DOWNLOADED_AT
+            )
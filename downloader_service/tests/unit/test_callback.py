@@ -1,4 +1,5 @@
 import unittest
+from datetime import datetime
 import os
 import sys
 import types
@@ -15,11 +16,14 @@ sys.modules.setdefault("redis.asyncio", types.ModuleType("redis.asyncio"))
 # Import from application layer directly, no longer from downloader_service.src
 from application.messaging.callbacks import message_callback
 
+DOWNLOADED_AT = datetime(2024, 5, 1, 12, 30)
+
 class TestCallback(unittest.IsolatedAsyncioTestCase):
     async def test_message_callback(self):
         """Verify that the message_callback downloads the image and publishes embeddings."""
         mock_downloader = AsyncMock()
         mock_downloader.download_image = AsyncMock(return_value=(123, "/path/to/image.jpg"))
+        mock_downloader.database.get_downloaded_at = AsyncMock(return_value=DOWNLOADED_AT)
 
         # Patch publish_embeddings where it's actually used in callbacks.py
         with patch(
@@ -30,4 +34,6 @@ class TestCallback(unittest.IsolatedAsyncioTestCase):
             await message_callback(url, mock_downloader)
 
             mock_downloader.download_image.assert_awaited_once_with(url)
-            mock_publish.assert_awaited_once_with(123, url, "/path/to/image.jpg")
+            mock_publish.assert_awaited_once_with(
+                123, url, "/path/to/image.jpg", downloaded_at=DOWNLOADED_AT
+            )
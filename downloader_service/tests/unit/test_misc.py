@@ -80,3 +80,8 @@ class TestDatabase(unittest.IsolatedAsyncioTestCase):
         conn.fetchrow = AsyncMock(side_effect=[None, None])
         result = await db.store_image_record("u3", "/f3")
         self.assertIsNone(result)
+
+        conn.fetchrow = AsyncMock(return_value={"downloaded_at": "2024-05-01"})
+        self.assertEqual(await db.get_downloaded_at(5), "2024-05-01")
+        conn.fetchrow = AsyncMock(return_value=None)
+        self.assertIsNone(await db.get_downloaded_at(6))
@@ -2,6 +2,7 @@ import os
 import sys
 import types
 import unittest
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 root_path = os.path.join(os.path.dirname(__file__), "..", "..", "src")
@@ -13,11 +14,14 @@ sys.modules.setdefault("redis.asyncio", types.ModuleType("redis.asyncio"))
 
 from application.messaging.callbacks import process_url
 
+DOWNLOADED_AT = datetime(2024, 5, 1, 12, 30)
+
 
 class TestProcessUrl(unittest.IsolatedAsyncioTestCase):
     async def test_process_url_publishes_on_success(self):
         downloader = AsyncMock()
         downloader.download_image = AsyncMock(return_value=(1, "/tmp/img.jpg"))
+        downloader.database.get_downloaded_at = AsyncMock(return_value=DOWNLOADED_AT)
         with patch(
             "application.messaging.callbacks.publish_embeddings",
             new_callable=AsyncMock,
@@ -25,7 +29,9 @@ class TestProcessUrl(unittest.IsolatedAsyncioTestCase):
             url = "http://example.com/img.jpg"
             await process_url(url, downloader)
             downloader.download_image.assert_awaited_once_with(url)
-            mock_publish.assert_awaited_once_with(1, url, "/tmp/img.jpg")
+            mock_publish.assert_awaited_once_with(
+                1, url, "/tmp/img.jpg", downloaded_at=DOWNLOADED_AT
+            )
 
     async def test_process_url_no_publish_when_none(self):
         downloader = AsyncMock()
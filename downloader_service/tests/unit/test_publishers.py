@@ -1,4 +1,6 @@
+import json
 import unittest
+from datetime import datetime
 import os
 import sys
 import types
@@ -14,6 +16,8 @@ sys.modules.setdefault("redis.asyncio", types.ModuleType("redis.asyncio"))
 from application.messaging.publishers import publish_embeddings
 from application.messaging.callbacks import message_callback
 
+DOWNLOADED_AT = datetime(2024, 5, 1, 12, 30)
+
 class TestPublishers(unittest.IsolatedAsyncioTestCase):
     async def test_publish_embeddings(self):
         """Test that publish_embeddings publishes the correct message to the embedding queue."""
@@ -23,11 +27,24 @@ class TestPublishers(unittest.IsolatedAsyncioTestCase):
         ) as mock_publish:
             await publish_embeddings(123, "http://example.com/img.jpg", "/local/path.jpg")
             mock_publish.assert_awaited_once()
+            self.assertNotIn("downloaded_at", json.loads(mock_publish.await_args.args[1]))
+
+    async def test_publish_embeddings_includes_downloaded_at(self):
+        with patch(
+            "application.messaging.publishers.rabbitmq_client.publish",
+            new_callable=AsyncMock,
+        ) as mock_publish:
+            await publish_embeddings(
+                123, "http://example.com/img.jpg", "/local/path.jpg", downloaded_at=DOWNLOADED_AT
+            )
+            message = json.loads(mock_publish.await_args.args[1])
+            self.assertEqual(message["downloaded_at"], "2024-05-01T12:30:00")
 
     async def test_message_callback(self):
         """Test message_callback logic integrated with publish_embeddings mock."""
         mock_downloader = AsyncMock()
         mock_downloader.download_image = AsyncMock(return_value=(123, "/path/to/image.jpg"))
+        mock_downloader.database.get_downloaded_at = AsyncMock(return_value=DOWNLOADED_AT)
 
         # Patch publish_embeddings in callbacks
         with patch(
@@ -37,4 +54,6 @@ class TestPublishers(unittest.IsolatedAsyncioTestCase):
             url = "http://example.com/image.jpg"
             await message_callback(url, mock_downloader)
             mock_downloader.download_image.assert_awaited_once_with(url)
-            mock_publish.assert_awaited_once_with(123, url, "/path/to/image.jpg")
+            mock_publish.assert_awaited_once_with(
+                123, url, "/path/to/image.jpg", downloaded_at=DOWNLOADED_AT
+            )
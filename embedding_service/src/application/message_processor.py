@@ -6,12 +6,43 @@ Processes incoming messages to generate embeddings and index them.
 
 import asyncio
 import logging
+from typing import Optional
+from urllib.parse import urlsplit
 from infrastructure.metrics import embeddings_generated, embedding_errors, embedding_latency
 from infrastructure.elasticsearch_client import elasticsearch_client
-from domain.embedding_service import EmbeddingService
+from domain.embedding_service import EmbeddingService, read_image_size
 
 logger = logging.getLogger(__name__)
 
+
+def source_domain(image_url: str) -> Optional[str]:
+    """Lower-cased host of an image URL without a leading "www."."""
+    host = urlsplit(image_url).hostname
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def image_metadata(data: dict, image_path: str) -> dict:
+    """
+    Build the filterable metadata indexed with an embedding.
+
+    Args:
+        data (dict): The queue message (image_url and, from the downloader,
+            downloaded_at as an ISO timestamp).
+        image_path (str): Local image file, read for its dimensions.
+
+    Returns:
+        dict: domain, downloaded_at, width and height, where known.
+    """
+    metadata = {"domain": source_domain(data["image_url"])}
+    if data.get("downloaded_at"):
+        metadata["downloaded_at"] = data["downloaded_at"]
+    size = read_image_size(image_path)
+    if size is not None:
+        metadata["width"], metadata["height"] = size
+    return {key: value for key, value in metadata.items() if value is not None}
+
 async def process_message(data: dict, embedding_service: EmbeddingService):
     image_id = data.get("image_id")
     image_url = data.get("image_url")
@@ -24,8 +55,11 @@ async def process_message(data: dict, embedding_service: EmbeddingService):
     embedding = embedding_service.generate_embedding_from_image(image_path)
     if embedding:
         try:
+            metadata = image_metadata(data, image_path)
             start_time = asyncio.get_running_loop().time()
-            await elasticsearch_client.index_embedding(image_id, image_url, image_path, embedding)
+            await elasticsearch_client.index_embedding(
+                image_id, image_url, image_path, embedding, metadata=metadata
+            )
             duration = asyncio.get_running_loop().time() - start_time
             embedding_latency.observe(duration)
             embeddings_generated.inc()
@@ -5,9 +5,10 @@ Provides the EmbeddingService class to generate embeddings for images using CLIP
 """
 
 import logging
+import numpy as np
 import torch
 from PIL import Image
-from typing import Optional
+from typing import List, Optional, Tuple
 import clip
 
 logger = logging.getLogger(__name__)
@@ -18,25 +19,112 @@ class EmbeddingService:
     Service to generate embeddings for images using the CLIP model.
     """
 
-    def __init__(self, model_name: str = "ViT-B/32"):
+    def __init__(
+        self,
+        model_name: str = "ViT-B/32",
+        artifacts=None,
+        onnx_encoder=None,
+        quantize: bool = False,
+    ):
         """
         Load the CLIP model and preprocess function, and determine embedding dimension.
 
         Args:
             model_name (str): Name of the CLIP model to load.
+            artifacts (Optional[ModelArtifactCache]): Cache of serialized models.
+                A cached model is memory-mapped and its dimension and
+                preprocessing are read from the artifact metadata; a model that
+                is not cached yet is saved after loading.
+            onnx_encoder (Optional[OnnxEncoder]): Exported image tower to run with
+                ONNX Runtime instead of the PyTorch model, which is then not
+                loaded at all; preprocessing comes from the export metadata.
+            quantize (bool): Dynamically quantize the PyTorch model's linear
+                layers to int8 (CPU only).
         """
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model, self.preprocess = clip.load(model_name, device=self.device)
-        # Determine embedding dimension by encoding a dummy image
-        dummy_image = Image.new("RGB", (224, 224))
-        image_tensor = self.preprocess(dummy_image).unsqueeze(0).to(self.device)
-        with torch.no_grad():
-            embedding = self.model.encode_image(image_tensor)
-        self.dimension = embedding.shape[1]
+        self.model_name = model_name
+        self.onnx_encoder = onnx_encoder
+        if onnx_encoder is not None:
+            self.device = "cpu"
+            self.model = None
+            self.preprocess = build_preprocess(onnx_encoder.metadata)
+            self.dimension = onnx_encoder.dimension
+        elif artifacts is not None and artifacts.exists(model_name, self.device):
+            self._load_artifact(artifacts)
+        else:
+            self.model, self.preprocess = clip.load(model_name, device=self.device)
+            # Determine embedding dimension by encoding a dummy image
+            self.dimension = self._encode_dummy_image().shape[1]
+            if artifacts is not None:
+                self._save_artifact(artifacts)
+        if quantize and self.model is not None:
+            self._quantize()
+        backend = "onnx" if onnx_encoder is not None else "torch"
         logger.info(
-            f"Loaded CLIP model '{model_name}' on {self.device} with dimension {self.dimension}."
+            f"Loaded CLIP model '{model_name}' on {self.device} ({backend}) "
+            f"with dimension {self.dimension}."
         )
 
+    def _dummy_image_tensor(self):
+        return self.preprocess(Image.new("RGB", (224, 224))).unsqueeze(0)
+
+    def _encode_dummy_image(self):
+        with torch.no_grad():
+            return self.model.encode_image(self._dummy_image_tensor().to(self.device))
+
+    def _load_artifact(self, artifacts) -> None:
+        from infrastructure.model_artifacts import build_clip_model
+
+        state_dict, metadata = artifacts.load(self.model_name, self.device)
+        self.model = build_clip_model(state_dict).to(self.device)
+        self.preprocess = build_preprocess(metadata)
+        self.dimension = metadata["dimension"]
+
+    def _save_artifact(self, artifacts) -> None:
+        from infrastructure.model_artifacts import clip_metadata
+
+        try:
+            artifacts.save(
+                self.model_name, self.device, self.model.state_dict(),
+                clip_metadata(self.model, self.preprocess, self.dimension),
+            )
+        except Exception as e:
+            # The cache only speeds up the next start; run without it.
+            logger.warning(f"Could not save model artifact for '{self.model_name}': {e}")
+
+    def _quantize(self) -> None:
+        if self.device != "cpu":
+            logger.warning(
+                "Int8 dynamic quantization runs on the CPU only; keeping float weights."
+            )
+            return
+        from infrastructure.quantization import quantize_torch_model
+
+        self.model = quantize_torch_model(self.model)
+        logger.info(f"Quantized the linear layers of '{self.model_name}' to int8.")
+
+    def warm_up(self) -> None:
+        """Run one forward pass so the first message does not pay for lazy init."""
+        self.encode_image_tensors(self._dummy_image_tensor())
+
+    def encode_image_tensors(self, image_tensors) -> List[list]:
+        """
+        Embed a batch of preprocessed images in one forward pass.
+
+        Args:
+            image_tensors: Tensor of shape (N, 3, H, W) from ``preprocess``.
+
+        Returns:
+            List[list]: One L2-normalized embedding per image.
+        """
+        if self.onnx_encoder is not None:
+            embeddings = self.onnx_encoder.run(image_tensors.numpy())
+            return (embeddings / np.linalg.norm(embeddings, axis=-1, keepdims=True)).tolist()
+        with torch.no_grad():
+            embeddings = self.model.encode_image(image_tensors.to(self.device))
+            embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+        return embeddings.cpu().numpy().tolist()
+
     def generate_embedding_from_image(self, image_path: str) -> Optional[list]:
         """
         Generate an embedding vector for the given image.
@@ -52,11 +140,7 @@ class EmbeddingService:
         """
         try:
             image = Image.open(image_path).convert("RGB")
-            image_tensor = self.preprocess(image).unsqueeze(0).to(self.device)
-            with torch.no_grad():
-                embedding = self.model.encode_image(image_tensor)
-                embedding = embedding / embedding.norm(dim=-1, keepdim=True)
-            embedding_np = embedding.cpu().numpy().tolist()[0]
+            embedding_np = self.encode_image_tensors(self.preprocess(image).unsqueeze(0))[0]
             logger.debug(f"Generated embedding for image: {image_path}")
             return embedding_np
         except Exception as e:
@@ -64,3 +148,48 @@ class EmbeddingService:
                 f"Failed to generate embedding for image '{image_path}': {e}"
             )
             return None
+
+
+def read_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """
+    Read an image's (width, height) from its header without decoding it.
+
+    Args:
+        image_path (str): Path to the image file.
+
+    Returns:
+        Optional[Tuple[int, int]]: The size, or None if the file cannot be read.
+    """
+    try:
+        with Image.open(image_path) as image:
+            return image.size
+    except Exception as e:
+        logger.warning(f"Could not read the size of image '{image_path}': {e}")
+        return None
+
+
+def build_preprocess(metadata: dict):
+    """
+    Rebuild CLIP's image transform from artifact metadata.
+
+    Mirrors the transform clip.load returns: bicubic resize and center crop to
+    the input resolution, RGB conversion, then per-channel normalization.
+
+    Args:
+        metadata (dict): Artifact metadata with input_resolution, mean and std.
+
+    Returns:
+        Callable: Transform from a PIL image to a normalized tensor.
+    """
+    from torchvision.transforms import (
+        CenterCrop, Compose, InterpolationMode, Normalize, Resize, ToTensor,
+    )
+
+    n_px = metadata["input_resolution"]
+    return Compose([
+        Resize(n_px, interpolation=InterpolationMode.BICUBIC),
+        CenterCrop(n_px),
+        lambda image: image.convert("RGB"),
+        ToTensor(),
+        Normalize(metadata["mean"], metadata["std"]),
+    ])
@@ -28,7 +28,24 @@ class Settings(BaseSettings):
         ELASTICSEARCH_HOST (str): The Elasticsearch host address.
         ELASTICSEARCH_PORT (int): The Elasticsearch port number.
         ELASTICSEARCH_INDEX (str): The Elasticsearch index name for embeddings.
+        EMBEDDING_DIMS (int): Dimension of the indexed embedding vectors.
+        HNSW_M (int): Max HNSW graph connections per node for the kNN index.
+        HNSW_EF_CONSTRUCTION (int): HNSW candidate list size used while indexing.
+        VECTOR_INDEX_TYPE (str): "hnsw", or "int8_hnsw"/"int4_hnsw" to search
+            scalar-quantized copies of the float vectors.
+        VECTOR_ELEMENT_TYPE (str): "float", or "byte" to store int8 vectors only.
+        EMBEDDING_IN_SOURCE (bool): Keep the vector in each document's _source.
         EMBEDDING_MODEL (str): The model name used for embedding generation.
+        MODEL_ARTIFACT_DIR (str): Cache of serialized models; empty disables it.
+        EMBEDDING_BACKEND (str): "torch" or "onnx" (ONNX Runtime, CPU).
+        ONNX_IMAGE_MODEL_PATH (str): Exported image tower used by the onnx backend.
+        ONNX_INTRA_OP_THREADS (int): ONNX Runtime intra-op threads (0: default).
+        ONNX_INTER_OP_THREADS (int): ONNX Runtime inter-op threads (0: default).
+        ONNX_GRAPH_OPTIMIZATION (str): disable, basic, extended or all.
+        EMBEDDING_QUANTIZATION (str): "dynamic" quantizes the torch model's
+            linear layers to int8 at load time; "none" keeps float weights.
+            Other values are rejected: static quantization is applied to an
+            exported graph with quantize-onnx.
         METRICS_PORT (int): Port where Prometheus metrics are served.
         EMBEDDING_QUEUE (str): The RabbitMQ queue for embeddings.
     """
@@ -55,8 +72,29 @@ class Settings(BaseSettings):
     ELASTICSEARCH_PORT: int = Field(default=9200)
     ELASTICSEARCH_INDEX: str = Field(default="image_embeddings")
 
+    # kNN Vector Index Settings
+    EMBEDDING_DIMS: int = Field(default=512)
+    HNSW_M: int = Field(default=16)
+    HNSW_EF_CONSTRUCTION: int = Field(default=100)
+    # Vector storage of newly created indices (migrate-index applies it to an
+    # existing one). "int8_hnsw" / "int4_hnsw" keep the float vectors on disk
+    # but search a quantized copy, so the graph needs 4x / 8x less page cache.
+    # VECTOR_ELEMENT_TYPE=byte stores only int8 vectors (queries are quantized
+    # by the API the same way). EMBEDDING_IN_SOURCE=false drops the vector from
+    # _source, which is otherwise the largest part of each document.
+    VECTOR_INDEX_TYPE: str = Field(default="hnsw")
+    VECTOR_ELEMENT_TYPE: str = Field(default="float")
+    EMBEDDING_IN_SOURCE: bool = Field(default=True)
+
     # Embedding Model Settings
     EMBEDDING_MODEL: str = Field(default="ViT-B/32")
+    MODEL_ARTIFACT_DIR: str = Field(default="/app/model_artifacts")
+    EMBEDDING_BACKEND: str = Field(default="torch")
+    ONNX_IMAGE_MODEL_PATH: str = Field(default="/app/model_artifacts/clip-image.onnx")
+    ONNX_INTRA_OP_THREADS: int = Field(default=0)
+    ONNX_INTER_OP_THREADS: int = Field(default=0)
+    ONNX_GRAPH_OPTIMIZATION: str = Field(default="all")
+    EMBEDDING_QUANTIZATION: str = Field(default="none")
 
     # Metrics
     METRICS_PORT: int = Field(default=8001)
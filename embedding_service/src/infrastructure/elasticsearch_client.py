@@ -4,12 +4,62 @@ infrastructure/elasticsearch_client.py
 Elasticsearch client for indexing embeddings.
 """
 
+import asyncio
 import logging
+from typing import Optional
+import numpy as np
 from elasticsearch import AsyncElasticsearch, exceptions
 from infrastructure.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Indexed image metadata the API can pre-filter vector searches on.
+METADATA_PROPERTIES = {
+    "domain": {"type": "keyword"},
+    "downloaded_at": {"type": "date"},
+    "width": {"type": "integer"},
+    "height": {"type": "integer"},
+}
+
+# Fields that are only ever returned, never searched, sorted or aggregated on.
+# Kept in _source alone: no inverted index, no doc values.
+STORED_ONLY_PROPERTIES = {
+    "image_url": {"type": "keyword", "index": False, "doc_values": False},
+    "image_path": {"type": "keyword", "index": False, "doc_values": False},
+}
+
+# Version of the index template and of the mapping it carries, also recorded
+# in each index's _meta. Bump it whenever index_body() changes shape.
+INDEX_TEMPLATE_VERSION = 2
+
+VECTOR_INDEX_TYPES = ("hnsw", "int8_hnsw", "int4_hnsw")
+VECTOR_ELEMENT_TYPES = ("float", "byte")
+
+# Reindex script turning float vectors into the int8 values quantize_to_bytes
+# produces, for migrating into a byte index.
+BYTE_QUANTIZE_SCRIPT = """
+if (ctx._source.embedding != null) {
+  double norm = 0;
+  for (def x : ctx._source.embedding) { norm += x * x; }
+  norm = norm > 0 ? Math.sqrt(norm) : 1;
+  def quantized = new ArrayList();
+  for (def x : ctx._source.embedding) {
+    quantized.add((int) Math.max(-127, Math.min(127, Math.round(x / norm * 127))));
+  }
+  ctx._source.embedding = quantized;
+}
+"""
+
+
+def quantize_to_bytes(embedding: list) -> list:
+    """Scale a vector to unit length and round it to int8 values in [-127, 127]."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    return np.clip(np.rint(vector * 127), -127, 127).astype(np.int8).tolist()
+
+
 class ElasticsearchClient:
     def __init__(self):
         self.es = AsyncElasticsearch(
@@ -19,41 +69,263 @@ class ElasticsearchClient:
             retry_on_timeout=True,
         )
 
+    @staticmethod
+    def index_body() -> dict:
+        """
+        Build the index settings and mappings for the embeddings index.
+
+        The embedding field is indexed as an HNSW graph with cosine similarity so
+        the API can serve approximate kNN queries instead of scanning every vector.
+        The metadata fields are indexed for filtering inside those queries; the
+        URL and path are stored only, and unknown fields are rejected instead of
+        being mapped dynamically. Vector storage follows VECTOR_INDEX_TYPE, VECTOR_ELEMENT_TYPE and
+        EMBEDDING_IN_SOURCE.
+
+        Raises:
+            ValueError: If the vector storage settings are invalid.
+        """
+        index_type = settings.VECTOR_INDEX_TYPE
+        element_type = settings.VECTOR_ELEMENT_TYPE
+        if index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(f"Unsupported VECTOR_INDEX_TYPE: {index_type}")
+        if element_type not in VECTOR_ELEMENT_TYPES:
+            raise ValueError(f"Unsupported VECTOR_ELEMENT_TYPE: {element_type}")
+        if element_type == "byte" and index_type != "hnsw":
+            raise ValueError(f"{index_type} quantizes float vectors; use hnsw with byte vectors")
+        mappings = {
+            "dynamic": "strict",
+            "_meta": {"mapping_version": INDEX_TEMPLATE_VERSION},
+            "properties": {
+                "image_id": {"type": "integer"},
+                **STORED_ONLY_PROPERTIES,
+                **METADATA_PROPERTIES,
+                "embedding": {
+                    "type": "dense_vector",
+                    "element_type": element_type,
+                    "dims": settings.EMBEDDING_DIMS,
+                    "index": True,
+                    "similarity": "cosine",
+                    "index_options": {
+                        "type": index_type,
+                        "m": settings.HNSW_M,
+                        "ef_construction": settings.HNSW_EF_CONSTRUCTION,
+                    },
+                },
+            }
+        }
+        if not settings.EMBEDDING_IN_SOURCE:
+            # The vector stays searchable (and readable from doc values by
+            # scripts) but is no longer stored a second time as JSON.
+            mappings["_source"] = {"excludes": ["embedding"]}
+        return {"mappings": mappings}
+
+    @staticmethod
+    def template_name() -> str:
+        return f"{settings.ELASTICSEARCH_INDEX}-template"
+
+    async def ensure_index_template(self) -> None:
+        """
+        Install the index template for ELASTICSEARCH_INDEX and its migration targets.
+
+        The template matches every index named ``<ELASTICSEARCH_INDEX>*``, so an
+        index created by migrate-index, by hand, or implicitly by a write to a
+        missing index gets the designed mapping instead of a dynamic one. It is
+        replaced when its version is older or its body differs from the current
+        settings, and left alone when a newer version is installed.
+        """
+        name = self.template_name()
+        body = {
+            "index_patterns": [f"{settings.ELASTICSEARCH_INDEX}*"],
+            "version": INDEX_TEMPLATE_VERSION,
+            "template": self.index_body(),
+        }
+        if await self.es.indices.exists_index_template(name=name):
+            installed = (await self.es.indices.get_index_template(name=name))["index_templates"]
+            installed = installed[0]["index_template"] if installed else {}
+            version = installed.get("version") or 0
+            if version > INDEX_TEMPLATE_VERSION:
+                logger.warning(
+                    "Index template %s has version %s, newer than %s; leaving it in place.",
+                    name, version, INDEX_TEMPLATE_VERSION,
+                )
+                return
+            if version == INDEX_TEMPLATE_VERSION and installed.get("template") == body["template"]:
+                return
+        await self.es.indices.put_index_template(name=name, body=body)
+        logger.info("Installed index template %s (version %s)", name, INDEX_TEMPLATE_VERSION)
+
     async def create_index(self):
         try:
+            await self.ensure_index_template()
             exists = await self.es.indices.exists(index=settings.ELASTICSEARCH_INDEX)
             if not exists:
-                index_body = {
-                    "mappings": {
-                        "properties": {
-                            "image_id": {"type": "integer"},
-                            "image_path": {"type": "text"},
-                            "embedding": {"type": "dense_vector", "dims": 512},
-                        }
-                    }
-                }
+                index_body = self.index_body()
                 await self.es.indices.create(index=settings.ELASTICSEARCH_INDEX, body=index_body)
                 logger.info("Created Elasticsearch index: %s", settings.ELASTICSEARCH_INDEX)
             else:
                 logger.info("Elasticsearch index already exists: %s", settings.ELASTICSEARCH_INDEX)
-        except exceptions.ElasticsearchException as e:
+                await self.ensure_metadata_mapping()
+                if not await self.supports_knn():
+                    logger.warning(
+                        "Index %s has no kNN-indexed embedding field; run "
+                        "'python -m interface.cli migrate-index' to enable HNSW search.",
+                        settings.ELASTICSEARCH_INDEX,
+                    )
+                elif await self.mapping_version() < INDEX_TEMPLATE_VERSION:
+                    logger.warning(
+                        "Index %s predates mapping version %s; run "
+                        "'python -m interface.cli migrate-index' to apply it.",
+                        settings.ELASTICSEARCH_INDEX, INDEX_TEMPLATE_VERSION,
+                    )
+        except (exceptions.ApiError, exceptions.TransportError) as e:
             logger.exception("Failed to create or verify Elasticsearch index: %s", e)
             raise
 
-    async def index_embedding(self, image_id: int, image_url: str, image_path: str, embedding: list):
+    async def ensure_metadata_mapping(self) -> None:
+        """
+        Add the metadata fields to an index created before they existed.
+
+        New fields can be added to a live mapping; a field that was already
+        mapped dynamically with another type cannot be changed, and then only
+        migrate-index fixes it.
+        """
+        try:
+            await self.es.indices.put_mapping(
+                index=settings.ELASTICSEARCH_INDEX, body={"properties": METADATA_PROPERTIES}
+            )
+        except exceptions.ApiError as e:
+            logger.warning(
+                "Could not map metadata fields on %s (%s); run "
+                "'python -m interface.cli migrate-index' to filter on them.",
+                settings.ELASTICSEARCH_INDEX, e,
+            )
+
+    async def supports_knn(self) -> bool:
+        """
+        Check whether the live index maps the embedding field for kNN search.
+
+        Returns:
+            bool: True if every backing index has an indexed, cosine dense_vector.
+        """
+        mappings = await self.es.indices.get_mapping(index=settings.ELASTICSEARCH_INDEX)
+        for index_mapping in mappings.values():
+            field = index_mapping["mappings"].get("properties", {}).get("embedding", {})
+            if not field.get("index") or field.get("similarity") != "cosine":
+                return False
+        return True
+
+    async def mapping_version(self) -> int:
+        """
+        Oldest mapping version among the indices behind ELASTICSEARCH_INDEX.
+
+        Returns:
+            int: The recorded _meta.mapping_version, 1 for indices created before
+            versions were recorded.
+        """
+        mappings = await self.es.indices.get_mapping(index=settings.ELASTICSEARCH_INDEX)
+        return min(
+            (index_mapping["mappings"].get("_meta", {}).get("mapping_version", 1)
+             for index_mapping in mappings.values()),
+            default=1,
+        )
+
+    async def migrate_index(self, target_index: str, poll_interval: float = 5.0) -> None:
+        """
+        Copy the embeddings index into a new index built with the current mapping.
+
+        The copy runs as a background reindex task which is polled until done.
+        Afterwards ELASTICSEARCH_INDEX is atomically repointed to the new index as
+        an alias, so the API and the indexer keep using the same name. A concrete
+        index of that name is removed by the alias swap; an index previously behind
+        the alias is kept for rollback.
+
+        Stop the embedding consumers while this runs: documents written to the old
+        index after the reindex task starts are not carried over.
+
+        Args:
+            target_index (str): Name of the index to create and copy into.
+            poll_interval (float): Seconds between reindex task status checks.
+        """
+        alias = settings.ELASTICSEARCH_INDEX
+        try:
+            is_alias = await self.es.indices.exists_alias(name=alias)
+            if is_alias:
+                source_indices = list((await self.es.indices.get_alias(name=alias)).keys())
+            else:
+                source_indices = [alias]
+            if target_index in source_indices:
+                raise ValueError(f"Index {target_index} is already behind {alias}")
+            mappings = await self.es.indices.get_mapping(index=alias)
+            for index, index_mapping in mappings.items():
+                if "embedding" in index_mapping["mappings"].get("_source", {}).get("excludes", []):
+                    raise ValueError(
+                        f"Index {index} does not keep embeddings in _source, so they "
+                        "cannot be reindexed; re-embed the images instead"
+                    )
+
+            await self.es.indices.create(index=target_index, body=self.index_body())
+            logger.info(
+                "Created target index %s; reindexing from %s", target_index, source_indices
+            )
+
+            body = {"source": {"index": source_indices}, "dest": {"index": target_index}}
+            if settings.VECTOR_ELEMENT_TYPE == "byte":
+                body["script"] = {"lang": "painless", "source": BYTE_QUANTIZE_SCRIPT}
+            task = await self.es.reindex(body=body, wait_for_completion=False)
+            while True:
+                status = await self.es.tasks.get(task_id=task["task"])
+                if status.get("completed"):
+                    break
+                logger.info("Reindex progress: %s", status.get("task", {}).get("status"))
+                await asyncio.sleep(poll_interval)
+            failures = status.get("response", {}).get("failures") or []
+            if failures:
+                raise RuntimeError(f"Reindex into {target_index} failed: {failures[:3]}")
+            await self.es.indices.refresh(index=target_index)
+
+            if is_alias:
+                actions = [
+                    {"remove": {"index": index, "alias": alias}} for index in source_indices
+                ]
+            else:
+                actions = [{"remove_index": {"index": alias}}]
+            actions.append({"add": {"index": target_index, "alias": alias}})
+            await self.es.indices.update_aliases(body={"actions": actions})
+            logger.info("Alias %s now points to %s", alias, target_index)
+        except (exceptions.ApiError, exceptions.TransportError) as e:
+            logger.exception("Failed to migrate index %s to %s: %s", alias, target_index, e)
+            raise
+
+    async def index_embedding(
+        self,
+        image_id: int,
+        image_url: str,
+        image_path: str,
+        embedding: list,
+        metadata: Optional[dict] = None,
+    ):
         try:
             doc = {
                 "image_id": image_id,
                 "image_url": image_url,
                 "image_path": image_path,
-                "embedding": embedding,
+                "embedding": self.stored_vector(embedding),
             }
+            if metadata:
+                doc.update(metadata)
             await self.es.index(index=settings.ELASTICSEARCH_INDEX, body=doc)
             logger.debug("Indexed embedding for image_id: %s", image_id)
-        except exceptions.ElasticsearchException as e:
+        except (exceptions.ApiError, exceptions.TransportError) as e:
             logger.exception("Failed to index embedding for image_id %s: %s", image_id, e)
             raise
 
+    @staticmethod
+    def stored_vector(embedding: list) -> list:
+        """The embedding in the index's element type."""
+        if settings.VECTOR_ELEMENT_TYPE == "byte":
+            return quantize_to_bytes(embedding)
+        return embedding
+
     async def close(self):
         await self.es.close()
         logger.info("Elasticsearch connection closed.")
@@ -0,0 +1,80 @@
+"""
+infrastructure/encoder_benchmark.py
+
+Latency, throughput and accuracy measurement for the embedding backends.
+"""
+
+import time
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+
+def measure_encoder(
+    encode_batch: Callable[[List[object]], List[list]],
+    items: Sequence[object],
+    batch_size: int,
+) -> Dict[str, float]:
+    """
+    Time an encoder one item at a time and in batches.
+
+    Args:
+        encode_batch: Encodes a list of inputs, returning one embedding each.
+        items (Sequence[object]): Inputs to encode.
+        batch_size (int): Items per call in the throughput pass.
+
+    Returns:
+        Dict[str, float]: p50/p95/mean per-item latency in milliseconds and
+        batch throughput in items per second.
+    """
+    latencies = np.empty(len(items), dtype=np.float64)
+    for i, item in enumerate(items):
+        started = time.perf_counter()
+        encode_batch([item])
+        latencies[i] = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    for start in range(0, len(items), batch_size):
+        encode_batch(list(items[start:start + batch_size]))
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "mean_ms": float(latencies.mean()),
+        "items_per_second": len(items) / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def cosine_parity(reference: List[list], candidate: List[list]) -> Dict[str, float]:
+    """
+    Row-wise cosine similarity between two backends' embeddings of the same inputs.
+
+    Returns:
+        Dict[str, float]: Minimum and mean cosine similarity.
+    """
+    a = np.asarray(reference, dtype=np.float64)
+    b = np.asarray(candidate, dtype=np.float64)
+    cosines = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean())}
+
+
+def topk_overlap(candidate: List[np.ndarray], baseline: List[np.ndarray]) -> Dict[str, float]:
+    """
+    Per-query overlap between two top-k result lists.
+
+    Args:
+        candidate (List[np.ndarray]): Result ids per query from the candidate encoder.
+        baseline (List[np.ndarray]): Result ids per query from the baseline encoder.
+
+    Returns:
+        Dict[str, float]: Mean and minimum overlap fraction, and the fraction
+        of queries whose top-k sets are identical.
+    """
+    overlaps = np.array([
+        len(np.intersect1d(c, b)) / len(b) if len(b) else 1.0
+        for c, b in zip(candidate, baseline)
+    ])
+    return {
+        "mean_overlap": float(overlaps.mean()),
+        "min_overlap": float(overlaps.min()),
+        "identical_fraction": float((overlaps == 1.0).mean()),
+    }
@@ -0,0 +1,201 @@
+"""
+infrastructure/index_report.py
+
+Storage and latency report for an embeddings index.
+
+Used to compare an index before and after a migration to compact vector
+storage: on-disk size (total, vectors, _source and the URL/path fields), the
+memory kNN search needs to stay off disk, and kNN query latency. Segment heap
+is left out: Elasticsearch 8 keeps segment structures off heap and reports 0.
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from infrastructure.config import settings
+from infrastructure.elasticsearch_client import quantize_to_bytes
+
+# Fields that are only returned to clients; any bytes they take outside
+# _source are index structures nothing uses.
+STORED_ONLY_FIELDS = ("image_url", "image_path")
+
+
+def _mib(value) -> str:
+    return f"{value / (1 << 20):.1f}"
+
+
+def _ms(value) -> str:
+    return f"{value:.2f}"
+
+
+REPORT_ROWS = [
+    ("vector storage", "vector_storage", str),
+    ("documents", "docs", str),
+    ("store size MiB", "store_bytes", _mib),
+    ("vectors on disk MiB", "vector_bytes", _mib),
+    ("_source on disk MiB", "source_bytes", _mib),
+    ("url/path index MiB", "stored_only_bytes", _mib),
+    ("kNN memory (est.) MiB", "vector_memory_bytes", _mib),
+    ("kNN p50 ms", "p50_ms", _ms),
+    ("kNN p95 ms", "p95_ms", _ms),
+]
+
+
+def vector_memory_bytes(
+    docs: int, dims: int, element_type: str, index_type: str, m: Optional[int] = None
+) -> int:
+    """
+    Estimate the page cache HNSW search needs for a vector field.
+
+    Uses the sizing rules of Elasticsearch's kNN tuning guide: the searched
+    vector values (plus 4 bytes of correction per vector for the
+    scalar-quantized types) and 4 * m bytes of graph neighbours per vector,
+    whatever the vectors are stored as.
+
+    Args:
+        docs (int): Number of indexed vectors.
+        dims (int): Vector dimension.
+        element_type (str): "float" or "byte".
+        index_type (str): "hnsw", "int8_hnsw" or "int4_hnsw".
+        m (Optional[int]): HNSW connections per node; settings.HNSW_M by default.
+
+    Returns:
+        int: Estimated bytes.
+    """
+    if index_type == "int8_hnsw":
+        vector = dims + 4
+    elif index_type == "int4_hnsw":
+        vector = dims / 2 + 4
+    elif element_type == "byte":
+        vector = dims
+    else:
+        vector = 4 * dims
+    graph = 4 * (settings.HNSW_M if m is None else m)
+    return int(docs * (vector + graph))
+
+
+def _vector_field(mapping: dict) -> dict:
+    for index_mapping in mapping.values():
+        return index_mapping["mappings"].get("properties", {}).get("embedding", {})
+    return {}
+
+
+async def _field_disk_usage(es, index: str) -> Dict[str, Optional[int]]:
+    """
+    Bytes on disk of the vector field, of _source and of the stored-only
+    fields' index structures (including multi-fields), summed over indices.
+    """
+    try:
+        usage = await es.indices.disk_usage(index=index, run_expensive_tasks=True)
+    except Exception:
+        # Not available on every deployment; the report still has the totals.
+        return {"vector_bytes": None, "source_bytes": None, "stored_only_bytes": None}
+    vector_bytes = source_bytes = stored_only_bytes = 0
+    for name, index_usage in usage.items():
+        if name == "_shards":
+            continue
+        fields = index_usage.get("fields", {})
+        vector_bytes += fields.get("embedding", {}).get("knn_vectors_in_bytes", 0)
+        source_bytes += fields.get("_source", {}).get("stored_fields_in_bytes", 0)
+        stored_only_bytes += sum(
+            field_usage.get("total_in_bytes", 0)
+            for field, field_usage in fields.items()
+            if field.split(".")[0] in STORED_ONLY_FIELDS
+        )
+    return {"vector_bytes": vector_bytes, "source_bytes": source_bytes,
+            "stored_only_bytes": stored_only_bytes}
+
+
+def random_queries(count: int, dims: int, element_type: str, seed: int = 0) -> list:
+    """Random unit query vectors in the field's element type."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dims)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    if element_type == "byte":
+        return [quantize_to_bytes(vector) for vector in vectors]
+    return vectors.tolist()
+
+
+async def index_report(
+    es,
+    index: str,
+    queries: int = 50,
+    k: int = 10,
+    num_candidates: int = 100,
+    warmup: int = 5,
+    seed: int = 0,
+) -> Dict[str, object]:
+    """
+    Measure an embeddings index.
+
+    Args:
+        es: AsyncElasticsearch client.
+        index (str): Index or alias to measure.
+        queries (int): Timed kNN queries (random unit vectors).
+        k (int): Hits per query.
+        num_candidates (int): kNN candidates per shard.
+        warmup (int): Untimed queries run first.
+        seed (int): Seed for the query vectors.
+
+    Returns:
+        Dict[str, object]: Storage settings, document count, sizes in bytes and
+        query latency percentiles in milliseconds.
+    """
+    field = _vector_field(await es.indices.get_mapping(index=index))
+    element_type = field.get("element_type", "float")
+    index_type = field.get("index_options", {}).get("type", "hnsw")
+    dims = field.get("dims", 0)
+    m = field.get("index_options", {}).get("m")
+    stats = (await es.indices.stats(index=index, metric="docs,store"))["_all"]["primaries"]
+    docs = stats["docs"]["count"]
+    report = {
+        "vector_storage": f"{element_type}/{index_type}",
+        "docs": docs,
+        "store_bytes": stats["store"]["size_in_bytes"],
+        **await _field_disk_usage(es, index),
+        "vector_memory_bytes": vector_memory_bytes(docs, dims, element_type, index_type, m),
+    }
+
+    vectors = random_queries(warmup + queries, dims, element_type, seed)
+    latencies = []
+    for i, vector in enumerate(vectors):
+        body = {
+            "size": k,
+            "_source": False,
+            "knn": {"field": "embedding", "query_vector": vector, "k": k,
+                    "num_candidates": max(num_candidates, k)},
+        }
+        started = time.perf_counter()
+        await es.search(index=index, body=body)
+        if i >= warmup:
+            latencies.append((time.perf_counter() - started) * 1000)
+    if latencies:
+        report["p50_ms"] = float(np.percentile(latencies, 50))
+        report["p95_ms"] = float(np.percentile(latencies, 95))
+    return report
+
+
+def format_reports(reports: Dict[str, Dict[str, object]], rows: Optional[list] = None) -> str:
+    """
+    Render reports side by side, one column per index.
+
+    Args:
+        reports (Dict[str, Dict[str, object]]): Reports by column title.
+        rows (Optional[list]): (label, key, render) rows; REPORT_ROWS by default.
+
+    Returns:
+        str: A plain-text table.
+    """
+    rows = REPORT_ROWS if rows is None else rows
+    width = max([24] + [len(title) + 2 for title in reports])
+    lines = [f"{'':<24}" + "".join(f"{title:>{width}}" for title in reports)]
+    for label, key, render in rows:
+        cells = "".join(
+            f"{(render(report[key]) if report.get(key) is not None else 'n/a'):>{width}}"
+            for report in reports.values()
+        )
+        lines.append(f"{label:<24}{cells}")
+    return "\n".join(lines)
+
@@ -0,0 +1,172 @@
+"""
+infrastructure/mapping_benchmark.py
+
+Indexing throughput and disk usage of the embeddings mapping.
+
+Compares the current mapping with the one used before mapping version 2, in
+which image_path was analyzed text and image_url was left to dynamic mapping
+(text plus a keyword sub-field). Each mapping gets a scratch index outside the
+index template's pattern, is bulk-loaded with the same synthetic documents,
+force-merged to one segment so sizes are comparable, measured and deleted.
+"""
+
+import copy
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+
+from infrastructure.index_report import _field_disk_usage, _mib, random_queries
+
+BENCHMARK_ROWS = [
+    ("documents", "docs", str),
+    ("indexing docs/s", "docs_per_second", lambda value: f"{value:.0f}"),
+    ("store size MiB", "store_bytes", _mib),
+    ("vectors on disk MiB", "vector_bytes", _mib),
+    ("_source on disk MiB", "source_bytes", _mib),
+    ("url/path index MiB", "stored_only_bytes", _mib),
+]
+
+DOMAINS = ["images.example.com", "cdn.example.org", "static.example.net", "media.example.io"]
+
+
+def legacy_index_body(index_body: dict) -> dict:
+    """
+    The given index body with non-vector fields mapped as before version 2.
+
+    Args:
+        index_body (dict): Current body from ElasticsearchClient.index_body().
+
+    Returns:
+        dict: A copy with dynamic mapping, image_path as text and image_url unmapped.
+    """
+    body = copy.deepcopy(index_body)
+    mappings = body["mappings"]
+    mappings["dynamic"] = True
+    mappings.pop("_meta", None)
+    mappings["properties"]["image_path"] = {"type": "text"}
+    mappings["properties"].pop("image_url", None)
+    return body
+
+
+def synthetic_documents(
+    count: int, dims: int, element_type: str = "float", seed: int = 0
+) -> List[dict]:
+    """
+    Documents shaped like the indexer's, with URL and path lengths of real ones.
+
+    Args:
+        count (int): Number of documents.
+        dims (int): Embedding dimension.
+        element_type (str): "float" or "byte" embeddings.
+        seed (int): Seed for vectors and metadata.
+
+    Returns:
+        List[dict]: Index-ready documents.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = random_queries(count, dims, element_type, seed)
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    documents = []
+    for i, vector in enumerate(vectors):
+        domain = DOMAINS[i % len(DOMAINS)]
+        token = rng.bytes(16).hex()
+        documents.append({
+            "image_id": i + 1,
+            "image_url": f"https://{domain}/uploads/{token[:2]}/{token}/photo-{i}.jpg?w=1200&q=80",
+            "image_path": f"/app/images/{token[:2]}/{token}.jpg",
+            "domain": domain,
+            "downloaded_at": (started + timedelta(seconds=int(i * 37))).isoformat(),
+            "width": int(rng.integers(200, 4000)),
+            "height": int(rng.integers(200, 4000)),
+            "embedding": vector,
+        })
+    return documents
+
+
+async def measure_indexing(
+    es, index: str, body: dict, documents: List[dict], batch_size: int = 500
+) -> Dict[str, object]:
+    """
+    Bulk-load documents into a scratch index, measure it and delete it.
+
+    Args:
+        es: AsyncElasticsearch client.
+        index (str): Scratch index name; must not match an index template.
+        body (dict): Index body to create it with.
+        documents (List[dict]): Documents to index.
+        batch_size (int): Documents per bulk request.
+
+    Returns:
+        Dict[str, object]: Document count, indexing throughput and sizes in bytes.
+
+    Raises:
+        RuntimeError: If a bulk request reports item errors.
+    """
+    body = copy.deepcopy(body)
+    # One shard, no replicas and no periodic refresh, the same for every mapping.
+    body["settings"] = {"number_of_shards": 1, "number_of_replicas": 0, "refresh_interval": "-1"}
+    await es.indices.create(index=index, body=body)
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(documents), batch_size):
+            operations = []
+            for doc in documents[start:start + batch_size]:
+                operations.extend(({"index": {"_index": index}}, doc))
+            response = await es.bulk(body=operations)
+            if response.get("errors"):
+                failed = [item for item in response["items"] if item["index"].get("error")]
+                raise RuntimeError(f"Bulk indexing into {index} failed: {failed[:3]}")
+        await es.indices.refresh(index=index)
+        elapsed = time.perf_counter() - started
+        await es.indices.forcemerge(index=index, max_num_segments=1)
+        stats = (await es.indices.stats(index=index, metric="docs,store"))["_all"]["primaries"]
+        return {
+            "docs": stats["docs"]["count"],
+            "docs_per_second": len(documents) / elapsed if elapsed > 0 else None,
+            "store_bytes": stats["store"]["size_in_bytes"],
+            **await _field_disk_usage(es, index),
+        }
+    finally:
+        await es.indices.delete(index=index)
+
+
+async def benchmark_mappings(
+    es,
+    bodies: Dict[str, dict],
+    documents: List[dict],
+    batch_size: int = 500,
+    rounds: int = 2,
+    prefix: str = "mapping-benchmark",
+) -> Dict[str, Dict[str, object]]:
+    """
+    Measure each index body with the same documents.
+
+    Mappings are loaded in alternating order for ``rounds`` rounds and the best
+    throughput of each is kept, so JIT and cache warm-up do not favour the one
+    that runs last.
+
+    Args:
+        es: AsyncElasticsearch client.
+        bodies (Dict[str, dict]): Index bodies by name.
+        documents (List[dict]): Documents to index.
+        batch_size (int): Documents per bulk request.
+        rounds (int): Loads per mapping.
+        prefix (str): Scratch index name prefix.
+
+    Returns:
+        Dict[str, Dict[str, object]]: Reports by mapping name, for format_reports.
+    """
+    reports = {}
+    names = list(bodies)
+    for round_number in range(max(rounds, 1)):
+        for name in names if round_number % 2 == 0 else reversed(names):
+            report = await measure_indexing(
+                es, f"{prefix}-{name}", bodies[name], documents, batch_size
+            )
+            best = reports.get(name, {}).get("docs_per_second") or 0
+            if (report["docs_per_second"] or 0) < best:
+                report["docs_per_second"] = best
+            reports[name] = report
+    return {name: reports[name] for name in names}
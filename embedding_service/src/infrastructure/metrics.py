@@ -5,7 +5,7 @@ Sets up Prometheus metrics and starts a metrics server.
 """
 
 import logging
-from prometheus_client import Counter, Histogram, start_http_server
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
 from infrastructure.config import settings
 
 logger = logging.getLogger(__name__)
@@ -22,6 +22,11 @@ embedding_latency = Histogram(
     "embedding_service_embedding_latency_seconds",
     "Time taken to generate and index embeddings"
 )
+startup_phase_duration = Gauge(
+    "embedding_service_startup_phase_seconds",
+    "Time the last start-up spent in each phase (model_load, warmup)",
+    ["phase"]
+)
 
 def start_metrics_server(port: int = 8001):
     start_http_server(port)
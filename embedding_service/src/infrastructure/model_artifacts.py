@@ -0,0 +1,154 @@
+"""
+infrastructure/model_artifacts.py
+
+Local cache of serialized CLIP models.
+
+clip.load unpacks the published checkpoint and rebuilds the model on every
+start, and the service then encodes a dummy image to learn the embedding
+dimension. The cache stores the built model's state dict in torch's zip
+format, which torch.load can memory-map, next to a small JSON file holding
+what start-up would otherwise have to compute (embedding dimension, image
+preprocessing parameters).
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+WEIGHTS_FILE = "weights.pt"
+METADATA_FILE = "metadata.json"
+
+
+class ModelArtifactCache:
+    """Directory of serialized models keyed by model name and device."""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root (str): Directory holding one sub-directory per artifact.
+        """
+        self.root = root
+
+    def artifact_path(self, model_name: str, device: str) -> str:
+        """Directory of the artifact for ``model_name`` built on ``device``."""
+        safe_name = re.sub(r"[^A-Za-z0-9._-]", "-", model_name)
+        return os.path.join(self.root, f"{safe_name}-{device}")
+
+    def exists(self, model_name: str, device: str) -> bool:
+        """True once an artifact has been completely written."""
+        return os.path.exists(
+            os.path.join(self.artifact_path(model_name, device), METADATA_FILE)
+        )
+
+    def save(self, model_name: str, device: str, state_dict: dict, metadata: dict) -> str:
+        """
+        Serialize a model's weights and metadata.
+
+        Both files are written under temporary names and renamed into place;
+        the metadata goes last, so a reader never sees partial weights even
+        when several containers populate a shared cache at once.
+
+        Args:
+            model_name (str): CLIP model name.
+            device (str): Device the weights were built for.
+            state_dict (dict): The model's state dict.
+            metadata (dict): JSON-serializable model metadata.
+
+        Returns:
+            str: The artifact directory.
+        """
+        path = self.artifact_path(model_name, device)
+        os.makedirs(path, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        weights = os.path.join(path, WEIGHTS_FILE)
+        torch.save(state_dict, weights + suffix)
+        os.replace(weights + suffix, weights)
+        metadata_path = os.path.join(path, METADATA_FILE)
+        with open(metadata_path + suffix, "w") as f:
+            json.dump(metadata, f)
+        os.replace(metadata_path + suffix, metadata_path)
+        logger.info("Saved model artifact for '%s' to %s.", model_name, path)
+        return path
+
+    def load(self, model_name: str, device: str) -> Tuple[dict, dict]:
+        """
+        Load an artifact without reading its weights into memory.
+
+        The tensors are views of the memory-mapped file, so pages are read on
+        first use and stay shared through the page cache between processes
+        that map the same file.
+
+        Args:
+            model_name (str): CLIP model name.
+            device (str): Device the weights were built for.
+
+        Returns:
+            Tuple[dict, dict]: The state dict (CPU tensors) and the metadata.
+        """
+        path = self.artifact_path(model_name, device)
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            metadata = json.load(f)
+        state_dict = torch.load(
+            os.path.join(path, WEIGHTS_FILE), map_location="cpu", mmap=True, weights_only=True
+        )
+        return state_dict, metadata
+
+
+def clip_metadata(model, preprocess, dimension: int) -> dict:
+    """
+    Describe a loaded CLIP model for its artifact.
+
+    Args:
+        model: The CLIP model.
+        preprocess: The image transform clip.load returned; its final
+            Normalize step holds the channel mean and std.
+        dimension (int): Embedding dimension.
+
+    Returns:
+        dict: dimension, input_resolution, context_length, mean and std.
+    """
+    normalize = preprocess.transforms[-1]
+    return {
+        "dimension": int(dimension),
+        "input_resolution": int(model.visual.input_resolution),
+        "context_length": int(model.context_length),
+        "mean": [float(v) for v in normalize.mean],
+        "std": [float(v) for v in normalize.std],
+    }
+
+
+def build_clip_model(state_dict: dict):
+    """
+    Build a CLIP model around an existing state dict without copying it.
+
+    The modules are created on the meta device (no storage) and the loaded
+    tensors are then assigned as parameters, so memory-mapped weights stay
+    mapped instead of being copied into freshly allocated ones.
+
+    Args:
+        state_dict (dict): Weights from ModelArtifactCache.load.
+
+    Returns:
+        The CLIP model in eval mode, on the CPU.
+    """
+    import warnings
+    from clip.model import build_model
+
+    with torch.device("meta"), warnings.catch_warnings():
+        # build_model loads the weights into the meta modules, which is a
+        # no-op that warns once per tensor; they are assigned below.
+        warnings.simplefilter("ignore")
+        model = build_model(state_dict)
+    model.load_state_dict(state_dict, assign=True)
+    # The causal mask is a plain attribute rather than a buffer, so it was
+    # created on the meta device and has to be rebuilt.
+    attn_mask = model.build_attention_mask()
+    for block in model.transformer.resblocks:
+        block.attn_mask = attn_mask
+    return model.eval()
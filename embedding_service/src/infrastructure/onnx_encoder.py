@@ -0,0 +1,121 @@
+"""
+infrastructure/onnx_encoder.py
+
+ONNX Runtime backend for the CLIP image tower.
+
+export_image_tower converts a loaded CLIP model's image encoder to an ONNX
+graph (dynamic batch size) and writes the model metadata next to it;
+OnnxEncoder runs that graph on the CPU execution provider. onnxruntime is
+only imported when the backend is used.
+"""
+
+import json
+import logging
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GRAPH_OPTIMIZATION_LEVELS = ("disable", "basic", "extended", "all")
+
+
+def metadata_path(model_path: str) -> str:
+    """Path of the JSON metadata written next to an exported graph."""
+    return model_path + ".json"
+
+
+class OnnxEncoder:
+    """Runs an exported CLIP tower with ONNX Runtime."""
+
+    def __init__(
+        self,
+        model_path: str,
+        intra_op_threads: int = 0,
+        inter_op_threads: int = 0,
+        optimization_level: str = "all",
+    ):
+        """
+        Args:
+            model_path (str): Exported .onnx file.
+            intra_op_threads (int): Threads used inside one operator; 0 lets
+                ONNX Runtime use every physical core.
+            inter_op_threads (int): Threads running independent operators in
+                parallel; 0 is the runtime default.
+            optimization_level (str): Graph optimizations applied when the
+                session is created: disable, basic, extended or all.
+        """
+        import onnxruntime as ort
+
+        if optimization_level not in GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unsupported graph optimization level: {optimization_level}")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        options.graph_optimization_level = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }[optimization_level]
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        with open(metadata_path(model_path)) as f:
+            self.metadata = json.load(f)
+        self.dimension = self.metadata["dimension"]
+        logger.info(
+            "Loaded ONNX encoder %s (intra-op %d, inter-op %d, optimization %s).",
+            model_path, intra_op_threads, inter_op_threads, optimization_level,
+        )
+
+    def run(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Encode a batch.
+
+        Args:
+            inputs (np.ndarray): Model input with the batch on axis 0.
+
+        Returns:
+            np.ndarray: Unnormalized embeddings, one row per input.
+        """
+        return self.session.run(None, {self.input_name: inputs})[0]
+
+
+def export_image_tower(model, model_path: str, metadata: dict, opset: Optional[int] = 17) -> None:
+    """
+    Export a CLIP model's image encoder to ONNX.
+
+    Args:
+        model: CLIP model loaded in float32 on the CPU.
+        model_path (str): Output .onnx file.
+        metadata (dict): Model metadata (see clip_metadata), written to
+            metadata_path(model_path); input_resolution sizes the input.
+        opset (Optional[int]): ONNX opset version.
+    """
+    import torch
+
+    class ImageTower(torch.nn.Module):
+        def __init__(self, clip_model):
+            super().__init__()
+            self.clip_model = clip_model
+
+        def forward(self, images):
+            return self.clip_model.encode_image(images)
+
+    resolution = metadata["input_resolution"]
+    images = torch.randn(2, 3, resolution, resolution)
+    with torch.no_grad():
+        torch.onnx.export(
+            ImageTower(model).eval(),
+            (images,),
+            model_path,
+            input_names=["images"],
+            output_names=["embeddings"],
+            dynamic_axes={"images": {0: "batch"}, "embeddings": {0: "batch"}},
+            opset_version=opset,
+        )
+    with open(metadata_path(model_path), "w") as f:
+        json.dump(metadata, f)
+    logger.info("Exported CLIP image tower to %s.", model_path)
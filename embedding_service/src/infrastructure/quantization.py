@@ -0,0 +1,121 @@
+"""
+infrastructure/quantization.py
+
+INT8 quantization of the CLIP image encoder.
+
+Two routes are supported:
+
+- PyTorch dynamic quantization: nn.Linear weights are stored as int8 and
+  activations are quantized on the fly, so no calibration data is needed.
+- ONNX Runtime quantization of an exported graph, either dynamic or static;
+  static quantization fixes activation ranges from calibration batches (our
+  own images), which saves the per-call range computation.
+"""
+
+import json
+import logging
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("dynamic", "static")
+# EMBEDDING_QUANTIZATION values. Static quantization needs calibration
+# batches, so it is only applied offline to an exported graph (quantize-onnx).
+TORCH_QUANTIZATION_MODES = ("none", "dynamic")
+
+
+def quantize_torch_model(model):
+    """
+    Dynamically quantize a model's linear layers to int8.
+
+    Args:
+        model: Float model on the CPU.
+
+    Returns:
+        The quantized model (int8 weights in every nn.Linear).
+    """
+    import torch
+
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class CalibrationBatches:
+    """Feeds calibration batches to ONNX Runtime's static quantizer."""
+
+    def __init__(self, input_name: str, batches: Iterable[np.ndarray]):
+        self.input_name = input_name
+        self.batches = list(batches)
+        self._position = 0
+
+    def get_next(self) -> Optional[dict]:
+        if self._position >= len(self.batches):
+            return None
+        batch = self.batches[self._position]
+        self._position += 1
+        return {self.input_name: batch}
+
+    def rewind(self) -> None:
+        self._position = 0
+
+
+def quantize_onnx_model(
+    model_path: str,
+    output_path: str,
+    mode: str = "dynamic",
+    calibration_batches: Optional[List[np.ndarray]] = None,
+) -> None:
+    """
+    Quantize an exported encoder's MatMul/Gemm weights to int8.
+
+    The export metadata is copied next to the output with a "quantization"
+    entry, so the quantized graph can be used as ONNX_IMAGE_MODEL_PATH directly.
+
+    Args:
+        model_path (str): Float .onnx graph from export-onnx.
+        output_path (str): Quantized .onnx file to write.
+        mode (str): "dynamic" or "static".
+        calibration_batches (Optional[List[np.ndarray]]): Model inputs used to
+            calibrate activation ranges; required for static quantization.
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+    from infrastructure.onnx_encoder import metadata_path
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported quantization mode: {mode}")
+    op_types = ["MatMul", "Gemm"]
+    if mode == "dynamic":
+        quantize_dynamic(
+            model_path, output_path, op_types_to_quantize=op_types, weight_type=QuantType.QInt8
+        )
+    else:
+        if not calibration_batches:
+            raise ValueError("Static quantization needs calibration batches")
+        import onnx
+
+        input_name = onnx.load(model_path, load_external_data=False).graph.input[0].name
+        quantize_static(
+            model_path,
+            output_path,
+            CalibrationBatches(input_name, calibration_batches),
+            quant_format=QuantFormat.QDQ,
+            op_types_to_quantize=op_types,
+            per_channel=True,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+        )
+    with open(metadata_path(model_path)) as f:
+        metadata = json.load(f)
+    metadata["quantization"] = mode
+    with open(metadata_path(output_path), "w") as f:
+        json.dump(metadata, f)
+    logger.info(
+        "Wrote %s-quantized model to %s (%.1f MB -> %.1f MB).",
+        mode, output_path, _size_mb(model_path), _size_mb(output_path),
+    )
+
+
+def _size_mb(path: str) -> float:
+    return os.path.getsize(path) / (1024 * 1024)
@@ -5,13 +5,26 @@ A minimal FastAPI application to expose a simple endpoint and provide Swagger UI
 """
 
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 
 app = FastAPI(
     title="Embedding Service API",
     description="API for health checks and administrative endpoints.",
     version="1.0.0"
 )
+# Set by main once the model is warmed up and messages are being consumed.
+app.state.ready = False
 
 @app.get("/health", summary="Health Check", description="Returns service health status.")
 async def health_check():
     return {"status": "ok", "service": "embedding_service"}
+
+
+@app.get("/ready", summary="Readiness Check",
+         description="Returns 200 once the model is loaded and messages are consumed.")
+async def readiness_check():
+    if not app.state.ready:
+        return JSONResponse(
+            status_code=503, content={"status": "starting", "service": "embedding_service"}
+        )
+    return {"status": "ready", "service": "embedding_service"}
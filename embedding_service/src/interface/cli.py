@@ -0,0 +1,330 @@
+"""
+interface/cli.py
+
+Command-line entry points for Elasticsearch index maintenance.
+
+Run from the service container (PYTHONPATH=/app/src):
+    python -m interface.cli migrate-index --target image_embeddings_v2 --report
+    python -m interface.cli index-report --index image_embeddings
+    python -m interface.cli benchmark-mapping --docs 20000
+    python -m interface.cli export-onnx --output /app/model_artifacts/clip-image.onnx
+    python -m interface.cli benchmark-encoders --images /app/images --batch-size 16
+    python -m interface.cli quantize-onnx --mode static --calibration-images /app/images
+    python -m interface.cli quantization-report --images /data/heldout --candidate torch-int8
+"""
+
+import argparse
+import asyncio
+import glob
+import os
+import random
+
+from infrastructure.config import settings
+from infrastructure.elasticsearch_client import elasticsearch_client
+from infrastructure.logging_config import logger
+
+
+async def migrate_index(args: argparse.Namespace) -> None:
+    """
+    Reindex the embeddings into a new index with the current mapping.
+
+    With --report, the old and the new index are measured and compared.
+    """
+    from infrastructure.index_report import format_reports, index_report
+
+    es = elasticsearch_client.es
+    try:
+        if args.report:
+            before = await index_report(es, settings.ELASTICSEARCH_INDEX, queries=args.queries)
+        await elasticsearch_client.migrate_index(args.target, poll_interval=args.poll_interval)
+        logger.info("Migration to %s finished.", args.target)
+        if args.report:
+            after = await index_report(es, args.target, queries=args.queries)
+            print(format_reports({"before": before, f"after ({args.target})": after}))
+    finally:
+        await elasticsearch_client.close()
+
+
+async def report_indices(args: argparse.Namespace) -> None:
+    """Print storage size, kNN memory and kNN latency of one or more indices."""
+    from infrastructure.index_report import format_reports, index_report
+
+    try:
+        reports = {}
+        for index in args.index or [settings.ELASTICSEARCH_INDEX]:
+            reports[index] = await index_report(
+                elasticsearch_client.es, index, queries=args.queries, k=args.k,
+                num_candidates=args.num_candidates,
+            )
+        print(format_reports(reports))
+    finally:
+        await elasticsearch_client.close()
+
+
+async def benchmark_mapping(args: argparse.Namespace) -> None:
+    """
+    Compare indexing throughput and disk usage of the current mapping with the
+    pre-version-2 one, using synthetic documents in scratch indices.
+    """
+    from infrastructure.index_report import format_reports
+    from infrastructure.mapping_benchmark import (
+        BENCHMARK_ROWS, benchmark_mappings, legacy_index_body, synthetic_documents,
+    )
+
+    try:
+        body = elasticsearch_client.index_body()
+        documents = synthetic_documents(
+            args.docs, settings.EMBEDDING_DIMS, settings.VECTOR_ELEMENT_TYPE, args.seed
+        )
+        reports = await benchmark_mappings(
+            elasticsearch_client.es,
+            {"legacy": legacy_index_body(body), "current": body},
+            documents,
+            batch_size=args.batch_size,
+            rounds=args.rounds,
+        )
+        print(format_reports(reports, BENCHMARK_ROWS))
+    finally:
+        await elasticsearch_client.close()
+
+
+async def export_onnx(args: argparse.Namespace) -> None:
+    """Export the CLIP image tower to ONNX for EMBEDDING_BACKEND=onnx."""
+    import clip
+    from infrastructure.model_artifacts import clip_metadata
+    from infrastructure.onnx_encoder import export_image_tower
+
+    model, preprocess = clip.load(args.model, device="cpu")
+    metadata = clip_metadata(model, preprocess, model.visual.output_dim)
+    await asyncio.to_thread(export_image_tower, model, args.output, metadata, args.opset)
+
+
+def _load_images(directory: str, count: int, seed: int = 0) -> list:
+    """Open a random sample of up to ``count`` images from ``directory``."""
+    from PIL import Image
+
+    paths = sorted(glob.glob(os.path.join(directory, "*")))
+    if not paths:
+        raise SystemExit(f"No images found in {directory}")
+    rng = random.Random(seed)
+    paths = rng.sample(paths, min(count, len(paths)))
+    return [Image.open(path).convert("RGB") for path in paths]
+
+
+def _image_tensors(preprocess, images):
+    import torch
+
+    return torch.stack([preprocess(image) for image in images])
+
+
+def _load_image_encoder(spec: str, model_name: str):
+    """
+    Build the encoder named by ``spec``: "torch", "torch-int8", or the path
+    of an exported (optionally quantized) .onnx graph.
+    """
+    from domain.embedding_service import EmbeddingService
+    from infrastructure.onnx_encoder import OnnxEncoder
+
+    if spec in ("torch", "torch-int8"):
+        return EmbeddingService(model_name, quantize=spec == "torch-int8")
+    return EmbeddingService(model_name, onnx_encoder=OnnxEncoder(spec))
+
+
+async def benchmark_encoders(args: argparse.Namespace) -> None:
+    """Compare the torch and ONNX image encoders: parity, latency and throughput."""
+    import torch
+    from domain.embedding_service import EmbeddingService
+    from infrastructure.encoder_benchmark import cosine_parity, measure_encoder
+    from infrastructure.onnx_encoder import OnnxEncoder
+
+    images = _load_images(args.images, args.items)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    backends = {
+        "torch": EmbeddingService(args.model),
+        "onnx": EmbeddingService(args.model, onnx_encoder=OnnxEncoder(
+            args.onnx_model,
+            intra_op_threads=args.threads,
+            inter_op_threads=args.inter_op_threads,
+            optimization_level=args.optimization,
+        )),
+    }
+    print(f"{'backend':<10}{'p50 ms':>10}{'p95 ms':>10}{'items/s':>12}")
+    embeddings = {}
+    for name, service in backends.items():
+        service.warm_up()
+
+        def encode(batch, service=service):
+            return service.encode_image_tensors(_image_tensors(service.preprocess, batch))
+
+        stats = measure_encoder(encode, images, args.batch_size)
+        embeddings[name] = encode(images)
+        print(f"{name:<10}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+              f"{stats['items_per_second']:>12.1f}")
+    parity = cosine_parity(embeddings["torch"], embeddings["onnx"])
+    print(f"onnx vs torch cosine: min {parity['min_cosine']:.6f}, "
+          f"mean {parity['mean_cosine']:.6f}")
+
+
+async def quantize_onnx(args: argparse.Namespace) -> None:
+    """Quantize the exported image tower to int8, calibrating on our own images."""
+    import json
+    from domain.embedding_service import build_preprocess
+    from infrastructure.onnx_encoder import metadata_path
+    from infrastructure.quantization import quantize_onnx_model
+
+    batches = None
+    if args.mode == "static":
+        if not args.calibration_images:
+            raise SystemExit("--calibration-images is required for static quantization")
+        with open(metadata_path(args.model_path)) as f:
+            preprocess = build_preprocess(json.load(f))
+        images = _load_images(args.calibration_images, args.samples)
+        batches = [
+            _image_tensors(preprocess, images[start:start + args.batch_size]).numpy()
+            for start in range(0, len(images), args.batch_size)
+        ]
+    output = args.output or args.model_path.replace(".onnx", f".{args.mode}-int8.onnx")
+    await asyncio.to_thread(quantize_onnx_model, args.model_path, output, args.mode, batches)
+
+
+async def quantization_report(args: argparse.Namespace) -> None:
+    """
+    Compare a quantized image encoder with the float one on held-out images.
+
+    Every held-out image is used as a query (its baseline embedding) against
+    the held-out set embedded by each encoder, so the top-k overlap shows how
+    much indexing with the candidate would change search results.
+    """
+    import numpy as np
+    from infrastructure.encoder_benchmark import cosine_parity, measure_encoder, topk_overlap
+
+    images = _load_images(args.images, args.items, seed=args.seed)
+    encoders = {
+        "baseline": _load_image_encoder(args.baseline, args.model),
+        "candidate": _load_image_encoder(args.candidate, args.model),
+    }
+    print(f"{'encoder':<11}{'spec':<40}{'p50 ms':>10}{'items/s':>12}")
+    embeddings = {}
+    for name, service in encoders.items():
+        service.warm_up()
+
+        def encode(batch, service=service):
+            return service.encode_image_tensors(_image_tensors(service.preprocess, batch))
+
+        stats = measure_encoder(encode, images, args.batch_size)
+        spec = args.baseline if name == "baseline" else args.candidate
+        print(f"{name:<11}{spec:<40}{stats['p50_ms']:>10.2f}{stats['items_per_second']:>12.1f}")
+        embeddings[name] = np.asarray(encode(images), dtype=np.float32)
+    queries = embeddings["baseline"]
+    rows = {}
+    for name, corpus in embeddings.items():
+        scores = queries @ corpus.T
+        np.fill_diagonal(scores, -np.inf)
+        rows[name] = list(np.argsort(-scores, axis=1)[:, :args.top_k])
+    overlap = topk_overlap(rows["candidate"], rows["baseline"])
+    parity = cosine_parity(embeddings["baseline"].tolist(), embeddings["candidate"].tolist())
+    print(f"top-{args.top_k} overlap over {len(images)} images: "
+          f"mean {overlap['mean_overlap']:.3f}, min {overlap['min_overlap']:.3f}, "
+          f"identical {overlap['identical_fraction']:.1%}")
+    print(f"image embedding cosine: min {parity['min_cosine']:.4f}, "
+          f"mean {parity['mean_cosine']:.4f}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Embedding service maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate = subparsers.add_parser(
+        "migrate-index", help="Reindex into a kNN-enabled index and swap the alias."
+    )
+    migrate.add_argument("--target", required=True, help="Name of the new index.")
+    migrate.add_argument("--poll-interval", type=float, default=5.0)
+    migrate.add_argument("--report", action="store_true",
+                         help="Compare size, kNN memory and latency before and after.")
+    migrate.add_argument("--queries", type=int, default=50,
+                         help="Timed kNN queries per report.")
+    migrate.set_defaults(handler=migrate_index)
+
+    index_stats = subparsers.add_parser(
+        "index-report", help="Storage size, kNN memory and kNN latency of indices."
+    )
+    index_stats.add_argument("--index", action="append",
+                             help="Index or alias to measure (repeatable).")
+    index_stats.add_argument("--queries", type=int, default=50)
+    index_stats.add_argument("--k", type=int, default=10)
+    index_stats.add_argument("--num-candidates", type=int, default=100)
+    index_stats.set_defaults(handler=report_indices)
+
+    mapping_bench = subparsers.add_parser(
+        "benchmark-mapping",
+        help="Indexing throughput and disk usage of the current vs the previous mapping.",
+    )
+    mapping_bench.add_argument("--docs", type=int, default=20000)
+    mapping_bench.add_argument("--batch-size", type=int, default=500)
+    mapping_bench.add_argument("--rounds", type=int, default=2,
+                               help="Loads per mapping, in alternating order.")
+    mapping_bench.add_argument("--seed", type=int, default=0)
+    mapping_bench.set_defaults(handler=benchmark_mapping)
+
+    export = subparsers.add_parser("export-onnx", help="Export the CLIP image tower to ONNX.")
+    export.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    export.add_argument("--output", default=settings.ONNX_IMAGE_MODEL_PATH)
+    export.add_argument("--opset", type=int, default=17)
+    export.set_defaults(handler=export_onnx)
+
+    bench = subparsers.add_parser(
+        "benchmark-encoders", help="Compare torch and ONNX image encoding latency and parity."
+    )
+    bench.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    bench.add_argument("--onnx-model", default=settings.ONNX_IMAGE_MODEL_PATH)
+    bench.add_argument("--images", default="/app/images",
+                       help="Directory of sample images.")
+    bench.add_argument("--items", type=int, default=128)
+    bench.add_argument("--batch-size", type=int, default=16)
+    bench.add_argument("--threads", type=int, default=settings.ONNX_INTRA_OP_THREADS,
+                       help="torch threads and ONNX intra-op threads (0: defaults).")
+    bench.add_argument("--inter-op-threads", type=int, default=settings.ONNX_INTER_OP_THREADS)
+    bench.add_argument("--optimization", default=settings.ONNX_GRAPH_OPTIMIZATION,
+                       choices=["disable", "basic", "extended", "all"])
+    bench.set_defaults(handler=benchmark_encoders)
+
+    quantize = subparsers.add_parser(
+        "quantize-onnx", help="Quantize the exported image tower to int8."
+    )
+    quantize.add_argument("--model-path", default=settings.ONNX_IMAGE_MODEL_PATH)
+    quantize.add_argument("--output", default=None,
+                          help="Default: <model-path> with .<mode>-int8.onnx.")
+    quantize.add_argument("--mode", choices=["dynamic", "static"], default="dynamic")
+    quantize.add_argument("--calibration-images", default=None,
+                          help="Directory of images sampled for static calibration.")
+    quantize.add_argument("--samples", type=int, default=256)
+    quantize.add_argument("--batch-size", type=int, default=16)
+    quantize.set_defaults(handler=quantize_onnx)
+
+    report = subparsers.add_parser(
+        "quantization-report",
+        help="Top-k overlap and latency of a quantized encoder against the float one.",
+    )
+    report.add_argument("--images", required=True,
+                        help="Held-out image directory, disjoint from calibration images.")
+    report.add_argument("--items", type=int, default=500)
+    report.add_argument("--seed", type=int, default=1)
+    report.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    report.add_argument("--baseline", default="torch",
+                        help="torch, torch-int8 or an .onnx path.")
+    report.add_argument("--candidate", default="torch-int8",
+                        help="torch, torch-int8 or an .onnx path.")
+    report.add_argument("--top-k", type=int, default=10)
+    report.add_argument("--batch-size", type=int, default=16)
+    report.set_defaults(handler=quantization_report)
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
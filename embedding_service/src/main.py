@@ -11,10 +11,13 @@ Orchestrates:
 
 import asyncio
 import signal
+import time
 
 
 from infrastructure.logging_config import logger
-from infrastructure.metrics import start_metrics_server
+from infrastructure.metrics import start_metrics_server, startup_phase_duration
+from infrastructure.model_artifacts import ModelArtifactCache
+from infrastructure.quantization import TORCH_QUANTIZATION_MODES
 from infrastructure.rabbitmq_client import rabbitmq_client
 from infrastructure.elasticsearch_client import elasticsearch_client
 from infrastructure.config import settings
@@ -23,17 +26,61 @@ from application.retry import retry_connection
 from application.message_processor import process_message
 from application.shutdown import shutdown
 from application.server_runner import run_api_server
+from interface.api import app
 
 logger = logger
 
+
+def load_embedding_service() -> EmbeddingService:
+    """
+    Load the configured backend (from the artifact cache when possible) and warm it up.
+
+    Raises:
+        ValueError: If EMBEDDING_QUANTIZATION is not "none" or "dynamic".
+    """
+    if settings.EMBEDDING_QUANTIZATION not in TORCH_QUANTIZATION_MODES:
+        raise ValueError(f"Unsupported EMBEDDING_QUANTIZATION: {settings.EMBEDDING_QUANTIZATION}")
+    started = time.perf_counter()
+    if settings.EMBEDDING_BACKEND == "onnx":
+        from infrastructure.onnx_encoder import OnnxEncoder
+
+        embedding_service = EmbeddingService(settings.EMBEDDING_MODEL, onnx_encoder=OnnxEncoder(
+            settings.ONNX_IMAGE_MODEL_PATH,
+            intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+            inter_op_threads=settings.ONNX_INTER_OP_THREADS,
+            optimization_level=settings.ONNX_GRAPH_OPTIMIZATION,
+        ))
+    else:
+        artifacts = (
+            ModelArtifactCache(settings.MODEL_ARTIFACT_DIR)
+            if settings.MODEL_ARTIFACT_DIR else None
+        )
+        embedding_service = EmbeddingService(
+            settings.EMBEDDING_MODEL,
+            artifacts=artifacts,
+            quantize=settings.EMBEDDING_QUANTIZATION == "dynamic",
+        )
+    loaded = time.perf_counter()
+    embedding_service.warm_up()
+    startup_phase_duration.labels(phase="model_load").set(loaded - started)
+    startup_phase_duration.labels(phase="warmup").set(time.perf_counter() - loaded)
+    return embedding_service
+
+
 async def main():
-    embedding_service = EmbeddingService()
+    embedding_service = None
+    # Serve /health and /ready while starting up; /ready flips at the end.
+    api_task = asyncio.create_task(run_api_server())
+    # The model loads on a thread while Elasticsearch and RabbitMQ connect.
+    model_task = asyncio.create_task(asyncio.to_thread(load_embedding_service))
     try:
         await elasticsearch_client.create_index()
 
         # Use retry logic for RabbitMQ connection
         await retry_connection(rabbitmq_client.connect, name="RabbitMQ")
 
+        embedding_service = await model_task
+
         # Use retry logic for starting the consumer
         await retry_connection(
             lambda: rabbitmq_client.consume(settings.EMBEDDING_QUEUE, lambda data: process_message(data, embedding_service)),
@@ -43,9 +90,7 @@ async def main():
         # Start metrics server after consumer is ready
         start_metrics_server(port=settings.METRICS_PORT)
 
-        # Run the API server in background
-        api_task = asyncio.create_task(run_api_server())
-
+        app.state.ready = True
         logger.info("Embedding Generator Service is running and ready to process messages.")
         await asyncio.Event().wait()
     except asyncio.CancelledError:
@@ -53,7 +98,7 @@ async def main():
     except Exception as e:
         logger.exception("Service encountered an error: %s", e)
     finally:
-        if embedding_service.model:
+        if embedding_service is not None and embedding_service.model:
             embedding_service.model.cpu()
         await elasticsearch_client.close()
         await rabbitmq_client.close()
@@ -62,6 +62,7 @@ class Histogram:
 prometheus_stub = types.ModuleType("prometheus_client")
 prometheus_stub.Counter = Counter
 prometheus_stub.Histogram = Histogram
+prometheus_stub.Gauge = MagicMock
 prometheus_stub.start_http_server = MagicMock()
 sys.modules["prometheus_client"] = prometheus_stub
 
@@ -0,0 +1,261 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, root_path)
+
+torch_stub = types.ModuleType("torch")
+torch_stub.cuda = types.SimpleNamespace(is_available=lambda: False)
+torch_stub.no_grad = contextlib.nullcontext
+sys.modules.setdefault("torch", torch_stub)
+sys.modules.setdefault("clip", types.ModuleType("clip"))
+
+from interface import cli  # noqa: E402
+
+
+def index_report_values(docs):
+    return {
+        "vector_storage": "float/hnsw", "docs": docs, "store_bytes": 5 << 20,
+        "vector_bytes": 3 << 20, "source_bytes": 1 << 20, "stored_only_bytes": 0,
+        "vector_memory_bytes": 1 << 20, "p50_ms": 1.5, "p95_ms": 2.5,
+    }
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.es_client = MagicMock(
+            es=MagicMock(), migrate_index=AsyncMock(), close=AsyncMock()
+        )
+        patcher = patch("interface.cli.elasticsearch_client", self.es_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_cli(self, *argv):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.main(list(argv))
+        return output.getvalue()
+
+
+class TestMaintenanceCommands(CliTestCase):
+    def test_migrate_index_reports_before_and_after(self):
+        reports = AsyncMock(side_effect=[index_report_values(10), index_report_values(12)])
+        with patch("infrastructure.index_report.index_report", reports):
+            output = self.run_cli(
+                "migrate-index", "--target", "image_embeddings_v3", "--report",
+                "--poll-interval", "0.5", "--queries", "5",
+            )
+        self.es_client.migrate_index.assert_awaited_once_with(
+            "image_embeddings_v3", poll_interval=0.5
+        )
+        self.assertEqual(
+            [call.args[1] for call in reports.await_args_list],
+            [cli.settings.ELASTICSEARCH_INDEX, "image_embeddings_v3"],
+        )
+        self.assertIn("after (image_embeddings_v3)", output)
+        self.es_client.close.assert_awaited_once()
+
+    def test_migrate_index_without_report_skips_measuring(self):
+        reports = AsyncMock()
+        with patch("infrastructure.index_report.index_report", reports):
+            self.assertEqual(self.run_cli("migrate-index", "--target", "v3"), "")
+        reports.assert_not_awaited()
+
+    def test_failed_migration_still_closes_the_client(self):
+        self.es_client.migrate_index.side_effect = ValueError("already behind the alias")
+        with self.assertRaises(ValueError):
+            self.run_cli("migrate-index", "--target", "v3")
+        self.es_client.close.assert_awaited_once()
+
+    def test_index_report_measures_every_index(self):
+        reports = AsyncMock(return_value=index_report_values(10))
+        with patch("infrastructure.index_report.index_report", reports):
+            output = self.run_cli(
+                "index-report", "--index", "a", "--index", "b", "--k", "5",
+                "--num-candidates", "50",
+            )
+        self.assertEqual([call.args[1] for call in reports.await_args_list], ["a", "b"])
+        self.assertEqual(reports.await_args.kwargs, {"queries": 50, "k": 5, "num_candidates": 50})
+        self.assertIn("a", output.splitlines()[0])
+        self.es_client.close.assert_awaited_once()
+
+    def test_index_report_defaults_to_the_configured_index(self):
+        reports = AsyncMock(return_value=index_report_values(10))
+        with patch("infrastructure.index_report.index_report", reports):
+            self.run_cli("index-report")
+        self.assertEqual(reports.await_args.args[1], cli.settings.ELASTICSEARCH_INDEX)
+
+    def test_benchmark_mapping_compares_legacy_and_current_bodies(self):
+        body = {"mappings": {"dynamic": "strict", "properties": {
+            "image_path": {"type": "keyword", "index": False},
+            "image_url": {"type": "keyword", "index": False},
+        }}}
+        self.es_client.index_body = MagicMock(return_value=body)
+        measured = {"docs": 20, "docs_per_second": 1000.0, "store_bytes": 1 << 20}
+        benchmark = AsyncMock(return_value={"legacy": measured, "current": measured})
+        with patch("infrastructure.mapping_benchmark.benchmark_mappings", benchmark):
+            output = self.run_cli(
+                "benchmark-mapping", "--docs", "20", "--batch-size", "8", "--rounds", "1"
+            )
+        _, bodies, documents = benchmark.await_args.args
+        self.assertEqual(list(bodies), ["legacy", "current"])
+        self.assertIs(bodies["current"], body)
+        self.assertEqual(bodies["legacy"]["mappings"]["properties"]["image_path"],
+                         {"type": "text"})
+        self.assertEqual(len(documents), 20)
+        self.assertEqual(benchmark.await_args.kwargs, {"batch_size": 8, "rounds": 1})
+        self.assertIn("indexing docs/s", output)
+        self.es_client.close.assert_awaited_once()
+
+    def test_a_command_is_required(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            cli.build_parser().parse_args([])
+
+
+class FakeTensor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def numpy(self):
+        return np.stack(self.rows)
+
+
+def fake_torch():
+    torch_module = types.ModuleType("torch")
+    torch_module.set_num_threads = MagicMock()
+    torch_module.stack = FakeTensor
+    return torch_module
+
+
+def fake_service(scale=1.0):
+    """An EmbeddingService stand-in whose embeddings are the scaled pixel rows."""
+    service = MagicMock(preprocess=lambda image: image)
+    service.encode_image_tensors.side_effect = lambda tensor: (
+        tensor.numpy().reshape(len(tensor.rows), -1) * scale
+    ).tolist()
+    return service
+
+
+class OnnxCommandTestCase(CliTestCase):
+    def setUp(self):
+        super().setUp()
+        self.torch = fake_torch()
+        patcher = patch.dict(sys.modules, {"torch": self.torch})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        rng = np.random.default_rng(0)
+        self.images = [rng.random(4, dtype=np.float32) + 0.1 for _ in range(6)]
+        patcher = patch("interface.cli._load_images", return_value=self.images)
+        self.load_images = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestOnnxCommands(OnnxCommandTestCase):
+    def test_export_onnx_writes_the_image_tower(self):
+        model = MagicMock()
+        model.visual.output_dim = 512
+        clip_module = types.ModuleType("clip")
+        clip_module.load = MagicMock(return_value=(model, "preprocess"))
+        with patch.dict(sys.modules, {"clip": clip_module}), \
+                patch("infrastructure.model_artifacts.clip_metadata",
+                      return_value={"dimension": 512}) as metadata, \
+                patch("infrastructure.onnx_encoder.export_image_tower") as export:
+            self.run_cli("export-onnx", "--model", "ViT-B/16", "--output", "/tmp/x.onnx",
+                         "--opset", "18")
+        clip_module.load.assert_called_once_with("ViT-B/16", device="cpu")
+        metadata.assert_called_once_with(model, "preprocess", 512)
+        export.assert_called_once_with(model, "/tmp/x.onnx", {"dimension": 512}, 18)
+
+    def test_benchmark_encoders_reports_latency_and_parity(self):
+        services = [fake_service(), fake_service(scale=2.0)]
+        with patch("domain.embedding_service.EmbeddingService", side_effect=services), \
+                patch("infrastructure.onnx_encoder.OnnxEncoder") as encoder_cls:
+            output = self.run_cli(
+                "benchmark-encoders", "--onnx-model", "/m/image.onnx", "--items", "6",
+                "--batch-size", "4", "--threads", "2", "--optimization", "basic",
+            )
+        self.load_images.assert_called_once_with("/app/images", 6)
+        self.torch.set_num_threads.assert_called_once_with(2)
+        encoder_cls.assert_called_once_with(
+            "/m/image.onnx", intra_op_threads=2, inter_op_threads=0,
+            optimization_level="basic",
+        )
+        for service in services:
+            service.warm_up.assert_called_once_with()
+        lines = output.splitlines()
+        self.assertEqual([line.split()[0] for line in lines[1:3]], ["torch", "onnx"])
+        # Scaling does not change the direction of an embedding.
+        self.assertIn("min 1.000000, mean 1.000000", lines[3])
+
+
+class TestQuantizationCommands(OnnxCommandTestCase):
+    def test_quantize_onnx_dynamic_needs_no_calibration(self):
+        with patch("infrastructure.quantization.quantize_onnx_model") as quantize:
+            self.run_cli("quantize-onnx", "--model-path", "/m/image.onnx")
+        quantize.assert_called_once_with(
+            "/m/image.onnx", "/m/image.dynamic-int8.onnx", "dynamic", None
+        )
+        self.load_images.assert_not_called()
+
+    def test_quantize_onnx_static_calibrates_on_image_batches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            model_path = os.path.join(directory, "image.onnx")
+            with open(model_path + ".json", "w") as f:
+                json.dump({"input_resolution": 2}, f)
+            with patch("domain.embedding_service.build_preprocess",
+                       return_value=lambda image: image) as build, \
+                    patch("infrastructure.quantization.quantize_onnx_model") as quantize:
+                self.run_cli(
+                    "quantize-onnx", "--model-path", model_path, "--mode", "static",
+                    "--calibration-images", "/calibration", "--samples", "6",
+                    "--batch-size", "4", "--output", "/m/out.onnx",
+                )
+        build.assert_called_once_with({"input_resolution": 2})
+        self.load_images.assert_called_once_with("/calibration", 6)
+        _, output, mode, batches = quantize.call_args.args
+        self.assertEqual((output, mode), ("/m/out.onnx", "static"))
+        self.assertEqual([batch.shape for batch in batches], [(4, 4), (2, 4)])
+
+    def test_quantize_onnx_static_requires_calibration_images(self):
+        with patch("infrastructure.quantization.quantize_onnx_model") as quantize, \
+                self.assertRaises(SystemExit):
+            self.run_cli("quantize-onnx", "--mode", "static")
+        quantize.assert_not_called()
+
+    def test_quantization_report_compares_top_k_and_embeddings(self):
+        services = [fake_service(), fake_service(scale=2.0)]
+        with patch("domain.embedding_service.EmbeddingService",
+                   side_effect=services) as service_cls, \
+                patch("infrastructure.onnx_encoder.OnnxEncoder") as encoder_cls:
+            output = self.run_cli(
+                "quantization-report", "--images", "/heldout", "--items", "6",
+                "--baseline", "torch", "--candidate", "/m/image.static-int8.onnx",
+                "--top-k", "3",
+            )
+        self.load_images.assert_called_once_with("/heldout", 6, seed=1)
+        self.assertEqual(service_cls.call_args_list[0].kwargs, {"quantize": False})
+        encoder_cls.assert_called_once_with("/m/image.static-int8.onnx")
+        self.assertEqual(
+            service_cls.call_args_list[1].kwargs, {"onnx_encoder": encoder_cls.return_value}
+        )
+        lines = output.splitlines()
+        self.assertIn("top-3 overlap over 6 images: mean 1.000, min 1.000", lines[3])
+        self.assertIn("min 1.0000, mean 1.0000", lines[4])
+
+    def test_torch_int8_spec_quantizes_the_torch_model(self):
+        with patch("domain.embedding_service.EmbeddingService") as service_cls:
+            cli._load_image_encoder("torch-int8", "ViT-B/32")
+        service_cls.assert_called_once_with("ViT-B/32", quantize=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
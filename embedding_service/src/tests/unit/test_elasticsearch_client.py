@@ -18,27 +18,96 @@ class AsyncIndices:
     async def create(self, index, body):
         self.parent.created = (index, body)
 
+    async def get_mapping(self, index):
+        return {index: {"mappings": {
+            "properties": {"embedding": self.parent.embedding_mapping},
+            **self.parent.source_mapping,
+        }}}
+
+    async def exists_alias(self, name):
+        return False
+
+    async def refresh(self, index):
+        self.parent.refreshed = index
+
+    async def update_aliases(self, body):
+        self.parent.alias_actions = body["actions"]
+
+    async def put_mapping(self, index, body):
+        self.parent.put_mappings.append(body)
+
+    async def exists_index_template(self, name):
+        return name in self.parent.templates
+
+    async def get_index_template(self, name):
+        return {"index_templates": [{"name": name, "index_template": self.parent.templates[name]}]}
+
+    async def put_index_template(self, name, body):
+        self.parent.templates[name] = body
+        self.parent.template_puts += 1
+
+
+class AsyncTasks:
+    def __init__(self, parent):
+        self.parent = parent
+
+    async def get(self, task_id):
+        self.parent.polled.append(task_id)
+        return {"completed": len(self.parent.polled) > 1, "response": {"failures": []}}
+
 
 class FakeAsyncElasticsearch:
     def __init__(self, *args, **kwargs):
         self.indices = AsyncIndices(self)
+        self.tasks = AsyncTasks(self)
+        self.embedding_mapping = {"type": "dense_vector", "dims": 512}
+        self.reindexed = None
+        self.polled = []
+        self.refreshed = None
+        self.alias_actions = None
         self.indexed = None
         self.closed = False
         self.exists_return = False
         self.created = None
+        self.put_mappings = []
+        self.source_mapping = {}
+        self.templates = {}
+        self.template_puts = 0
 
     async def index(self, index, body):
         self.indexed = (index, body)
 
+    async def reindex(self, body, wait_for_completion):
+        self.reindexed = body
+        return {"task": "node:1"}
+
     async def close(self):
         self.closed = True
 
 
 class exceptions:
-    class ElasticsearchException(Exception):
+    class ApiError(Exception):
+        pass
+
+    class TransportError(Exception):
         pass
 
 
+def real_es_exceptions():
+    """The installed elasticsearch client's exceptions module, or None."""
+    saved = {name: module for name, module in sys.modules.items()
+             if name == "elasticsearch" or name.startswith("elasticsearch.")}
+    for name in saved:
+        sys.modules.pop(name)
+    try:
+        from elasticsearch import exceptions as real_exceptions
+        return real_exceptions
+    except ImportError:
+        return None
+    finally:
+        sys.modules.update(saved)
+
+
 class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
     def setUp(self):
         self.es_module = types.ModuleType("elasticsearch")
@@ -51,6 +120,20 @@ class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
         self.es_client_module = es_mod
         self.client = es_mod.ElasticsearchClient()
 
+    def _storage(self, index_type="hnsw", element_type="float", in_source=True):
+        settings = self.es_client_module.settings
+        saved = (settings.VECTOR_INDEX_TYPE, settings.VECTOR_ELEMENT_TYPE,
+                 settings.EMBEDDING_IN_SOURCE)
+        settings.VECTOR_INDEX_TYPE = index_type
+        settings.VECTOR_ELEMENT_TYPE = element_type
+        settings.EMBEDDING_IN_SOURCE = in_source
+
+        def restore():
+            (settings.VECTOR_INDEX_TYPE, settings.VECTOR_ELEMENT_TYPE,
+             settings.EMBEDDING_IN_SOURCE) = saved
+
+        self.addCleanup(restore)
+
     def tearDown(self):
         sys.modules.pop("elasticsearch", None)
         sys.modules.pop("infrastructure.elasticsearch_client", None)
@@ -60,7 +143,117 @@ class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
         with self.assertLogs("infrastructure.elasticsearch_client", level="INFO") as cm:
             await self.client.create_index()
         self.assertIsNotNone(self.client.es.created)
-        self.assertIn("Created Elasticsearch index", cm.output[0])
+        self.assertIn("Created Elasticsearch index", cm.output[-1])
+
+    async def test_create_index_maps_embedding_for_knn(self):
+        await self.client.create_index()
+        _, body = self.client.es.created
+        embedding = body["mappings"]["properties"]["embedding"]
+        self.assertTrue(embedding["index"])
+        self.assertEqual(embedding["similarity"], "cosine")
+        self.assertEqual(embedding["index_options"]["type"], "hnsw")
+
+    async def test_create_index_warns_when_existing_index_lacks_knn(self):
+        self.client.es.exists_return = True
+        with self.assertLogs("infrastructure.elasticsearch_client", level="WARNING") as cm:
+            await self.client.create_index()
+        self.assertIsNone(self.client.es.created)
+        self.assertIn("migrate-index", cm.output[-1])
+
+    async def test_create_index_maps_metadata_for_filtering(self):
+        await self.client.create_index()
+        properties = self.client.es.created[1]["mappings"]["properties"]
+        self.assertEqual(properties["domain"], {"type": "keyword"})
+        self.assertEqual(properties["downloaded_at"], {"type": "date"})
+        # an existing index gets the fields added to its mapping
+        self.client.es.exists_return = True
+        await self.client.create_index()
+        self.assertEqual(
+            self.client.es.put_mappings,
+            [{"properties": self.es_client_module.METADATA_PROPERTIES}],
+        )
+
+    async def test_non_vector_fields_are_stored_only_and_mapping_is_strict(self):
+        mappings = self.client.index_body()["mappings"]
+        self.assertEqual(mappings["dynamic"], "strict")
+        self.assertEqual(mappings["_meta"]["mapping_version"],
+                         self.es_client_module.INDEX_TEMPLATE_VERSION)
+        for field in ("image_url", "image_path"):
+            self.assertEqual(mappings["properties"][field],
+                             {"type": "keyword", "index": False, "doc_values": False})
+        # image_id is filtered on and read from doc values by the API
+        self.assertEqual(mappings["properties"]["image_id"], {"type": "integer"})
+
+    async def test_index_template_is_installed_once_per_version(self):
+        await self.client.create_index()
+        name = self.client.template_name()
+        template = self.client.es.templates[name]
+        alias = self.es_client_module.settings.ELASTICSEARCH_INDEX
+        self.assertEqual(template["index_patterns"], [f"{alias}*"])
+        self.assertEqual(template["template"], self.client.index_body())
+        await self.client.create_index()
+        self.assertEqual(self.client.es.template_puts, 1)
+        # an older version is replaced, a newer one is left alone
+        template["version"] = 1
+        await self.client.create_index()
+        self.assertEqual(self.client.es.template_puts, 2)
+        self.client.es.templates[name] = {"version": 99, "template": {}}
+        with self.assertLogs("infrastructure.elasticsearch_client", level="WARNING"):
+            await self.client.create_index()
+        self.assertEqual(self.client.es.template_puts, 2)
+
+    async def test_create_index_warns_when_existing_index_has_old_mapping(self):
+        self.client.es.exists_return = True
+        self.client.es.embedding_mapping = {"type": "dense_vector", "index": True,
+                                            "similarity": "cosine"}
+        with self.assertLogs("infrastructure.elasticsearch_client", level="WARNING") as cm:
+            await self.client.create_index()
+        self.assertIn("predates mapping version", cm.output[-1])
+        self.client.es.source_mapping = {
+            "_meta": {"mapping_version": self.es_client_module.INDEX_TEMPLATE_VERSION}
+        }
+        self.assertEqual(await self.client.mapping_version(),
+                         self.es_client_module.INDEX_TEMPLATE_VERSION)
+
+    async def test_compact_storage_quantizes_hnsw_and_drops_vectors_from_source(self):
+        self._storage(index_type="int8_hnsw", in_source=False)
+        mappings = self.client.index_body()["mappings"]
+        self.assertEqual(mappings["properties"]["embedding"]["index_options"]["type"], "int8_hnsw")
+        self.assertEqual(mappings["_source"], {"excludes": ["embedding"]})
+        self._storage(index_type="int8_hnsw", element_type="byte")
+        with self.assertRaises(ValueError):
+            self.client.index_body()
+
+    async def test_byte_vectors_are_quantized_when_indexed_and_reindexed(self):
+        self._storage(element_type="byte")
+        self.assertEqual(
+            self.client.index_body()["mappings"]["properties"]["embedding"]["element_type"], "byte"
+        )
+        await self.client.index_embedding(1, "url", "path", [0.6, -0.8, 0.0])
+        self.assertEqual(self.client.es.indexed[1]["embedding"], [76, -102, 0])
+        await self.client.migrate_index("new_index", poll_interval=0)
+        self.assertIn("script", self.client.es.reindexed)
+
+    async def test_migrate_index_refuses_sources_without_vectors(self):
+        self.client.es.source_mapping = {"_source": {"excludes": ["embedding"]}}
+        with self.assertRaises(ValueError):
+            await self.client.migrate_index("new_index", poll_interval=0)
+        self.assertIsNone(self.client.es.created)
+
+    async def test_migrate_index_reindexes_and_swaps_alias(self):
+        alias = self.es_client_module.settings.ELASTICSEARCH_INDEX
+        await self.client.migrate_index("new_index", poll_interval=0)
+        self.assertEqual(self.client.es.created[0], "new_index")
+        self.assertEqual(self.client.es.reindexed["source"]["index"], [alias])
+        self.assertEqual(self.client.es.polled, ["node:1", "node:1"])
+        self.assertEqual(self.client.es.refreshed, "new_index")
+        self.assertEqual(
+            self.client.es.alias_actions,
+            [
+                {"remove_index": {"index": alias}},
+                {"add": {"index": "new_index", "alias": alias}},
+            ],
+        )
 
     async def test_index_embedding_sends_correct_document(self):
         await self.client.index_embedding(
@@ -80,14 +273,41 @@ class TestElasticsearchClient(unittest.IsolatedAsyncioTestCase):
             (self.es_client_module.settings.ELASTICSEARCH_INDEX, expected_doc),
         )
 
+    async def test_index_embedding_adds_metadata(self):
+        await self.client.index_embedding(1, "url", "path", [0.1], metadata={"domain": "a.com"})
+        self.assertEqual(self.client.es.indexed[1]["domain"], "a.com")
+
     async def test_close_awaits_es_close(self):
         await self.client.close()
         self.assertTrue(self.client.es.closed)
 
     async def test_elasticsearch_exception_propagates(self):
         async def raise_exception(*args, **kwargs):
-            raise exceptions.ElasticsearchException("boom")
+            raise exceptions.ApiError("boom")
 
         self.client.es.indices.exists = raise_exception
-        with self.assertRaises(exceptions.ElasticsearchException):
+        with self.assertRaises(exceptions.ApiError):
             await self.client.create_index()
+
+    async def test_conflicting_metadata_mapping_is_tolerated_with_real_client_errors(self):
+        real_exceptions = real_es_exceptions()
+        if real_exceptions is None:
+            self.skipTest("elasticsearch is not installed")
+        from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+
+        self.es_module.exceptions = real_exceptions
+        importlib.reload(self.es_client_module)
+        client = self.es_client_module.ElasticsearchClient()
+        meta = ApiResponseMeta(status=400, http_version="1.1", headers=HttpHeaders(),
+                               duration=0.0, node=NodeConfig("http", "localhost", 9200))
+
+        async def conflicting_mapping(index, body):
+            raise real_exceptions.BadRequestError(
+                "illegal_argument_exception", meta, {"error": "mapper [width] cannot be changed"}
+            )
+
+        client.es.exists_return = True
+        client.es.indices.put_mapping = conflicting_mapping
+        with self.assertLogs("infrastructure.elasticsearch_client", level="WARNING") as cm:
+            await client.create_index()
+        self.assertTrue(any("Could not map metadata fields" in line for line in cm.output))
@@ -38,3 +38,57 @@ class TestEmbeddingServiceInit(unittest.TestCase):
             self.assertEqual(service.device, "cpu")
             load_mock.assert_called_once_with("dummy", device="cpu")
             image_new.assert_called_once()
+
+    def test_init_from_cached_artifact_skips_clip_load(self):
+        model = MagicMock()
+        model.to.return_value = model
+        artifacts = MagicMock()
+        artifacts.exists.return_value = True
+        artifacts.load.return_value = ({"w": 1}, {"dimension": 512})
+        with patch("domain.embedding_service.clip.load") as load_mock, patch(
+            "domain.embedding_service.torch.cuda.is_available", return_value=False
+        ), patch(
+            "infrastructure.model_artifacts.build_clip_model", return_value=model
+        ) as build_mock, patch(
+            "domain.embedding_service.build_preprocess", return_value="preprocess"
+        ) as preprocess_mock:
+            service = EmbeddingService(model_name="dummy", artifacts=artifacts)
+        self.assertIs(service.model, model)
+        self.assertEqual(service.dimension, 512)
+        self.assertEqual(service.preprocess, "preprocess")
+        artifacts.load.assert_called_once_with("dummy", "cpu")
+        build_mock.assert_called_once_with({"w": 1})
+        preprocess_mock.assert_called_once_with({"dimension": 512})
+        load_mock.assert_not_called()
+        model.encode_image.assert_not_called()
+
+    def test_init_with_onnx_encoder_skips_clip_load(self):
+        encoder = MagicMock(dimension=512, metadata={"input_resolution": 224})
+        with patch("domain.embedding_service.clip.load") as load_mock, patch(
+            "domain.embedding_service.build_preprocess", return_value="preprocess"
+        ) as preprocess_mock:
+            service = EmbeddingService(model_name="dummy", onnx_encoder=encoder)
+        self.assertIsNone(service.model)
+        self.assertEqual(service.device, "cpu")
+        self.assertEqual(service.dimension, 512)
+        preprocess_mock.assert_called_once_with({"input_resolution": 224})
+        load_mock.assert_not_called()
+
+    def test_init_with_quantize_uses_int8_model(self):
+        embedding = MagicMock()
+        embedding.shape = (1, 8)
+        model = MagicMock(encode_image=MagicMock(return_value=embedding))
+        preprocess = MagicMock(return_value=DummyTensor())
+        quantized = MagicMock()
+        with patch(
+            "domain.embedding_service.clip.load", return_value=(model, preprocess)
+        ), patch(
+            "domain.embedding_service.torch.cuda.is_available", return_value=False
+        ), patch(
+            "domain.embedding_service.torch.no_grad", lambda: contextlib.nullcontext()
+        ), patch(
+            "infrastructure.quantization.quantize_torch_model", return_value=quantized
+        ) as quantize_mock:
+            service = EmbeddingService(model_name="dummy", quantize=True)
+        self.assertIs(service.model, quantized)
+        quantize_mock.assert_called_once_with(model)
@@ -0,0 +1,172 @@
+import importlib
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+root_path = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, root_path)
+
+
+class FakeIndices:
+    def __init__(self, mapping):
+        self.mapping = mapping
+        self.created = []
+        self.deleted = []
+
+    async def get_mapping(self, index):
+        return {"image_embeddings_v2": {"mappings": {"properties": {"embedding": self.mapping}}}}
+
+    async def stats(self, index, metric):
+        return {"_all": {"primaries": {
+            "docs": {"count": 1000},
+            "store": {"size_in_bytes": 5 << 20},
+        }}}
+
+    async def disk_usage(self, index, run_expensive_tasks):
+        return {
+            "_shards": {"total": 1},
+            "image_embeddings_v2": {"fields": {
+                "embedding": {"knn_vectors_in_bytes": 3 << 20},
+                "_source": {"stored_fields_in_bytes": 1 << 20},
+                "image_url": {"total_in_bytes": 300},
+                "image_url.keyword": {"total_in_bytes": 200},
+            }},
+        }
+
+    async def create(self, index, body):
+        self.created.append((index, body))
+
+    async def refresh(self, index):
+        pass
+
+    async def forcemerge(self, index, max_num_segments):
+        pass
+
+    async def delete(self, index):
+        self.deleted.append(index)
+
+
+class FakeElasticsearch:
+    def __init__(self, mapping):
+        self.indices = FakeIndices(mapping)
+        self.searches = []
+        self.bulks = []
+        self.bulk_errors = False
+
+    async def search(self, index, body):
+        self.searches.append(body)
+        return {"hits": {"hits": []}}
+
+    async def bulk(self, body):
+        self.bulks.append(body)
+        if self.bulk_errors:
+            error = {"type": "strict_dynamic_mapping_exception"}
+            return {"errors": True, "items": [{"index": {"error": error}}]}
+        return {"errors": False, "items": []}
+
+
+class TestIndexReport(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        es_module = types.ModuleType("elasticsearch")
+        es_module.AsyncElasticsearch = lambda *args, **kwargs: None
+        es_module.exceptions = types.SimpleNamespace(ApiError=Exception, TransportError=Exception)
+        self._saved_es = sys.modules.get("elasticsearch")
+        sys.modules["elasticsearch"] = es_module
+        import infrastructure.elasticsearch_client as es_client_module
+        importlib.reload(es_client_module)
+        import infrastructure.index_report as report_module
+        importlib.reload(report_module)
+        self.module = report_module
+        import infrastructure.mapping_benchmark as benchmark_module
+        importlib.reload(benchmark_module)
+        self.benchmark = benchmark_module
+        self.es_client_module = es_client_module
+
+    def tearDown(self):
+        if self._saved_es is not None:
+            sys.modules["elasticsearch"] = self._saved_es
+        else:
+            sys.modules.pop("elasticsearch", None)
+        sys.modules.pop("infrastructure.elasticsearch_client", None)
+
+    def test_quantized_storage_needs_less_knn_memory(self):
+        graph = 4 * 16
+        float_bytes = self.module.vector_memory_bytes(1000, 512, "float", "hnsw", m=16)
+        self.assertEqual(float_bytes, 1000 * (4 * 512 + graph))
+        self.assertEqual(self.module.vector_memory_bytes(1000, 512, "float", "int8_hnsw", m=16),
+                         1000 * (512 + 4 + graph))
+        self.assertEqual(self.module.vector_memory_bytes(1000, 512, "byte", "hnsw", m=16),
+                         1000 * (512 + graph))
+        self.assertLess(self.module.vector_memory_bytes(1000, 512, "float", "int4_hnsw"),
+                        self.module.vector_memory_bytes(1000, 512, "float", "int8_hnsw"))
+
+    def test_graph_memory_follows_m(self):
+        with mock.patch.object(self.module.settings, "HNSW_M", 32):
+            self.assertEqual(self.module.vector_memory_bytes(1, 512, "byte", "hnsw"), 512 + 128)
+
+    async def test_report_measures_sizes_and_latency(self):
+        es = FakeElasticsearch({"type": "dense_vector", "dims": 4, "element_type": "byte",
+                                "index_options": {"type": "hnsw", "m": 8}})
+        report = await self.module.index_report(es, "image_embeddings", queries=4, warmup=1)
+        self.assertEqual(report["vector_storage"], "byte/hnsw")
+        self.assertEqual(report["vector_bytes"], 3 << 20)
+        self.assertEqual(report["source_bytes"], 1 << 20)
+        self.assertEqual(report["stored_only_bytes"], 500)
+        self.assertEqual(report["vector_memory_bytes"], 1000 * (4 + 4 * 8))
+        self.assertEqual(len(es.searches), 5)
+        # byte fields are queried with int8 vectors
+        self.assertTrue(all(isinstance(x, int) for x in es.searches[0]["knn"]["query_vector"]))
+        self.assertIn("p95_ms", report)
+
+        table = self.module.format_reports({"before": report, "after": dict(report, p50_ms=None)})
+        self.assertIn("byte/hnsw", table)
+        self.assertIn("n/a", table)
+
+
+    def test_legacy_body_maps_url_and_path_dynamically(self):
+        body = self.es_client_module.ElasticsearchClient.index_body()
+        legacy = self.benchmark.legacy_index_body(body)
+        self.assertTrue(legacy["mappings"]["dynamic"])
+        self.assertEqual(legacy["mappings"]["properties"]["image_path"], {"type": "text"})
+        self.assertNotIn("image_url", legacy["mappings"]["properties"])
+        self.assertEqual(legacy["mappings"]["properties"]["embedding"],
+                         body["mappings"]["properties"]["embedding"])
+        self.assertEqual(body["mappings"]["dynamic"], "strict")
+
+    async def test_benchmark_loads_each_mapping_into_a_scratch_index(self):
+        es = FakeElasticsearch({})
+        documents = self.benchmark.synthetic_documents(5, 4, "byte")
+        self.assertEqual(len({doc["image_url"] for doc in documents}), 5)
+        self.assertTrue(all(isinstance(x, int) for x in documents[0]["embedding"]))
+        reports = await self.benchmark.benchmark_mappings(
+            es, {"legacy": {"mappings": {}}, "current": {"mappings": {}}}, documents,
+            batch_size=2, rounds=2,
+        )
+        self.assertEqual(list(reports), ["legacy", "current"])
+        self.assertEqual([index for index, _ in es.indices.created], [
+            "mapping-benchmark-legacy", "mapping-benchmark-current",
+            "mapping-benchmark-current", "mapping-benchmark-legacy",
+        ])
+        self.assertEqual(sorted(es.indices.deleted),
+                         sorted(index for index, _ in es.indices.created))
+        self.assertEqual(len(es.bulks), 12)
+        self.assertEqual(len(es.bulks[0]), 4)
+        self.assertEqual(reports["current"]["stored_only_bytes"], 500)
+        self.assertIsNotNone(reports["current"]["docs_per_second"])
+        table = self.module.format_reports(reports, self.benchmark.BENCHMARK_ROWS)
+        self.assertIn("indexing docs/s", table)
+
+    async def test_benchmark_fails_on_rejected_documents(self):
+        es = FakeElasticsearch({})
+        es.bulk_errors = True
+        documents = self.benchmark.synthetic_documents(2, 4)
+        with self.assertRaises(RuntimeError):
+            await self.benchmark.measure_indexing(es, "mapping-benchmark-x", {"mappings": {}},
+                                                  documents)
+        self.assertEqual(es.indices.deleted, ["mapping-benchmark-x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
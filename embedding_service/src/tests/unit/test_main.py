@@ -0,0 +1,147 @@
+import asyncio
+import contextlib
+import os
+import sys
+import types
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+root_path = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, root_path)
+
+torch_stub = types.ModuleType("torch")
+torch_stub.cuda = types.SimpleNamespace(is_available=lambda: False)
+torch_stub.no_grad = contextlib.nullcontext
+sys.modules.setdefault("torch", torch_stub)
+sys.modules.setdefault("clip", types.ModuleType("clip"))
+
+import main  # noqa: E402
+
+
+class TestLoadEmbeddingService(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("main.startup_phase_duration")
+        self.phases = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def patch_settings(self, **values):
+        for name, value in values.items():
+            patcher = patch.object(main.settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_torch_backend_uses_artifact_cache_and_quantization(self):
+        self.patch_settings(
+            EMBEDDING_BACKEND="torch", MODEL_ARTIFACT_DIR="/cache",
+            EMBEDDING_QUANTIZATION="dynamic", EMBEDDING_MODEL="ViT-B/32",
+        )
+        with patch("main.EmbeddingService") as service_cls, \
+                patch("main.ModelArtifactCache") as cache_cls:
+            service = main.load_embedding_service()
+        cache_cls.assert_called_once_with("/cache")
+        service_cls.assert_called_once_with(
+            "ViT-B/32", artifacts=cache_cls.return_value, quantize=True
+        )
+        self.assertIs(service, service_cls.return_value)
+        service.warm_up.assert_called_once_with()
+        self.assertEqual(
+            [call.kwargs for call in self.phases.labels.call_args_list],
+            [{"phase": "model_load"}, {"phase": "warmup"}],
+        )
+
+    def test_empty_artifact_dir_disables_the_cache(self):
+        self.patch_settings(
+            EMBEDDING_BACKEND="torch", MODEL_ARTIFACT_DIR="", EMBEDDING_QUANTIZATION="none"
+        )
+        with patch("main.EmbeddingService") as service_cls, \
+                patch("main.ModelArtifactCache") as cache_cls:
+            main.load_embedding_service()
+        cache_cls.assert_not_called()
+        _, kwargs = service_cls.call_args
+        self.assertEqual(kwargs, {"artifacts": None, "quantize": False})
+
+    def test_rejects_quantization_modes_without_a_load_time_path(self):
+        for mode in ("static", "int4"):
+            self.patch_settings(EMBEDDING_QUANTIZATION=mode)
+            with patch("main.EmbeddingService") as service_cls, \
+                    self.assertRaisesRegex(ValueError, "EMBEDDING_QUANTIZATION"):
+                main.load_embedding_service()
+            service_cls.assert_not_called()
+
+    def test_onnx_backend_builds_a_configured_encoder(self):
+        self.patch_settings(
+            EMBEDDING_BACKEND="onnx", ONNX_IMAGE_MODEL_PATH="/models/image.onnx",
+            ONNX_INTRA_OP_THREADS=4, ONNX_INTER_OP_THREADS=1,
+            ONNX_GRAPH_OPTIMIZATION="extended",
+        )
+        with patch("main.EmbeddingService") as service_cls, \
+                patch("infrastructure.onnx_encoder.OnnxEncoder") as encoder_cls:
+            main.load_embedding_service()
+        encoder_cls.assert_called_once_with(
+            "/models/image.onnx", intra_op_threads=4, inter_op_threads=1,
+            optimization_level="extended",
+        )
+        _, kwargs = service_cls.call_args
+        self.assertEqual(kwargs, {"onnx_encoder": encoder_cls.return_value})
+
+
+class TestMain(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.es = MagicMock(create_index=AsyncMock(), close=AsyncMock())
+        self.rabbitmq = MagicMock(connect=AsyncMock(), consume=AsyncMock(), close=AsyncMock())
+        self.service = MagicMock()
+
+        async def retry(connect, name):
+            await connect()
+
+        patchers = [
+            patch("main.elasticsearch_client", self.es),
+            patch("main.rabbitmq_client", self.rabbitmq),
+            patch("main.retry_connection", side_effect=retry),
+            patch("main.run_api_server", new=AsyncMock()),
+            patch("main.start_metrics_server"),
+            patch("main.load_embedding_service", return_value=self.service),
+            patch("main.process_message", new=AsyncMock()),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, main.app.state, "ready", False)
+
+    async def wait_until_ready(self):
+        for _ in range(200):
+            if main.app.state.ready:
+                return
+            await asyncio.sleep(0.01)
+        self.fail("the service never became ready")
+
+    async def test_consumes_until_cancelled_then_closes_clients(self):
+        task = asyncio.create_task(main.main())
+        await self.wait_until_ready()
+
+        self.es.create_index.assert_awaited_once()
+        self.rabbitmq.connect.assert_awaited_once()
+        queue, callback = self.rabbitmq.consume.call_args.args
+        self.assertEqual(queue, main.settings.EMBEDDING_QUEUE)
+        await callback({"image_id": 1})
+        main.process_message.assert_awaited_once_with({"image_id": 1}, self.service)
+        main.start_metrics_server.assert_called_once_with(port=main.settings.METRICS_PORT)
+
+        task.cancel()
+        await task
+        self.service.model.cpu.assert_called_once_with()
+        self.es.close.assert_awaited_once()
+        self.rabbitmq.close.assert_awaited_once()
+
+    async def test_startup_error_is_logged_and_clients_are_closed(self):
+        self.es.create_index.side_effect = RuntimeError("cluster unavailable")
+        with self.assertLogs(main.logger, level="ERROR"):
+            await main.main()
+        self.assertFalse(main.app.state.ready)
+        self.rabbitmq.connect.assert_not_awaited()
+        self.es.close.assert_awaited_once()
+        self.rabbitmq.close.assert_awaited_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
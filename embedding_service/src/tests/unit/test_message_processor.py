@@ -59,10 +59,11 @@ class Histogram:
 prometheus_stub = types.ModuleType("prometheus_client")
 prometheus_stub.Counter = Counter
 prometheus_stub.Histogram = Histogram
+prometheus_stub.Gauge = MagicMock
 prometheus_stub.start_http_server = MagicMock()
 sys.modules["prometheus_client"] = prometheus_stub
 
-from application.message_processor import process_message
+from application.message_processor import image_metadata, process_message, source_domain
 from domain.embedding_service import EmbeddingService
 from infrastructure.metrics import embedding_errors, embeddings_generated
 
@@ -115,3 +116,36 @@ class TestMessageProcessor(unittest.IsolatedAsyncioTestCase):
             await process_message(data, service)
             # embedding_errors should have incremented
             self.assertEqual(embedding_errors._value.get(), 1.0)
+
+    async def test_process_message_indexes_metadata(self):
+        with patch(
+            "domain.embedding_service.EmbeddingService.__init__",
+            lambda self, model_name="ViT-B/32": None,
+        ):
+            service = EmbeddingService(model_name="ViT-B/32")
+        with patch.object(service, "generate_embedding_from_image", return_value=[0.1]), patch(
+            "application.message_processor.read_image_size", return_value=(640, 480)
+        ), patch("application.message_processor.elasticsearch_client") as mock_es:
+            mock_es.index_embedding = AsyncMock(return_value=None)
+            data = {
+                "image_id": 123,
+                "image_url": "https://WWW.Example.com/img.jpg",
+                "image_path": "/path/to/img.jpg",
+                "downloaded_at": "2024-05-01T12:30:00",
+            }
+            await process_message(data, service)
+            self.assertEqual(
+                mock_es.index_embedding.await_args.kwargs["metadata"],
+                {
+                    "domain": "example.com",
+                    "downloaded_at": "2024-05-01T12:30:00",
+                    "width": 640,
+                    "height": 480,
+                },
+            )
+
+    def test_metadata_skips_unknown_fields(self):
+        with patch("application.message_processor.read_image_size", return_value=None):
+            metadata = image_metadata({"image_url": "file:///img.jpg"}, "/img.jpg")
+        self.assertEqual(metadata, {})
+        self.assertEqual(source_domain("http://cdn.example.com:8080/a.jpg"), "cdn.example.com")
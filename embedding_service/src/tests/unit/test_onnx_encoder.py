@@ -0,0 +1,177 @@
+import contextlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, root_path)
+
+from infrastructure.encoder_benchmark import (  # noqa: E402
+    cosine_parity, measure_encoder, topk_overlap,
+)
+import infrastructure.onnx_encoder as onnx_encoder  # noqa: E402
+
+
+def installed(name):
+    # Other tests replace torch and clip with stub modules, which have no spec.
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ValueError:
+        return False
+
+
+HAS_EXPORT_DEPS = all(installed(name) for name in ("torch", "clip", "onnxruntime"))
+
+
+class FakeSession:
+    def __init__(self, path, sess_options=None, providers=None):
+        self.path = path
+        self.options = sess_options
+        self.providers = providers
+        self.feeds = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="images")]
+
+    def run(self, outputs, feeds):
+        self.feeds.append(feeds)
+        return [np.ones((len(feeds["images"]), 4), dtype=np.float32)]
+
+
+def fake_onnxruntime():
+    ort = types.ModuleType("onnxruntime")
+    ort.SessionOptions = types.SimpleNamespace
+    ort.GraphOptimizationLevel = types.SimpleNamespace(
+        ORT_DISABLE_ALL=0, ORT_ENABLE_BASIC=1, ORT_ENABLE_EXTENDED=2, ORT_ENABLE_ALL=99
+    )
+    ort.InferenceSession = FakeSession
+    return ort
+
+
+class FakeModule:
+    def __init__(self):
+        pass
+
+    def eval(self):
+        return self
+
+
+def fake_torch():
+    torch_module = types.ModuleType("torch")
+    torch_module.nn = types.SimpleNamespace(Module=FakeModule)
+    torch_module.no_grad = contextlib.nullcontext
+    torch_module.randn = lambda *shape: np.zeros(shape, dtype=np.float32)
+    torch_module.onnx = types.SimpleNamespace(export=mock.MagicMock())
+    return torch_module
+
+
+class TestOnnxEncoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "image.onnx")
+        with open(onnx_encoder.metadata_path(self.path), "w") as f:
+            json.dump({"dimension": 4}, f)
+        patcher = mock.patch.dict(sys.modules, {"onnxruntime": fake_onnxruntime()})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_session_options_follow_configuration(self):
+        encoder = onnx_encoder.OnnxEncoder(
+            self.path, intra_op_threads=3, inter_op_threads=1, optimization_level="all"
+        )
+        options = encoder.session.options
+        self.assertEqual(options.intra_op_num_threads, 3)
+        self.assertEqual(options.inter_op_num_threads, 1)
+        self.assertEqual(options.graph_optimization_level, 99)
+        self.assertEqual(encoder.session.providers, ["CPUExecutionProvider"])
+        self.assertEqual(encoder.dimension, 4)
+
+    def test_every_optimization_level_maps_to_the_runtime(self):
+        levels = [
+            onnx_encoder.OnnxEncoder(self.path, optimization_level=level)
+            .session.options.graph_optimization_level
+            for level in onnx_encoder.GRAPH_OPTIMIZATION_LEVELS
+        ]
+        self.assertEqual(levels, [0, 1, 2, 99])
+
+    def test_run_feeds_the_graph_input(self):
+        encoder = onnx_encoder.OnnxEncoder(self.path)
+        images = np.zeros((2, 3, 32, 32), dtype=np.float32)
+        self.assertEqual(encoder.run(images).shape, (2, 4))
+        self.assertIs(encoder.session.feeds[0]["images"], images)
+
+    def test_rejects_unknown_optimization_level(self):
+        with self.assertRaises(ValueError):
+            onnx_encoder.OnnxEncoder(self.path, optimization_level="max")
+
+
+class TestExportImageTower(unittest.TestCase):
+    def test_exports_a_dynamic_batch_graph_and_writes_metadata(self):
+        torch_module = fake_torch()
+        metadata = {"dimension": 4, "input_resolution": 32}
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict(sys.modules, {"torch": torch_module}):
+            path = os.path.join(directory, "image.onnx")
+            onnx_encoder.export_image_tower(object(), path, metadata, opset=18)
+            with open(onnx_encoder.metadata_path(path)) as f:
+                self.assertEqual(json.load(f), metadata)
+        (tower, (images,), output), kwargs = torch_module.onnx.export.call_args
+        self.assertEqual(output, path)
+        self.assertEqual(images.shape, (2, 3, 32, 32))
+        self.assertEqual(kwargs["dynamic_axes"]["images"], {0: "batch"})
+        self.assertEqual(kwargs["opset_version"], 18)
+
+
+class TestEncoderBenchmark(unittest.TestCase):
+    def test_measure_encoder_times_items_and_batches(self):
+        batches = []
+        stats = measure_encoder(lambda items: batches.append(len(items)), list(range(10)), 4)
+        self.assertEqual(batches, [1] * 10 + [4, 4, 2])
+        self.assertGreater(stats["items_per_second"], 0)
+        self.assertLessEqual(stats["p50_ms"], stats["p95_ms"])
+
+    def test_cosine_parity(self):
+        parity = cosine_parity([[1.0, 0.0], [0.0, 2.0]], [[2.0, 0.0], [1.0, 1.0]])
+        self.assertAlmostEqual(parity["min_cosine"], np.sqrt(0.5))
+        self.assertAlmostEqual(parity["mean_cosine"], (1 + np.sqrt(0.5)) / 2)
+
+    def test_topk_overlap(self):
+        baseline = [np.array([1, 2, 3, 4]), np.array([5, 6, 7, 8])]
+        candidate = [np.array([4, 3, 2, 1]), np.array([5, 6, 9, 10])]
+        self.assertEqual(topk_overlap(candidate, baseline), {
+            "mean_overlap": 0.75, "min_overlap": 0.5, "identical_fraction": 0.5,
+        })
+
+
+@unittest.skipUnless(HAS_EXPORT_DEPS, "requires torch, clip and onnxruntime")
+class TestImageTowerParity(unittest.TestCase):
+    def test_onnx_image_embeddings_match_torch(self):
+        import torch
+        from clip.model import CLIP
+        onnx_module = importlib.reload(onnx_encoder)
+        torch.manual_seed(0)
+        model = CLIP(
+            embed_dim=32, image_resolution=32, vision_layers=2, vision_width=64,
+            vision_patch_size=16, context_length=77, vocab_size=49408,
+            transformer_width=64, transformer_heads=2, transformer_layers=1,
+        ).float().eval()
+        images = torch.randn(3, 3, 32, 32)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "image.onnx")
+            onnx_module.export_image_tower(
+                model, path, {"dimension": 32, "input_resolution": 32}
+            )
+            onnx_out = onnx_module.OnnxEncoder(path).run(images.numpy())
+        with torch.no_grad():
+            torch_out = model.encode_image(images).numpy()
+        parity = cosine_parity(torch_out.tolist(), onnx_out.tolist())
+        self.assertGreater(parity["min_cosine"], 0.999)
@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+root_path = os.path.join(os.path.dirname(__file__), "..", "..")
+sys.path.insert(0, root_path)
+
+import infrastructure.quantization as quantization  # noqa: E402
+
+
+def fake_ort_quantization(calls):
+    module = types.ModuleType("onnxruntime.quantization")
+    module.QuantFormat = types.SimpleNamespace(QDQ="QDQ")
+    module.QuantType = types.SimpleNamespace(QInt8="QInt8", QUInt8="QUInt8")
+
+    def quantize_dynamic(model_input, model_output, **kwargs):
+        calls.append(("dynamic", kwargs))
+        with open(model_output, "wb") as f:
+            f.write(b"int8")
+
+    def quantize_static(model_input, model_output, reader, **kwargs):
+        calls.append(("static", [reader.get_next() for _ in range(3)], kwargs))
+        with open(model_output, "wb") as f:
+            f.write(b"int8")
+
+    module.quantize_dynamic = quantize_dynamic
+    module.quantize_static = quantize_static
+    onnx_module = types.ModuleType("onnx")
+    onnx_module.load = lambda path, load_external_data=False: types.SimpleNamespace(
+        graph=types.SimpleNamespace(input=[types.SimpleNamespace(name="images")])
+    )
+    return {
+        "onnxruntime": types.ModuleType("onnxruntime"),
+        "onnxruntime.quantization": module,
+        "onnx": onnx_module,
+    }
+
+
+class TestCalibrationBatches(unittest.TestCase):
+    def test_feeds_each_batch_once_then_rewinds(self):
+        batches = [np.zeros((2, 3)), np.ones((1, 3))]
+        reader = quantization.CalibrationBatches("images", iter(batches))
+        fed = [reader.get_next() for _ in range(3)]
+        self.assertIs(fed[0]["images"], batches[0])
+        self.assertIs(fed[1]["images"], batches[1])
+        self.assertIsNone(fed[2])
+        reader.rewind()
+        self.assertIs(reader.get_next()["images"], batches[0])
+
+
+class TestOnnxQuantization(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.model_path = os.path.join(self.tmp.name, "image.onnx")
+        with open(self.model_path, "wb") as f:
+            f.write(b"float32 graph")
+        with open(self.model_path + ".json", "w") as f:
+            json.dump({"dimension": 4}, f)
+        self.output = os.path.join(self.tmp.name, "image.int8.onnx")
+        self.calls = []
+        patcher = mock.patch.dict(sys.modules, fake_ort_quantization(self.calls))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_dynamic_quantizes_matmuls_and_tags_metadata(self):
+        quantization.quantize_onnx_model(self.model_path, self.output, "dynamic")
+        self.assertEqual(self.calls[0][0], "dynamic")
+        self.assertEqual(self.calls[0][1]["op_types_to_quantize"], ["MatMul", "Gemm"])
+        with open(self.output + ".json") as f:
+            self.assertEqual(json.load(f), {"dimension": 4, "quantization": "dynamic"})
+
+    def test_static_feeds_calibration_batches(self):
+        batches = [np.zeros((2, 3, 32, 32), dtype=np.float32),
+                   np.ones((1, 3, 32, 32), dtype=np.float32)]
+        quantization.quantize_onnx_model(self.model_path, self.output, "static", batches)
+        mode, fed, kwargs = self.calls[0]
+        self.assertEqual(mode, "static")
+        self.assertEqual([feed and feed["images"].shape[0] for feed in fed], [2, 1, None])
+        self.assertTrue(kwargs["per_channel"])
+        with open(self.output + ".json") as f:
+            self.assertEqual(json.load(f)["quantization"], "static")
+
+    def test_static_requires_calibration_batches(self):
+        with self.assertRaises(ValueError):
+            quantization.quantize_onnx_model(self.model_path, self.output, "static")
+
+    def test_rejects_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            quantization.quantize_onnx_model(self.model_path, self.output, "int4")
+        self.assertEqual(self.calls, [])
+
+
+class TestTorchQuantization(unittest.TestCase):
+    def test_quantizes_linear_layers_to_int8(self):
+        torch_module = types.ModuleType("torch")
+        torch_module.nn = types.SimpleNamespace(Linear="Linear")
+        torch_module.qint8 = "qint8"
+        quantize_dynamic = mock.MagicMock(return_value="quantized")
+        torch_module.ao = types.SimpleNamespace(
+            quantization=types.SimpleNamespace(quantize_dynamic=quantize_dynamic)
+        )
+        with mock.patch.dict(sys.modules, {"torch": torch_module}):
+            self.assertEqual(quantization.quantize_torch_model("model"), "quantized")
+        quantize_dynamic.assert_called_once_with("model", {"Linear"}, dtype="qint8")
+
+
+if __name__ == "__main__":
+    unittest.main()